@@ -0,0 +1,255 @@
+"""
+Pooled, retrying algod client for the ops tooling
+A drop-in AlgodClient that keeps one HTTP keep-alive connection per thread,
+retries transient failures with backoff and caches suggested params for a
+short TTL, plus helpers that submit many signed groups concurrently and
+confirm them together (one status_after_block wait per round for all
+pending transactions, instead of one wait_for_confirmation per group).
+Every request, submission and confirmation is recorded in telemetry.py.
+
+Usage:
+    from algod_pool import client_from_env, submit_groups
+    client = client_from_env()
+    confirmed = submit_groups(client, [atc.gather_signatures() for atc in composers])
+"""
+import copy
+import http.client
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+from urllib import parse
+
+from algosdk import constants, error
+from algosdk.transaction import GenericSignedTransaction
+from algosdk.v2client import algod
+
+import telemetry
+
+DEFAULT_ALGOD_URL = "https://testnet-api.algonode.cloud"
+
+# Responses worth retrying: rate limiting and gateway/node restarts
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+DEFAULT_RETRIES = 4
+DEFAULT_BACKOFF = 0.25
+
+# Suggested params change once per round (~3s); reusing them for a couple
+# of seconds saves one request per transaction without risking expiry
+DEFAULT_PARAMS_TTL = 2.0
+
+DEFAULT_WORKERS = 16
+
+
+class PooledAlgodClient(algod.AlgodClient):
+    """AlgodClient over persistent per-thread connections with retries"""
+
+    def __init__(
+        self,
+        algod_token: str,
+        algod_address: str,
+        headers: Optional[Dict[str, str]] = None,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        params_ttl: float = DEFAULT_PARAMS_TTL,
+    ) -> None:
+        super().__init__(algod_token, algod_address, headers)
+        url = parse.urlsplit(algod_address)
+        self._scheme = url.scheme or "http"
+        self._netloc = url.netloc
+        self._base_path = url.path.rstrip("/")
+        self.retries = retries
+        self.backoff = backoff
+        self.params_ttl = params_ttl
+
+        self._local = threading.local()
+        self._params_lock = threading.Lock()
+        self._params = None
+        self._params_time = 0.0
+        telemetry.configure_from_env()
+
+    def _connection(self, timeout: Optional[int]) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self._scheme == "https" else http.client.HTTPConnection
+            conn = cls(self._netloc, timeout=timeout)
+            conn.connect()
+            # Requests are small writes; don't let Nagle hold them for an ACK
+            conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._local.conn = conn
+        return conn
+
+    def _drop_connection(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def algod_request(
+        self,
+        method: str,
+        requrl: str,
+        params=None,
+        data: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        response_format: Optional[str] = "json",
+        timeout: Optional[int] = 30,
+    ):
+        """Same contract as AlgodClient.algod_request, over a kept-alive connection
+
+        Connection errors and RETRY_STATUSES are retried with exponential
+        backoff. Resending a POST is safe: algod deduplicates transactions by
+        txid, and the other POST endpoints (compile, simulate) are pure.
+        """
+        header = {"User-Agent": "py-algorand-sdk"}
+        if self.headers:
+            header.update(self.headers)
+        if headers:
+            header.update(headers)
+        if requrl not in constants.no_auth:
+            header[constants.algod_auth_header] = self.algod_token
+
+        route = requrl
+        if requrl not in constants.unversioned_paths:
+            requrl = algod.api_version_path_prefix + requrl
+        path = self._base_path + requrl
+        if params:
+            path += "?" + parse.urlencode(params)
+
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                conn = self._connection(timeout)
+                conn.request(method, path, body=data, headers=header)
+                resp = conn.getresponse()
+                body = resp.read()
+            except (http.client.HTTPException, OSError) as e:
+                self._drop_connection()
+                if attempt >= self.retries:
+                    telemetry.record_request(method, route, time.perf_counter() - start, 0, str(e))
+                    raise
+            else:
+                if resp.status < 400:
+                    break
+                if resp.status not in RETRY_STATUSES or attempt >= self.retries:
+                    http_error = _http_error(resp.status, body)
+                    telemetry.record_request(method, route, time.perf_counter() - start, resp.status, str(http_error))
+                    raise http_error
+            telemetry.record_retry(route)
+            time.sleep(self.backoff * (2 ** attempt))
+            attempt += 1
+        telemetry.record_request(method, route, time.perf_counter() - start, resp.status)
+
+        if response_format != "json":
+            return body
+        if not body:
+            # algod answers some calls with an empty 200
+            return {}
+        try:
+            return json.loads(body)
+        except ValueError as e:
+            raise error.AlgodResponseError("Failed to parse JSON response from algod") from e
+
+    def suggested_params(self, **kwargs):
+        """Suggested params, fetched at most once per params_ttl seconds
+
+        Returns a copy, so callers may adjust fees without affecting others.
+        """
+        with self._params_lock:
+            if self._params is None or time.monotonic() - self._params_time > self.params_ttl:
+                self._params = super().suggested_params(**kwargs)
+                self._params_time = time.monotonic()
+            return copy.copy(self._params)
+
+
+def _http_error(status: int, body: bytes) -> error.AlgodHTTPError:
+    text = body.decode("utf-8", errors="replace")
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        return error.AlgodHTTPError(text, status)
+    return error.AlgodHTTPError(payload.get("message", text), status, payload.get("data"))
+
+
+def client_from_env(**kwargs) -> PooledAlgodClient:
+    """PooledAlgodClient for ALGOD_URL / ALGOD_TOKEN (testnet by default)"""
+    return PooledAlgodClient(
+        os.environ.get("ALGOD_TOKEN", ""),
+        os.environ.get("ALGOD_URL", DEFAULT_ALGOD_URL),
+        headers={"User-Agent": "algosdk"},
+        **kwargs,
+    )
+
+
+def send_group(algod_client, group: Sequence[GenericSignedTransaction]) -> str:
+    """Send one signed group; returns the txid used to track its confirmation
+
+    A group is confirmed atomically, so tracking its first transaction is
+    enough. A resend of a group that already made it in is not an error.
+    """
+    tx_id = group[0].get_txid()
+    start = time.perf_counter()
+    try:
+        algod_client.send_transactions(list(group))
+    except error.AlgodHTTPError as e:
+        if "already in ledger" not in str(e):
+            raise
+    telemetry.record_submission(tx_id, time.perf_counter() - start)
+    return tx_id
+
+
+def wait_for_confirmations(algod_client, tx_ids: Sequence[str], wait_rounds: int = 10) -> Dict[str, dict]:
+    """Wait until every txid is confirmed, checking all of them each round
+
+    Raises:
+        TransactionRejectedError: If a transaction was dropped from the pool
+        ConfirmationTimeoutError: If some are still pending after wait_rounds
+    """
+    pending = list(dict.fromkeys(tx_ids))
+    confirmed: Dict[str, dict] = {}
+    last_round = algod_client.status()["last-round"]
+    first_round = last_round
+    deadline = last_round + wait_rounds
+
+    with ThreadPoolExecutor(max_workers=DEFAULT_WORKERS) as pool:
+        while True:
+            still_pending = []
+            for tx_id, info in zip(pending, pool.map(algod_client.pending_transaction_info, pending)):
+                if info.get("confirmed-round", 0) > 0:
+                    confirmed[tx_id] = info
+                    telemetry.record_confirmation(tx_id, info["confirmed-round"], first_round)
+                elif info.get("pool-error"):
+                    telemetry.record_rejection(tx_id, info["pool-error"])
+                    raise error.TransactionRejectedError(f"{tx_id}: {info['pool-error']}")
+                else:
+                    still_pending.append(tx_id)
+            pending = still_pending
+
+            if not pending:
+                return confirmed
+            if last_round >= deadline:
+                raise error.ConfirmationTimeoutError(
+                    f"{len(pending)} transaction(s) not confirmed after {wait_rounds} rounds"
+                )
+            last_round = algod_client.status_after_block(last_round)["last-round"]
+
+
+def submit_groups(
+    algod_client,
+    groups: Sequence[Sequence[GenericSignedTransaction]],
+    wait_rounds: int = 10,
+    max_workers: int = DEFAULT_WORKERS,
+) -> List[dict]:
+    """Send independent signed groups concurrently and confirm them together
+
+    Returns:
+        Pending transaction info of each group's first transaction, in order
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        tx_ids = list(pool.map(lambda group: send_group(algod_client, group), groups))
+    confirmed = wait_for_confirmations(algod_client, tx_ids, wait_rounds)
+    return [confirmed[tx_id] for tx_id in tx_ids]
@@ -0,0 +1,449 @@
+"""
+Batch claim-link creation driver
+Creates many escrow claim links with one funding payment per batch call
+and as few atomic groups as the protocol limits allow
+
+Group layout:
+    [funding payment, create_claim_links_batch call] per ALGO batch, or
+    [create_asset_links_batch call, funding asset transfer] per ASA batch,
+    then reserve_box_refs calls for the remaining box references
+
+Several batches are packed into one group while it stays within 16
+transactions, counting the claim boxes, the sender index box, the
+receiver index pages (which depend on the predicted claim IDs),
+the asset registry box, the box I/O quota those boxes need, the pooled
+opcode budget of the links and, for ASA batches, the asset reference of
+each batch call. ASA batches let the escrow opt into a new asset in the
+same group.
+"""
+import csv
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, MutableMapping, Optional, Sequence, Tuple
+
+from algosdk import encoding
+
+from box_codec import (
+    ASSET_REGISTRY_SIZE,
+    CLAIM_RECORD_SIZE,
+    INDEX_HEADER,
+    RECEIVER_INDEX_PREFIX,
+    RECEIVER_PAGE_SIZE,
+    asset_registry_name,
+    box_io_refs,
+    claim_box_name,
+    receiver_index_name,
+    sender_index_name,
+)
+from group_packer import APP_CALL_BUDGET, BUDGET_MARGIN, DEFAULT_COSTS, load_costs
+import telemetry
+
+# Protocol limits
+MAX_GROUP_SIZE = 16
+MAX_REFS_PER_TXN = 8
+MAX_APP_ARGS_BYTES = 2048
+
+# ABI encoding sizes
+SELECTOR_SIZE = 4
+ARRAY_LENGTH_PREFIX = 2
+ENTRY_SIZE = 32 + 8 + 8  # address + amount + expiry_time
+
+# Largest entry count that fits the app args of one call
+MAX_ENTRIES_PER_CALL = (MAX_APP_ARGS_BYTES - SELECTOR_SIZE - ARRAY_LENGTH_PREFIX) // ENTRY_SIZE
+
+BATCH_METHOD_SIGNATURE = "create_claim_links_batch(txn,(address,uint64,uint64)[])(uint64,uint64)"
+ASSET_BATCH_METHOD_SIGNATURE = "create_asset_links_batch(asset,(address,uint64,uint64)[])(uint64,uint64)"
+
+ZERO_ADDRESS = "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAY5HFKQ"
+
+
+@dataclass(frozen=True)
+class ClaimEntry:
+    """One claim link to create"""
+    receiver: str  # ZERO_ADDRESS for anyone
+    amount: int
+    expiry_time: int = 0
+
+
+def _index_names(sender_key: bytes, entry: ClaimEntry, claim_id: int) -> List[bytes]:
+    """Index boxes a new link with the given ID is listed in"""
+    names = [sender_index_name(sender_key)]
+    if entry.receiver != ZERO_ADDRESS:
+        names.append(receiver_index_name(encoding.decode_address(entry.receiver), claim_id))
+    return names
+
+
+def _projected_size(name: bytes, current: int) -> int:
+    """Size of an index box once one more link is listed in it
+
+    The sender index grows by a slot; receiver index pages have a fixed size.
+    """
+    if name.startswith(RECEIVER_INDEX_PREFIX):
+        return RECEIVER_PAGE_SIZE
+    return (current or INDEX_HEADER.size) + 8
+
+
+@dataclass
+class PlannedGroup:
+    """Batches sent in one atomic group and the box references they need"""
+    batches: List[List[ClaimEntry]] = field(default_factory=list)
+    index_bytes: Dict[bytes, int] = field(default_factory=dict)  # projected size of each index box
+    claims: int = 0
+    asset_id: int = 0
+    link_budget: int = DEFAULT_COSTS["create_claim_links_batch"].budget  # opcode cost of creating one link
+    first_id: int = 0  # claim ID predicted for the group's first link
+
+    @property
+    def ref_count(self) -> int:
+        """Box references: every claim and index box, the registry box, and enough for the I/O quota"""
+        return self.refs_for(self.index_bytes)
+
+    def refs_for(self, index_bytes: Dict[bytes, int]) -> int:
+        named = self.claims + len(index_bytes) + 1
+        io_bytes = self.claims * CLAIM_RECORD_SIZE + sum(index_bytes.values()) + ASSET_REGISTRY_SIZE
+        return max(named, box_io_refs(io_bytes))
+
+    def index_boxes(self, next_id: int) -> Dict[bytes, int]:
+        """Index boxes of the group's links when they get IDs from next_id
+
+        Receiver pages follow the claim IDs, so they are renamed if the IDs
+        moved since planning.
+        """
+        if next_id == self.first_id:
+            return self.index_bytes
+        boxes = {name: size for name, size in self.index_bytes.items() if not name.startswith(RECEIVER_INDEX_PREFIX)}
+        for offset, entry in enumerate(entry for batch in self.batches for entry in batch):
+            if entry.receiver != ZERO_ADDRESS:
+                boxes[receiver_index_name(encoding.decode_address(entry.receiver), next_id + offset)] = RECEIVER_PAGE_SIZE
+        return boxes
+
+    def call_count(self, batches: int, ref_count: int, claims: int) -> int:
+        """App calls: the batch calls, each also holding the asset reference for ASA, plus
+        bare calls for the remaining references and the pooled opcode budget of the links"""
+        asset_refs = batches if self.asset_id else 0
+        budget = int(claims * self.link_budget * BUDGET_MARGIN)
+        return max(
+            batches,
+            -(-(ref_count + asset_refs) // MAX_REFS_PER_TXN),
+            -(-budget // APP_CALL_BUDGET),
+        )
+
+    def txn_count(self, batches: int, ref_count: int, claims: int) -> int:
+        return batches + self.call_count(batches, ref_count, claims)  # one funding payment per batch
+
+    def record(self) -> None:
+        """Report a confirmed group's packing to telemetry"""
+        batches, refs = len(self.batches), self.ref_count
+        calls = self.call_count(batches, refs, self.claims)
+        telemetry.record_group("create", batches + calls, self.claims, calls - batches)
+
+    def fits(self, names: List[bytes], sizes: Dict[bytes, int], new_batch: bool) -> bool:
+        """Whether one more link (in the open batch or a new one) still fits"""
+        added = 0
+        for name in names:
+            current = self.index_bytes.get(name)
+            if current is None:
+                current = sizes.get(name, 0)
+            added += _projected_size(name, current) - self.index_bytes.get(name, 0)
+        new_names = sum(1 for name in names if name not in self.index_bytes)
+        named = self.claims + 1 + len(self.index_bytes) + new_names + 1
+        io_bytes = (self.claims + 1) * CLAIM_RECORD_SIZE + sum(self.index_bytes.values()) + added
+        io_bytes += ASSET_REGISTRY_SIZE
+        refs = max(named, box_io_refs(io_bytes))
+        return self.txn_count(len(self.batches) + new_batch, refs, self.claims + 1) <= MAX_GROUP_SIZE
+
+    def add(self, entry: ClaimEntry, names: List[bytes], sizes: Dict[bytes, int], new_batch: bool) -> None:
+        if new_batch:
+            self.batches.append([])
+        self.batches[-1].append(entry)
+        self.claims += 1
+        for name in names:
+            current = self.index_bytes.get(name)
+            if current is None:
+                current = sizes.get(name, 0)
+            self.index_bytes[name] = _projected_size(name, current)
+
+
+def plan_groups(
+    entries: Sequence[ClaimEntry],
+    sender: str,
+    index_sizes: Optional[Dict[bytes, int]] = None,
+    asset_id: int = 0,
+    link_budget: Optional[int] = None,
+    first_id: int = 0,
+) -> List[PlannedGroup]:
+    """Split entries into groups of batches that respect protocol limits
+
+    Each batch is bounded by the app args size of one call, and each group
+    by the 16 transaction limit: one payment per batch plus the app calls
+    needed for the group's box references (claim boxes, index boxes and the
+    box I/O quota of the index boxes as they grow) and for the opcode
+    budget of its links.
+
+    Args:
+        entries: Claim links to create
+        sender: Address funding the links
+        index_sizes: Current size of index boxes by name (missing = new box)
+        asset_id: 0 for ALGO, otherwise the ASA funding every link
+        link_budget: Opcode cost of creating one link (measured baseline by default)
+        first_id: Claim ID the first link is expected to get (the app's claim_count)
+
+    Returns:
+        Planned groups in submission order
+    """
+    return list(iter_groups(entries, sender, dict(index_sizes or {}), asset_id, link_budget, first_id))
+
+
+def iter_groups(
+    entries: Iterable[ClaimEntry],
+    sender: str,
+    sizes: MutableMapping[bytes, int],
+    asset_id: int = 0,
+    link_budget: Optional[int] = None,
+    first_id: int = 0,
+) -> Iterator[PlannedGroup]:
+    """Streaming form of plan_groups
+
+    Pulls entries lazily and yields each group once the next entry no longer
+    fits it. `sizes` is updated in place with the projected index box sizes
+    of every yielded group.
+    """
+    if link_budget is None:
+        link_budget = load_costs()["create_claim_links_batch"].budget
+    sender_key = encoding.decode_address(sender)
+    group = PlannedGroup(asset_id=asset_id, link_budget=link_budget, first_id=first_id)
+
+    for entry in entries:
+        names = _index_names(sender_key, entry, group.first_id + group.claims)
+        new_batch = not group.batches or len(group.batches[-1]) >= MAX_ENTRIES_PER_CALL
+        if not group.fits(names, sizes, new_batch):
+            # Close the batch and retry in a new one, then close the group
+            if not new_batch and group.fits(names, sizes, True):
+                new_batch = True
+            else:
+                sizes.update(group.index_bytes)
+                yield group
+                next_id = group.first_id + group.claims
+                group = PlannedGroup(asset_id=asset_id, link_budget=link_budget, first_id=next_id)
+                new_batch = True
+                names = _index_names(sender_key, entry, next_id)
+        group.add(entry, names, sizes, new_batch)
+
+    if group.claims:
+        sizes.update(group.index_bytes)
+        yield group
+
+
+def create_claim_links_batch(
+    algod_client,
+    app_id: int,
+    sender: str,
+    signer,
+    entries: Sequence[ClaimEntry],
+    asset_id: int = 0,
+) -> List[Tuple[int, int]]:
+    """Create claim links in as few atomic groups as possible
+
+    Box references must name the claim IDs before they are assigned, so the
+    next IDs are predicted from the app's claim_count. If another creator
+    takes those IDs first the group is rejected and can simply be retried.
+
+    Args:
+        algod_client: algod client
+        app_id: Escrow application ID
+        sender: Address funding the links
+        signer: algosdk TransactionSigner for sender
+        entries: Claim links to create
+        asset_id: 0 for ALGO, otherwise the ASA funding every link
+
+    Returns:
+        List of (first_claim_id, count) ranges, one per batch
+    """
+    from claim_index import index_sizes
+
+    # Receiver pages have a fixed size; only the sender index grows
+    sizes = index_sizes(algod_client, app_id, [sender_index_name(encoding.decode_address(sender))])
+    ranges: List[Tuple[int, int]] = []
+    opt_in = needs_opt_in(algod_client, app_id, asset_id)
+    first_id = read_claim_count(algod_client, app_id)
+
+    for group in plan_groups(entries, sender, sizes, asset_id, first_id=first_id):
+        params = algod_client.suggested_params()
+        next_id = read_claim_count(algod_client, app_id)
+        atc = build_group(group, app_id, sender, signer, params, next_id, asset_id, opt_in)
+        opt_in = False
+        result = atc.execute(algod_client, 4)
+        group.record()
+        for abi_result in result.abi_results:
+            first_id, count = abi_result.return_value
+            ranges.append((first_id, count))
+
+    return ranges
+
+
+def build_group(
+    group: PlannedGroup,
+    app_id: int,
+    sender: str,
+    signer,
+    params,
+    next_id: int,
+    asset_id: int = 0,
+    opt_in: bool = False,
+):
+    """AtomicTransactionComposer for a planned group whose links get IDs from next_id
+
+    Every reference of the group (claim boxes, index boxes, the registry box
+    and empty references for the I/O quota) is spread over its app calls;
+    the ones left over ride on bare no-op calls, and further bare calls are
+    added for opcode budget. With opt_in, the first batch call also pays
+    for the escrow's inner opt-in to asset_id.
+    """
+    import copy
+
+    from algosdk import abi, logic
+    from algosdk.atomic_transaction_composer import (
+        AtomicTransactionComposer,
+        TransactionWithSigner,
+    )
+    from algosdk.transaction import (
+        ApplicationNoOpTxn,
+        AssetTransferTxn,
+        PaymentTxn,
+    )
+
+    app_address = logic.get_application_address(app_id)
+    atc = AtomicTransactionComposer()
+
+    index_boxes = group.index_boxes(next_id)
+    ref_count = group.refs_for(index_boxes)
+    boxes = [(0, claim_box_name(next_id + i)) for i in range(group.claims)]
+    boxes += [(0, name) for name in index_boxes]
+    boxes += [(0, asset_registry_name(asset_id))]
+    boxes += [(0, b"")] * (ref_count - len(boxes))
+    # ASA batch calls hold the asset reference in one of their 8 slots
+    batch_room = MAX_REFS_PER_TXN - (1 if asset_id else 0)
+    slots = []
+    for position in range(group.call_count(len(group.batches), ref_count, group.claims)):
+        room = batch_room if position < len(group.batches) else MAX_REFS_PER_TXN
+        slots.append(boxes[:room])
+        boxes = boxes[room:]
+
+    for position, (batch, call_boxes) in enumerate(zip(group.batches, slots)):
+        total = sum(entry.amount for entry in batch)
+        rows = [[entry.receiver, entry.amount, entry.expiry_time] for entry in batch]
+        if asset_id == 0:
+            funding = PaymentTxn(sender, params, app_address, total)
+            atc.add_method_call(
+                app_id=app_id,
+                method=abi.Method.from_signature(BATCH_METHOD_SIGNATURE),
+                sender=sender,
+                sp=params,
+                signer=signer,
+                method_args=[TransactionWithSigner(funding, signer), rows],
+                boxes=call_boxes,
+            )
+            continue
+
+        call_params = params
+        if opt_in and position == 0:
+            call_params = copy.copy(params)
+            call_params.flat_fee = True
+            call_params.fee = max(params.min_fee, 1000) * 2
+        atc.add_method_call(
+            app_id=app_id,
+            method=abi.Method.from_signature(ASSET_BATCH_METHOD_SIGNATURE),
+            sender=sender,
+            sp=call_params,
+            signer=signer,
+            method_args=[asset_id, rows],
+            boxes=call_boxes,
+        )
+        # The funding transfer follows the call, after its opt-in
+        funding = AssetTransferTxn(sender, params, app_address, total, asset_id)
+        atc.add_transaction(TransactionWithSigner(funding, signer))
+
+    for call_boxes in slots[len(group.batches):]:
+        pad = ApplicationNoOpTxn(sender, params, app_id, boxes=call_boxes)
+        atc.add_transaction(TransactionWithSigner(pad, signer))
+
+    return atc
+
+
+def needs_opt_in(algod_client, app_id: int, asset_id: int) -> bool:
+    """Whether the escrow still has to opt into asset_id (never for ALGO)"""
+    from algosdk import logic
+    from algosdk.error import AlgodHTTPError
+
+    if asset_id == 0:
+        return False
+    try:
+        algod_client.account_asset_info(logic.get_application_address(app_id), asset_id)
+    except AlgodHTTPError as e:
+        if e.code == 404:
+            return True
+        raise
+    return False
+
+
+def read_claim_count(algod_client, app_id: int) -> int:
+    """Read the claim_count global from the escrow application"""
+    import base64
+
+    app_info = algod_client.application_info(app_id)
+    for item in app_info["params"].get("global-state", []):
+        if base64.b64decode(item["key"]) == b"claim_count":
+            return item["value"]["uint"]
+    return 0
+
+
+def load_entries(path: str) -> Iterable[ClaimEntry]:
+    """Load entries from a CSV with receiver, amount and optional expiry_time columns"""
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield ClaimEntry(
+                receiver=row.get("receiver") or ZERO_ADDRESS,
+                amount=int(row["amount"]),
+                expiry_time=int(row.get("expiry_time") or 0),
+            )
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("Usage: python batch_claim_links.py <entries.csv>")
+        return False
+
+    from algosdk import account, mnemonic as mn
+    from algosdk.atomic_transaction_composer import AccountTransactionSigner
+    from algod_pool import client_from_env
+
+    private_key = mn.to_private_key(os.environ["DEPLOYER_MNEMONIC"])
+    sender = account.address_from_private_key(private_key)
+    app_id = int(os.environ["CLAIM_APP_ID"])
+
+    algod_client = client_from_env()
+
+    entries = list(load_entries(sys.argv[1]))
+    asset_id = int(os.environ.get("CLAIM_ASSET_ID", "0"))
+    groups = plan_groups(entries, sender, asset_id=asset_id)
+    print(f"📦 {len(entries)} links in {len(groups)} group(s)")
+
+    ranges = create_claim_links_batch(
+        algod_client,
+        app_id,
+        sender,
+        AccountTransactionSigner(private_key),
+        entries,
+        asset_id=asset_id,
+    )
+
+    for first_id, count in ranges:
+        print(f"✅ claim_{first_id} .. claim_{first_id + count - 1}")
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,560 @@
+"""
+Off-chain codec for AlgoSplit box storage
+Mirrors the ClaimRecord struct in escrow_claim_link.py and the
+PaymentRecord struct in payment_split.py so indexers and tooling can
+decode boxes without hand-written offsets
+
+Claim record layout (93 bytes, big-endian):
+    sender (32) + receiver (32) + amount (8) + asset_id (8) + expiry_time (8) + state (1)
+    + sender_slot (2) + receiver_slot (2)
+    Records written before the index boxes existed are the first 89 bytes
+    only; they decode with both slots NO_INDEX_SLOT (listed in no index box)
+
+Sender index box layout (snd_<address>):
+    free slot + 1 (8) + live count (8), then one 8-byte slot per entry holding
+    a claim ID, or INDEX_FREE_BIT | (next free slot + 1) for a freed slot
+
+Receiver index page layout (rcv_<address><page>, RECEIVER_PAGE_SIZE bytes):
+    live count (8), then the open bit of claim ID
+    page * RECEIVER_PAGE_CLAIMS + 8 * byte + bit
+
+Airdrop record layout (112 bytes, big-endian):
+    sender (32) + merkle_root (32) + asset_id (8) + total (8) + claimed (8)
+    + leaf_count (8, 0 once closed) + expiry_time (8) + pages (8)
+    Bitmap pages drb_<id><page> (AIRDROP_PAGE_SIZE bytes) hold the claimed bit
+    of leaf page * AIRDROP_PAGE_LEAVES + 8 * byte + bit; `pages` counts those
+    whose prepaid minimum balance (AIRDROP_PAGE_MIN_BALANCE) is not refunded yet
+
+Voucher book layout (vbk_<id>, 112 bytes, big-endian):
+    sender (32) + signer (32) + asset_id (8) + total (8) + claimed (8) + expiry_time (8)
+    + nonce_count (8, 0 once closed) + pages (8)
+    Spent-nonce pages vbb_<id><page> are laid out like the airdrop bitmap pages,
+    and `pages` counts those whose prepaid VOUCHER_PAGE_MIN_BALANCE is not refunded yet
+
+Asset registry layout (ast_<asset_id>, 16 bytes, big-endian):
+    liability (8) + open_links (8)
+    The same value is mirrored in the global ledger key ldg_<asset_id> while
+    the asset holds a ledger slot (nonzero totals and a free slot when first used)
+
+TEAL escrow link layout (escrow_approval.teal, box itob(claim_id), 80 bytes):
+    sender (32) + receiver (32) + amount (8) + expiry_time (8)
+
+Payment record layout (97 bytes, big-endian):
+    creator (32) + receiver (32) + total_amount (8) + participants (8)
+    + collected (8) + contributor_count (8) + status (1)
+
+Contributor pages of a payment (CONTRIBUTOR_PAGE_SIZE bytes each):
+    cbm_<id><page>: paid bit of slot page * BITMAP_PAGE_SLOTS + 8 * byte + bit
+    cam_<id><page>: amount (8, big-endian) of slot page * AMOUNT_PAGE_SLOTS + index
+    The creator pays for the record and the pages, each contributor for
+    their ctb_<id><address> box (*_MIN_BALANCE below)
+
+Stream record layout (str_<id>, 105 bytes, big-endian):
+    creator (32) + receiver (32) + rate (8) + start (8) + stop (8)
+    + deposited (8) + withdrawn (8) + unit (1)
+"""
+import struct
+from typing import List, NamedTuple, Optional
+
+# Claim record states (last byte of the record)
+CLAIM_OPEN = 0
+CLAIM_CLAIMED = 1
+CLAIM_CANCELLED = 2
+
+CLAIM_RECORD = struct.Struct(">32s32sQQQBHH")
+CLAIM_RECORD_SIZE = CLAIM_RECORD.size
+LEGACY_CLAIM_RECORD_SIZE = 89
+
+# Record slot of a link without a receiver index (anyone can claim)
+NO_INDEX_SLOT = 0xFFFF
+
+SENDER_INDEX_PREFIX = b"snd_"
+RECEIVER_INDEX_PREFIX = b"rcv_"
+INDEX_HEADER = struct.Struct(">QQ")
+INDEX_FREE_BIT = 1 << 63
+
+RECEIVER_PAGE_SIZE = 1024
+RECEIVER_PAGE_HEADER_SIZE = 8
+RECEIVER_PAGE_CLAIMS = (RECEIVER_PAGE_SIZE - RECEIVER_PAGE_HEADER_SIZE) * 8
+
+# Each box reference in a group grants this many bytes of box I/O
+BOX_IO_QUOTA_PER_REF = 1024
+
+# ARC-4 encoded "claim_" (2-byte length prefix + text), as written by the contract
+CLAIM_BOX_PREFIX = len(b"claim_").to_bytes(2, "big") + b"claim_"
+
+AIRDROP_RECORD = struct.Struct(">32s32sQQQQQQ")
+AIRDROP_RECORD_SIZE = AIRDROP_RECORD.size
+
+AIRDROP_BOX_PREFIX = b"drp_"
+AIRDROP_PAGE_PREFIX = b"drb_"
+AIRDROP_PAGE_SIZE = 1024
+AIRDROP_PAGE_LEAVES = AIRDROP_PAGE_SIZE * 8
+AIRDROP_PAGE_MIN_BALANCE = 2500 + 400 * (20 + AIRDROP_PAGE_SIZE)
+
+VOUCHER_BOOK = struct.Struct(">32s32sQQQQQQ")
+VOUCHER_BOOK_SIZE = VOUCHER_BOOK.size
+
+VOUCHER_BOOK_PREFIX = b"vbk_"
+VOUCHER_PAGE_PREFIX = b"vbb_"
+VOUCHER_PAGE_MIN_BALANCE = 2500 + 400 * (20 + AIRDROP_PAGE_SIZE)
+
+ASSET_REGISTRY = struct.Struct(">QQ")
+ASSET_REGISTRY_SIZE = ASSET_REGISTRY.size
+ASSET_REGISTRY_PREFIX = b"ast_"
+LEDGER_KEY_PREFIX = b"ldg_"
+
+TEAL_LINK_RECORD = struct.Struct(">32s32sQQ")
+TEAL_LINK_RECORD_SIZE = TEAL_LINK_RECORD.size
+# Minimum balance of one TEAL link box (2500 + 400 * (name + value)), also the smallest link
+TEAL_LINK_MIN_BALANCE = 2500 + 400 * (8 + TEAL_LINK_RECORD_SIZE)
+
+# Payment record states (last byte of the record)
+PAYMENT_ACTIVE = 0
+PAYMENT_COMPLETED = 1  # fully collected, awaiting settle()
+PAYMENT_PAID_OUT = 2
+
+PAYMENT_RECORD = struct.Struct(">32s32sQQQQB")
+PAYMENT_RECORD_SIZE = PAYMENT_RECORD.size
+
+STREAM_RECORD = struct.Struct(">32s32sQQQQQB")
+STREAM_RECORD_SIZE = STREAM_RECORD.size
+
+# Clock a stream's rate is measured against (last byte of the record)
+STREAM_UNIT_SECONDS = 0
+STREAM_UNIT_ROUNDS = 1
+
+CONTRIBUTOR_PAGE_SIZE = 1024
+BITMAP_PAGE_SLOTS = CONTRIBUTOR_PAGE_SIZE * 8
+AMOUNT_PAGE_SLOTS = CONTRIBUTOR_PAGE_SIZE // 8
+
+# Box minimum balances the PaymentSplit caller pays (2500 + 400 * (name + value))
+PAYMENT_BOX_MIN_BALANCE = 2500 + 400 * (12 + PAYMENT_RECORD_SIZE)
+CONTRIBUTOR_BOX_MIN_BALANCE = 2500 + 400 * (44 + 8)
+CONTRIBUTOR_PAGE_MIN_BALANCE = 2500 + 400 * (20 + CONTRIBUTOR_PAGE_SIZE)
+DEFERRAL_BOX_MIN_BALANCE = 2500 + 400 * (36 + 1)
+STREAM_BOX_MIN_BALANCE = 2500 + 400 * (12 + STREAM_RECORD_SIZE)
+AMOUNT_PAGES_PER_BITMAP_PAGE = BITMAP_PAGE_SLOTS // AMOUNT_PAGE_SLOTS
+
+PAYMENT_BOX_PREFIX = b"pay_"
+BITMAP_PAGE_PREFIX = b"cbm_"
+AMOUNT_PAGE_PREFIX = b"cam_"
+STREAM_BOX_PREFIX = b"str_"
+CONTRIBUTOR_BOX_PREFIX = b"ctb_"
+DEFERRAL_BOX_PREFIX = b"dfr_"
+
+ZERO_ADDRESS_BYTES = bytes(32)
+
+
+class ClaimRecord(NamedTuple):
+    """Decoded claim_<id> box; addresses are raw 32-byte public keys"""
+    sender: bytes
+    receiver: bytes
+    amount: int
+    asset_id: int
+    expiry_time: int
+    state: int
+    sender_slot: int  # NO_INDEX_SLOT for a legacy record
+    receiver_slot: int  # NO_INDEX_SLOT if anyone can claim
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == CLAIM_OPEN
+
+    @property
+    def anyone_can_claim(self) -> bool:
+        return self.receiver == ZERO_ADDRESS_BYTES
+
+    @property
+    def is_indexed(self) -> bool:
+        """False for a legacy record, which no index box lists"""
+        return self.sender_slot != NO_INDEX_SLOT
+
+
+def claim_box_name(claim_id: int) -> bytes:
+    """Box name for a claim ID: ARC-4 encoded "claim_" + itob(claim_id)"""
+    return CLAIM_BOX_PREFIX + claim_id.to_bytes(8, "big")
+
+
+def claim_id_from_box_name(name: bytes) -> Optional[int]:
+    """Claim ID encoded in a box name, or None if it is not a claim box"""
+    if len(name) != len(CLAIM_BOX_PREFIX) + 8 or not name.startswith(CLAIM_BOX_PREFIX):
+        return None
+    return int.from_bytes(name[len(CLAIM_BOX_PREFIX):], "big")
+
+
+def encode_claim_record(record: ClaimRecord) -> bytes:
+    """Encode a claim record exactly as the contract stores it"""
+    return CLAIM_RECORD.pack(*record)
+
+
+def decode_claim_record(data: bytes) -> ClaimRecord:
+    """Decode a claim_<id> box value in one unpack
+
+    A legacy LEGACY_CLAIM_RECORD_SIZE byte record decodes with both slots
+    NO_INDEX_SLOT, as the contract reads it.
+
+    Raises:
+        ValueError: If the value is neither a current nor a legacy record
+    """
+    if len(data) == LEGACY_CLAIM_RECORD_SIZE:
+        data += NO_INDEX_SLOT.to_bytes(2, "big") * 2
+    if len(data) != CLAIM_RECORD_SIZE:
+        raise ValueError(f"Claim record must be {CLAIM_RECORD_SIZE} bytes, got {len(data)}")
+    return ClaimRecord(*CLAIM_RECORD.unpack(data))
+
+
+def sender_index_name(sender: bytes) -> bytes:
+    """Index box listing a sender's open claim IDs: "snd_" + public key"""
+    return SENDER_INDEX_PREFIX + sender
+
+
+def receiver_index_name(receiver: bytes, claim_id: int) -> bytes:
+    """Index page listing a claim ID restricted to a receiver: "rcv_" + public key + itob(page)"""
+    return RECEIVER_INDEX_PREFIX + receiver + (claim_id // RECEIVER_PAGE_CLAIMS).to_bytes(8, "big")
+
+
+def receiver_page_from_box_name(name: bytes, receiver: bytes) -> Optional[int]:
+    """Page number of one of a receiver's index pages, or None for any other box"""
+    prefix = RECEIVER_INDEX_PREFIX + receiver
+    if len(name) != len(prefix) + 8 or not name.startswith(prefix):
+        return None
+    return int.from_bytes(name[len(prefix):], "big")
+
+
+def decode_receiver_page(data: bytes, page: int) -> List[int]:
+    """Open claim IDs whose bit is set in a receiver index page, in ID order
+
+    Raises:
+        ValueError: If the value is not a RECEIVER_PAGE_SIZE byte page
+    """
+    if len(data) != RECEIVER_PAGE_SIZE:
+        raise ValueError(f"Receiver index page must be {RECEIVER_PAGE_SIZE} bytes, got {len(data)}")
+    first = page * RECEIVER_PAGE_CLAIMS
+    return [
+        first + 8 * index + bit
+        for index, byte in enumerate(data[RECEIVER_PAGE_HEADER_SIZE:])
+        if byte
+        for bit in range(8)
+        if byte >> bit & 1
+    ]
+
+
+def decode_index(data: bytes) -> List[int]:
+    """Open claim IDs listed in an index box, in slot order
+
+    Raises:
+        ValueError: If the value is not a header plus whole slots
+    """
+    if len(data) < INDEX_HEADER.size or (len(data) - INDEX_HEADER.size) % 8:
+        raise ValueError(f"Malformed index box of {len(data)} bytes")
+    slots = struct.unpack_from(f">{(len(data) - INDEX_HEADER.size) // 8}Q", data, INDEX_HEADER.size)
+    return [slot for slot in slots if not slot & INDEX_FREE_BIT]
+
+
+def box_io_refs(total_bytes: int) -> int:
+    """Box references a group needs for the I/O quota of `total_bytes` of boxes"""
+    return max(1, -(-total_bytes // BOX_IO_QUOTA_PER_REF))
+
+
+class AirdropRecord(NamedTuple):
+    """Decoded drp_<id> box; the sender is a raw 32-byte public key"""
+    sender: bytes
+    merkle_root: bytes
+    asset_id: int
+    total: int
+    claimed: int
+    leaf_count: int
+    expiry_time: int
+    pages: int
+
+    @property
+    def remaining(self) -> int:
+        return self.total - self.claimed
+
+    @property
+    def is_closed(self) -> bool:
+        return self.leaf_count == 0
+
+
+def airdrop_box_name(airdrop_id: int) -> bytes:
+    """Airdrop record box: "drp_" + itob(airdrop_id)"""
+    return AIRDROP_BOX_PREFIX + airdrop_id.to_bytes(8, "big")
+
+
+def airdrop_page_name(airdrop_id: int, page: int) -> bytes:
+    """Airdrop claimed-bitmap page: "drb_" + itob(airdrop_id) + itob(page)"""
+    return AIRDROP_PAGE_PREFIX + airdrop_id.to_bytes(8, "big") + page.to_bytes(8, "big")
+
+
+def airdrop_page_count(leaf_count: int) -> int:
+    """Bitmap pages an airdrop can use"""
+    return -(-leaf_count // AIRDROP_PAGE_LEAVES)
+
+
+def decode_airdrop_record(data: bytes) -> AirdropRecord:
+    """Decode a drp_<id> box value
+
+    Raises:
+        ValueError: If the value is not an AIRDROP_RECORD_SIZE byte record
+    """
+    if len(data) != AIRDROP_RECORD_SIZE:
+        raise ValueError(f"Airdrop record must be {AIRDROP_RECORD_SIZE} bytes, got {len(data)}")
+    return AirdropRecord(*AIRDROP_RECORD.unpack(data))
+
+
+def is_leaf_claimed(page: bytes, index: int) -> bool:
+    """Whether a leaf's bit is set in its bitmap page"""
+    bit = index % AIRDROP_PAGE_LEAVES
+    return bool(page[bit // 8] >> (bit % 8) & 1)
+
+
+class VoucherBook(NamedTuple):
+    """Decoded vbk_<id> box; sender and signer are raw 32-byte public keys"""
+    sender: bytes
+    signer: bytes
+    asset_id: int
+    total: int
+    claimed: int
+    expiry_time: int
+    nonce_count: int
+    pages: int
+
+    @property
+    def remaining(self) -> int:
+        return self.total - self.claimed
+
+    @property
+    def is_closed(self) -> bool:
+        return self.nonce_count == 0
+
+
+def voucher_book_name(book_id: int) -> bytes:
+    """Voucher book box: "vbk_" + itob(book_id)"""
+    return VOUCHER_BOOK_PREFIX + book_id.to_bytes(8, "big")
+
+
+def voucher_page_name(book_id: int, page: int) -> bytes:
+    """Spent-nonce bitmap page: "vbb_" + itob(book_id) + itob(page)"""
+    return VOUCHER_PAGE_PREFIX + book_id.to_bytes(8, "big") + page.to_bytes(8, "big")
+
+
+def decode_voucher_book(data: bytes) -> VoucherBook:
+    """Decode a vbk_<id> box value
+
+    Raises:
+        ValueError: If the value is not a VOUCHER_BOOK_SIZE byte record
+    """
+    if len(data) != VOUCHER_BOOK_SIZE:
+        raise ValueError(f"Voucher book must be {VOUCHER_BOOK_SIZE} bytes, got {len(data)}")
+    return VoucherBook(*VOUCHER_BOOK.unpack(data))
+
+
+class AssetRegistry(NamedTuple):
+    """Decoded ast_<asset_id> box"""
+    liability: int
+    open_links: int
+
+
+def asset_registry_name(asset_id: int) -> bytes:
+    """Asset registry box: "ast_" + itob(asset_id), 0 for ALGO"""
+    return ASSET_REGISTRY_PREFIX + asset_id.to_bytes(8, "big")
+
+
+def ledger_key(asset_id: int) -> bytes:
+    """Global ledger key of an asset: "ldg_" + itob(asset_id)"""
+    return LEDGER_KEY_PREFIX + asset_id.to_bytes(8, "big")
+
+
+def asset_id_from_ledger_key(key: bytes) -> Optional[int]:
+    """Asset ID of a global ledger key, or None for other global keys"""
+    if len(key) != len(LEDGER_KEY_PREFIX) + 8 or not key.startswith(LEDGER_KEY_PREFIX):
+        return None
+    return int.from_bytes(key[len(LEDGER_KEY_PREFIX):], "big")
+
+
+def decode_asset_registry(data: bytes) -> AssetRegistry:
+    """Decode an ast_<asset_id> box value
+
+    Raises:
+        ValueError: If the value is not an ASSET_REGISTRY_SIZE byte record
+    """
+    if len(data) != ASSET_REGISTRY_SIZE:
+        raise ValueError(f"Asset registry must be {ASSET_REGISTRY_SIZE} bytes, got {len(data)}")
+    return AssetRegistry(*ASSET_REGISTRY.unpack(data))
+
+
+class TealLink(NamedTuple):
+    """Decoded link box of the TEAL escrow"""
+    sender: bytes
+    receiver: bytes
+    amount: int
+    expiry_time: int
+
+
+def teal_link_box_name(claim_id: int) -> bytes:
+    """TEAL escrow link box: itob(claim_id)"""
+    return claim_id.to_bytes(8, "big")
+
+
+def encode_teal_link(link: TealLink) -> bytes:
+    """Encode a TEAL escrow link box value"""
+    return TEAL_LINK_RECORD.pack(*link)
+
+
+def decode_teal_link(data: bytes) -> TealLink:
+    """Decode a TEAL escrow link box value
+
+    Raises:
+        ValueError: If the value is not a TEAL_LINK_RECORD_SIZE byte record
+    """
+    if len(data) != TEAL_LINK_RECORD_SIZE:
+        raise ValueError(f"TEAL link must be {TEAL_LINK_RECORD_SIZE} bytes, got {len(data)}")
+    return TealLink(*TEAL_LINK_RECORD.unpack(data))
+
+
+class PaymentRecord(NamedTuple):
+    """Decoded pay_<id> box; addresses are raw 32-byte public keys"""
+    creator: bytes
+    receiver: bytes
+    total_amount: int
+    participants: int
+    collected: int
+    contributor_count: int
+    status: int
+
+    @property
+    def remaining(self) -> int:
+        return self.total_amount - self.collected
+
+
+def payment_box_name(payment_id: int) -> bytes:
+    """Box name for a payment ID: "pay_" + itob(payment_id)"""
+    return PAYMENT_BOX_PREFIX + payment_id.to_bytes(8, "big")
+
+
+def contributor_box_name(payment_id: int, contributor: bytes) -> bytes:
+    """Membership box name: "ctb_" + itob(payment_id) + contributor public key"""
+    return CONTRIBUTOR_BOX_PREFIX + payment_id.to_bytes(8, "big") + contributor
+
+
+def contributor_from_box_name(name: bytes, payment_id: int) -> Optional[bytes]:
+    """Contributor public key of a payment's ctb_ box name, or None for any other box"""
+    prefix = contributor_box_name(payment_id, b"")
+    if len(name) != len(prefix) + 32 or not name.startswith(prefix):
+        return None
+    return name[len(prefix):]
+
+
+def bitmap_page_name(payment_id: int, page: int) -> bytes:
+    """Paid-slot bitmap page: "cbm_" + itob(payment_id) + itob(page)"""
+    return BITMAP_PAGE_PREFIX + payment_id.to_bytes(8, "big") + page.to_bytes(8, "big")
+
+
+def amount_page_name(payment_id: int, page: int) -> bytes:
+    """Slot amount page: "cam_" + itob(payment_id) + itob(page)"""
+    return AMOUNT_PAGE_PREFIX + payment_id.to_bytes(8, "big") + page.to_bytes(8, "big")
+
+
+def paid_slots(bitmap: bytes, page: int) -> List[int]:
+    """Slots marked paid in a bitmap page (bit 0 of a byte is its lowest bit)"""
+    first = page * BITMAP_PAGE_SLOTS
+    return [
+        first + offset * 8 + bit
+        for offset, byte in enumerate(bitmap)
+        if byte
+        for bit in range(8)
+        if byte >> bit & 1
+    ]
+
+
+def decode_amount_page(data: bytes) -> List[int]:
+    """Amounts of the AMOUNT_PAGE_SLOTS slots of an amount page in one unpack"""
+    if len(data) != CONTRIBUTOR_PAGE_SIZE:
+        raise ValueError(f"Amount page must be {CONTRIBUTOR_PAGE_SIZE} bytes, got {len(data)}")
+    return list(struct.unpack(f">{AMOUNT_PAGE_SLOTS}Q", data))
+
+
+def deferral_box_name(receiver: bytes) -> bytes:
+    """Deferred-payout marker box name: "dfr_" + receiver public key"""
+    return DEFERRAL_BOX_PREFIX + receiver
+
+
+def payment_id_from_box_name(name: bytes) -> Optional[int]:
+    """Payment ID encoded in a box name, or None if it is not a payment box"""
+    if len(name) != len(PAYMENT_BOX_PREFIX) + 8 or not name.startswith(PAYMENT_BOX_PREFIX):
+        return None
+    return int.from_bytes(name[len(PAYMENT_BOX_PREFIX):], "big")
+
+
+def encode_payment_record(record: PaymentRecord) -> bytes:
+    """Encode a payment record exactly as the contract stores it"""
+    return PAYMENT_RECORD.pack(*record)
+
+
+def decode_payment_record(data: bytes) -> PaymentRecord:
+    """Decode a pay_<id> box value in one unpack
+
+    Raises:
+        ValueError: If the value is not a PAYMENT_RECORD_SIZE byte record
+    """
+    if len(data) != PAYMENT_RECORD_SIZE:
+        raise ValueError(f"Payment record must be {PAYMENT_RECORD_SIZE} bytes, got {len(data)}")
+    return PaymentRecord(*PAYMENT_RECORD.unpack(data))
+
+
+class StreamRecord(NamedTuple):
+    """Decoded str_<id> box; addresses are raw 32-byte public keys"""
+    creator: bytes
+    receiver: bytes
+    rate: int
+    start: int  # moved forward when a top-up restarts a stream that ran dry
+    stop: int  # 0 while the stream runs until its deposits are used up
+    deposited: int
+    withdrawn: int
+    unit: int  # STREAM_UNIT_SECONDS / STREAM_UNIT_ROUNDS
+
+    def vested(self, now: int) -> int:
+        """Amount unlocked at second/round `now`, as the contract computes it"""
+        if self.stop and now > self.stop:
+            now = self.stop
+        if now <= self.start:
+            return 0
+        return min(self.rate * (now - self.start), self.deposited)
+
+    def withdrawable(self, now: int) -> int:
+        return self.vested(now) - self.withdrawn
+
+    @property
+    def funded_until(self) -> int:
+        """Second/round the deposits last until"""
+        until = self.start + self.deposited // self.rate
+        return min(until, self.stop) if self.stop else until
+
+
+def stream_box_name(stream_id: int) -> bytes:
+    """Box name for a stream ID: "str_" + itob(stream_id)"""
+    return STREAM_BOX_PREFIX + stream_id.to_bytes(8, "big")
+
+
+def stream_id_from_box_name(name: bytes) -> Optional[int]:
+    """Stream ID encoded in a box name, or None if it is not a stream box"""
+    if len(name) != len(STREAM_BOX_PREFIX) + 8 or not name.startswith(STREAM_BOX_PREFIX):
+        return None
+    return int.from_bytes(name[len(STREAM_BOX_PREFIX):], "big")
+
+
+def encode_stream_record(record: StreamRecord) -> bytes:
+    """Encode a stream record exactly as the contract stores it"""
+    return STREAM_RECORD.pack(*record)
+
+
+def decode_stream_record(data: bytes) -> StreamRecord:
+    """Decode a str_<id> box value in one unpack
+
+    Raises:
+        ValueError: If the value is not a STREAM_RECORD_SIZE byte record
+    """
+    if len(data) != STREAM_RECORD_SIZE:
+        raise ValueError(f"Stream record must be {STREAM_RECORD_SIZE} bytes, got {len(data)}")
+    return StreamRecord(*STREAM_RECORD.unpack(data))
@@ -0,0 +1,192 @@
+"""
+Deterministic, cached contract builds
+Compiles the PuyaPy contracts and the raw TEAL escrow once per distinct
+(source, compiler version) and keeps the results in a content-addressed
+local store, so deploys and CI skip recompilation when nothing changed
+
+Store layout (.build-cache/):
+    objects/<sha256>           artifact bytes, keyed by their own hash
+    index/<input key>.json     artifact name -> object hash for one build
+
+Usage:
+    python build_contracts.py [--out-dir ./out] [--force]
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+SCRIPT_DIR = Path(__file__).parent
+CACHE_DIR = SCRIPT_DIR / ".build-cache"
+
+CONTRACTS = ("escrow_claim_link.py", "payment_split.py")
+
+# Artifacts requested from puyapy; part of the cache key
+PUYAPY_OPTIONS = (
+    "--output-bytecode",
+    "--output-arc32",
+    "--output-arc56",
+    "--output-source-map",
+)
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class ArtifactCache:
+    """Content-addressed store of build artifacts"""
+
+    def __init__(self, root: Path = CACHE_DIR) -> None:
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.index = self.root / "index"
+
+    def get(self, key: str) -> Optional[Dict[str, bytes]]:
+        """Artifacts stored for an input key, or None on a miss"""
+        entry = self.index / f"{key}.json"
+        if not entry.exists():
+            return None
+        manifest = json.loads(entry.read_text(encoding="utf-8"))
+        artifacts = {}
+        for name, digest in manifest["artifacts"].items():
+            path = self.objects / digest
+            if not path.exists():
+                return None
+            data = path.read_bytes()
+            if _sha256(data) != digest:
+                return None
+            artifacts[name] = data
+        return artifacts
+
+    def put(self, key: str, artifacts: Dict[str, bytes], metadata: Optional[dict] = None) -> None:
+        """Store artifacts under an input key; identical artifacts are stored once"""
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.index.mkdir(parents=True, exist_ok=True)
+
+        hashes = {}
+        for name, data in artifacts.items():
+            digest = _sha256(data)
+            path = self.objects / digest
+            if not path.exists():
+                self._write_atomic(path, data)
+            hashes[name] = digest
+
+        manifest = {"artifacts": hashes, **(metadata or {})}
+        self._write_atomic(self.index / f"{key}.json", json.dumps(manifest, indent=2, sort_keys=True).encode())
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        fd, tmp = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+
+def compiler_version() -> str:
+    """puyapy version string, part of every contract cache key"""
+    result = subprocess.run(
+        [sys.executable, "-m", "puyapy", "--version"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout.strip()
+
+
+def contract_key(source_path: Path, version: str) -> str:
+    """Cache key of a contract build: source, compiler version and options"""
+    digest = hashlib.sha256()
+    digest.update(source_path.name.encode())
+    digest.update(b"\0")
+    digest.update(source_path.read_bytes())
+    digest.update(b"\0")
+    digest.update(version.encode())
+    for option in PUYAPY_OPTIONS:
+        digest.update(b"\0")
+        digest.update(option.encode())
+    return digest.hexdigest()
+
+
+def build_contract(
+    source_path: Path,
+    out_dir: Path,
+    cache: ArtifactCache,
+    version: str,
+    force: bool = False,
+) -> Tuple[str, bool]:
+    """Compile one contract through the cache and write its artifacts to out_dir
+
+    Returns:
+        Tuple of (cache key, whether it was a cache hit)
+    """
+    key = contract_key(source_path, version)
+    artifacts = None if force else cache.get(key)
+    hit = artifacts is not None
+
+    if not hit:
+        with tempfile.TemporaryDirectory() as tmp:
+            subprocess.run(
+                [sys.executable, "-m", "puyapy", str(source_path), "--out-dir", tmp, *PUYAPY_OPTIONS],
+                check=True,
+            )
+            artifacts = {
+                path.name: path.read_bytes()
+                for path in sorted(Path(tmp).rglob("*"))
+                if path.is_file()
+            }
+        cache.put(key, artifacts, {"source": source_path.name, "compiler": version})
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for name, data in artifacts.items():
+        (out_dir / name).write_bytes(data)
+
+    return key, hit
+
+
+def compile_teal(algod_client, source: str, cache: Optional[ArtifactCache] = None) -> bytes:
+    """Compile TEAL through algod, reusing cached bytecode for unchanged source
+
+    Assembly is deterministic for a given source (which pins its own
+    #pragma version), so the source alone is the key and algod is only
+    contacted on a miss.
+    """
+    cache = cache or ArtifactCache()
+    key = _sha256(b"teal\0" + source.encode())
+
+    artifacts = cache.get(key)
+    if artifacts is None:
+        result = algod_client.compile(source)
+        artifacts = {"program.bin": base64.b64decode(result["result"])}
+        cache.put(key, artifacts, {"source": "teal", "compiler": "algod"})
+
+    return artifacts["program.bin"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile contracts through the local artifact cache")
+    parser.add_argument("--out-dir", type=Path, default=SCRIPT_DIR / "out")
+    parser.add_argument("--force", action="store_true", help="Recompile even on a cache hit")
+    args = parser.parse_args()
+
+    cache = ArtifactCache()
+    version = compiler_version()
+    print(f"🔨 {version}")
+
+    for name in CONTRACTS:
+        key, hit = build_contract(SCRIPT_DIR / name, args.out_dir, cache, version, args.force)
+        status = "cached" if hit else "compiled"
+        print(f"✅ {name}: {status} ({key[:12]})")
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,834 @@
+"""
+Incremental chain indexer for AlgoSplit
+Follows blocks for the escrow and PaymentSplit apps, decodes their app
+calls and inner payments, and keeps the Supabase claim_links / payments
+tables in sync with batched upserts
+
+Progress is stored as a round checkpoint in the same database transaction
+as each batch, so a restart resumes exactly where the last batch ended.
+
+Usage:
+    python chain_indexer.py
+    (reads ALGOD_URL, ALGOD_TOKEN, CLAIM_APP_ID, PAYMENT_APP_ID, DATABASE_URL)
+"""
+import base64
+import hashlib
+import json
+import os
+import struct
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import msgpack
+from algosdk import abi, encoding, logic
+from algosdk.error import AlgodHTTPError
+
+from batch_claim_links import ASSET_BATCH_METHOD_SIGNATURE, BATCH_METHOD_SIGNATURE
+from box_codec import CONTRIBUTOR_BOX_MIN_BALANCE
+from expiry_sweeper import SWEEP_METHOD_SIGNATURE
+from merkle_airdrop import CLAIM_METHOD_SIGNATURE as AIRDROP_CLAIM_METHOD_SIGNATURE
+from vouchers import REDEEM_METHOD_SIGNATURE
+
+CHECKPOINT_NAME = "algosplit"
+DEFAULT_BATCH_ROUNDS = 100
+
+# ARC-4 return value log prefix
+RETURN_PREFIX = bytes.fromhex("151f7c75")
+
+MICRO = Decimal(1_000_000)
+
+# Unit name and decimals of asset ID 0
+ALGO_UNIT = ("ALGO", 6)
+
+ESCROW_METHODS = {
+    "create": "create_claim_link(txn,account,uint64)string",
+    "create_batch": BATCH_METHOD_SIGNATURE,
+    "create_asset_batch": ASSET_BATCH_METHOD_SIGNATURE,
+    "claim": "claim(uint64)bool",
+    "claim_batch": "claim_batch(uint64[])uint64",
+    "cancel": "cancel(uint64)bool",
+    "sweep": SWEEP_METHOD_SIGNATURE,
+    "claim_airdrop": AIRDROP_CLAIM_METHOD_SIGNATURE,
+    "redeem_voucher": REDEEM_METHOD_SIGNATURE,
+}
+
+PAYMENT_METHODS = {
+    "create_payment": "create_payment(account,uint64,uint64,string,string,pay)uint64",
+    "contribute": "contribute(uint64,pay)bool",
+    "contribute_slot": "contribute_slot(uint64,uint64,pay)bool",
+}
+
+# Tables the indexer needs when running against a local SQLite stand-in;
+# in Supabase these come from supabase-schema.sql
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS claim_links (
+  id TEXT PRIMARY KEY,
+  sender_address TEXT NOT NULL,
+  receiver_address TEXT,
+  amount NUMERIC NOT NULL,
+  currency TEXT NOT NULL DEFAULT 'ALGO',
+  asset_id BIGINT NOT NULL DEFAULT 0,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  expiry_date TIMESTAMP,
+  claimed BOOLEAN DEFAULT FALSE,
+  claimed_at TIMESTAMP,
+  claimed_by TEXT,
+  status TEXT DEFAULT 'active',
+  tx_hash TEXT,
+  claim_tx_hash TEXT,
+  contract_app_id INTEGER,
+  contract_address TEXT,
+  chain_claim_id BIGINT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_claim_links_chain_id ON claim_links(contract_app_id, chain_claim_id);
+CREATE TABLE IF NOT EXISTS payments (
+  id TEXT PRIMARY KEY,
+  title TEXT NOT NULL,
+  description TEXT,
+  total_amount NUMERIC NOT NULL,
+  currency TEXT NOT NULL DEFAULT 'ALGO',
+  participants INTEGER NOT NULL,
+  receiver_address TEXT NOT NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  expiry_date TIMESTAMP,
+  collected NUMERIC DEFAULT 0,
+  contributors TEXT DEFAULT '[]',
+  status TEXT DEFAULT 'active',
+  tx_hash TEXT,
+  contract_app_id INTEGER,
+  contract_address TEXT,
+  chain_payment_id NUMERIC
+);
+CREATE TABLE IF NOT EXISTS airdrop_claims (
+  contract_app_id INTEGER NOT NULL,
+  airdrop_id BIGINT NOT NULL,
+  leaf_index BIGINT NOT NULL,
+  claimed_by TEXT NOT NULL,
+  amount NUMERIC NOT NULL,
+  currency TEXT NOT NULL DEFAULT 'ALGO',
+  asset_id BIGINT NOT NULL DEFAULT 0,
+  claimed_at TIMESTAMP,
+  claim_tx_hash TEXT,
+  PRIMARY KEY (contract_app_id, airdrop_id, leaf_index)
+);
+CREATE TABLE IF NOT EXISTS voucher_redemptions (
+  contract_app_id INTEGER NOT NULL,
+  book_id BIGINT NOT NULL,
+  nonce BIGINT NOT NULL,
+  redeemed_by TEXT NOT NULL,
+  amount NUMERIC NOT NULL,
+  currency TEXT NOT NULL DEFAULT 'ALGO',
+  asset_id BIGINT NOT NULL DEFAULT 0,
+  redeemed_at TIMESTAMP,
+  redeem_tx_hash TEXT,
+  PRIMARY KEY (contract_app_id, book_id, nonce)
+);
+CREATE TABLE IF NOT EXISTS indexer_checkpoints (
+  name TEXT PRIMARY KEY,
+  round BIGINT NOT NULL,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+def _selectors(methods: Dict[str, str]) -> Dict[bytes, str]:
+    return {abi.Method.from_signature(sig).get_selector(): name for name, sig in methods.items()}
+
+
+ESCROW_SELECTORS = _selectors(ESCROW_METHODS)
+PAYMENT_SELECTORS = _selectors(PAYMENT_METHODS)
+
+BATCH_ENTRIES = abi.ABIType.from_string("(address,uint64,uint64)[]")
+STRING = abi.ABIType.from_string("string")
+CLAIM_IDS = abi.ABIType.from_string("uint64[]")
+
+
+@dataclass
+class ChangeBatch:
+    """Row changes accumulated over a range of rounds"""
+    created: List[dict] = field(default_factory=list)
+    claimed: List[dict] = field(default_factory=list)
+    cancelled: List[dict] = field(default_factory=list)
+    expired: List[dict] = field(default_factory=list)
+    airdrop_claims: List[dict] = field(default_factory=list)
+    voucher_redemptions: List[dict] = field(default_factory=list)
+    payments: List[dict] = field(default_factory=list)
+    contributions: List[dict] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return (
+            len(self.created) + len(self.claimed) + len(self.cancelled) + len(self.expired)
+            + len(self.airdrop_claims) + len(self.voucher_redemptions) + len(self.payments)
+            + len(self.contributions)
+        )
+
+
+# -- block decoding ----------------------------------------------------
+
+
+def _canonical(value):
+    """Sort map keys recursively, as required for canonical msgpack"""
+    if isinstance(value, dict):
+        return {key: _canonical(value[key]) for key in sorted(value)}
+    if isinstance(value, list):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def transaction_id(txn: dict, block: dict, has_genesis_id: bool) -> str:
+    """Compute a transaction ID from its block encoding
+
+    Blocks strip the genesis hash (and genesis ID when hgi is set) from
+    every transaction, so they are restored before hashing.
+    """
+    txn = dict(txn)
+    txn["gh"] = block["gh"]
+    if has_genesis_id:
+        txn["gen"] = block["gen"]
+    packed = msgpack.packb(_canonical(txn), use_bin_type=True)
+    return _encode_txid(hashlib.new("sha512_256", b"TX" + packed).digest())
+
+
+def inner_transaction_id(txn: dict, parent_txid: str, index: int) -> str:
+    """Compute the ID of an inner transaction
+
+    Inner IDs fold in the parent's ID and the position of the transaction
+    among the parent's inner transactions, since an app can issue the
+    same transaction twice.
+    """
+    parent = base64.b32decode(parent_txid + "====")
+    packed = msgpack.packb(_canonical(txn), use_bin_type=True)
+    digest = hashlib.new("sha512_256", b"TX" + parent + struct.pack(">Q", index) + packed).digest()
+    return _encode_txid(digest)
+
+
+def _encode_txid(digest: bytes) -> str:
+    return base64.b32encode(digest).decode().strip("=")
+
+
+def _return_value(apply_data: dict) -> Optional[bytes]:
+    logs = apply_data.get("dt", {}).get("lg", [])
+    if logs and logs[-1].startswith(RETURN_PREFIX):
+        return logs[-1][len(RETURN_PREFIX):]
+    return None
+
+
+def _address(raw: Optional[bytes]) -> Optional[str]:
+    if not raw or raw == bytes(32):
+        return None
+    return encoding.encode_address(raw)
+
+
+def _iso(timestamp: int) -> Optional[str]:
+    if not timestamp:
+        return None
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+
+def _funding(stxn: dict) -> Tuple[int, int, Optional[str]]:
+    """Amount, asset ID and claim_link note ID of a funding transaction"""
+    txn = stxn["txn"]
+    note = txn.get("note", b"")
+    link_id = None
+    if note.startswith(b"claim_link:"):
+        link_id = note[len(b"claim_link:"):].decode("utf-8", "replace")
+    if txn.get("type") == "axfer":
+        return txn.get("aamt", 0), txn.get("xaid", 0), link_id
+    return txn.get("amt", 0), 0, link_id
+
+
+def _payout(stxn: dict) -> Tuple[Optional[str], int]:
+    """Receiver and asset ID of the first inner payment / transfer of an app call"""
+    inner = stxn.get("dt", {}).get("itx", [])
+    if not inner:
+        return None, 0
+    txn = inner[0]["txn"]
+    if txn.get("type") == "axfer":
+        return _address(txn.get("arcv")), txn.get("xaid", 0)
+    return _address(txn.get("rcv")), 0
+
+
+class AssetUnits:
+    """Unit name and decimals of each asset, looked up once through algod
+
+    Without a client, or for an asset algod no longer knows (destroyed),
+    the unit is "ASA-<id>" and amounts stay in base units.
+    """
+
+    def __init__(self, algod_client=None) -> None:
+        self.algod_client = algod_client
+        self._units: Dict[int, Tuple[str, int]] = {0: ALGO_UNIT}
+
+    def unit(self, asset_id: int) -> Tuple[str, int]:
+        if asset_id not in self._units:
+            name, decimals = f"ASA-{asset_id}", 0
+            if self.algod_client is not None:
+                try:
+                    params = self.algod_client.asset_info(asset_id)["params"]
+                    name, decimals = params.get("unit-name") or name, params.get("decimals", 0)
+                except AlgodHTTPError as e:
+                    if e.code != 404:
+                        raise
+            self._units[asset_id] = (name, decimals)
+        return self._units[asset_id]
+
+    def amount(self, asset_id: int, base_units: int) -> str:
+        """Base units as a decimal string in the asset's whole units"""
+        return str(Decimal(base_units) / (10 ** self.unit(asset_id)[1]))
+
+
+def _claim_row(
+    app_id: int,
+    claim_id: int,
+    sender: str,
+    receiver: Optional[str],
+    amount: int,
+    asset_id: int,
+    expiry_time: int,
+    tx_hash: str,
+    created_at: str,
+    link_id: Optional[str],
+    assets: AssetUnits,
+) -> dict:
+    return {
+        "id": link_id or f"{app_id}-{claim_id}",
+        "sender_address": sender,
+        "receiver_address": receiver,
+        "amount": assets.amount(asset_id, amount),
+        "currency": assets.unit(asset_id)[0],
+        "asset_id": asset_id,
+        "created_at": created_at,
+        "expiry_date": _iso(expiry_time),
+        "tx_hash": tx_hash,
+        "contract_app_id": app_id,
+        "contract_address": logic.get_application_address(app_id),
+        "chain_claim_id": claim_id,
+    }
+
+
+class BlockDecoder:
+    """Turns escrow / PaymentSplit app calls in a block into row changes
+
+    App calls are found at the top level of the block and among the inner
+    transactions of any app call, so calls made through another app are
+    indexed too. Blocks must be decoded in round order: sweep_expired
+    compares expiry times against the previous block's timestamp, which is
+    what Global.latest_timestamp returns while a block is evaluated.
+    """
+
+    def __init__(
+        self,
+        escrow_app_id: int,
+        payment_app_id: Optional[int] = None,
+        latest_timestamp: Optional[int] = None,
+        assets: Optional[AssetUnits] = None,
+    ) -> None:
+        self.escrow_app_id = escrow_app_id
+        self.payment_app_id = payment_app_id
+        self.latest_timestamp = latest_timestamp
+        self.assets = assets or AssetUnits()
+
+    def decode(self, block: dict, batch: ChangeBatch) -> None:
+        timestamp = block.get("ts", 0)
+        if self.latest_timestamp is None:
+            self.latest_timestamp = timestamp
+        self._decode_group(block.get("txns", []), block, None, batch)
+        self.latest_timestamp = timestamp
+
+    def _decode_group(
+        self,
+        stxns: List[dict],
+        block: dict,
+        parent_txid: Optional[str],
+        batch: ChangeBatch,
+    ) -> None:
+        """Decode a block's transactions, or the inner transactions of parent_txid"""
+        timestamp = _iso(block.get("ts", 0))
+
+        for index, stxn in enumerate(stxns):
+            txn = stxn["txn"]
+            if txn.get("type") != "appl":
+                continue
+
+            # Inner transactions complete before the call that issued them
+            inner = stxn.get("dt", {}).get("itx", [])
+            if any(item["txn"].get("type") == "appl" for item in inner):
+                self._decode_group(inner, block, self._txid(stxns, index, block, parent_txid), batch)
+
+            if not txn.get("apaa"):
+                continue
+
+            app_id = txn.get("apid", 0)
+            selector = txn["apaa"][0]
+
+            if app_id == self.escrow_app_id and selector in ESCROW_SELECTORS:
+                method = ESCROW_SELECTORS[selector]
+                # create_asset_links_batch opts in first, so its asset transfer follows the call
+                funding_index = index + 1 if method == "create_asset_batch" else index - 1
+                funding = stxns[funding_index] if 0 <= funding_index < len(stxns) else None
+                funding_txid = None
+                if funding is not None:
+                    funding_txid = self._txid(stxns, funding_index, block, parent_txid)
+                txid = self._txid(stxns, index, block, parent_txid)
+                self._decode_escrow(method, stxn, funding, funding_txid, txid, timestamp, batch)
+            elif self.payment_app_id and app_id == self.payment_app_id and selector in PAYMENT_SELECTORS:
+                funding = stxns[index - 1] if index > 0 else None
+                txid = self._txid(stxns, index, block, parent_txid)
+                self._decode_payment(PAYMENT_SELECTORS[selector], stxn, funding, txid, timestamp, batch)
+
+    @staticmethod
+    def _txid(stxns: List[dict], index: int, block: dict, parent_txid: Optional[str]) -> str:
+        stxn = stxns[index]
+        if parent_txid is None:
+            return transaction_id(stxn["txn"], block, stxn.get("hgi", False))
+        return inner_transaction_id(stxn["txn"], parent_txid, index)
+
+    def _decode_escrow(
+        self,
+        method: str,
+        stxn: dict,
+        funding: Optional[dict],
+        funding_txid: Optional[str],
+        txid: str,
+        timestamp: str,
+        batch: ChangeBatch,
+    ) -> None:
+        txn = stxn["txn"]
+        args = txn["apaa"]
+        sender = encoding.encode_address(txn["snd"])
+        returned = _return_value(stxn)
+
+        if method == "create" and returned is not None and funding is not None:
+            # Return value is the ARC-4 string "claim_<id>"
+            claim_id = int(returned[2:].decode().split("_", 1)[1])
+            amount, asset_id, link_id = _funding(funding)
+            account_index = args[1][0]
+            receiver_raw = txn["snd"] if account_index == 0 else txn["apat"][account_index - 1]
+            expiry_time = int.from_bytes(args[2], "big")
+            batch.created.append(_claim_row(
+                self.escrow_app_id, claim_id, sender, _address(receiver_raw), amount,
+                asset_id, expiry_time, funding_txid, timestamp, link_id, self.assets,
+            ))
+
+        elif method in ("create_batch", "create_asset_batch") and returned is not None and funding is not None:
+            first_id, count = struct.unpack(">QQ", returned)
+            _amount, asset_id, _link_id = _funding(funding)
+            entries = BATCH_ENTRIES.decode(args[-1])
+            for offset, (receiver, amount, expiry_time) in enumerate(entries[:count]):
+                batch.created.append(_claim_row(
+                    self.escrow_app_id, first_id + offset, sender,
+                    None if receiver == encoding.encode_address(bytes(32)) else receiver,
+                    amount, asset_id, expiry_time, funding_txid, timestamp, None, self.assets,
+                ))
+
+        elif method == "claim":
+            # The claimer is the receiver of the inner payment / transfer
+            inner = stxn.get("dt", {}).get("itx", [])
+            claimer = sender
+            if inner:
+                inner_txn = inner[0]["txn"]
+                claimer = _address(inner_txn.get("rcv") or inner_txn.get("arcv")) or sender
+            batch.claimed.append({
+                "app_id": self.escrow_app_id,
+                "claim_id": int.from_bytes(args[1], "big"),
+                "claimed_by": claimer,
+                "claimed_at": timestamp,
+                "claim_tx_hash": txid,
+            })
+
+        elif method == "claim_batch":
+            # Every link is paid to the caller, or the whole call fails
+            for claim_id in CLAIM_IDS.decode(args[1]):
+                batch.claimed.append({
+                    "app_id": self.escrow_app_id,
+                    "claim_id": claim_id,
+                    "claimed_by": sender,
+                    "claimed_at": timestamp,
+                    "claim_tx_hash": txid,
+                })
+
+        elif method == "claim_airdrop":
+            _receiver, asset_id = _payout(stxn)
+            batch.airdrop_claims.append({
+                "app_id": self.escrow_app_id,
+                "airdrop_id": int.from_bytes(args[1], "big"),
+                "leaf_index": int.from_bytes(args[2], "big"),
+                "claimed_by": sender,
+                "amount": self.assets.amount(asset_id, int.from_bytes(args[3], "big")),
+                "currency": self.assets.unit(asset_id)[0],
+                "asset_id": asset_id,
+                "claimed_at": timestamp,
+                "claim_tx_hash": txid,
+            })
+
+        elif method == "redeem_voucher":
+            # A voucher for the zero address pays the caller
+            payee, asset_id = _payout(stxn)
+            batch.voucher_redemptions.append({
+                "app_id": self.escrow_app_id,
+                "book_id": int.from_bytes(args[1], "big"),
+                "nonce": int.from_bytes(args[2], "big"),
+                "redeemed_by": payee or sender,
+                "amount": self.assets.amount(asset_id, int.from_bytes(args[4], "big")),
+                "currency": self.assets.unit(asset_id)[0],
+                "asset_id": asset_id,
+                "redeemed_at": timestamp,
+                "redeem_tx_hash": txid,
+            })
+
+        elif method == "cancel":
+            batch.cancelled.append({
+                "app_id": self.escrow_app_id,
+                "claim_id": int.from_bytes(args[1], "big"),
+            })
+
+        elif method == "sweep" and returned is not None and int.from_bytes(returned, "big") > 0:
+            # The contract skips IDs that are not open or not yet expired, so
+            # the store applies the same expiry test to each ID
+            for claim_id in CLAIM_IDS.decode(args[1]):
+                batch.expired.append({
+                    "app_id": self.escrow_app_id,
+                    "claim_id": claim_id,
+                    "expired_before": _iso(self.latest_timestamp),
+                })
+
+    def _decode_payment(
+        self,
+        method: str,
+        stxn: dict,
+        funding: Optional[dict],
+        txid: str,
+        timestamp: str,
+        batch: ChangeBatch,
+    ) -> None:
+        txn = stxn["txn"]
+        args = txn["apaa"]
+        returned = _return_value(stxn)
+
+        if method == "create_payment" and returned is not None:
+            # The app frontend keys its payments row by this call's transaction ID
+            account_index = args[1][0]
+            receiver_raw = txn["snd"] if account_index == 0 else txn["apat"][account_index - 1]
+            batch.payments.append({
+                "id": txid,
+                "title": STRING.decode(args[4]),
+                "description": STRING.decode(args[5]),
+                "total_amount": str(Decimal(int.from_bytes(args[2], "big")) / MICRO),
+                "participants": int.from_bytes(args[3], "big"),
+                "receiver_address": encoding.encode_address(receiver_raw),
+                "created_at": timestamp,
+                "tx_hash": txid,
+                "contract_app_id": self.payment_app_id,
+                "contract_address": logic.get_application_address(self.payment_app_id),
+                "chain_payment_id": int.from_bytes(returned, "big"),
+            })
+
+        elif method in ("contribute", "contribute_slot") and funding is not None:
+            # The contribution is the payment transaction preceding the call;
+            # contribute's payment also carries the contributor box minimum balance
+            amount, _asset_id, _link_id = _funding(funding)
+            if method == "contribute":
+                amount -= CONTRIBUTOR_BOX_MIN_BALANCE
+            batch.contributions.append({
+                "app_id": self.payment_app_id,
+                "payment_id": int.from_bytes(args[1], "big"),
+                "contributor": encoding.encode_address(txn["snd"]),
+                "slot": int.from_bytes(args[2], "big") if method == "contribute_slot" else None,
+                "amount": str(Decimal(amount) / MICRO),
+                "contributed_at": timestamp,
+            })
+
+
+# -- database ----------------------------------------------------------
+
+
+class SqlStore:
+    """Applies change batches through any DB-API connection
+
+    The statements use INSERT ... ON CONFLICT, which both SQLite (3.24+) and
+    Postgres accept; only the placeholder style differs.
+    """
+
+    def __init__(self, connection, paramstyle: str = "qmark") -> None:
+        self.connection = connection
+        self.paramstyle = paramstyle
+
+    def _sql(self, statement: str) -> str:
+        if self.paramstyle == "format":
+            return statement.replace("?", "%s")
+        return statement
+
+    def _add_contributors(self, cursor, contributions: List[dict]) -> None:
+        """Append contributors to the payments.contributors JSON list
+
+        Read and rewritten row by row, as SQLite and Postgres have no common
+        JSON append. Entries the app frontend already wrote for the same
+        address (and slot) are kept as they are.
+        """
+        for row in contributions:
+            cursor.execute(self._sql(
+                "SELECT contributors FROM payments WHERE contract_app_id = ? AND chain_payment_id = ?"
+            ), (row["app_id"], row["payment_id"]))
+            found = cursor.fetchone()
+            if found is None:
+                continue
+            # psycopg2 decodes JSONB; SQLite returns the text
+            contributors = found[0] if isinstance(found[0], list) else json.loads(found[0] or "[]")
+            if any(
+                entry.get("address") == row["contributor"] and entry.get("slot") == row["slot"]
+                for entry in contributors
+            ):
+                continue
+            entry = {"address": row["contributor"], "amount": float(row["amount"]), "timestamp": row["contributed_at"]}
+            if row["slot"] is not None:
+                entry["slot"] = row["slot"]
+            contributors.append(entry)
+            cursor.execute(self._sql(
+                "UPDATE payments SET contributors = ? WHERE contract_app_id = ? AND chain_payment_id = ?"
+            ), (json.dumps(contributors), row["app_id"], row["payment_id"]))
+
+    def create_sqlite_schema(self) -> None:
+        """Create the tables on a local SQLite stand-in"""
+        self.connection.executescript(SQLITE_SCHEMA)
+
+    def load_checkpoint(self, name: str = CHECKPOINT_NAME) -> Optional[int]:
+        cursor = self.connection.cursor()
+        cursor.execute(self._sql("SELECT round FROM indexer_checkpoints WHERE name = ?"), (name,))
+        row = cursor.fetchone()
+        return None if row is None else int(row[0])
+
+    def apply(self, batch: ChangeBatch, round_num: int, name: str = CHECKPOINT_NAME) -> None:
+        """Write a batch and advance the checkpoint in one transaction"""
+        cursor = self.connection.cursor()
+        try:
+            if batch.created:
+                cursor.executemany(self._sql(
+                    "INSERT INTO claim_links (id, sender_address, receiver_address, amount, currency,"
+                    " asset_id, created_at, expiry_date, claimed, status, tx_hash, contract_app_id,"
+                    " contract_address, chain_claim_id)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, FALSE, 'active', ?, ?, ?, ?)"
+                    " ON CONFLICT (id) DO UPDATE SET asset_id = excluded.asset_id,"
+                    " contract_app_id = excluded.contract_app_id,"
+                    " contract_address = excluded.contract_address,"
+                    " chain_claim_id = excluded.chain_claim_id,"
+                    " tx_hash = COALESCE(claim_links.tx_hash, excluded.tx_hash)"
+                ), [
+                    (
+                        row["id"], row["sender_address"], row["receiver_address"], row["amount"],
+                        row["currency"], row["asset_id"], row["created_at"], row["expiry_date"], row["tx_hash"],
+                        row["contract_app_id"], row["contract_address"], row["chain_claim_id"],
+                    )
+                    for row in batch.created
+                ])
+
+            if batch.claimed:
+                cursor.executemany(self._sql(
+                    "UPDATE claim_links SET claimed = TRUE, status = 'claimed', claimed_by = ?,"
+                    " claimed_at = ?, claim_tx_hash = ?"
+                    " WHERE contract_app_id = ? AND chain_claim_id = ?"
+                ), [
+                    (row["claimed_by"], row["claimed_at"], row["claim_tx_hash"], row["app_id"], row["claim_id"])
+                    for row in batch.claimed
+                ])
+
+            if batch.cancelled:
+                cursor.executemany(self._sql(
+                    "UPDATE claim_links SET status = 'cancelled'"
+                    " WHERE contract_app_id = ? AND chain_claim_id = ?"
+                ), [(row["app_id"], row["claim_id"]) for row in batch.cancelled])
+
+            if batch.expired:
+                cursor.executemany(self._sql(
+                    "UPDATE claim_links SET status = 'expired'"
+                    " WHERE contract_app_id = ? AND chain_claim_id = ? AND status = 'active'"
+                    " AND expiry_date IS NOT NULL AND expiry_date <= ?"
+                ), [(row["app_id"], row["claim_id"], row["expired_before"]) for row in batch.expired])
+
+            if batch.airdrop_claims:
+                cursor.executemany(self._sql(
+                    "INSERT INTO airdrop_claims (contract_app_id, airdrop_id, leaf_index, claimed_by, amount,"
+                    " currency, asset_id, claimed_at, claim_tx_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (contract_app_id, airdrop_id, leaf_index) DO NOTHING"
+                ), [
+                    (
+                        row["app_id"], row["airdrop_id"], row["leaf_index"], row["claimed_by"], row["amount"],
+                        row["currency"], row["asset_id"], row["claimed_at"], row["claim_tx_hash"],
+                    )
+                    for row in batch.airdrop_claims
+                ])
+
+            if batch.voucher_redemptions:
+                cursor.executemany(self._sql(
+                    "INSERT INTO voucher_redemptions (contract_app_id, book_id, nonce, redeemed_by, amount,"
+                    " currency, asset_id, redeemed_at, redeem_tx_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (contract_app_id, book_id, nonce) DO NOTHING"
+                ), [
+                    (
+                        row["app_id"], row["book_id"], row["nonce"], row["redeemed_by"], row["amount"],
+                        row["currency"], row["asset_id"], row["redeemed_at"], row["redeem_tx_hash"],
+                    )
+                    for row in batch.voucher_redemptions
+                ])
+
+            if batch.payments:
+                cursor.executemany(self._sql(
+                    "INSERT INTO payments (id, title, description, total_amount, currency, participants,"
+                    " receiver_address, created_at, collected, status, tx_hash, contract_app_id,"
+                    " contract_address, chain_payment_id)"
+                    " VALUES (?, ?, ?, ?, 'ALGO', ?, ?, ?, 0, 'active', ?, ?, ?, ?)"
+                    " ON CONFLICT (id) DO UPDATE SET contract_app_id = excluded.contract_app_id,"
+                    " contract_address = excluded.contract_address,"
+                    " chain_payment_id = excluded.chain_payment_id,"
+                    " tx_hash = COALESCE(payments.tx_hash, excluded.tx_hash)"
+                ), [
+                    (
+                        row["id"], row["title"], row["description"], row["total_amount"], row["participants"],
+                        row["receiver_address"], row["created_at"], row["tx_hash"], row["contract_app_id"],
+                        row["contract_address"], row["chain_payment_id"],
+                    )
+                    for row in batch.payments
+                ])
+
+            if batch.contributions:
+                cursor.executemany(self._sql(
+                    "UPDATE payments SET collected = collected + ?,"
+                    " status = CASE WHEN collected + ? >= total_amount THEN 'completed' ELSE status END"
+                    " WHERE contract_app_id = ? AND chain_payment_id = ?"
+                ), [
+                    (row["amount"], row["amount"], row["app_id"], row["payment_id"])
+                    for row in batch.contributions
+                ])
+                self._add_contributors(cursor, batch.contributions)
+
+            cursor.execute(self._sql(
+                "INSERT INTO indexer_checkpoints (name, round) VALUES (?, ?)"
+                " ON CONFLICT (name) DO UPDATE SET round = excluded.round"
+            ), (name, round_num))
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+
+
+# -- block source ------------------------------------------------------
+
+
+def fetch_block(algod_client, round_num: int) -> dict:
+    """Fetch a block as a msgpack-decoded dict"""
+    raw = algod_client.block_info(round_num=round_num, response_format="msgpack")
+    return msgpack.unpackb(raw, raw=False, strict_map_key=False)["block"]
+
+
+def record_blocks(algod_client, first_round: int, last_round: int, path: str) -> None:
+    """Record raw msgpack blocks to a fixture file for replay in FakeAlgod"""
+    with open(path, "wb") as f:
+        for round_num in range(first_round, last_round + 1):
+            raw = algod_client.block_info(round_num=round_num, response_format="msgpack")
+            f.write(struct.pack(">QI", round_num, len(raw)))
+            f.write(raw)
+
+
+def load_block_fixture(path: str) -> Iterator[Tuple[int, bytes]]:
+    """Yield (round, raw msgpack block) pairs written by record_blocks"""
+    header = struct.Struct(">QI")
+    with open(path, "rb") as f:
+        while True:
+            head = f.read(header.size)
+            if not head:
+                return
+            round_num, length = header.unpack(head)
+            yield round_num, f.read(length)
+
+
+class ChainIndexer:
+    """Follows blocks and applies decoded changes in batches"""
+
+    def __init__(
+        self,
+        algod_client,
+        store: SqlStore,
+        escrow_app_id: int,
+        payment_app_id: Optional[int] = None,
+        start_round: int = 1,
+        batch_rounds: int = DEFAULT_BATCH_ROUNDS,
+        name: str = CHECKPOINT_NAME,
+    ) -> None:
+        self.algod_client = algod_client
+        self.store = store
+        self.decoder = BlockDecoder(escrow_app_id, payment_app_id, assets=AssetUnits(algod_client))
+        self.batch_rounds = batch_rounds
+        self.name = name
+
+        checkpoint = store.load_checkpoint(name)
+        self.next_round = start_round if checkpoint is None else checkpoint + 1
+
+    def run_once(self) -> int:
+        """Index every round up to the current one
+
+        Returns:
+            Number of rounds processed
+        """
+        last_round = self.algod_client.status()["last-round"]
+        processed = 0
+
+        while self.next_round <= last_round:
+            end = min(self.next_round + self.batch_rounds - 1, last_round)
+            batch = ChangeBatch()
+            for round_num in range(self.next_round, end + 1):
+                self._decode_round(round_num, batch)
+            self.store.apply(batch, end, self.name)
+            processed += end - self.next_round + 1
+            self.next_round = end + 1
+
+        return processed
+
+    def _decode_round(self, round_num: int, batch: ChangeBatch) -> None:
+        if self.decoder.latest_timestamp is None and round_num > 1:
+            self.decoder.latest_timestamp = fetch_block(self.algod_client, round_num - 1).get("ts", 0)
+        self.decoder.decode(fetch_block(self.algod_client, round_num), batch)
+
+    def run_forever(self, poll_interval: float = 0) -> None:
+        """Index continuously, waiting for each new round"""
+        while True:
+            self.run_once()
+            if poll_interval:
+                time.sleep(poll_interval)
+            else:
+                self.algod_client.status_after_block(self.next_round - 1)
+
+
+def main():
+    from algod_pool import client_from_env
+
+    algod_client = client_from_env()
+
+    database_url = os.environ.get("DATABASE_URL", "")
+    if database_url.startswith("postgres"):
+        import psycopg2
+
+        store = SqlStore(psycopg2.connect(database_url), paramstyle="format")
+    else:
+        import sqlite3
+
+        connection = sqlite3.connect(database_url or "indexer.sqlite3")
+        store = SqlStore(connection)
+        store.create_sqlite_schema()
+
+    payment_app_id = os.environ.get("PAYMENT_APP_ID")
+    indexer = ChainIndexer(
+        algod_client,
+        store,
+        escrow_app_id=int(os.environ["CLAIM_APP_ID"]),
+        payment_app_id=int(payment_app_id) if payment_app_id else None,
+        start_round=int(os.environ.get("START_ROUND", "1")),
+    )
+
+    print(f"🔄 Indexing from round {indexer.next_round}...")
+    indexer.run_forever()
+
+
+if __name__ == "__main__":
+    main()
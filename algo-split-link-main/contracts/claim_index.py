@@ -0,0 +1,159 @@
+"""
+Reader for the escrow's sender index boxes and receiver index pages
+Resolves the open links of an address with one index box read (or one box
+listing plus its receiver pages) and one concurrent read per listed claim,
+instead of scanning every claim box.
+Also sizes index boxes for the drivers, which must reference them and
+cover their size in the group's box I/O quota.
+
+Usage:
+    python claim_index.py <app_id> <address> [--receiver]
+"""
+import argparse
+import base64
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from algosdk import encoding
+from algosdk.error import AlgodHTTPError
+
+from box_codec import (
+    ClaimRecord,
+    decode_index,
+    decode_receiver_page,
+    receiver_page_from_box_name,
+    sender_index_name,
+)
+from claim_snapshot import fetch_claim
+
+DEFAULT_WORKERS = 32
+
+
+def _read_box(algod_client, app_id: int, name: bytes) -> Optional[bytes]:
+    try:
+        response = algod_client.application_box_by_name(app_id, name)
+    except AlgodHTTPError as e:
+        if e.code == 404:
+            return None
+        raise
+    return base64.b64decode(response["value"])
+
+
+def read_index(algod_client, app_id: int, name: bytes) -> List[int]:
+    """Open claim IDs listed in an index box (empty if the box does not exist)"""
+    data = _read_box(algod_client, app_id, name)
+    return decode_index(data) if data is not None else []
+
+
+def read_receiver_pages(algod_client, app_id: int, receiver: bytes, max_workers: int = DEFAULT_WORKERS) -> List[int]:
+    """Open claim IDs restricted to a receiver, read from its index pages in ID order"""
+    response = algod_client.application_boxes(app_id, limit=0)
+    pages = {}
+    for box in response.get("boxes", []):
+        name = base64.b64decode(box["name"])
+        page = receiver_page_from_box_name(name, receiver)
+        if page is not None:
+            pages[page] = name
+    if not pages:
+        return []
+
+    ordered = sorted(pages)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(ordered))) as pool:
+        values = pool.map(lambda page: _read_box(algod_client, app_id, pages[page]), ordered)
+        return [
+            claim_id
+            for page, data in zip(ordered, values)
+            if data is not None
+            for claim_id in decode_receiver_page(data, page)
+        ]
+
+
+def address_links(algod_client, app_id: int, address: str, role: str = "sender") -> List[int]:
+    """Open claim IDs of an address as sender or as restricted receiver"""
+    public_key = encoding.decode_address(address)
+    if role == "sender":
+        return read_index(algod_client, app_id, sender_index_name(public_key))
+    if role == "receiver":
+        return read_receiver_pages(algod_client, app_id, public_key)
+    raise ValueError(f"Unknown index role {role!r}; use 'sender' or 'receiver'")
+
+
+def index_sizes(
+    algod_client,
+    app_id: int,
+    names: Iterable[bytes],
+    max_workers: int = DEFAULT_WORKERS,
+) -> Dict[bytes, int]:
+    """Current size in bytes of each index box (0 if it does not exist yet)"""
+    names = list(dict.fromkeys(names))
+    if not names:
+        return {}
+
+    def size(name: bytes) -> int:
+        data = _read_box(algod_client, app_id, name)
+        return len(data) if data is not None else 0
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(names))) as pool:
+        return dict(zip(names, pool.map(size, names)))
+
+
+def open_links(
+    algod_client,
+    app_id: int,
+    address: str,
+    role: str = "sender",
+    max_workers: int = DEFAULT_WORKERS,
+) -> List[Tuple[int, ClaimRecord]]:
+    """Open links of an address, as (claim_id, record) in index order
+
+    Links closed between the index read and the claim reads are dropped.
+    """
+    claim_ids = address_links(algod_client, app_id, address, role)
+    if not claim_ids:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(claim_ids))) as pool:
+        records = pool.map(lambda claim_id: fetch_claim(algod_client, app_id, claim_id), claim_ids)
+        return [
+            (claim_id, record)
+            for claim_id, record in zip(claim_ids, records)
+            if record is not None and record.is_open
+        ]
+
+
+def open_links_sharded(algod_client, shards, address: str, role: str = "sender") -> List[Tuple[int, ClaimRecord]]:
+    """Open links of an address across a ShardSet, keyed by global link ID"""
+    from shard_router import encode_link_id
+
+    with ThreadPoolExecutor(max_workers=min(DEFAULT_WORKERS, len(shards))) as pool:
+        per_shard = pool.map(lambda app_id: open_links(algod_client, app_id, address, role), shards.app_ids)
+        return [
+            (encode_link_id(shard, claim_id), record)
+            for shard, links in enumerate(per_shard)
+            for claim_id, record in links
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List the open claim links of an address")
+    parser.add_argument("app_id", type=int)
+    parser.add_argument("address")
+    parser.add_argument("--receiver", action="store_true", help="Links restricted to the address as receiver")
+    args = parser.parse_args()
+
+    from algod_pool import client_from_env
+
+    role = "receiver" if args.receiver else "sender"
+    links = open_links(client_from_env(), args.app_id, args.address, role)
+    for claim_id, record in links:
+        asset = f"asset {record.asset_id}" if record.asset_id else "ALGO"
+        print(f"claim_{claim_id}: {record.amount} ({asset}), expires {record.expiry_time or 'never'}")
+    print(f"🔍 {len(links)} open link(s) as {role}")
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
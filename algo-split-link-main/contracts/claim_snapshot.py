@@ -0,0 +1,224 @@
+"""
+Bulk claim-state snapshot for the escrow claim link app
+Lists every claim_<id> box, fetches the values concurrently and decodes
+them into a columnar in-memory table that can be dumped to a compact
+binary file for reconciliation
+
+Usage:
+    python claim_snapshot.py <app_id> <output.snap>
+"""
+import base64
+import struct
+import sys
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Tuple
+
+from algosdk.error import AlgodHTTPError
+
+from box_codec import (
+    CLAIM_OPEN,
+    ClaimRecord,
+    claim_box_name,
+    claim_id_from_box_name,
+    decode_claim_record,
+)
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; the table is array-backed
+    np = None
+
+DEFAULT_WORKERS = 32
+
+# Snapshot file: magic, version, row count, then each column's raw bytes
+SNAPSHOT_MAGIC = b"ASNP"
+SNAPSHOT_VERSION = 2
+SNAPSHOT_HEADER = struct.Struct("<4sHQ")
+
+# Fixed-width integer columns and their array typecodes
+INT_COLUMNS = (
+    ("claim_id", "Q"),
+    ("amount", "Q"),
+    ("asset_id", "Q"),
+    ("expiry_time", "Q"),
+    ("state", "B"),
+    ("sender_slot", "H"),
+    ("receiver_slot", "H"),
+)
+ADDRESS_COLUMNS = ("sender", "receiver")
+
+
+@dataclass
+class ClaimTable:
+    """Columnar table of claim records
+
+    Integer columns are array.array values; address columns are contiguous
+    bytearrays of 32 bytes per row.
+    """
+    claim_id: array = field(default_factory=lambda: array("Q"))
+    amount: array = field(default_factory=lambda: array("Q"))
+    asset_id: array = field(default_factory=lambda: array("Q"))
+    expiry_time: array = field(default_factory=lambda: array("Q"))
+    state: array = field(default_factory=lambda: array("B"))
+    sender_slot: array = field(default_factory=lambda: array("H"))
+    receiver_slot: array = field(default_factory=lambda: array("H"))
+    sender: bytearray = field(default_factory=bytearray)
+    receiver: bytearray = field(default_factory=bytearray)
+
+    def __len__(self) -> int:
+        return len(self.claim_id)
+
+    def append(self, claim_id: int, record: ClaimRecord) -> None:
+        self.claim_id.append(claim_id)
+        self.amount.append(record.amount)
+        self.asset_id.append(record.asset_id)
+        self.expiry_time.append(record.expiry_time)
+        self.state.append(record.state)
+        self.sender_slot.append(record.sender_slot)
+        self.receiver_slot.append(record.receiver_slot)
+        self.sender += record.sender
+        self.receiver += record.receiver
+
+    def row(self, index: int) -> Tuple[int, ClaimRecord]:
+        """Return (claim_id, record) for a row"""
+        start = index * 32
+        return self.claim_id[index], ClaimRecord(
+            sender=bytes(self.sender[start:start + 32]),
+            receiver=bytes(self.receiver[start:start + 32]),
+            amount=self.amount[index],
+            asset_id=self.asset_id[index],
+            expiry_time=self.expiry_time[index],
+            state=self.state[index],
+            sender_slot=self.sender_slot[index],
+            receiver_slot=self.receiver_slot[index],
+        )
+
+    def outstanding(self, asset_id: int = 0) -> int:
+        """Total amount of open claims for an asset"""
+        return sum(
+            amount
+            for amount, asset, state in zip(self.amount, self.asset_id, self.state)
+            if asset == asset_id and state == CLAIM_OPEN
+        )
+
+    def to_numpy(self) -> dict:
+        """Zero-copy numpy views of the columns (requires numpy)"""
+        if np is None:
+            raise RuntimeError("numpy is not installed")
+        columns = {name: np.frombuffer(getattr(self, name), dtype=np.dtype(code)) for name, code in INT_COLUMNS}
+        for name in ADDRESS_COLUMNS:
+            columns[name] = np.frombuffer(getattr(self, name), dtype="S32")
+        return columns
+
+    def dump(self, path: str) -> None:
+        """Write the table to a compact little-endian binary snapshot"""
+        with open(path, "wb") as f:
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(self)))
+            for name, _code in INT_COLUMNS:
+                column = getattr(self, name)
+                if sys.byteorder != "little":
+                    column = array(column.typecode, column)
+                    column.byteswap()
+                column.tofile(f)
+            for name in ADDRESS_COLUMNS:
+                f.write(getattr(self, name))
+
+    @classmethod
+    def load(cls, path: str) -> "ClaimTable":
+        """Read a snapshot written by dump()"""
+        table = cls()
+        with open(path, "rb") as f:
+            magic, version, count = SNAPSHOT_HEADER.unpack(f.read(SNAPSHOT_HEADER.size))
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                raise ValueError(f"{path} is not a version {SNAPSHOT_VERSION} claim snapshot")
+            for name, _code in INT_COLUMNS:
+                column = getattr(table, name)
+                column.fromfile(f, count)
+                if sys.byteorder != "little":
+                    column.byteswap()
+            for name in ADDRESS_COLUMNS:
+                getattr(table, name).extend(f.read(32 * count))
+        return table
+
+
+def list_claim_ids(algod_client, app_id: int) -> List[int]:
+    """List the claim IDs of every claim_<id> box of the app"""
+    response = algod_client.application_boxes(app_id, limit=0)
+    ids = []
+    for box in response.get("boxes", []):
+        claim_id = claim_id_from_box_name(base64.b64decode(box["name"]))
+        if claim_id is not None:
+            ids.append(claim_id)
+    ids.sort()
+    return ids
+
+
+def fetch_claim(algod_client, app_id: int, claim_id: int) -> Optional[ClaimRecord]:
+    """Fetch and decode one claim box; None if it was deleted meanwhile"""
+    try:
+        response = algod_client.application_box_by_name(app_id, claim_box_name(claim_id))
+    except AlgodHTTPError as e:
+        if e.code == 404:
+            return None
+        raise
+    return decode_claim_record(base64.b64decode(response["value"]))
+
+
+def snapshot_claims(
+    algod_client,
+    app_id: int,
+    claim_ids: Optional[Iterable[int]] = None,
+    max_workers: int = DEFAULT_WORKERS,
+) -> ClaimTable:
+    """Fetch claim boxes with a bounded thread pool into a ClaimTable
+
+    Args:
+        algod_client: algod client (AlgodClient or a compatible fake)
+        app_id: Escrow application ID
+        claim_ids: IDs to fetch; all claim boxes of the app when omitted
+        max_workers: Maximum concurrent box requests
+
+    Returns:
+        ClaimTable ordered by claim ID, without boxes deleted during the scan
+    """
+    if claim_ids is None:
+        claim_ids = list_claim_ids(algod_client, app_id)
+    else:
+        claim_ids = sorted(claim_ids)
+
+    table = ClaimTable()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        records = pool.map(lambda claim_id: fetch_claim(algod_client, app_id, claim_id), claim_ids)
+        for claim_id, record in zip(claim_ids, records):
+            if record is not None:
+                table.append(claim_id, record)
+
+    return table
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("Usage: python claim_snapshot.py <app_id> <output.snap>")
+        return False
+
+    from algod_pool import client_from_env
+
+    app_id = int(sys.argv[1])
+    algod_client = client_from_env()
+
+    print(f"🔍 Snapshotting claim boxes of app {app_id}...")
+    table = snapshot_claims(algod_client, app_id)
+    table.dump(sys.argv[2])
+
+    open_count = sum(1 for state in table.state if state == CLAIM_OPEN)
+    print(f"✅ {len(table)} claims ({open_count} open) written to {sys.argv[2]}")
+    print(f"   Outstanding ALGO: {table.outstanding(0) / 1_000_000}")
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
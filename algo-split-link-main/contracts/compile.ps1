@@ -1,5 +1,5 @@
-# Compile Algopy Smart Contract
-Write-Host "Compiling escrow_claim_link.py..." -ForegroundColor Cyan
+# Compile Algopy Smart Contracts (cached by source + compiler version)
+Write-Host "Compiling contracts..." -ForegroundColor Cyan
 
 # Check Python
 $pythonCmd = Get-Command python -ErrorAction SilentlyContinue
@@ -9,7 +9,7 @@ if (-not $pythonCmd) {
 }
 
 # Compile
-python -m puyapy escrow_claim_link.py --out-dir ./out
+python build_contracts.py --out-dir ./out
 
 if ($LASTEXITCODE -eq 0) {
     Write-Host "Success! Check ./out directory for TEAL files" -ForegroundColor Green
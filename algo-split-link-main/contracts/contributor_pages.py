@@ -0,0 +1,405 @@
+"""
+Paged contributor storage of PaymentSplit
+Large splits keep their contributions by participant slot in 1KB pages:
+one bitmap page marks 8192 slots as paid, one amount page holds the amounts
+of 128 slots. This reads a payment's contributions with one record read,
+its bitmap pages fetched concurrently, then only the amount pages that
+hold a paid slot, also concurrently; and builds the open_slot_pages,
+contribute_slot and close calls with the boxes they must reference.
+
+The creator opens a payment's pages before slots are paid, paying their
+minimum balance. Once the split is paid out, close deletes the pages and
+contributor boxes, refunding each box to whoever paid for it, then the
+record itself.
+
+Usage:
+    python contributor_pages.py read <payment_id> [--json out.json]
+    python contributor_pages.py open <payment_id>
+    python contributor_pages.py pay <payment_id> <slot> <amount>
+    python contributor_pages.py close <payment_id>
+    (reads ALGOD_URL, ALGOD_TOKEN, PAYMENT_APP_ID, DEPLOYER_MNEMONIC for open/pay/close)
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set
+
+from algosdk.error import AlgodHTTPError
+
+from box_codec import (
+    AMOUNT_PAGE_PREFIX,
+    AMOUNT_PAGE_SLOTS,
+    AMOUNT_PAGES_PER_BITMAP_PAGE,
+    BITMAP_PAGE_PREFIX,
+    BITMAP_PAGE_SLOTS,
+    CONTRIBUTOR_BOX_PREFIX,
+    CONTRIBUTOR_PAGE_MIN_BALANCE,
+    PAYMENT_BOX_PREFIX,
+    PAYMENT_PAID_OUT,
+    PaymentRecord,
+    amount_page_name,
+    bitmap_page_name,
+    contributor_box_name,
+    contributor_from_box_name,
+    decode_amount_page,
+    decode_payment_record,
+    deferral_box_name,
+    paid_slots,
+    payment_box_name,
+)
+
+CONTRIBUTE_SLOT_SIGNATURE = "contribute_slot(uint64,uint64,pay)bool"
+OPEN_SLOT_PAGES_SIGNATURE = "open_slot_pages(uint64,uint64[],pay)uint64"
+CLOSE_CONTRIBUTIONS_SIGNATURE = "close_contributions(uint64,address[],uint64[])uint64"
+CLOSE_PAYMENT_SIGNATURE = "close_payment(uint64)uint64"
+
+MAX_REFS_PER_TXN = 8
+MAX_GROUP_SIZE = 16
+
+# Boxes one open or close call touches, carried by the call and bare
+# reserve_box_refs calls: 48 amount pages span at most two bitmap pages, so
+# with the record they fit in seven transactions
+PAGES_PER_CALL = 48
+CONTRIBUTORS_PER_CALL = 48
+
+DEFAULT_WORKERS = 32
+
+PAYMENT_SCOPED_PREFIXES = (PAYMENT_BOX_PREFIX, CONTRIBUTOR_BOX_PREFIX, BITMAP_PAGE_PREFIX, AMOUNT_PAGE_PREFIX)
+
+
+def fetch_box(algod_client, app_id: int, name: bytes) -> Optional[bytes]:
+    """Value of one box, or None if it does not exist (a page nobody paid into yet)"""
+    try:
+        response = algod_client.application_box_by_name(app_id, name)
+    except AlgodHTTPError as e:
+        if e.code == 404:
+            return None
+        raise
+    return base64.b64decode(response["value"])
+
+
+def read_payment(algod_client, app_id: int, payment_id: int) -> PaymentRecord:
+    data = fetch_box(algod_client, app_id, payment_box_name(payment_id))
+    if data is None:
+        raise ValueError(f"Payment {payment_id} not found")
+    return decode_payment_record(data)
+
+
+def read_contributions(
+    algod_client,
+    app_id: int,
+    payment_id: int,
+    participants: Optional[int] = None,
+    max_workers: int = DEFAULT_WORKERS,
+) -> Dict[int, int]:
+    """Amount paid for every paid slot of a payment
+
+    Args:
+        algod_client: algod client
+        app_id: PaymentSplit application ID
+        payment_id: ID of the payment
+        participants: Slot count; read from the payment record when omitted
+        max_workers: Maximum concurrent box requests
+
+    Returns:
+        Amount by slot, in slot order
+    """
+    if participants is None:
+        participants = read_payment(algod_client, app_id, payment_id).participants
+
+    bitmap_pages = range(-(-participants // BITMAP_PAGE_SLOTS))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        bitmaps = pool.map(lambda page: fetch_box(algod_client, app_id, bitmap_page_name(payment_id, page)), bitmap_pages)
+        slots: List[int] = []
+        for page, bitmap in zip(bitmap_pages, bitmaps):
+            if bitmap is not None:
+                slots.extend(slot for slot in paid_slots(bitmap, page) if slot < participants)
+
+        amount_pages = sorted({slot // AMOUNT_PAGE_SLOTS for slot in slots})
+        pages = dict(zip(amount_pages, pool.map(
+            lambda page: fetch_box(algod_client, app_id, amount_page_name(payment_id, page)), amount_pages,
+        )))
+
+    contributions = {}
+    for slot in slots:
+        data = pages[slot // AMOUNT_PAGE_SLOTS]
+        contributions[slot] = 0 if data is None else decode_amount_page(data)[slot % AMOUNT_PAGE_SLOTS]
+    return contributions
+
+
+def amount_pages(participants: int) -> List[int]:
+    """Amount page numbers covering every slot of a payment"""
+    return list(range(-(-participants // AMOUNT_PAGE_SLOTS)))
+
+
+def page_boxes(payment_id: int, pages: List[int]) -> Set[bytes]:
+    """Amount pages and the bitmap pages they open or close with"""
+    boxes = set()
+    for page in pages:
+        boxes.add(amount_page_name(payment_id, page))
+        boxes.add(bitmap_page_name(payment_id, page // AMOUNT_PAGES_PER_BITMAP_PAGE))
+    return boxes
+
+
+def list_payment_boxes(algod_client, app_id: int, payment_id: int) -> Set[bytes]:
+    """Names of the app's boxes that belong to one payment"""
+    response = algod_client.application_boxes(app_id, limit=0)
+    infix = payment_id.to_bytes(8, "big")
+    return {
+        name
+        for name in (base64.b64decode(box["name"]) for box in response.get("boxes", []))
+        if name[:4] in PAYMENT_SCOPED_PREFIXES and name[4:12] == infix
+    }
+
+
+def _call_atc(
+    params,
+    app_id: int,
+    signature: str,
+    method_args: list,
+    boxes: List[bytes],
+    sender: str,
+    signer,
+    inner_txns: int = 0,
+):
+    """One method call with its box references spread over bare calls after it
+
+    The call's fee covers the bare calls and its inner transactions.
+    """
+    import copy
+
+    from algosdk import abi
+    from algosdk.atomic_transaction_composer import AtomicTransactionComposer, TransactionWithSigner
+    from algosdk.transaction import ApplicationNoOpTxn
+
+    refs = [(0, name) for name in boxes]
+    pads = [refs[offset:offset + MAX_REFS_PER_TXN] for offset in range(MAX_REFS_PER_TXN, len(refs), MAX_REFS_PER_TXN)]
+    if len(pads) + 2 > MAX_GROUP_SIZE:
+        raise ValueError(f"{len(refs)} box references do not fit in one group")
+
+    call_params = copy.copy(params)
+    call_params.flat_fee = True
+    call_params.fee = max(params.min_fee, 1000) * (1 + len(pads) + inner_txns)
+    pad_params = copy.copy(params)
+    pad_params.flat_fee = True
+    pad_params.fee = 0
+
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=app_id,
+        method=abi.Method.from_signature(signature),
+        sender=sender,
+        sp=call_params,
+        signer=signer,
+        method_args=method_args,
+        boxes=refs[:MAX_REFS_PER_TXN],
+    )
+    for pad_refs in pads:
+        atc.add_transaction(TransactionWithSigner(ApplicationNoOpTxn(sender, pad_params, app_id, boxes=pad_refs), signer))
+    return atc
+
+
+def open_pages_atc(
+    params,
+    app_id: int,
+    payment_id: int,
+    pages: List[int],
+    existing: Set[bytes],
+    sender: str,
+    signer,
+):
+    """Group opening amount pages and their bitmap pages; the creator pays the new boxes
+
+    Args:
+        existing: Names of the payment's boxes that already exist
+    """
+    from algosdk import logic
+    from algosdk.atomic_transaction_composer import TransactionWithSigner
+    from algosdk.transaction import PaymentTxn
+
+    boxes = page_boxes(payment_id, pages)
+    created = len(boxes - existing)
+    funding = PaymentTxn(sender, params, logic.get_application_address(app_id), created * CONTRIBUTOR_PAGE_MIN_BALANCE)
+    return _call_atc(
+        params, app_id, OPEN_SLOT_PAGES_SIGNATURE,
+        [payment_id, pages, TransactionWithSigner(funding, signer)],
+        [payment_box_name(payment_id)] + sorted(boxes), sender, signer,
+    )
+
+
+def close_contributions_atc(
+    params,
+    app_id: int,
+    payment_id: int,
+    contributors: List[bytes],
+    pages: List[int],
+    sender: str,
+    signer,
+):
+    """Group deleting contributor boxes and pages of a paid-out payment
+
+    One inner refund goes to each contributor and one to the creator for
+    the pages; anyone can send it.
+    """
+    from algosdk import encoding
+
+    boxes = [contributor_box_name(payment_id, contributor) for contributor in contributors]
+    boxes += sorted(page_boxes(payment_id, pages))
+    return _call_atc(
+        params, app_id, CLOSE_CONTRIBUTIONS_SIGNATURE,
+        [payment_id, [encoding.encode_address(contributor) for contributor in contributors], pages],
+        [payment_box_name(payment_id)] + boxes, sender, signer,
+        inner_txns=len(contributors) + bool(pages),
+    )
+
+
+def close_payment_atc(params, app_id: int, payment_id: int, sender: str, signer):
+    """Group deleting a paid-out payment's record; only its creator can send it"""
+    return _call_atc(
+        params, app_id, CLOSE_PAYMENT_SIGNATURE, [payment_id], [payment_box_name(payment_id)], sender, signer,
+        inner_txns=1,
+    )
+
+
+def contribute_slot_atc(
+    params,
+    app_id: int,
+    payment_id: int,
+    record: PaymentRecord,
+    slot: int,
+    amount: int,
+    sender: str,
+    signer,
+):
+    """Group paying the share of one slot: the payment and the contribute_slot call
+
+    The call references the payment record, the slot's bitmap and amount
+    pages (one box reference of I/O quota each) and the receiver's deferral
+    box, and pays the fee of the payout that completes the split.
+    """
+    import copy
+
+    from algosdk import abi, logic
+    from algosdk.atomic_transaction_composer import AtomicTransactionComposer, TransactionWithSigner
+    from algosdk.transaction import PaymentTxn
+
+    funding = PaymentTxn(sender, params, logic.get_application_address(app_id), amount)
+    call_params = copy.copy(params)
+    call_params.flat_fee = True
+    call_params.fee = max(params.min_fee, 1000) * 2
+
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=app_id,
+        method=abi.Method.from_signature(CONTRIBUTE_SLOT_SIGNATURE),
+        sender=sender,
+        sp=call_params,
+        signer=signer,
+        method_args=[payment_id, slot, TransactionWithSigner(funding, signer)],
+        boxes=[
+            (0, payment_box_name(payment_id)),
+            (0, bitmap_page_name(payment_id, slot // BITMAP_PAGE_SLOTS)),
+            (0, amount_page_name(payment_id, slot // AMOUNT_PAGE_SLOTS)),
+            (0, deferral_box_name(record.receiver)),
+        ],
+    )
+    return atc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paged contributions of PaymentSplit payments")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    read = sub.add_parser("read", help="List the paid slots of a payment")
+    read.add_argument("payment_id", type=int)
+    read.add_argument("--json", help="Also write {slot: amount} to this file")
+
+    open_pages = sub.add_parser("open", help="Open every page of a payment (creator only)")
+    open_pages.add_argument("payment_id", type=int)
+
+    pay = sub.add_parser("pay", help="Pay the share of one slot")
+    pay.add_argument("payment_id", type=int)
+    pay.add_argument("slot", type=int)
+    pay.add_argument("amount", type=int, help="Amount in microAlgos")
+
+    close = sub.add_parser("close", help="Delete the boxes of a paid-out payment and refund their minimum balance")
+    close.add_argument("payment_id", type=int)
+
+    args = parser.parse_args()
+
+    from algod_pool import client_from_env
+
+    app_id = int(os.environ["PAYMENT_APP_ID"])
+    algod_client = client_from_env()
+    record = read_payment(algod_client, app_id, args.payment_id)
+
+    if args.command == "read":
+        contributions = read_contributions(algod_client, app_id, args.payment_id, record.participants)
+        print(f"✅ {len(contributions)} of {record.participants} slot(s) paid")
+        print(f"   Collected: {sum(contributions.values()) / 1_000_000} of {record.total_amount / 1_000_000} ALGO")
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump({str(slot): amount for slot, amount in contributions.items()}, f)
+        return True
+
+    from algosdk import account, mnemonic as mn
+    from algosdk.atomic_transaction_composer import AccountTransactionSigner
+
+    from algosdk import encoding
+
+    private_key = mn.to_private_key(os.environ["DEPLOYER_MNEMONIC"])
+    sender = account.address_from_private_key(private_key)
+    signer = AccountTransactionSigner(private_key)
+
+    if args.command == "pay":
+        atc = contribute_slot_atc(
+            algod_client.suggested_params(), app_id, args.payment_id, record, args.slot, args.amount, sender, signer,
+        )
+        atc.execute(algod_client, 4)
+        print(f"✅ Paid slot {args.slot} of payment {args.payment_id}")
+        return True
+
+    existing = list_payment_boxes(algod_client, app_id, args.payment_id)
+
+    if args.command == "open":
+        pages = [page for page in amount_pages(record.participants) if amount_page_name(args.payment_id, page) not in existing]
+        for start in range(0, len(pages), PAGES_PER_CALL):
+            batch = pages[start:start + PAGES_PER_CALL]
+            atc = open_pages_atc(algod_client.suggested_params(), app_id, args.payment_id, batch, existing, sender, signer)
+            atc.execute(algod_client, 4)
+            existing |= page_boxes(args.payment_id, batch)
+        print(f"✅ Opened {len(pages)} amount page(s) of payment {args.payment_id}")
+        return True
+
+    if record.status != PAYMENT_PAID_OUT:
+        print(f"❌ Payment {args.payment_id} is not paid out")
+        return False
+
+    contributors = sorted(filter(None, (contributor_from_box_name(name, args.payment_id) for name in existing)))
+    for start in range(0, len(contributors), CONTRIBUTORS_PER_CALL):
+        atc = close_contributions_atc(
+            algod_client.suggested_params(), app_id, args.payment_id,
+            contributors[start:start + CONTRIBUTORS_PER_CALL], [], sender, signer,
+        )
+        atc.execute(algod_client, 4)
+
+    pages = [page for page in amount_pages(record.participants) if amount_page_name(args.payment_id, page) in existing]
+    for start in range(0, len(pages), PAGES_PER_CALL):
+        atc = close_contributions_atc(
+            algod_client.suggested_params(), app_id, args.payment_id, [], pages[start:start + PAGES_PER_CALL], sender, signer,
+        )
+        atc.execute(algod_client, 4)
+    print(f"✅ Closed {len(contributors)} contributor box(es) and {len(pages)} amount page(s)")
+
+    if encoding.decode_address(sender) == record.creator:
+        close_payment_atc(algod_client.suggested_params(), app_id, args.payment_id, sender, signer).execute(algod_client, 4)
+        print(f"✅ Closed payment {args.payment_id}")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,1013 @@
+"""
+Opcode-cost benchmark and regression gate for the AlgoSplit contracts
+Runs each ABI method of EscrowClaimLink, PaymentSplit and the raw TEAL
+escrow through algod's simulate endpoint on a local network (AlgoKit
+LocalNet), and records per method:
+
+- opcode_budget: app budget consumed by the group's app calls
+- inner_txns: inner transactions issued (recursively)
+- boxes_accessed: distinct boxes touched
+- box_bytes_read: size of the existing boxes touched
+- box_bytes_written: bytes of box values written or created
+
+Simulation is read-only, so state needed by a method (a link to claim, a
+payment to contribute to) is created with real transactions first. The
+TEAL escrow's create, claim and cancel routes are also printed next to the
+EscrowClaimLink methods they stand in for.
+
+Usage:
+    python cost_benchmark.py --update       # write cost_baseline.json
+    python cost_benchmark.py --check        # fail if any cost increased
+    (reads ALGOD_URL, ALGOD_TOKEN, KMD_URL, KMD_TOKEN; LocalNet defaults)
+"""
+import argparse
+import base64
+import copy
+import json
+import os
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from algosdk import abi, encoding, kmd, logic
+from algosdk.atomic_transaction_composer import (
+    AccountTransactionSigner,
+    AtomicTransactionComposer,
+    TransactionWithSigner,
+)
+from algosdk.transaction import (
+    ApplicationCreateTxn,
+    ApplicationNoOpTxn,
+    AssetCreateTxn,
+    AssetTransferTxn,
+    OnComplete,
+    PaymentTxn,
+    StateSchema,
+    wait_for_confirmation,
+)
+from algosdk.error import AlgodHTTPError
+from algosdk.v2client import algod
+from algosdk.v2client.models import SimulateRequest, SimulateTraceConfig
+
+from batch_claim_links import ZERO_ADDRESS
+from box_codec import (
+    CONTRIBUTOR_BOX_MIN_BALANCE,
+    DEFERRAL_BOX_MIN_BALANCE,
+    PAYMENT_BOX_MIN_BALANCE,
+    STREAM_BOX_MIN_BALANCE,
+    amount_page_name,
+    asset_registry_name,
+    claim_box_name,
+    contributor_box_name,
+    deferral_box_name,
+    payment_box_name,
+    sender_index_name,
+    stream_box_name,
+    teal_link_box_name,
+)
+from build_contracts import SCRIPT_DIR, compile_teal
+
+BASELINE_PATH = SCRIPT_DIR / "cost_baseline.json"
+ARTIFACT_DIR = SCRIPT_DIR / "out"
+
+LOCALNET_ALGOD_URL = "http://localhost:4001"
+LOCALNET_KMD_URL = "http://localhost:4002"
+LOCALNET_TOKEN = "a" * 64
+
+METRICS = ("opcode_budget", "inner_txns", "boxes_accessed", "box_bytes_read", "box_bytes_written")
+
+ESCROW_METHODS = {
+    "create_claim_link": "create_claim_link(txn,account,uint64)string",
+    "create_claim_links_batch": "create_claim_links_batch(txn,(address,uint64,uint64)[])(uint64,uint64)",
+    "create_asset_links_batch": "create_asset_links_batch(asset,(address,uint64,uint64)[])(uint64,uint64)",
+    "claim": "claim(uint64)bool",
+    "claim_batch": "claim_batch(uint64[])uint64",
+    "cancel": "cancel(uint64)bool",
+    "sweep_expired": "sweep_expired(uint64[])uint64",
+    "create_airdrop": "create_airdrop(txn,byte[32],uint64,uint64,pay)uint64",
+    "claim_airdrop": "claim_airdrop(uint64,uint64,uint64,byte[32][])bool",
+    "close_airdrop": "close_airdrop(uint64)uint64",
+    "purge_airdrop_pages": "purge_airdrop_pages(uint64,uint64)uint64",
+    "create_voucher_book": "create_voucher_book(txn,address,uint64,uint64,pay)uint64",
+    "redeem_voucher": "redeem_voucher(uint64,uint64,account,uint64,uint64,byte[64])bool",
+    "close_voucher_book": "close_voucher_book(uint64)uint64",
+    "purge_voucher_pages": "purge_voucher_pages(uint64,uint64)uint64",
+    "get_claim_info": "get_claim_info(uint64)(address,address,uint64,uint64,uint64,uint64)",
+    "get_asset_registry": "get_asset_registry(uint64)(uint64,uint64,uint64)",
+    "get_liability_ledger": "get_liability_ledger()(uint64,uint64,uint64,uint64)[]",
+    "opt_in_asset": "opt_in_asset(asset)bool",
+}
+
+PAYMENT_METHODS = {
+    "create_payment": "create_payment(account,uint64,uint64,string,string,pay)uint64",
+    "contribute": "contribute(uint64,pay)bool",
+    "contribute_slot": "contribute_slot(uint64,uint64,pay)bool",
+    "open_slot_pages": "open_slot_pages(uint64,uint64[],pay)uint64",
+    "get_payment_info": "get_payment_info(uint64)(address,uint64,uint64,uint64,uint64,string)",
+    "get_contributions": "get_contributions(uint64,uint64,uint64)uint64[]",
+    "has_contributed": "has_contributed(uint64,account)bool",
+    "set_deferred_payout": "set_deferred_payout(bool,pay)bool",
+    "settle": "settle(uint64[])uint64",
+    "close_contributions": "close_contributions(uint64,address[],uint64[])uint64",
+    "close_payment": "close_payment(uint64)uint64",
+    "create_stream": "create_stream(account,uint64,uint64,uint64,uint64,pay,pay)uint64",
+    "fund_stream": "fund_stream(uint64,pay)uint64",
+    "withdraw_stream": "withdraw_stream(uint64)uint64",
+    "cancel_stream": "cancel_stream(uint64)uint64",
+    "get_stream_info": "get_stream_info(uint64)(address,uint64,uint64,uint64,uint64,uint64)",
+}
+
+LINK_AMOUNT = 100_000
+APP_FUNDING = 10_000_000
+
+
+@dataclass
+class BenchEnv:
+    """LocalNet client, funded account and the apps under test"""
+    client: algod.AlgodClient
+    sender: str
+    signer: AccountTransactionSigner
+    escrow_app_id: int = 0
+    payment_app_id: int = 0
+    teal_app_id: int = 0
+
+    def params(self, fee_multiplier: int = 1):
+        params = self.client.suggested_params()
+        if fee_multiplier > 1:
+            params = copy.copy(params)
+            params.flat_fee = True
+            params.fee = max(params.min_fee, 1000) * fee_multiplier
+        return params
+
+
+def _method(signatures: Dict[str, str], name: str) -> abi.Method:
+    return abi.Method.from_signature(signatures[name])
+
+
+def _read_counter(env: BenchEnv, app_id: int, key: bytes) -> int:
+    info = env.client.application_info(app_id)
+    for item in info["params"].get("global-state", []):
+        if base64.b64decode(item["key"]) == key:
+            return item["value"]["uint"]
+    return 0
+
+
+def _read_claim_count(env: BenchEnv) -> int:
+    return _read_counter(env, env.escrow_app_id, b"claim_count")
+
+
+# -- setup -------------------------------------------------------------
+
+
+def localnet_env() -> BenchEnv:
+    """Connect to LocalNet and take a funded account from the default KMD wallet"""
+    client = algod.AlgodClient(
+        os.environ.get("ALGOD_TOKEN", LOCALNET_TOKEN),
+        os.environ.get("ALGOD_URL", LOCALNET_ALGOD_URL),
+    )
+    kmd_client = kmd.KMDClient(
+        os.environ.get("KMD_TOKEN", LOCALNET_TOKEN),
+        os.environ.get("KMD_URL", LOCALNET_KMD_URL),
+    )
+
+    wallet_id = next(
+        wallet["id"] for wallet in kmd_client.list_wallets()
+        if wallet["name"] == "unencrypted-default-wallet"
+    )
+    handle = kmd_client.init_wallet_handle(wallet_id, "")
+    try:
+        addresses = kmd_client.list_keys(handle)
+        sender = max(addresses, key=lambda address: client.account_info(address)["amount"])
+        private_key = kmd_client.export_key(handle, "", sender)
+    finally:
+        kmd_client.release_wallet_handle(handle)
+
+    return BenchEnv(client=client, sender=sender, signer=AccountTransactionSigner(private_key))
+
+
+def _create_app(env: BenchEnv, approval: bytes, clear: bytes, global_uints: int, global_bytes: int) -> int:
+    txn = ApplicationCreateTxn(
+        sender=env.sender,
+        sp=env.params(),
+        on_complete=OnComplete.NoOpOC,
+        approval_program=approval,
+        clear_program=clear,
+        global_schema=StateSchema(num_uints=global_uints, num_byte_slices=global_bytes),
+        local_schema=StateSchema(num_uints=0, num_byte_slices=0),
+        extra_pages=(max(len(approval), len(clear)) - 1) // 2048,
+    )
+    tx_id = env.client.send_transaction(txn.sign(env.signer.private_key))
+    app_id = wait_for_confirmation(env.client, tx_id, 4)["application-index"]
+
+    # Fund the app account for box MBR and inner transaction amounts
+    funding = PaymentTxn(env.sender, env.params(), logic.get_application_address(app_id), APP_FUNDING)
+    wait_for_confirmation(env.client, env.client.send_transaction(funding.sign(env.signer.private_key)), 4)
+    return app_id
+
+
+def deploy_apps(env: BenchEnv, artifact_dir: Path = ARTIFACT_DIR) -> None:
+    """Deploy the PuyaPy contracts from build artifacts and the raw TEAL escrow"""
+    for contract, attr in (("EscrowClaimLink", "escrow_app_id"), ("PaymentSplit", "payment_app_id")):
+        spec = json.loads((artifact_dir / f"{contract}.arc32.json").read_text(encoding="utf-8"))
+        schema = spec["state"]["global"]
+        app_id = _create_app(
+            env,
+            (artifact_dir / f"{contract}.approval.bin").read_bytes(),
+            (artifact_dir / f"{contract}.clear.bin").read_bytes(),
+            schema["num_uints"],
+            schema["num_byte_slices"],
+        )
+        setattr(env, attr, app_id)
+
+    approval = compile_teal(env.client, (SCRIPT_DIR / "escrow_approval.teal").read_text())
+    clear = compile_teal(env.client, (SCRIPT_DIR / "escrow_clear.teal").read_text())
+    env.teal_app_id = _create_app(env, approval, clear, 1, 0)
+
+
+def _add_create_link(atc: AtomicTransactionComposer, env: BenchEnv, claim_id: int, expiry_time: int = 0) -> None:
+    app_address = logic.get_application_address(env.escrow_app_id)
+    funding = PaymentTxn(env.sender, env.params(), app_address, LINK_AMOUNT)
+    atc.add_method_call(
+        app_id=env.escrow_app_id,
+        method=_method(ESCROW_METHODS, "create_claim_link"),
+        sender=env.sender,
+        sp=env.params(),
+        signer=env.signer,
+        method_args=[TransactionWithSigner(funding, env.signer), ZERO_ADDRESS, expiry_time],
+        boxes=[
+            (0, claim_box_name(claim_id)),
+            (0, sender_index_name(encoding.decode_address(env.sender))),
+            (0, asset_registry_name(0)),
+        ],
+    )
+
+
+def create_links(env: BenchEnv, count: int, expiry_time: int = 0) -> List[int]:
+    """Create real claim links (state for claim/cancel/sweep scenarios)"""
+    first_id = _read_claim_count(env)
+    ids = list(range(first_id, first_id + count))
+    for start in range(0, count, 8):
+        atc = AtomicTransactionComposer()
+        for claim_id in ids[start:start + 8]:
+            _add_create_link(atc, env, claim_id, expiry_time)
+        atc.execute(env.client, 4)
+    return ids
+
+
+def create_asset(env: BenchEnv) -> int:
+    """Create an ASA held by the sender (state for the ASA scenarios)"""
+    txn = AssetCreateTxn(
+        env.sender, env.params(), total=10**12, default_frozen=False,
+        unit_name="BENCH", asset_name="cost benchmark", decimals=6,
+    )
+    tx_id = env.client.send_transaction(txn.sign(env.signer.private_key))
+    return wait_for_confirmation(env.client, tx_id, 4)["asset-index"]
+
+
+def _airdrop_atc(env: BenchEnv):
+    """create_airdrop group for two leaves paying the sender, and their Merkle tree"""
+    from merkle_airdrop import MerkleTree, create_airdrop_atc, leaf_hash
+
+    sender_key = encoding.decode_address(env.sender)
+    tree = MerkleTree([leaf_hash(index, sender_key, LINK_AMOUNT) for index in range(2)])
+    manifest = {"root": tree.root.hex(), "leaf_count": 2, "total": 2 * LINK_AMOUNT}
+    return create_airdrop_atc(env.client, env.escrow_app_id, env.sender, env.signer, manifest), tree
+
+
+def create_airdrop(env: BenchEnv):
+    """Create a two-leaf airdrop (state for the claim, close and purge scenarios)
+
+    Returns:
+        (airdrop ID, Merkle tree)
+    """
+    atc, tree = _airdrop_atc(env)
+    return atc.execute(env.client, 4).abi_results[0].return_value, tree
+
+
+def create_payment(env: BenchEnv) -> int:
+    """Create a real payment split (state for the contribute scenario)"""
+    atc = _payment_create_atc(env)
+    return atc.execute(env.client, 4).abi_results[0].return_value
+
+
+def _payment_create_atc(env: BenchEnv) -> AtomicTransactionComposer:
+    payment_id = _read_counter(env, env.payment_app_id, b"payment_count")
+    app_address = logic.get_application_address(env.payment_app_id)
+    mbr_payment = PaymentTxn(env.sender, env.params(), app_address, PAYMENT_BOX_MIN_BALANCE)
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=env.payment_app_id,
+        method=_method(PAYMENT_METHODS, "create_payment"),
+        sender=env.sender,
+        sp=env.params(),
+        signer=env.signer,
+        method_args=[
+            env.sender, 2 * LINK_AMOUNT, 2, "bench", "cost benchmark", TransactionWithSigner(mbr_payment, env.signer),
+        ],
+        boxes=[(0, payment_box_name(payment_id))],
+    )
+    return atc
+
+
+def _contribute_atc(env: BenchEnv, payment_id: int) -> AtomicTransactionComposer:
+    sender_key = encoding.decode_address(env.sender)
+    funding = PaymentTxn(
+        env.sender, env.params(), logic.get_application_address(env.payment_app_id),
+        LINK_AMOUNT + CONTRIBUTOR_BOX_MIN_BALANCE,
+    )
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=env.payment_app_id,
+        method=_method(PAYMENT_METHODS, "contribute"),
+        sender=env.sender,
+        sp=env.params(2),
+        signer=env.signer,
+        method_args=[payment_id, TransactionWithSigner(funding, env.signer)],
+        boxes=[
+            (0, payment_box_name(payment_id)),
+            (0, contributor_box_name(payment_id, sender_key)),
+            (0, deferral_box_name(sender_key)),
+        ],
+    )
+    return atc
+
+
+def _deferral_atc(env: BenchEnv, enabled: bool) -> AtomicTransactionComposer:
+    # Enabling pays for the sender's deferral box; disabling refunds it in an inner payment
+    app_address = logic.get_application_address(env.payment_app_id)
+    payment = PaymentTxn(env.sender, env.params(), app_address, DEFERRAL_BOX_MIN_BALANCE if enabled else 0)
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=env.payment_app_id,
+        method=_method(PAYMENT_METHODS, "set_deferred_payout"),
+        sender=env.sender,
+        sp=env.params(1 if enabled else 2),
+        signer=env.signer,
+        method_args=[enabled, TransactionWithSigner(payment, env.signer)],
+        boxes=[(0, deferral_box_name(encoding.decode_address(env.sender)))],
+    )
+    return atc
+
+
+def completed_payment(env: BenchEnv) -> int:
+    """Create a payment and pay both its slots while its receiver defers payouts
+
+    The payment is left completed and awaiting settle(); the deferral is
+    switched off again so other scenarios pay out on completion.
+    """
+    from contributor_pages import contribute_slot_atc, open_pages_atc, read_payment
+
+    _deferral_atc(env, True).execute(env.client, 4)
+    payment_id = create_payment(env)
+    open_pages_atc(
+        env.params(), env.payment_app_id, payment_id, [0], set(), env.sender, env.signer,
+    ).execute(env.client, 4)
+    record = read_payment(env.client, env.payment_app_id, payment_id)
+    for slot in range(2):
+        contribute_slot_atc(
+            env.params(), env.payment_app_id, payment_id, record, slot, LINK_AMOUNT, env.sender, env.signer,
+        ).execute(env.client, 4)
+    _deferral_atc(env, False).execute(env.client, 4)
+    return payment_id
+
+
+def paid_out_payment(env: BenchEnv) -> int:
+    """A completed payment settled to its receiver (state for the close scenarios)"""
+    from settle_payments import settle_atc
+
+    payment_id = completed_payment(env)
+    settle_atc(env.params(), env.payment_app_id, env.sender, env.signer, [payment_id]).execute(env.client, 4)
+    return payment_id
+
+
+# -- scenarios ---------------------------------------------------------
+
+
+def scenario_create_claim_link(env: BenchEnv) -> AtomicTransactionComposer:
+    atc = AtomicTransactionComposer()
+    _add_create_link(atc, env, _read_claim_count(env))
+    return atc
+
+
+def scenario_create_claim_links_batch(env: BenchEnv) -> AtomicTransactionComposer:
+    first_id = _read_claim_count(env)
+    entries = [[ZERO_ADDRESS, LINK_AMOUNT, 0] for _ in range(8)]
+    app_address = logic.get_application_address(env.escrow_app_id)
+    funding = PaymentTxn(env.sender, env.params(), app_address, LINK_AMOUNT * len(entries))
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=env.escrow_app_id,
+        method=_method(ESCROW_METHODS, "create_claim_links_batch"),
+        sender=env.sender,
+        sp=env.params(),
+        signer=env.signer,
+        method_args=[TransactionWithSigner(funding, env.signer), entries],
+        boxes=[(0, claim_box_name(first_id + i)) for i in range(len(entries))],
+    )
+    return atc
+
+
+def scenario_create_asset_links_batch(env: BenchEnv) -> AtomicTransactionComposer:
+    # A new asset, so the call also opts the escrow in; the funding transfer follows it
+    asset_id = create_asset(env)
+    first_id = _read_claim_count(env)
+    entries = [[ZERO_ADDRESS, LINK_AMOUNT, 0] for _ in range(8)]
+    app_address = logic.get_application_address(env.escrow_app_id)
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=env.escrow_app_id,
+        method=_method(ESCROW_METHODS, "create_asset_links_batch"),
+        sender=env.sender,
+        sp=env.params(2),
+        signer=env.signer,
+        method_args=[asset_id, entries],
+        boxes=[(0, claim_box_name(first_id + i)) for i in range(7)],  # the asset takes the eighth reference
+    )
+    funding = AssetTransferTxn(env.sender, env.params(), app_address, LINK_AMOUNT * len(entries), asset_id)
+    atc.add_transaction(TransactionWithSigner(funding, env.signer))
+    return atc
+
+
+def scenario_opt_in_asset(env: BenchEnv) -> AtomicTransactionComposer:
+    asset_id = create_asset(env)
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=env.escrow_app_id,
+        method=_method(ESCROW_METHODS, "opt_in_asset"),
+        sender=env.sender,
+        sp=env.params(2),
+        signer=env.signer,
+        method_args=[asset_id],
+        boxes=[(0, asset_registry_name(asset_id))],
+    )
+    return atc
+
+
+def _single_id_call(env: BenchEnv, name: str, claim_id: int, fee_multiplier: int = 1) -> AtomicTransactionComposer:
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=env.escrow_app_id,
+        method=_method(ESCROW_METHODS, name),
+        sender=env.sender,
+        sp=env.params(fee_multiplier),
+        signer=env.signer,
+        method_args=[claim_id],
+        boxes=[(0, claim_box_name(claim_id))],
+    )
+    return atc
+
+
+def scenario_claim(env: BenchEnv) -> AtomicTransactionComposer:
+    return _single_id_call(env, "claim", create_links(env, 1)[0], fee_multiplier=2)
+
+
+def scenario_cancel(env: BenchEnv) -> AtomicTransactionComposer:
+    return _single_id_call(env, "cancel", create_links(env, 1)[0], fee_multiplier=2)
+
+
+def scenario_get_claim_info(env: BenchEnv) -> AtomicTransactionComposer:
+    return _single_id_call(env, "get_claim_info", create_links(env, 1)[0])
+
+
+def scenario_get_asset_registry(env: BenchEnv) -> AtomicTransactionComposer:
+    create_links(env, 1)
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=env.escrow_app_id,
+        method=_method(ESCROW_METHODS, "get_asset_registry"),
+        sender=env.sender,
+        sp=env.params(),
+        signer=env.signer,
+        method_args=[0],
+        boxes=[(0, asset_registry_name(0))],
+    )
+    return atc
+
+
+def scenario_get_liability_ledger(env: BenchEnv) -> AtomicTransactionComposer:
+    create_links(env, 1)
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=env.escrow_app_id,
+        method=_method(ESCROW_METHODS, "get_liability_ledger"),
+        sender=env.sender,
+        sp=env.params(),
+        signer=env.signer,
+    )
+    return atc
+
+
+def scenario_sweep_expired(env: BenchEnv) -> AtomicTransactionComposer:
+    # Expiry 1 is in the past, so all eight links are sweepable; one sender
+    # and asset means a single merged refund
+    ids = create_links(env, 8, expiry_time=1)
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=env.escrow_app_id,
+        method=_method(ESCROW_METHODS, "sweep_expired"),
+        sender=env.sender,
+        sp=env.params(2),
+        signer=env.signer,
+        method_args=[ids],
+        boxes=[(0, claim_box_name(claim_id)) for claim_id in ids],
+    )
+    return atc
+
+
+def scenario_claim_batch(env: BenchEnv) -> AtomicTransactionComposer:
+    # One asset, so the eight payouts merge into a single inner transfer
+    ids = create_links(env, 8)
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=env.escrow_app_id,
+        method=_method(ESCROW_METHODS, "claim_batch"),
+        sender=env.sender,
+        sp=env.params(2),
+        signer=env.signer,
+        method_args=[ids],
+        boxes=[(0, claim_box_name(claim_id)) for claim_id in ids],
+    )
+    return atc
+
+
+def scenario_create_airdrop(env: BenchEnv) -> AtomicTransactionComposer:
+    return _airdrop_atc(env)[0]
+
+
+def scenario_claim_airdrop(env: BenchEnv) -> AtomicTransactionComposer:
+    # Leaf 0 of a two-leaf tree; the group includes its budget calls
+    from merkle_airdrop import claim_airdrop_atc
+
+    airdrop_id, tree = create_airdrop(env)
+    return claim_airdrop_atc(
+        env.client, env.escrow_app_id, airdrop_id, env.sender, env.signer, tree.depth, 0, LINK_AMOUNT, tree.proof(0),
+    )
+
+
+def scenario_close_airdrop(env: BenchEnv) -> AtomicTransactionComposer:
+    from merkle_airdrop import close_airdrop_atc
+
+    airdrop_id, _tree = create_airdrop(env)
+    return close_airdrop_atc(env.client, env.escrow_app_id, airdrop_id, env.sender, env.signer)
+
+
+def scenario_purge_airdrop_pages(env: BenchEnv) -> AtomicTransactionComposer:
+    # All pages of a closed airdrop, which also deletes its record
+    from merkle_airdrop import close_airdrop_atc, purge_pages_atc, read_airdrop
+
+    airdrop_id, _tree = create_airdrop(env)
+    close_airdrop_atc(env.client, env.escrow_app_id, airdrop_id, env.sender, env.signer).execute(env.client, 4)
+    pages = range(read_airdrop(env.client, env.escrow_app_id, airdrop_id).pages)
+    return purge_pages_atc(env.client, env.escrow_app_id, airdrop_id, pages, env.sender, env.signer)
+
+
+def scenario_create_voucher_book(env: BenchEnv) -> AtomicTransactionComposer:
+    from vouchers import create_voucher_book_atc
+
+    return create_voucher_book_atc(env.client, env.escrow_app_id, env.sender, env.signer, LINK_AMOUNT, env.sender, 1)
+
+
+def scenario_close_voucher_book(env: BenchEnv) -> AtomicTransactionComposer:
+    from vouchers import close_atc, create_voucher_book
+
+    book_id = create_voucher_book(env.client, env.escrow_app_id, env.sender, env.signer, LINK_AMOUNT, env.sender, 1)
+    return close_atc(env.params(), env.escrow_app_id, book_id, env.sender, env.signer)
+
+
+def scenario_purge_voucher_pages(env: BenchEnv) -> AtomicTransactionComposer:
+    # All pages of a closed book, which also deletes its record
+    from vouchers import close_atc, create_voucher_book, purge_pages_atc, read_voucher_book
+
+    book_id = create_voucher_book(env.client, env.escrow_app_id, env.sender, env.signer, LINK_AMOUNT, env.sender, 1)
+    close_atc(env.params(), env.escrow_app_id, book_id, env.sender, env.signer).execute(env.client, 4)
+    pages = range(read_voucher_book(env.client, env.escrow_app_id, book_id).pages)
+    return purge_pages_atc(env.params(), env.escrow_app_id, book_id, pages, env.sender, env.signer)
+
+
+def scenario_redeem_voucher(env: BenchEnv) -> AtomicTransactionComposer:
+    # A book with one voucher for the caller; the group includes its budget calls
+    from vouchers import VoucherEntry, create_voucher_book, mint_vouchers, redeem_atc
+
+    book_id = create_voucher_book(env.client, env.escrow_app_id, env.sender, env.signer, LINK_AMOUNT, env.sender, 1)
+    voucher = mint_vouchers(
+        env.signer.private_key, env.escrow_app_id, book_id, [VoucherEntry(env.sender, LINK_AMOUNT)]
+    )[0]
+    return redeem_atc(env.params(), voucher, env.sender, env.signer)
+
+
+def scenario_create_payment(env: BenchEnv) -> AtomicTransactionComposer:
+    return _payment_create_atc(env)
+
+
+def scenario_contribute(env: BenchEnv) -> AtomicTransactionComposer:
+    return _contribute_atc(env, create_payment(env))
+
+
+def scenario_contribute_slot(env: BenchEnv) -> AtomicTransactionComposer:
+    # Slot 0 of a payment whose pages the creator opened beforehand
+    from contributor_pages import contribute_slot_atc, open_pages_atc, read_payment
+
+    payment_id = create_payment(env)
+    open_pages_atc(env.params(), env.payment_app_id, payment_id, [0], set(), env.sender, env.signer).execute(env.client, 4)
+    record = read_payment(env.client, env.payment_app_id, payment_id)
+    return contribute_slot_atc(
+        env.params(), env.payment_app_id, payment_id, record, 0, LINK_AMOUNT, env.sender, env.signer,
+    )
+
+
+def scenario_open_slot_pages(env: BenchEnv) -> AtomicTransactionComposer:
+    # Amount page 0 and bitmap page 0 of a new payment
+    from contributor_pages import open_pages_atc
+
+    payment_id = create_payment(env)
+    return open_pages_atc(env.params(), env.payment_app_id, payment_id, [0], set(), env.sender, env.signer)
+
+
+def scenario_get_contributions(env: BenchEnv) -> AtomicTransactionComposer:
+    # Both slots of a completed payment, read from amount page 0
+    payment_id = completed_payment(env)
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=env.payment_app_id,
+        method=_method(PAYMENT_METHODS, "get_contributions"),
+        sender=env.sender,
+        sp=env.params(),
+        signer=env.signer,
+        method_args=[payment_id, 0, 2],
+        boxes=[(0, payment_box_name(payment_id)), (0, amount_page_name(payment_id, 0))],
+    )
+    return atc
+
+
+def scenario_has_contributed(env: BenchEnv) -> AtomicTransactionComposer:
+    payment_id = create_payment(env)
+    _contribute_atc(env, payment_id).execute(env.client, 4)
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=env.payment_app_id,
+        method=_method(PAYMENT_METHODS, "has_contributed"),
+        sender=env.sender,
+        sp=env.params(),
+        signer=env.signer,
+        method_args=[payment_id, env.sender],
+        boxes=[(0, contributor_box_name(payment_id, encoding.decode_address(env.sender)))],
+    )
+    return atc
+
+
+def scenario_set_deferred_payout(env: BenchEnv) -> AtomicTransactionComposer:
+    # Enabling, which creates the deferral box (completed_payment leaves it disabled)
+    return _deferral_atc(env, True)
+
+
+def scenario_settle(env: BenchEnv) -> AtomicTransactionComposer:
+    from settle_payments import settle_atc
+
+    return settle_atc(env.params(), env.payment_app_id, env.sender, env.signer, [completed_payment(env)])
+
+
+def scenario_close_contributions(env: BenchEnv) -> AtomicTransactionComposer:
+    # Slot contributions have no contributor boxes; amount page 0 also closes bitmap page 0
+    from contributor_pages import close_contributions_atc
+
+    payment_id = paid_out_payment(env)
+    return close_contributions_atc(env.params(), env.payment_app_id, payment_id, [], [0], env.sender, env.signer)
+
+
+def scenario_close_payment(env: BenchEnv) -> AtomicTransactionComposer:
+    from contributor_pages import close_contributions_atc, close_payment_atc
+
+    payment_id = paid_out_payment(env)
+    close_contributions_atc(
+        env.params(), env.payment_app_id, payment_id, [], [0], env.sender, env.signer,
+    ).execute(env.client, 4)
+    return close_payment_atc(env.params(), env.payment_app_id, payment_id, env.sender, env.signer)
+
+
+def scenario_get_payment_info(env: BenchEnv) -> AtomicTransactionComposer:
+    payment_id = create_payment(env)
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=env.payment_app_id,
+        method=_method(PAYMENT_METHODS, "get_payment_info"),
+        sender=env.sender,
+        sp=env.params(),
+        signer=env.signer,
+        method_args=[payment_id],
+        boxes=[(0, payment_box_name(payment_id))],
+    )
+    return atc
+
+
+def _stream_create_atc(env: BenchEnv) -> AtomicTransactionComposer:
+    # A per-round stream that started 100 rounds ago, so withdraw and cancel pay out
+    stream_id = _read_counter(env, env.payment_app_id, b"payment_count")
+    start = env.client.status()["last-round"]
+    app_address = logic.get_application_address(env.payment_app_id)
+    funding = PaymentTxn(env.sender, env.params(), app_address, LINK_AMOUNT)
+    mbr_payment = PaymentTxn(env.sender, env.params(), app_address, STREAM_BOX_MIN_BALANCE)
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=env.payment_app_id,
+        method=_method(PAYMENT_METHODS, "create_stream"),
+        sender=env.sender,
+        sp=env.params(),
+        signer=env.signer,
+        method_args=[
+            env.sender, 1, max(start - 100, 1), 0, 1,
+            TransactionWithSigner(funding, env.signer), TransactionWithSigner(mbr_payment, env.signer),
+        ],
+        boxes=[(0, stream_box_name(stream_id))],
+    )
+    return atc
+
+
+def _stream_call(env: BenchEnv, method: str, fee_multiplier: int) -> AtomicTransactionComposer:
+    stream_id = _stream_create_atc(env).execute(env.client, 4).abi_results[0].return_value
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=env.payment_app_id,
+        method=_method(PAYMENT_METHODS, method),
+        sender=env.sender,
+        sp=env.params(fee_multiplier),
+        signer=env.signer,
+        method_args=[stream_id],
+        boxes=[(0, stream_box_name(stream_id))],
+    )
+    return atc
+
+
+def scenario_create_stream(env: BenchEnv) -> AtomicTransactionComposer:
+    return _stream_create_atc(env)
+
+
+def scenario_fund_stream(env: BenchEnv) -> AtomicTransactionComposer:
+    stream_id = _stream_create_atc(env).execute(env.client, 4).abi_results[0].return_value
+    funding = PaymentTxn(env.sender, env.params(), logic.get_application_address(env.payment_app_id), LINK_AMOUNT)
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=env.payment_app_id,
+        method=_method(PAYMENT_METHODS, "fund_stream"),
+        sender=env.sender,
+        sp=env.params(),
+        signer=env.signer,
+        method_args=[stream_id, TransactionWithSigner(funding, env.signer)],
+        boxes=[(0, stream_box_name(stream_id))],
+    )
+    return atc
+
+
+def scenario_withdraw_stream(env: BenchEnv) -> AtomicTransactionComposer:
+    return _stream_call(env, "withdraw_stream", 2)
+
+
+def scenario_cancel_stream(env: BenchEnv) -> AtomicTransactionComposer:
+    return _stream_call(env, "cancel_stream", 3)
+
+
+def scenario_get_stream_info(env: BenchEnv) -> AtomicTransactionComposer:
+    return _stream_call(env, "get_stream_info", 1)
+
+
+def _teal_create_atc(env: BenchEnv, claim_id: int) -> AtomicTransactionComposer:
+    funding = PaymentTxn(env.sender, env.params(), logic.get_application_address(env.teal_app_id), LINK_AMOUNT)
+    call = ApplicationNoOpTxn(
+        env.sender,
+        env.params(),
+        env.teal_app_id,
+        app_args=[b"create", encoding.decode_address(ZERO_ADDRESS), (0).to_bytes(8, "big")],
+        boxes=[(0, teal_link_box_name(claim_id))],
+    )
+    atc = AtomicTransactionComposer()
+    atc.add_transaction(TransactionWithSigner(funding, env.signer))
+    atc.add_transaction(TransactionWithSigner(call, env.signer))
+    return atc
+
+
+def create_teal_link(env: BenchEnv) -> int:
+    claim_id = _read_counter(env, env.teal_app_id, b"claim_count")
+    _teal_create_atc(env, claim_id).execute(env.client, 4)
+    return claim_id
+
+
+def _teal_link_call(env: BenchEnv, method: bytes, claim_id: int) -> AtomicTransactionComposer:
+    atc = AtomicTransactionComposer()
+    txn = ApplicationNoOpTxn(
+        env.sender,
+        env.params(2),
+        env.teal_app_id,
+        app_args=[method, claim_id.to_bytes(8, "big")],
+        boxes=[(0, teal_link_box_name(claim_id))],
+    )
+    atc.add_transaction(TransactionWithSigner(txn, env.signer))
+    return atc
+
+
+def scenario_teal_create(env: BenchEnv) -> AtomicTransactionComposer:
+    return _teal_create_atc(env, _read_counter(env, env.teal_app_id, b"claim_count"))
+
+
+def scenario_teal_claim(env: BenchEnv) -> AtomicTransactionComposer:
+    return _teal_link_call(env, b"claim", create_teal_link(env))
+
+
+def scenario_teal_cancel(env: BenchEnv) -> AtomicTransactionComposer:
+    return _teal_link_call(env, b"cancel", create_teal_link(env))
+
+
+SCENARIOS: Dict[str, Callable[[BenchEnv], AtomicTransactionComposer]] = {
+    "EscrowClaimLink.create_claim_link": scenario_create_claim_link,
+    "EscrowClaimLink.create_claim_links_batch[8]": scenario_create_claim_links_batch,
+    "EscrowClaimLink.create_asset_links_batch[8]": scenario_create_asset_links_batch,
+    "EscrowClaimLink.claim": scenario_claim,
+    "EscrowClaimLink.cancel": scenario_cancel,
+    "EscrowClaimLink.get_claim_info": scenario_get_claim_info,
+    "EscrowClaimLink.sweep_expired[8]": scenario_sweep_expired,
+    "EscrowClaimLink.get_asset_registry": scenario_get_asset_registry,
+    "EscrowClaimLink.get_liability_ledger": scenario_get_liability_ledger,
+    "EscrowClaimLink.claim_batch[8]": scenario_claim_batch,
+    "EscrowClaimLink.opt_in_asset": scenario_opt_in_asset,
+    "EscrowClaimLink.create_airdrop": scenario_create_airdrop,
+    "EscrowClaimLink.claim_airdrop": scenario_claim_airdrop,
+    "EscrowClaimLink.close_airdrop": scenario_close_airdrop,
+    "EscrowClaimLink.purge_airdrop_pages": scenario_purge_airdrop_pages,
+    "EscrowClaimLink.create_voucher_book": scenario_create_voucher_book,
+    "EscrowClaimLink.redeem_voucher": scenario_redeem_voucher,
+    "EscrowClaimLink.close_voucher_book": scenario_close_voucher_book,
+    "EscrowClaimLink.purge_voucher_pages": scenario_purge_voucher_pages,
+    "PaymentSplit.create_payment": scenario_create_payment,
+    "PaymentSplit.contribute": scenario_contribute,
+    "PaymentSplit.contribute_slot": scenario_contribute_slot,
+    "PaymentSplit.open_slot_pages": scenario_open_slot_pages,
+    "PaymentSplit.get_payment_info": scenario_get_payment_info,
+    "PaymentSplit.get_contributions": scenario_get_contributions,
+    "PaymentSplit.has_contributed": scenario_has_contributed,
+    "PaymentSplit.set_deferred_payout": scenario_set_deferred_payout,
+    "PaymentSplit.settle": scenario_settle,
+    "PaymentSplit.close_contributions": scenario_close_contributions,
+    "PaymentSplit.close_payment": scenario_close_payment,
+    "PaymentSplit.create_stream": scenario_create_stream,
+    "PaymentSplit.fund_stream": scenario_fund_stream,
+    "PaymentSplit.withdraw_stream": scenario_withdraw_stream,
+    "PaymentSplit.cancel_stream": scenario_cancel_stream,
+    "PaymentSplit.get_stream_info": scenario_get_stream_info,
+    "TealEscrow.create": scenario_teal_create,
+    "TealEscrow.claim": scenario_teal_claim,
+    "TealEscrow.cancel": scenario_teal_cancel,
+}
+
+# TEAL escrow routes and the EscrowClaimLink methods they replace
+TEAL_COUNTERPARTS = {
+    "TealEscrow.create": "EscrowClaimLink.create_claim_link",
+    "TealEscrow.claim": "EscrowClaimLink.claim",
+    "TealEscrow.cancel": "EscrowClaimLink.cancel",
+}
+
+
+# -- measurement -------------------------------------------------------
+
+
+def _count_inner(txn_result: dict) -> int:
+    inner = txn_result.get("inner-txns", [])
+    return len(inner) + sum(_count_inner(child) for child in inner)
+
+
+def _box_writes(trace: dict) -> List[Tuple[bytes, int]]:
+    """(box name, bytes written) for every box write in an app trace"""
+    writes = []
+    for unit in trace.get("approval-program-trace", []):
+        for change in unit.get("state-changes", []):
+            if change.get("app-state-type") == "b" and change.get("operation") == "w":
+                value = change.get("new-value", {}).get("bytes", "")
+                writes.append((base64.b64decode(change["key"]), len(base64.b64decode(value))))
+    return writes
+
+
+def _box_size(env: BenchEnv, app_id: int, name: bytes) -> int:
+    try:
+        value = env.client.application_box_by_name(app_id, name)["value"]
+    except AlgodHTTPError:
+        return 0
+    return len(base64.b64decode(value))
+
+
+def measure(env: BenchEnv, atc: AtomicTransactionComposer) -> Dict[str, int]:
+    """Simulate a group and collect its cost metrics"""
+    request = SimulateRequest(
+        txn_groups=[],
+        allow_unnamed_resources=True,
+        exec_trace_config=SimulateTraceConfig(enable=True, state_change=True),
+    )
+    result = atc.simulate(env.client, request)
+    if result.failure_message:
+        raise RuntimeError(f"Simulation failed at {result.failed_at}: {result.failure_message}")
+
+    group = result.simulate_response["txn-groups"][0]
+    txns = [txn_with_signer.txn for txn_with_signer in atc.txn_list]
+
+    # Boxes touched: named references plus what simulate reports as unnamed
+    boxes = set()
+    for txn in txns:
+        for box in getattr(txn, "boxes", None) or []:
+            app_id = txn.index if box.app_index == 0 else box.app_index
+            boxes.add((app_id, box.name))
+    for box in group.get("unnamed-resources-accessed", {}).get("boxes", []):
+        boxes.add((box["app"], base64.b64decode(box["name"])))
+
+    metrics = dict.fromkeys(METRICS, 0)
+    for txn, txn_result in zip(txns, group["txn-results"]):
+        metrics["opcode_budget"] += txn_result.get("app-budget-consumed", 0)
+        metrics["inner_txns"] += _count_inner(txn_result["txn-result"])
+        for _name, length in _box_writes(txn_result.get("exec-trace", {})):
+            metrics["box_bytes_written"] += length
+
+    metrics["boxes_accessed"] = len(boxes)
+    metrics["box_bytes_read"] = sum(_box_size(env, app_id, name) for app_id, name in boxes)
+    return metrics
+
+
+def run_benchmarks(env: BenchEnv, names: Optional[List[str]] = None) -> Dict[str, Dict[str, int]]:
+    results = {}
+    for name, scenario in SCENARIOS.items():
+        if names and name not in names:
+            continue
+        results[name] = measure(env, scenario(env))
+    return results
+
+
+# -- regression gate ---------------------------------------------------
+
+
+def compare(baseline: Dict[str, Dict[str, int]], results: Dict[str, Dict[str, int]], tolerance: float = 0.0) -> List[str]:
+    """Describe every metric that grew beyond the tolerance
+
+    Returns:
+        List of regressions; empty when the gate passes
+    """
+    regressions = []
+    for name, metrics in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric, value in metrics.items():
+            limit = previous.get(metric, 0) * (1 + tolerance)
+            if value > limit:
+                regressions.append(f"{name}: {metric} {previous.get(metric, 0)} -> {value}")
+    return regressions
+
+
+def compare_escrows(results: Dict[str, Dict[str, int]]) -> List[str]:
+    """Opcode cost and box I/O of each TEAL route next to its EscrowClaimLink method"""
+    lines = []
+    for teal_name, escrow_name in TEAL_COUNTERPARTS.items():
+        teal, escrow = results.get(teal_name), results.get(escrow_name)
+        if teal is None or escrow is None:
+            continue
+        lines.append(
+            f"{teal_name} vs {escrow_name}: opcode_budget {teal['opcode_budget']} / {escrow['opcode_budget']}, "
+            f"box_bytes_written {teal['box_bytes_written']} / {escrow['box_bytes_written']}"
+        )
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure contract costs and gate regressions")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--update", action="store_true", help="Write the baseline from this run")
+    mode.add_argument("--check", action="store_true", help="Fail if a cost exceeds the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.0, help="Allowed relative increase")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--artifacts", type=Path, default=ARTIFACT_DIR)
+    parser.add_argument("scenarios", nargs="*", help="Scenario names (default: all)")
+    args = parser.parse_args()
+
+    env = localnet_env()
+    deploy_apps(env, args.artifacts)
+    results = run_benchmarks(env, args.scenarios)
+
+    for name, metrics in results.items():
+        print(f"📊 {name}: " + ", ".join(f"{metric}={value}" for metric, value in metrics.items()))
+    for line in compare_escrows(results):
+        print(f"🔍 {line}")
+
+    if args.update:
+        args.baseline.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"✅ Baseline written to {args.baseline}")
+        return True
+
+    if not args.baseline.exists():
+        print(f"❌ No baseline at {args.baseline}; run with --update first")
+        return False
+
+    regressions = compare(json.loads(args.baseline.read_text(encoding="utf-8")), results, args.tolerance)
+    for regression in regressions:
+        print(f"❌ {regression}")
+    if not regressions:
+        print("✅ No cost regressions")
+    return not regressions
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
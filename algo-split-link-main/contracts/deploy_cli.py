@@ -0,0 +1,429 @@
+"""
+Deployment CLI for the AlgoSplit apps across networks and shards
+Driven by a config file (deploy.json); every network in it is handled
+concurrently and the results are recorded in a deployment manifest
+(deployments.json).
+
+Commands are idempotent: apps already created by the deployer with the
+same program hash are reused, never created twice.
+
+    deploy    create any missing app instances
+    upgrade   update outdated instances in place (creator-only update method)
+    migrate   create instances of the new program and retire the old ones
+              (old apps keep their links; they are listed under "retired")
+    status    compare on-chain programs with the current build
+
+Usage:
+    python deploy_cli.py [--config deploy.json] [--network NAME ...] <command>
+    (reads the mnemonic from each network's mnemonic_env, default DEPLOYER_MNEMONIC)
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from build_contracts import SCRIPT_DIR
+
+CONFIG_PATH = SCRIPT_DIR / "deploy.json"
+MANIFEST_PATH = SCRIPT_DIR / "deployments.json"
+ARTIFACT_DIR = SCRIPT_DIR / "out"
+
+MAX_GROUP_SIZE = 16
+DEFAULT_APP_FUNDING = 100_000
+
+
+@dataclass(frozen=True)
+class Program:
+    """Compiled approval/clear pair and the global schema it needs"""
+    approval: bytes
+    clear: bytes
+    global_uints: int
+    global_bytes: int
+    upgradable: bool
+
+    @property
+    def program_hash(self) -> str:
+        return program_hash(self.approval, self.clear)
+
+    @property
+    def extra_pages(self) -> int:
+        return (max(len(self.approval), len(self.clear)) - 1) // 2048
+
+
+@dataclass(frozen=True)
+class AppConfig:
+    """One app entry of the config: a PuyaPy contract or a TEAL pair"""
+    name: str
+    contract: Optional[str] = None
+    teal: Optional[Tuple[str, str]] = None
+    global_uints: int = 0
+    global_bytes: int = 0
+    shards: int = 1
+    funding: int = DEFAULT_APP_FUNDING
+    env: Dict[str, str] = field(default_factory=dict)  # "app_id"/"address" -> .env key
+    shards_file: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class NetworkConfig:
+    name: str
+    algod_url: str
+    algod_token: str = ""
+    mnemonic_env: str = "DEPLOYER_MNEMONIC"
+    env_file: Optional[str] = None
+
+
+def program_hash(approval: bytes, clear: bytes) -> str:
+    """Identity of a deployed program pair"""
+    return hashlib.sha256(approval + b"\0" + clear).hexdigest()
+
+
+def load_config(path: Path) -> Tuple[List[NetworkConfig], List[AppConfig]]:
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    networks = [NetworkConfig(name=name, **options) for name, options in data["networks"].items()]
+    apps = []
+    for options in data["apps"]:
+        options = dict(options)
+        if "teal" in options:
+            options["teal"] = tuple(options["teal"])
+        apps.append(AppConfig(**options))
+    return networks, apps
+
+
+def load_programs(apps: List[AppConfig], algod_client, artifact_dir: Path = ARTIFACT_DIR) -> Dict[str, Program]:
+    """Programs of every configured app
+
+    PuyaPy contracts come from build_contracts.py output; TEAL pairs are
+    compiled through the build cache, so algod is only asked once per source.
+    """
+    from build_contracts import compile_teal
+
+    programs = {}
+    for app in apps:
+        if app.contract:
+            spec = json.loads((artifact_dir / f"{app.contract}.arc32.json").read_text(encoding="utf-8"))
+            schema = spec["state"]["global"]
+            programs[app.name] = Program(
+                approval=(artifact_dir / f"{app.contract}.approval.bin").read_bytes(),
+                clear=(artifact_dir / f"{app.contract}.clear.bin").read_bytes(),
+                global_uints=schema["num_uints"],
+                global_bytes=schema["num_byte_slices"],
+                upgradable=True,
+            )
+        else:
+            approval_path, clear_path = (SCRIPT_DIR / name for name in app.teal)
+            programs[app.name] = Program(
+                approval=compile_teal(algod_client, approval_path.read_text(encoding="utf-8")),
+                clear=compile_teal(algod_client, clear_path.read_text(encoding="utf-8")),
+                global_uints=app.global_uints,
+                global_bytes=app.global_bytes,
+                upgradable=False,
+            )
+    return programs
+
+
+# -- on-chain operations -------------------------------------------------
+
+
+class Deployer:
+    """Deployer account and client for one network"""
+
+    def __init__(self, network: NetworkConfig) -> None:
+        from algosdk import account, mnemonic as mn
+        from algosdk.atomic_transaction_composer import AccountTransactionSigner
+
+        from algod_pool import PooledAlgodClient
+
+        self.network = network
+        self.client = PooledAlgodClient(network.algod_token, network.algod_url, headers={"User-Agent": "algosdk"})
+        private_key = mn.to_private_key(os.environ[network.mnemonic_env])
+        self.address = account.address_from_private_key(private_key)
+        self.signer = AccountTransactionSigner(private_key)
+
+    def created_apps(self) -> Dict[int, dict]:
+        """App ID -> params of every app this deployer created"""
+        info = self.client.account_info(self.address)
+        return {app["id"]: app["params"] for app in info.get("created-apps", [])}
+
+    def submit(self, txns: list) -> List[dict]:
+        """Submit transactions 16 per group, all groups concurrently
+
+        Returns:
+            Pending transaction info of every transaction, in order
+        """
+        from algosdk.transaction import assign_group_id
+
+        from algod_pool import submit_groups
+
+        groups = []
+        for start in range(0, len(txns), MAX_GROUP_SIZE):
+            group = txns[start:start + MAX_GROUP_SIZE]
+            if len(group) > 1:
+                assign_group_id(group)
+            groups.append(self.signer.sign_transactions(group, list(range(len(group)))))
+        submit_groups(self.client, groups)
+
+        tx_ids = [signed.get_txid() for group in groups for signed in group]
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            return list(pool.map(self.client.pending_transaction_info, tx_ids))
+
+    def create_apps(self, program: Program, count: int, label: str) -> List[int]:
+        from algosdk.transaction import ApplicationCreateTxn, OnComplete, StateSchema
+
+        params = self.client.suggested_params()
+        txns = [
+            ApplicationCreateTxn(
+                sender=self.address,
+                sp=params,
+                on_complete=OnComplete.NoOpOC,
+                approval_program=program.approval,
+                clear_program=program.clear,
+                global_schema=StateSchema(num_uints=program.global_uints, num_byte_slices=program.global_bytes),
+                local_schema=StateSchema(num_uints=0, num_byte_slices=0),
+                extra_pages=program.extra_pages,
+                note=f"{label}:{index}".encode(),
+            )
+            for index in range(count)
+        ]
+        return [info["application-index"] for info in self.submit(txns)]
+
+    def fund_apps(self, app_ids: List[int], amount: int) -> None:
+        from algosdk import logic
+        from algosdk.transaction import PaymentTxn
+
+        if not app_ids or amount <= 0:
+            return
+        params = self.client.suggested_params()
+        self.submit([
+            PaymentTxn(self.address, params, logic.get_application_address(app_id), amount)
+            for app_id in app_ids
+        ])
+
+    def update_apps(self, program: Program, app_ids: List[int]) -> None:
+        from algosdk.transaction import ApplicationUpdateTxn
+
+        params = self.client.suggested_params()
+        self.submit([
+            ApplicationUpdateTxn(self.address, params, app_id, program.approval, program.clear)
+            for app_id in app_ids
+        ])
+
+
+def _onchain_hash(params: dict) -> str:
+    return program_hash(
+        base64.b64decode(params["approval-program"]),
+        base64.b64decode(params["clear-state-program"]),
+    )
+
+
+def _instances(app_ids: List[int], digest: str) -> List[dict]:
+    from algosdk import logic
+
+    return [
+        {"app_id": app_id, "address": logic.get_application_address(app_id), "program_hash": digest}
+        for app_id in app_ids
+    ]
+
+
+# -- commands --------------------------------------------------------------
+
+
+def cmd_deploy(deployer: Deployer, apps: List[AppConfig], programs: Dict[str, Program], state: dict) -> List[str]:
+    """Create missing instances; reuses apps recorded in the manifest or
+    found on-chain with the same program hash"""
+    created = deployer.created_apps()
+    log = []
+
+    for app in apps:
+        program = programs[app.name]
+        entry = state.setdefault(app.name, {"instances": [], "retired": []})
+        live = [item for item in entry["instances"] if item["app_id"] in created]
+
+        # Adopt apps with the current program that the manifest does not know
+        known = {item["app_id"] for item in live}
+        for app_id, params in sorted(created.items()):
+            if len(live) >= app.shards:
+                break
+            if app_id not in known and _onchain_hash(params) == program.program_hash:
+                live.extend(_instances([app_id], program.program_hash))
+
+        missing = app.shards - len(live)
+        if missing > 0:
+            app_ids = deployer.create_apps(program, missing, app.name)
+            deployer.fund_apps(app_ids, app.funding)
+            live.extend(_instances(app_ids, program.program_hash))
+        entry["instances"] = live
+        log.append(f"{app.name}: {max(missing, 0)} created, {len(live) - max(missing, 0)} existing")
+
+    return log
+
+
+def cmd_upgrade(deployer: Deployer, apps: List[AppConfig], programs: Dict[str, Program], state: dict) -> List[str]:
+    """Update outdated instances in place, keeping their IDs and state"""
+    created = deployer.created_apps()
+    log = []
+
+    for app in apps:
+        program = programs[app.name]
+        entry = state.get(app.name, {"instances": []})
+        outdated = [
+            item["app_id"] for item in entry["instances"]
+            if item["app_id"] in created and _onchain_hash(created[item["app_id"]]) != program.program_hash
+        ]
+        if not outdated:
+            log.append(f"{app.name}: up to date")
+            continue
+        if not program.upgradable:
+            log.append(f"{app.name}: {len(outdated)} outdated, program is not updatable; use migrate")
+            continue
+
+        schema = created[outdated[0]].get("global-state-schema", {})
+        if program.global_uints > schema.get("num-uint", 0) or program.global_bytes > schema.get("num-byte-slice", 0):
+            log.append(f"{app.name}: new program needs a larger global schema; use migrate")
+            continue
+
+        deployer.update_apps(program, outdated)
+        for item in entry["instances"]:
+            item["program_hash"] = program.program_hash
+        log.append(f"{app.name}: {len(outdated)} updated")
+
+    return log
+
+
+def cmd_migrate(deployer: Deployer, apps: List[AppConfig], programs: Dict[str, Program], state: dict) -> List[str]:
+    """Move each app to fresh instances of the current program
+
+    Outdated instances are retired rather than deleted: their links stay
+    claimable there and the sweeper keeps refunding them.
+    """
+    for app in apps:
+        entry = state.setdefault(app.name, {"instances": [], "retired": []})
+        digest = programs[app.name].program_hash
+        current = [item for item in entry["instances"] if item["program_hash"] == digest]
+        entry["retired"].extend(item for item in entry["instances"] if item["program_hash"] != digest)
+        entry["instances"] = current
+    return cmd_deploy(deployer, apps, programs, state)
+
+
+def cmd_status(deployer: Deployer, apps: List[AppConfig], programs: Dict[str, Program], state: dict) -> List[str]:
+    created = deployer.created_apps()
+    log = []
+    for app in apps:
+        for shard, item in enumerate(state.get(app.name, {}).get("instances", [])):
+            params = created.get(item["app_id"])
+            if params is None:
+                status = "missing"
+            elif _onchain_hash(params) == programs[app.name].program_hash:
+                status = "current"
+            else:
+                status = "outdated"
+            log.append(f"{app.name}[{shard}]: app {item['app_id']} {status}")
+        retired = state.get(app.name, {}).get("retired", [])
+        if retired:
+            log.append(f"{app.name}: {len(retired)} retired")
+    return log
+
+
+COMMANDS = {
+    "deploy": cmd_deploy,
+    "upgrade": cmd_upgrade,
+    "migrate": cmd_migrate,
+    "status": cmd_status,
+}
+
+
+# -- outputs -----------------------------------------------------------------
+
+
+def update_env_file(path: Path, values: Dict[str, str]) -> None:
+    """Set KEY=value lines in an env file, keeping every other line"""
+    lines = path.read_text(encoding="utf-8").splitlines() if path.exists() else []
+    remaining = dict(values)
+    for index, line in enumerate(lines):
+        key = line.split("=", 1)[0]
+        if key in remaining:
+            lines[index] = f"{key}={remaining.pop(key)}"
+    lines.extend(f"{key}={value}" for key, value in remaining.items())
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def write_outputs(network: NetworkConfig, apps: List[AppConfig], state: dict) -> None:
+    """Shard lists and .env values derived from a network's manifest entry"""
+    from shard_router import ShardSet
+
+    env_values = {}
+    for app in apps:
+        instances = state.get(app.name, {}).get("instances", [])
+        if not instances:
+            continue
+        if app.shards_file:
+            ShardSet(tuple(item["app_id"] for item in instances)).dump(SCRIPT_DIR / app.shards_file)
+        for field_name, env_key in app.env.items():
+            env_values[env_key] = instances[0][field_name]
+    if network.env_file and env_values:
+        update_env_file(SCRIPT_DIR / network.env_file, env_values)
+
+
+def run_network(
+    command: str,
+    network: NetworkConfig,
+    apps: List[AppConfig],
+    artifact_dir: Path,
+    state: dict,
+) -> List[str]:
+    deployer = Deployer(network)
+    programs = load_programs(apps, deployer.client, artifact_dir)
+    log = COMMANDS[command](deployer, apps, programs, state)
+    if command != "status":
+        write_outputs(network, apps, state)
+    return log
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deploy and maintain AlgoSplit apps")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    parser.add_argument("--config", type=Path, default=CONFIG_PATH)
+    parser.add_argument("--manifest", type=Path, default=MANIFEST_PATH)
+    parser.add_argument("--artifacts", type=Path, default=ARTIFACT_DIR)
+    parser.add_argument("--network", action="append", help="Only these networks (default: all)")
+    args = parser.parse_args()
+
+    networks, apps = load_config(args.config)
+    if args.network:
+        networks = [network for network in networks if network.name in args.network]
+
+    manifest = json.loads(args.manifest.read_text(encoding="utf-8")) if args.manifest.exists() else {}
+    states = {network.name: manifest.setdefault(network.name, {}) for network in networks}
+
+    def run(network: NetworkConfig) -> Tuple[str, Optional[List[str]], Optional[Exception]]:
+        try:
+            return network.name, run_network(args.command, network, apps, args.artifacts, states[network.name]), None
+        except Exception as e:
+            return network.name, None, e
+
+    ok = True
+    with ThreadPoolExecutor(max_workers=max(1, len(networks))) as pool:
+        for name, log, exc in pool.map(run, networks):
+            if exc is not None:
+                ok = False
+                print(f"❌ {name}: {exc}")
+                continue
+            for line in log:
+                print(f"✅ {name} {line}")
+
+    if args.command != "status":
+        args.manifest.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"📝 Manifest written to {args.manifest}")
+
+    return ok
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
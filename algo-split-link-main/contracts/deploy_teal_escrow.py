@@ -1,11 +1,24 @@
 """
 Deploy TEAL escrow contract directly
 No puyapy needed - uses pure TEAL + AlgoSDK
+The app account is funded with APP_FUNDING to cover its minimum balance;
+every link covers its own box minimum balance out of its amount
+The app ID is written to .env as TEAL_ESCROW_APP_ID, not VITE_CLAIM_APP_ID:
+the frontend still sends the old claim arguments, which this app rejects
+Set ALGOSPLIT_METRICS_FILE to keep the algod latencies and step timings
+of the run (see telemetry.py)
 """
 import sys
 import os
 from pathlib import Path
 
+# Base minimum balance of the app account; link boxes (37,700 microAlgos
+# each) are covered by the link amounts
+APP_FUNDING = 100_000
+
+ENV_APP_ID = "TEAL_ESCROW_APP_ID"
+ENV_APP_ADDRESS = "TEAL_ESCROW_APP_ADDRESS"
+
 # Set UTF-8 encoding for Windows
 if sys.platform == "win32":
     sys.stdout.reconfigure(encoding='utf-8')
@@ -21,9 +34,11 @@ def main():
     
     try:
         from algosdk import account, mnemonic as mn, logic
-        from algosdk.v2client import algod
-        from algosdk.transaction import ApplicationCreateTxn, OnComplete, StateSchema, wait_for_confirmation
-        import base64
+        from algosdk.transaction import ApplicationCreateTxn, OnComplete, PaymentTxn, StateSchema, wait_for_confirmation
+        from algod_pool import client_from_env
+        from build_contracts import compile_teal
+        from deploy_cli import update_env_file
+        from telemetry import span
         
         # Get private key and address
         private_key = mn.to_private_key(mnemonic_phrase)
@@ -31,19 +46,15 @@ def main():
         
         print(f"📍 Deploying from: {address}")
         
-        # Connect to testnet
-        algod_client = algod.AlgodClient(
-            "",
-            "https://testnet-api.algonode.cloud",
-            headers={"User-Agent": "algosdk"}
-        )
+        # Connect to testnet (ALGOD_URL overrides) over a pooled connection
+        algod_client = client_from_env()
         
         # Check balance
         account_info = algod_client.account_info(address)
         balance = account_info['amount'] / 1_000_000
         print(f"💰 Balance: {balance} ALGO")
         
-        if balance < 0.3:
+        if balance < 0.3 + APP_FUNDING / 1_000_000:
             print("\n❌ ERROR: Insufficient balance")
             return False
         
@@ -62,13 +73,11 @@ def main():
         print(f"   Approval: {len(approval_teal)} chars")
         print(f"   Clear: {len(clear_teal)} chars")
         
-        # Compile TEAL to bytecode
+        # Compile TEAL to bytecode (cached by source hash)
         print("\n🔨 Compiling TEAL...")
-        approval_result = algod_client.compile(approval_teal)
-        clear_result = algod_client.compile(clear_teal)
-        
-        approval_bytecode = base64.b64decode(approval_result['result'])
-        clear_bytecode = base64.b64decode(clear_result['result'])
+        with span("deploy.compile"):
+            approval_bytecode = compile_teal(algod_client, approval_teal)
+            clear_bytecode = compile_teal(algod_client, clear_teal)
         
         print("✅ Compilation successful")
         
@@ -97,11 +106,18 @@ def main():
         print("⏳ Waiting for confirmation...")
         
         # Wait for confirmation
-        confirmed_txn = wait_for_confirmation(algod_client, tx_id, 4)
+        with span("deploy.confirm", txid=tx_id):
+            confirmed_txn = wait_for_confirmation(algod_client, tx_id, 4)
         
         app_id = confirmed_txn['application-index']
         app_address = logic.get_application_address(app_id)
         
+        # Fund the app account for its minimum balance and link boxes
+        print("💰 Funding app account...")
+        funding = PaymentTxn(address, algod_client.suggested_params(), app_address, APP_FUNDING)
+        with span("deploy.fund", app_id=app_id):
+            wait_for_confirmation(algod_client, algod_client.send_transaction(funding.sign(private_key)), 4)
+        
         print()
         print("=" * 60)
         print("🎉 ESCROW CONTRACT DEPLOYED!")
@@ -113,50 +129,23 @@ def main():
         print(f"🔍 Explorer: https://lora.algokit.io/testnet/application/{app_id}")
         print()
         print("✨ Contract Features:")
-        print("   ✅ Receives ALGO into escrow")
-        print("   ✅ Sends ALGO from escrow to claimer")
-        print("   ✅ Supports cancellation/refund")
-        print("   ✅ Works with your frontend!")
+        print("   ✅ One box per link: sender, receiver, amount, expiry")
+        print("   ✅ Claims pay the stored amount to the allowed receiver")
+        print("   ✅ Only the stored sender can cancel/refund")
+        print("   ✅ Links are deleted on payout, so they pay out once")
         print()
         
-        # Update .env file
+        # Record the app in .env without repointing the frontend
         env_path = Path(__file__).parent.parent / ".env"
         
         print("📝 Updating .env file...")
+        update_env_file(env_path, {ENV_APP_ID: str(app_id), ENV_APP_ADDRESS: app_address})
         
-        env_lines = []
-        if env_path.exists():
-            with open(env_path, 'r', encoding='utf-8') as f:
-                env_lines = f.readlines()
-        
-        # Update or add values
-        found_app_id = False
-        found_app_address = False
-        
-        with open(env_path, 'w', encoding='utf-8') as f:
-            for line in env_lines:
-                if line.startswith('VITE_CLAIM_APP_ID='):
-                    f.write(f'VITE_CLAIM_APP_ID={app_id}\n')
-                    found_app_id = True
-                elif line.startswith('VITE_CLAIM_APP_ADDRESS='):
-                    f.write(f'VITE_CLAIM_APP_ADDRESS={app_address}\n')
-                    found_app_address = True
-                else:
-                    f.write(line)
-            
-            if not found_app_id:
-                f.write(f'VITE_CLAIM_APP_ID={app_id}\n')
-            if not found_app_address:
-                f.write(f'VITE_CLAIM_APP_ADDRESS={app_address}\n')
-        
-        print("✅ .env file updated!")
+        print(f"✅ .env file updated ({ENV_APP_ID}, {ENV_APP_ADDRESS})")
         print()
-        print("🔄 NEXT STEPS:")
-        print("  1. Stop dev server (Ctrl+C)")
-        print("  2. Run: npm run dev")
-        print("  3. Hard refresh browser (Ctrl+Shift+R)")
-        print("  4. Create a NEW claim link")
-        print("  5. Claim it - FUNDS WILL TRANSFER! 🎉")
+        print("⚠️  VITE_CLAIM_APP_ID was left unchanged:")
+        print("   the frontend still sends claim with an amount, which this app rejects.")
+        print("   Point it at this app once the frontend sends claim with the claim ID.")
         print()
         print(f"💡 Old contract funds (~0.5-1 ALGO) remain at:")
         print(f"   R6SMHE7FS7TBVLO4UQJWBY3E2QW6L5RYGBVCYPN5RMHELAOMFKUHOLJNC4")
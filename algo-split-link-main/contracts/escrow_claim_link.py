@@ -10,27 +10,197 @@ Features:
 - Optional receiver restriction
 - Expiry enforcement
 - Cancel/refund before expiry if unclaimed
+- Permissionless bulk refund of expired, unclaimed links
+- Per-sender index boxes and per-receiver index pages listing open claim IDs
+- Merkle-root airdrops: one funded pool per airdrop, claimed with proofs
+- Automatic ASA opt-in and per-asset liability registry boxes
+- Liability ledger in global state for O(1) solvency checks
+- Batched claims across assets
+- Signed offline vouchers redeemed against a funded voucher book
 """
+import typing
+
 from algopy import (
     ARC4Contract,
     arc4,
     Account,
     Asset,
+    Bytes,
     UInt64,
     Txn,
     gtxn,
     itxn,
     Global,
+    StateTotals,
+    TransactionType,
     op,
+    subroutine,
+    urange,
 )
 
 
-class EscrowClaimLink(ARC4Contract):
+# Claim record states (last byte of the record)
+CLAIM_OPEN = 0
+CLAIM_CLAIMED = 1
+CLAIM_CANCELLED = 2
+
+# Size of an encoded ClaimRecord: 32 + 32 + 8 + 8 + 8 + 1 + 2 + 2
+CLAIM_RECORD_SIZE = 93
+
+# Offset of the state byte (the slots follow it)
+CLAIM_STATE_OFFSET = 88
+
+# Records written before the index boxes existed end at the state byte.
+# They decode with both slots NO_INDEX_SLOT: such links are listed in no
+# index box, so closing them removes nothing from the indexes.
+LEGACY_CLAIM_RECORD_SIZE = 89
+
+# Sender index box (snd_<address>): a 16-byte header of (first free
+# slot + 1, live entry count) followed by 8-byte slots. A slot holds an
+# open claim ID, or INDEX_FREE_BIT | (next free slot + 1) once its link is
+# closed, so adds and removals are O(1) and freed slots are reused. The
+# box is deleted when its last entry is removed. Only the sender's own
+# links go in it, so only the sender can fill it.
+INDEX_HEADER_SIZE = 16
+INDEX_FREE_BIT = 1 << 63
+INDEX_MAX_SLOTS = 4094  # (32768 - INDEX_HEADER_SIZE) // 8
+
+# Receiver index pages (rcv_<address><page>): anyone can create a link to
+# any address, so a receiver's links are not kept in one growing box that
+# a third party could fill up. Page p is a fixed 1KB box covering claim IDs
+# p * RECEIVER_PAGE_CLAIMS onwards: an 8-byte live count, then one bit per
+# claim ID. A page is deleted when its count drops to zero, so every claim
+# or cancel touches one 1KB page and a receiver can always be given more
+# links.
+RECEIVER_PAGE_SIZE = 1024  # one box reference of I/O quota
+RECEIVER_PAGE_HEADER_SIZE = 8
+RECEIVER_PAGE_CLAIMS = 8128  # (RECEIVER_PAGE_SIZE - RECEIVER_PAGE_HEADER_SIZE) * 8
+
+# Record slot of a link without a receiver index (anyone can claim)
+NO_INDEX_SLOT = 0xFFFF
+
+# Maximum transactions in one inner group
+MAX_INNER_GROUP_SIZE = 16
+
+# Airdrops: the drp_<id> record box holds the Merkle root of the
+# (index, receiver, amount) leaves, and drb_<id><page> bitmap pages hold one
+# claimed bit per leaf. Pages are created by the first claim that lands in
+# them, so creating an airdrop costs the same for any number of leaves, but
+# the sender prepays the minimum balance of every page the leaves can use.
+# close_airdrop zeroes leaf_count, which stops claims, and keeps the record
+# until purge_airdrop_pages has deleted the pages and refunded their
+# minimum balance. Leaves are sha256(0x00 || index || receiver || amount)
+# and inner nodes sha256(0x01 || left || right); the bit of the leaf index
+# selects the side at each level (see merkle_airdrop.py).
+AIRDROP_RECORD_SIZE = 112  # 32 + 32 + 8 * 6
+AIRDROP_CLAIMED_OFFSET = 80
+AIRDROP_PAGE_SIZE = 1024  # one box reference of I/O quota
+AIRDROP_PAGE_LEAVES = 8192  # AIRDROP_PAGE_SIZE * 8
+AIRDROP_PAGE_MIN_BALANCE = 420_100  # drb_<id><page>: 20 + 1024
+
+# Vouchers: a vbk_<id> book holds a funded pool and the ed25519 key that
+# signs its vouchers offline. redeem_voucher checks the signature with
+# ed25519verify_bare over VOUCHER_PREFIX || app ID || book ID || nonce ||
+# receiver || amount || expiry_time (8-byte integers, see vouchers.py) and
+# sets the nonce's bit in a vbb_<id><page> page laid out like the airdrop
+# bitmap, so a voucher costs one bit of storage instead of a claim box.
+# A book covers nonces 0 to nonce_count - 1; the sender prepays the minimum
+# balance of their pages, and closing works like an airdrop's: nonce_count
+# drops to 0 and purge_voucher_pages refunds the pages, then the book.
+VOUCHER_BOOK_SIZE = 112  # 32 + 32 + 8 * 6
+VOUCHER_CLAIMED_OFFSET = 80
+VOUCHER_PAGE_MIN_BALANCE = 420_100  # vbb_<id><page>: 20 + 1024
+VOUCHER_PREFIX = b"ASV1"
+
+# Asset registry (ast_<asset_id>, 0 for ALGO): outstanding liability of open
+# links, unclaimed airdrops and unredeemed voucher books, and the number of open links. An ASA's box
+# is created together with the app's opt-in. Links created before the
+# registry existed are not counted, so removals saturate at zero.
+REGISTRY_SIZE = 16
+
+# Liability ledger: the registry totals of each asset are mirrored into a
+# global bytes value ldg_<asset_id>, so one application_info read returns
+# every asset's totals. ledger_assets lists the tracked asset IDs (8 bytes
+# each); the global schema reserves a slot for each of up to
+# MAX_LEDGER_ASSETS assets. A global key plus its value must fit in 128
+# bytes, which caps the list at (128 - len("ledger_assets")) // 8 IDs.
+# An asset's slot is freed once its liability and open links are both
+# zero; while every slot is taken, further assets are tracked only in
+# their registry box.
+MAX_GLOBAL_KEY_VALUE_SIZE = 128
+MAX_LEDGER_ASSETS = (MAX_GLOBAL_KEY_VALUE_SIZE - len(b"ledger_assets")) // 8  # 14
+
+
+class ClaimRecord(arc4.Struct):
+    """Fixed 93-byte layout of a claim_<id> box, mirrored by box_codec.py"""
+    sender: arc4.Address
+    receiver: arc4.Address  # zero address means anyone can claim
+    amount: arc4.UInt64
+    asset_id: arc4.UInt64  # 0 for ALGO
+    expiry_time: arc4.UInt64  # 0 for no expiry
+    state: arc4.UInt8  # CLAIM_OPEN / CLAIM_CLAIMED / CLAIM_CANCELLED
+    sender_slot: arc4.UInt16  # slot in snd_<sender>, NO_INDEX_SLOT for a legacy record
+    receiver_slot: arc4.UInt16  # bit in its rcv_<receiver><page> page, NO_INDEX_SLOT if anyone can claim
+
+
+Hash32: typing.TypeAlias = arc4.StaticArray[arc4.Byte, typing.Literal[32]]
+Signature: typing.TypeAlias = arc4.StaticArray[arc4.Byte, typing.Literal[64]]
+
+
+class AirdropRecord(arc4.Struct):
+    """Fixed 112-byte layout of a drp_<id> box, mirrored by box_codec.py"""
+    sender: arc4.Address
+    merkle_root: Hash32
+    asset_id: arc4.UInt64  # 0 for ALGO
+    total: arc4.UInt64  # funded amount
+    claimed: arc4.UInt64  # sum of claimed amounts
+    leaf_count: arc4.UInt64  # 0 once closed
+    expiry_time: arc4.UInt64  # 0 for no expiry
+    pages: arc4.UInt64  # bitmap pages whose minimum balance is still held
+
+
+class VoucherBook(arc4.Struct):
+    """Fixed 112-byte layout of a vbk_<id> box, mirrored by box_codec.py"""
+    sender: arc4.Address
+    signer: arc4.Address  # ed25519 public key that signs the vouchers
+    asset_id: arc4.UInt64  # 0 for ALGO
+    total: arc4.UInt64  # funded amount
+    claimed: arc4.UInt64  # sum of redeemed amounts
+    expiry_time: arc4.UInt64  # 0 for no expiry
+    nonce_count: arc4.UInt64  # valid nonces are below it; 0 once closed
+    pages: arc4.UInt64  # bitmap pages whose minimum balance is still held
+
+
+class AssetRegistry(arc4.Struct):
+    """Fixed 16-byte layout of an ast_<asset_id> box, mirrored by box_codec.py"""
+    liability: arc4.UInt64  # sum of open link amounts and unclaimed airdrop amounts
+    open_links: arc4.UInt64
+
+
+class LedgerEntry(arc4.Struct):
+    """One asset's solvency figures returned by get_liability_ledger"""
+    asset_id: arc4.UInt64
+    balance: arc4.UInt64
+    liability: arc4.UInt64
+    open_links: arc4.UInt64
+
+
+class ClaimEntry(arc4.Struct):
+    """One link of a batch: receiver (zero address for anyone), amount and expiry"""
+    receiver: arc4.Address
+    amount: arc4.UInt64
+    expiry_time: arc4.UInt64
+
+
+class EscrowClaimLink(ARC4Contract, state_totals=StateTotals(global_bytes=MAX_LEDGER_ASSETS + 1)):
     """Smart contract for escrow-based claim links"""
     
     def __init__(self) -> None:
         # Initialize global state
         self.claim_count = UInt64(0)
+        self.airdrop_count = UInt64(0)
+        self.voucher_book_count = UInt64(0)
+        self.ledger_assets = Bytes()
     
     @arc4.abimethod()
     def create_claim_link(
@@ -72,77 +242,402 @@ class EscrowClaimLink(ARC4Contract):
         assert amount > 0, "Amount must be greater than 0"
         
         # Store claim link data in box storage
-        # Box name: "claim_" + claim_id (8 bytes)
-        box_name = op.concat(arc4.String("claim_").bytes, op.itob(claim_id))
-        
-        # Create box to store claim data
-        # Format: sender (32) + receiver (32) + amount (8) + asset_id (8) + expiry (8) + claimed (1) = 89 bytes
-        op.Box.create(box_name, UInt64(89))
+        self._store_claim(claim_id, Txn.sender, receiver, amount, asset_id, expiry_time)
+        self._add_liability(asset_id, amount, UInt64(1))
         
-        # Store data in box
-        # Sender address (bytes 0-31)
-        op.Box.put(box_name, UInt64(0), Txn.sender.bytes)
-        
-        # Receiver address (bytes 32-63) - zero address means anyone can claim
-        op.Box.put(box_name, UInt64(32), receiver.bytes)
+        return arc4.String(f"claim_{claim_id}")
+    
+    @arc4.abimethod()
+    def create_claim_links_batch(
+        self,
+        payment: gtxn.Transaction,
+        entries: arc4.DynamicArray[ClaimEntry],
+    ) -> arc4.Tuple[arc4.UInt64, arc4.UInt64]:
+        """Create many claim links funded by a single payment
         
-        # Amount (bytes 64-71)
-        op.Box.put(box_name, UInt64(64), op.itob(amount))
+        The boxes for every entry, the sender's index box, the index page
+        of every restricted receiver and the asset's registry box must be
+        referenced by the group; other app calls in the same group can carry
+        extra box references (see reserve_box_refs) because box references
+        are shared group-wide.
         
-        # Asset ID (bytes 72-79)
-        op.Box.put(box_name, UInt64(72), op.itob(asset_id))
+        Args:
+            payment: Payment or asset transfer funding all links (sum of entry amounts)
+            entries: (receiver, amount, expiry_time) for each link
+            
+        Returns:
+            Tuple of (first_claim_id, count); assigned IDs are first_claim_id .. first_claim_id + count - 1
+        """
+        assert entries.length > 0, "At least one entry required"
         
-        # Expiry time (bytes 80-87)
-        op.Box.put(box_name, UInt64(80), op.itob(expiry_time))
+        funded, asset_id = self._funding(payment)
         
-        # Claimed flag (byte 88)
-        op.Box.put(box_name, UInt64(88), op.bzero(UInt64(1)))  # 0 = not claimed
+        first_id = self.claim_count
+        total = self._store_entries(entries, asset_id)
+        assert total == funded, "Payment must equal the sum of entry amounts"
         
-        return arc4.String(f"claim_{claim_id}")
+        return arc4.Tuple((arc4.UInt64(first_id), arc4.UInt64(entries.length)))
     
     @arc4.abimethod()
-    def claim(
+    def create_asset_links_batch(
         self,
-        claim_id: UInt64,
-    ) -> arc4.Bool:
-        """Claim funds from escrow
+        asset: Asset,
+        entries: arc4.DynamicArray[ClaimEntry],
+    ) -> arc4.Tuple[arc4.UInt64, arc4.UInt64]:
+        """Create many ASA claim links, opting the app into the asset if needed
+        
+        The asset transfer funding the links must be the transaction right
+        after this call, so the opt-in issued here lands before it and a new
+        asset needs no separate opt-in round-trip. Box references are as for
+        create_claim_links_batch; the caller's fee covers the opt-in.
         
         Args:
-            claim_id: ID of the claim link
+            asset: ASA funding every link
+            entries: (receiver, amount, expiry_time) for each link
             
         Returns:
-            True if claim successful
+            Tuple of (first_claim_id, count)
         """
-        # Get box name
-        box_name = op.concat(arc4.String("claim_").bytes, op.itob(claim_id))
+        assert entries.length > 0, "At least one entry required"
+        
+        self._ensure_opted_in(asset.id)
+        funding = gtxn.AssetTransferTransaction(Txn.group_index + 1)
+        assert funding.asset_receiver == Global.current_application_address, "Payment must be to contract"
+        assert funding.xfer_asset == asset, "Funding must be in the link asset"
+        
+        first_id = self.claim_count
+        total = self._store_entries(entries, asset.id)
+        assert total == funding.asset_amount, "Payment must equal the sum of entry amounts"
+        
+        return arc4.Tuple((arc4.UInt64(first_id), arc4.UInt64(entries.length)))
+    
+    @subroutine
+    def _store_entries(self, entries: arc4.DynamicArray[ClaimEntry], asset_id: UInt64) -> UInt64:
+        """Store a link per entry from claim_count on and return their total amount"""
+        total = UInt64(0)
+        
+        for entry in entries:
+            amount = entry.amount.native
+            assert amount > 0, "Amount must be greater than 0"
+            total += amount
+            
+            self._store_claim(
+                self.claim_count,
+                Txn.sender,
+                Account(entry.receiver.bytes),
+                amount,
+                asset_id,
+                entry.expiry_time.native,
+            )
+            self.claim_count += UInt64(1)
+        
+        self._add_liability(asset_id, total, entries.length)
+        return total
+    
+    @subroutine
+    def _funding(self, payment: gtxn.Transaction) -> tuple[UInt64, UInt64]:
+        """Funded amount and asset ID (0 for ALGO) of a payment or asset transfer to this app"""
+        if payment.type == TransactionType.Payment:
+            assert payment.receiver == Global.current_application_address, "Payment must be to contract"
+            return payment.amount, UInt64(0)
+        
+        assert payment.type == TransactionType.AssetTransfer, "Funding must be a payment or asset transfer"
+        assert payment.asset_receiver == Global.current_application_address, "Payment must be to contract"
+        return payment.asset_amount, payment.xfer_asset.id
+    
+    @subroutine
+    def _charge_min_balance(self, payment: gtxn.PaymentTransaction, amount: UInt64) -> None:
+        """Assert a payment covers exactly the minimum balance of the boxes a call prepays"""
+        assert payment.receiver == Global.current_application_address, "Payment must be to contract"
+        assert payment.amount == amount, "Payment must equal the box minimum balance"
+    
+    @arc4.baremethod()
+    def reserve_box_refs(self) -> None:
+        """Bare no-op call used only to carry extra box references for a batch"""
+    
+    @arc4.baremethod(allow_actions=["UpdateApplication"])
+    def update(self) -> None:
+        """Creator-only in-place program update (deploy_cli.py upgrade)"""
+        assert Txn.sender == Global.creator_address, "Only creator can update"
+    
+    @subroutine
+    def _store_claim(
+        self,
+        claim_id: UInt64,
+        sender: Account,
+        receiver: Account,
+        amount: UInt64,
+        asset_id: UInt64,
+        expiry_time: UInt64,
+    ) -> None:
+        """Create the claim_<id> box holding the encoded claim record (one box
+        write) and list the link in the sender's index box and receiver's index page"""
+        receiver_slot = UInt64(NO_INDEX_SLOT)
+        if receiver != Global.zero_address:
+            receiver_slot = self._receiver_index_add(receiver, claim_id)
+        
+        record = ClaimRecord(
+            sender=arc4.Address(sender),
+            receiver=arc4.Address(receiver),
+            amount=arc4.UInt64(amount),
+            asset_id=arc4.UInt64(asset_id),
+            expiry_time=arc4.UInt64(expiry_time),
+            state=arc4.UInt8(CLAIM_OPEN),
+            sender_slot=arc4.UInt16(self._index_add(self._sender_index_name(sender), claim_id)),
+            receiver_slot=arc4.UInt16(receiver_slot),
+        )
+        box_name = self._claim_box_name(claim_id)
         
-        # Verify box exists
-        box_exists, _ = op.Box.length(box_name)
+        _length, box_exists = op.Box.length(box_name)
+        assert not box_exists, "Claim link already exists"
+        
+        op.Box.put(box_name, record.bytes)
+    
+    @subroutine
+    def _load_claim(self, claim_id: UInt64) -> ClaimRecord:
+        """Read and decode the whole claim record (one box read)"""
+        data, box_exists = op.Box.get(self._claim_box_name(claim_id))
         assert box_exists, "Claim link not found"
         
-        # Read claim data from box
-        sender = Account(op.Box.extract(box_name, UInt64(0), UInt64(32)))
-        receiver = Account(op.Box.extract(box_name, UInt64(32), UInt64(32)))
-        amount = op.btoi(op.Box.extract(box_name, UInt64(64), UInt64(8)))
-        asset_id = op.btoi(op.Box.extract(box_name, UInt64(72), UInt64(8)))
-        expiry_time = op.btoi(op.Box.extract(box_name, UInt64(80), UInt64(8)))
-        claimed_byte = op.Box.extract(box_name, UInt64(88), UInt64(1))
+        return self._decode_claim(data)
+    
+    @subroutine
+    def _decode_claim(self, data: Bytes) -> ClaimRecord:
+        """Decode a claim box value, giving a legacy 89-byte record unindexed slots"""
+        if data.length == LEGACY_CLAIM_RECORD_SIZE:
+            # sender_slot and receiver_slot of NO_INDEX_SLOT
+            data = data + Bytes(b"\xff\xff\xff\xff")
+        
+        return ClaimRecord.from_bytes(data)
+    
+    @subroutine
+    def _claim_box_name(self, claim_id: UInt64) -> Bytes:
+        """Box name: ARC-4 encoded "claim_" + claim_id (8 bytes)"""
+        return op.concat(arc4.String("claim_").bytes, op.itob(claim_id))
+    
+    @subroutine
+    def _sender_index_name(self, sender: Account) -> Bytes:
+        """Index box of a sender's open links: "snd_" + address"""
+        return op.concat(Bytes(b"snd_"), sender.bytes)
+    
+    @subroutine
+    def _receiver_index_name(self, receiver: Account, page: UInt64) -> Bytes:
+        """Index page of the open links restricted to a receiver: "rcv_" + address + page (8 bytes)"""
+        return op.concat(op.concat(Bytes(b"rcv_"), receiver.bytes), op.itob(page))
+    
+    @subroutine
+    def _index_add(self, box_name: Bytes, claim_id: UInt64) -> UInt64:
+        """List a claim ID in an index box, reusing a freed slot if any
+        
+        Returns:
+            Slot holding the claim ID
+        """
+        length, box_exists = op.Box.length(box_name)
+        if not box_exists:
+            # Zeroed header: no free slot, no entries
+            op.Box.create(box_name, UInt64(INDEX_HEADER_SIZE))
+            length = UInt64(INDEX_HEADER_SIZE)
+        
+        free_head = op.btoi(op.Box.extract(box_name, 0, 8))
+        if free_head > 0:
+            slot = free_head - 1
+            offset = INDEX_HEADER_SIZE + slot * 8
+            next_free = op.btoi(op.Box.extract(box_name, offset, 8)) ^ INDEX_FREE_BIT
+            op.Box.replace(box_name, 0, op.itob(next_free))
+        else:
+            slot = (length - INDEX_HEADER_SIZE) // 8
+            assert slot < INDEX_MAX_SLOTS, "Too many open links for one sender"
+            op.Box.resize(box_name, length + 8)
+            offset = length
         
+        op.Box.replace(box_name, offset, op.itob(claim_id))
+        count = op.btoi(op.Box.extract(box_name, 8, 8))
+        op.Box.replace(box_name, 8, op.itob(count + 1))
+        return slot
+    
+    @subroutine
+    def _index_remove(self, box_name: Bytes, slot: UInt64) -> None:
+        """Free a slot of an index box, deleting the box when it empties"""
+        count = op.btoi(op.Box.extract(box_name, 8, 8))
+        if count == 1:
+            op.Box.delete(box_name)
+        else:
+            free_head = op.btoi(op.Box.extract(box_name, 0, 8))
+            op.Box.replace(box_name, INDEX_HEADER_SIZE + slot * 8, op.itob(INDEX_FREE_BIT | free_head))
+            op.Box.replace(box_name, 0, op.itob(slot + 1))
+            op.Box.replace(box_name, 8, op.itob(count - 1))
+    
+    @subroutine
+    def _receiver_index_add(self, receiver: Account, claim_id: UInt64) -> UInt64:
+        """Set a claim ID's bit in its receiver index page, creating the page if needed
+        
+        Returns:
+            Bit of the claim ID within its page
+        """
+        box_name = self._receiver_index_name(receiver, claim_id // RECEIVER_PAGE_CLAIMS)
+        _length, box_exists = op.Box.length(box_name)
+        if not box_exists:
+            op.Box.create(box_name, UInt64(RECEIVER_PAGE_SIZE))
+        
+        bit = claim_id % RECEIVER_PAGE_CLAIMS
+        offset = RECEIVER_PAGE_HEADER_SIZE + bit // 8
+        bits = op.btoi(op.Box.extract(box_name, offset, 1))
+        op.Box.replace(box_name, offset, op.extract(op.itob(bits | (UInt64(1) << (bit % 8))), 7, 1))
+        count = op.btoi(op.Box.extract(box_name, 0, 8))
+        op.Box.replace(box_name, 0, op.itob(count + 1))
+        return bit
+    
+    @subroutine
+    def _receiver_index_remove(self, receiver: Account, claim_id: UInt64) -> None:
+        """Clear a claim ID's bit in its receiver index page, deleting the page when it empties"""
+        box_name = self._receiver_index_name(receiver, claim_id // RECEIVER_PAGE_CLAIMS)
+        count = op.btoi(op.Box.extract(box_name, 0, 8))
+        if count == 1:
+            op.Box.delete(box_name)
+        else:
+            bit = claim_id % RECEIVER_PAGE_CLAIMS
+            offset = RECEIVER_PAGE_HEADER_SIZE + bit // 8
+            bits = op.btoi(op.Box.extract(box_name, offset, 1))
+            op.Box.replace(box_name, offset, op.extract(op.itob(bits & ~(UInt64(1) << (bit % 8))), 7, 1))
+            op.Box.replace(box_name, 0, op.itob(count - 1))
+    
+    @subroutine
+    def _unindex_claim(self, claim_id: UInt64, record: ClaimRecord) -> None:
+        """Remove a closed link from its sender's index box and receiver's index page"""
+        if record.sender_slot.native != NO_INDEX_SLOT:
+            self._index_remove(self._sender_index_name(record.sender.native), record.sender_slot.native)
+        if record.receiver_slot.native != NO_INDEX_SLOT:
+            self._receiver_index_remove(record.receiver.native, claim_id)
+    
+    @subroutine
+    def _registry_name(self, asset_id: UInt64) -> Bytes:
+        """Asset registry box: "ast_" + asset_id (8 bytes)"""
+        return op.concat(Bytes(b"ast_"), op.itob(asset_id))
+    
+    @subroutine
+    def _ensure_opted_in(self, asset_id: UInt64) -> None:
+        """Create the asset's registry box on first use, opting into an ASA first"""
+        box_name = self._registry_name(asset_id)
+        _length, box_exists = op.Box.length(box_name)
+        if not box_exists:
+            if asset_id != UInt64(0):
+                _balance, opted_in = op.AssetHoldingGet.asset_balance(Global.current_application_address, asset_id)
+                if not opted_in:
+                    itxn.AssetTransfer(
+                        xfer_asset=Asset(asset_id),
+                        asset_receiver=Global.current_application_address,
+                        asset_amount=UInt64(0),
+                        fee=UInt64(0),  # Caller pays fee
+                    ).submit()
+            op.Box.create(box_name, UInt64(REGISTRY_SIZE))
+    
+    @subroutine
+    def _add_liability(self, asset_id: UInt64, amount: UInt64, links: UInt64) -> None:
+        """Add newly funded links (or an airdrop pool, with links = 0) to the registry"""
+        self._ensure_opted_in(asset_id)
+        box_name = self._registry_name(asset_id)
+        registry = AssetRegistry.from_bytes(op.Box.extract(box_name, 0, REGISTRY_SIZE))
+        self._write_liability(
+            asset_id,
+            registry.liability.native + amount,
+            registry.open_links.native + links,
+        )
+    
+    @subroutine
+    def _remove_liability(self, asset_id: UInt64, amount: UInt64, links: UInt64) -> None:
+        """Remove paid-out or refunded amounts from the registry, saturating at zero"""
+        self._ensure_opted_in(asset_id)
+        box_name = self._registry_name(asset_id)
+        registry = AssetRegistry.from_bytes(op.Box.extract(box_name, 0, REGISTRY_SIZE))
+        liability = registry.liability.native
+        open_links = registry.open_links.native
+        self._write_liability(
+            asset_id,
+            liability - amount if liability > amount else UInt64(0),
+            open_links - links if open_links > links else UInt64(0),
+        )
+    
+    @subroutine
+    def _write_liability(self, asset_id: UInt64, liability: UInt64, open_links: UInt64) -> None:
+        """Store an asset's totals in its registry box and, if a slot is free, the global ledger
+        
+        The registry box holds the real totals. An asset whose totals reach
+        zero gives up its ledger slot.
+        """
+        registry = AssetRegistry(
+            liability=arc4.UInt64(liability),
+            open_links=arc4.UInt64(open_links),
+        )
+        op.Box.put(self._registry_name(asset_id), registry.bytes)
+        
+        key = op.concat(Bytes(b"ldg_"), op.itob(asset_id))
+        _value, tracked = op.AppGlobal.get_ex_bytes(Global.current_application_id, key)
+        if liability == 0 and open_links == 0:
+            if tracked:
+                op.AppGlobal.delete(key)
+                self._untrack_ledger_asset(asset_id)
+        elif tracked:
+            op.AppGlobal.put(key, registry.bytes)
+        elif self.ledger_assets.length < UInt64(MAX_LEDGER_ASSETS * 8):
+            self.ledger_assets += op.itob(asset_id)
+            op.AppGlobal.put(key, registry.bytes)
+    
+    @subroutine
+    def _untrack_ledger_asset(self, asset_id: UInt64) -> None:
+        """Remove an asset ID from ledger_assets"""
+        assets = self.ledger_assets
+        for position in urange(0, assets.length, 8):
+            if op.extract_uint64(assets, position) == asset_id:
+                self.ledger_assets = assets[:position] + assets[position + 8:]
+                return
+    
+    @subroutine
+    def _held_balance(self, asset_id: UInt64) -> UInt64:
+        """App holding of an asset, excluding its minimum balance for ALGO"""
+        app = Global.current_application_address
+        if asset_id == UInt64(0):
+            return app.balance - app.min_balance
+        balance, _opted_in = op.AssetHoldingGet.asset_balance(app, asset_id)
+        return balance
+    
+    @subroutine
+    def _check_claimable(self, record: ClaimRecord) -> None:
+        """Assert the caller may claim a link now"""
         # Check if already claimed
-        assert op.btoi(claimed_byte) == 0, "Already claimed"
+        assert record.state.native == CLAIM_OPEN, "Already claimed"
         
         # Check expiry
+        expiry_time = record.expiry_time.native
         if expiry_time > UInt64(0):
             assert Global.latest_timestamp < expiry_time, "Claim link expired"
         
         # Check receiver restriction
         # Zero address (all zeros) means anyone can claim
-        zero_address = op.bzero(UInt64(32))
-        if receiver.bytes != zero_address:
-            assert Txn.sender == receiver, "Only specified receiver can claim"
+        if record.receiver != arc4.Address():
+            assert Txn.sender == record.receiver.native, "Only specified receiver can claim"
+    
+    @arc4.abimethod()
+    def claim(
+        self,
+        claim_id: UInt64,
+    ) -> arc4.Bool:
+        """Claim funds from escrow
+        
+        Args:
+            claim_id: ID of the claim link
+            
+        Returns:
+            True if claim successful
+        """
+        record = self._load_claim(claim_id)
+        self._check_claimable(record)
         
         # Mark as claimed
-        op.Box.put(box_name, UInt64(88), op.itob(UInt64(1)))
+        op.Box.replace(self._claim_box_name(claim_id), UInt64(CLAIM_STATE_OFFSET), arc4.UInt8(CLAIM_CLAIMED).bytes)
+        self._unindex_claim(claim_id, record)
+        
+        amount = record.amount.native
+        asset_id = record.asset_id.native
         
         # Send funds to claimer
         if asset_id == UInt64(0):
@@ -161,8 +656,65 @@ class EscrowClaimLink(ARC4Contract):
                 fee=UInt64(0),  # Caller pays fee
             ).submit()
         
+        self._remove_liability(asset_id, amount, UInt64(1))
+        
         return arc4.Bool(True)
     
+    @arc4.abimethod()
+    def claim_batch(
+        self,
+        claim_ids: arc4.DynamicArray[arc4.UInt64],
+    ) -> arc4.UInt64:
+        """Claim many links, in any mix of assets, for the caller
+        
+        Every link must be claimable by the caller. Consecutive links in the
+        same asset are paid with one merged inner transfer, so callers should
+        order IDs by asset; the caller covers inner fees through fee pooling.
+        The group must reference each claim box, its index boxes and the
+        registry box of each asset.
+        
+        Args:
+            claim_ids: IDs of the claim links to claim
+            
+        Returns:
+            Number of links claimed
+        """
+        inner_count = UInt64(0)
+        pending_asset = UInt64(0)
+        pending_amount = UInt64(0)
+        pending_links = UInt64(0)
+        
+        for claim_id in claim_ids:
+            record = self._load_claim(claim_id.native)
+            self._check_claimable(record)
+            
+            op.Box.replace(
+                self._claim_box_name(claim_id.native),
+                UInt64(CLAIM_STATE_OFFSET),
+                arc4.UInt8(CLAIM_CLAIMED).bytes,
+            )
+            self._unindex_claim(claim_id.native, record)
+            
+            asset_id = record.asset_id.native
+            if pending_links > 0 and asset_id != pending_asset:
+                inner_count = self._add_transfer(Txn.sender, pending_asset, pending_amount, inner_count)
+                self._remove_liability(pending_asset, pending_amount, pending_links)
+                pending_amount = UInt64(0)
+                pending_links = UInt64(0)
+            
+            pending_asset = asset_id
+            pending_amount += record.amount.native
+            pending_links += UInt64(1)
+        
+        if pending_links > 0:
+            inner_count = self._add_transfer(Txn.sender, pending_asset, pending_amount, inner_count)
+            self._remove_liability(pending_asset, pending_amount, pending_links)
+        
+        if inner_count > 0:
+            op.ITxnCreate.submit()
+        
+        return arc4.UInt64(claim_ids.length)
+    
     @arc4.abimethod()
     def cancel(
         self,
@@ -176,31 +728,21 @@ class EscrowClaimLink(ARC4Contract):
         Returns:
             True if cancellation successful
         """
-        # Get box name
-        box_name = op.concat(arc4.String("claim_").bytes, op.itob(claim_id))
-        
-        # Verify box exists
-        box_exists, _ = op.Box.length(box_name)
-        assert box_exists, "Claim link not found"
-        
-        # Read claim data from box
-        sender = Account(op.Box.extract(box_name, UInt64(0), UInt64(32)))
-        amount = op.btoi(op.Box.extract(box_name, UInt64(64), UInt64(8)))
-        asset_id = op.btoi(op.Box.extract(box_name, UInt64(72), UInt64(8)))
-        expiry_time = op.btoi(op.Box.extract(box_name, UInt64(80), UInt64(8)))
-        claimed_byte = op.Box.extract(box_name, UInt64(88), UInt64(1))
+        record = self._load_claim(claim_id)
         
         # Check if already claimed
-        assert op.btoi(claimed_byte) == 0, "Already claimed"
+        assert record.state.native == CLAIM_OPEN, "Already claimed"
         
         # Only sender can cancel
+        sender = record.sender.native
         assert Txn.sender == sender, "Only sender can cancel"
         
         # Can only cancel if expired or sender wants to cancel before expiry
         # For now, allow sender to cancel anytime if not claimed
+        # The box is deleted below, so no cancelled state needs writing
         
-        # Mark as claimed (to prevent double-spend)
-        op.Box.put(box_name, UInt64(88), op.itob(UInt64(2)))  # 2 = cancelled
+        amount = record.amount.native
+        asset_id = record.asset_id.native
         
         # Refund sender
         if asset_id == UInt64(0):
@@ -220,10 +762,550 @@ class EscrowClaimLink(ARC4Contract):
             ).submit()
         
         # Delete box to free up storage
-        op.Box.delete(box_name)
+        op.Box.delete(self._claim_box_name(claim_id))
+        self._unindex_claim(claim_id, record)
+        self._remove_liability(asset_id, amount, UInt64(1))
+        
+        return arc4.Bool(True)
+    
+    @arc4.abimethod()
+    def sweep_expired(
+        self,
+        claim_ids: arc4.DynamicArray[arc4.UInt64],
+    ) -> arc4.UInt64:
+        """Refund senders and delete boxes of expired, unclaimed links
+        
+        Anyone can call this. IDs that are missing, not open, have no expiry
+        or have not expired yet are skipped. Consecutive refunds to the same
+        sender in the same asset are merged into one inner transfer, and
+        inner transfers are submitted in groups of up to 16. The caller
+        covers inner fees through fee pooling.
+        
+        Args:
+            claim_ids: IDs of the claim links to sweep
+            
+        Returns:
+            Number of links swept
+        """
+        swept = UInt64(0)
+        inner_count = UInt64(0)
+        pending_sender = Global.zero_address
+        pending_asset = UInt64(0)
+        pending_amount = UInt64(0)
+        pending_links = UInt64(0)
+        
+        for claim_id in claim_ids:
+            box_name = self._claim_box_name(claim_id.native)
+            data, box_exists = op.Box.get(box_name)
+            if box_exists:
+                record = self._decode_claim(data)
+                expiry_time = record.expiry_time.native
+                if (
+                    record.state.native == CLAIM_OPEN
+                    and expiry_time > UInt64(0)
+                    and Global.latest_timestamp >= expiry_time
+                ):
+                    sender = record.sender.native
+                    asset_id = record.asset_id.native
+                    if pending_amount > 0 and (sender != pending_sender or asset_id != pending_asset):
+                        inner_count = self._add_transfer(pending_sender, pending_asset, pending_amount, inner_count)
+                        self._remove_liability(pending_asset, pending_amount, pending_links)
+                        pending_amount = UInt64(0)
+                        pending_links = UInt64(0)
+                    
+                    pending_sender = sender
+                    pending_asset = asset_id
+                    pending_amount += record.amount.native
+                    pending_links += UInt64(1)
+                    
+                    # Delete box to free up storage
+                    op.Box.delete(box_name)
+                    self._unindex_claim(claim_id.native, record)
+                    swept += UInt64(1)
+        
+        if pending_amount > 0:
+            inner_count = self._add_transfer(pending_sender, pending_asset, pending_amount, inner_count)
+            self._remove_liability(pending_asset, pending_amount, pending_links)
+        
+        if inner_count > 0:
+            op.ITxnCreate.submit()
+        
+        return arc4.UInt64(swept)
+    
+    @subroutine
+    def _add_transfer(
+        self,
+        receiver: Account,
+        asset_id: UInt64,
+        amount: UInt64,
+        inner_count: UInt64,
+    ) -> UInt64:
+        """Append an ALGO or ASA transfer to the open inner group, submitting full groups"""
+        if inner_count == 0:
+            op.ITxnCreate.begin()
+        elif inner_count % MAX_INNER_GROUP_SIZE == 0:
+            op.ITxnCreate.submit()
+            op.ITxnCreate.begin()
+        else:
+            op.ITxnCreate.next()
+        
+        if asset_id == UInt64(0):
+            op.ITxnCreate.set_type_enum(TransactionType.Payment)
+            op.ITxnCreate.set_receiver(receiver)
+            op.ITxnCreate.set_amount(amount)
+        else:
+            op.ITxnCreate.set_type_enum(TransactionType.AssetTransfer)
+            op.ITxnCreate.set_xfer_asset(asset_id)
+            op.ITxnCreate.set_asset_receiver(receiver)
+            op.ITxnCreate.set_asset_amount(amount)
+        op.ITxnCreate.set_fee(UInt64(0))  # Caller pays fee
+        
+        return inner_count + 1
+    
+    @arc4.abimethod()
+    def create_airdrop(
+        self,
+        payment: gtxn.Transaction,
+        merkle_root: Hash32,
+        leaf_count: UInt64,
+        expiry_time: UInt64,
+        mbr_payment: gtxn.PaymentTransaction,
+    ) -> arc4.UInt64:
+        """Fund an airdrop pool claimable with Merkle proofs
+        
+        Stores only the root, so the cost is one box write whether the tree
+        has ten leaves or a million. The call must reference drp_<id>.
+        
+        Args:
+            payment: Payment or asset transfer funding the pool (sum of leaf amounts)
+            merkle_root: Root of the (index, receiver, amount) tree
+            leaf_count: Number of leaves
+            expiry_time: Unix timestamp after which claims stop (0 for no expiry)
+            mbr_payment: Payment of AIRDROP_PAGE_MIN_BALANCE per bitmap page
+                (leaf_count / AIRDROP_PAGE_LEAVES, rounded up) to this contract;
+                purge_airdrop_pages refunds it
+            
+        Returns:
+            Airdrop ID
+        """
+        assert leaf_count > 0, "At least one leaf required"
+        
+        funded, asset_id = self._funding(payment)
+        assert funded > 0, "Amount must be greater than 0"
+        
+        pages = (leaf_count + AIRDROP_PAGE_LEAVES - 1) // AIRDROP_PAGE_LEAVES
+        self._charge_min_balance(mbr_payment, pages * AIRDROP_PAGE_MIN_BALANCE)
+        
+        airdrop_id = self.airdrop_count
+        self.airdrop_count += UInt64(1)
+        
+        record = AirdropRecord(
+            sender=arc4.Address(Txn.sender),
+            merkle_root=merkle_root.copy(),
+            asset_id=arc4.UInt64(asset_id),
+            total=arc4.UInt64(funded),
+            claimed=arc4.UInt64(0),
+            leaf_count=arc4.UInt64(leaf_count),
+            expiry_time=arc4.UInt64(expiry_time),
+            pages=arc4.UInt64(pages),
+        )
+        box_name = self._airdrop_box_name(airdrop_id)
+        
+        _length, box_exists = op.Box.length(box_name)
+        assert not box_exists, "Airdrop already exists"
+        
+        op.Box.put(box_name, record.bytes)
+        self._add_liability(asset_id, funded, UInt64(0))
+        
+        return arc4.UInt64(airdrop_id)
+    
+    @arc4.abimethod()
+    def claim_airdrop(
+        self,
+        airdrop_id: UInt64,
+        index: UInt64,
+        amount: UInt64,
+        proof: arc4.DynamicArray[Hash32],
+    ) -> arc4.Bool:
+        """Claim the caller's leaf of an airdrop
+        
+        The call must reference drp_<id> and the leaf's bitmap page. Each
+        proof level costs one sha256; deep trees may need extra app calls in
+        the group (reserve_box_refs) for opcode budget.
+        
+        Args:
+            airdrop_id: ID of the airdrop
+            index: Leaf index
+            amount: Leaf amount
+            proof: Sibling hashes from the leaf up to the root
+            
+        Returns:
+            True if claim successful
+        """
+        record = self._load_airdrop(airdrop_id)
+        assert record.leaf_count.native > 0, "Airdrop closed"
+        assert index < record.leaf_count.native, "Leaf index out of range"
+        
+        expiry_time = record.expiry_time.native
+        if expiry_time > UInt64(0):
+            assert Global.latest_timestamp < expiry_time, "Airdrop expired"
+        
+        # The leaf binds the caller, so a proof cannot be replayed by anyone else
+        node = op.sha256(Bytes(b"\x00") + op.itob(index) + Txn.sender.bytes + op.itob(amount))
+        position = index
+        for sibling in proof:
+            if position & 1:
+                node = op.sha256(Bytes(b"\x01") + sibling.bytes + node)
+            else:
+                node = op.sha256(Bytes(b"\x01") + node + sibling.bytes)
+            position = position >> 1
+        assert position == 0, "Proof too short"
+        assert node == record.merkle_root.bytes, "Invalid proof"
+        
+        self._set_claimed_bit(self._airdrop_page_name(airdrop_id, index // AIRDROP_PAGE_LEAVES), index)
+        
+        claimed = record.claimed.native + amount
+        assert claimed <= record.total.native, "Airdrop pool exhausted"
+        op.Box.replace(self._airdrop_box_name(airdrop_id), UInt64(AIRDROP_CLAIMED_OFFSET), op.itob(claimed))
+        
+        self._add_transfer(Txn.sender, record.asset_id.native, amount, UInt64(0))
+        op.ITxnCreate.submit()
+        self._remove_liability(record.asset_id.native, amount, UInt64(0))
         
         return arc4.Bool(True)
     
+    @arc4.abimethod()
+    def close_airdrop(
+        self,
+        airdrop_id: UInt64,
+    ) -> arc4.UInt64:
+        """Refund the unclaimed remainder to the sender and stop claims
+        
+        Only the sender can close, at any time; later claims fail. The
+        record stays until purge_airdrop_pages has released the bitmap pages.
+        
+        Args:
+            airdrop_id: ID of the airdrop
+            
+        Returns:
+            Refunded amount
+        """
+        record = self._load_airdrop(airdrop_id)
+        sender = record.sender.native
+        assert Txn.sender == sender, "Only sender can close"
+        assert record.leaf_count.native > 0, "Airdrop already closed"
+        
+        remaining = record.total.native - record.claimed.native
+        if remaining > 0:
+            self._add_transfer(sender, record.asset_id.native, remaining, UInt64(0))
+            op.ITxnCreate.submit()
+            self._remove_liability(record.asset_id.native, remaining, UInt64(0))
+        
+        record.claimed = record.total
+        record.leaf_count = arc4.UInt64(0)
+        op.Box.put(self._airdrop_box_name(airdrop_id), record.bytes)
+        
+        return arc4.UInt64(remaining)
+    
+    @arc4.abimethod()
+    def purge_airdrop_pages(
+        self,
+        airdrop_id: UInt64,
+        count: UInt64,
+    ) -> arc4.UInt64:
+        """Delete the highest `count` bitmap pages of a closed airdrop and refund their minimum balance
+        
+        Anyone can call this once the airdrop is closed. Pages are released
+        from the top down, whether or not a claim created them, and the
+        sender gets AIRDROP_PAGE_MIN_BALANCE back for each. The record is
+        deleted with the last page. The caller covers the inner fee through
+        fee pooling.
+        
+        Args:
+            airdrop_id: ID of the closed airdrop
+            count: Number of pages to release
+            
+        Returns:
+            Number of pages released
+        """
+        record = self._load_airdrop(airdrop_id)
+        assert record.leaf_count.native == 0, "Airdrop is still open"
+        
+        pages = record.pages.native
+        if count > pages:
+            count = pages
+        for page in urange(pages - count, pages):
+            op.Box.delete(self._airdrop_page_name(airdrop_id, page))
+        
+        if count > 0:
+            itxn.Payment(
+                receiver=record.sender.native,
+                amount=count * AIRDROP_PAGE_MIN_BALANCE,
+                fee=UInt64(0),  # Caller pays fee
+            ).submit()
+        
+        if count == pages:
+            op.Box.delete(self._airdrop_box_name(airdrop_id))
+        else:
+            record.pages = arc4.UInt64(pages - count)
+            op.Box.put(self._airdrop_box_name(airdrop_id), record.bytes)
+        
+        return arc4.UInt64(count)
+    
+    @subroutine
+    def _set_claimed_bit(self, page_name: Bytes, index: UInt64) -> None:
+        """Test and set the bit of index in its bitmap page, creating the page if needed"""
+        _length, page_exists = op.Box.length(page_name)
+        if not page_exists:
+            op.Box.create(page_name, UInt64(AIRDROP_PAGE_SIZE))
+        
+        bit = index % AIRDROP_PAGE_LEAVES
+        byte_offset = bit // 8
+        mask = UInt64(1) << (bit % 8)
+        bits = op.btoi(op.Box.extract(page_name, byte_offset, 1))
+        assert bits & mask == 0, "Already claimed"
+        op.Box.replace(page_name, byte_offset, op.extract(op.itob(bits | mask), 7, 1))
+    
+    @subroutine
+    def _load_airdrop(self, airdrop_id: UInt64) -> AirdropRecord:
+        """Read and decode an airdrop record (one box read)"""
+        data, box_exists = op.Box.get(self._airdrop_box_name(airdrop_id))
+        assert box_exists, "Airdrop not found"
+        
+        return AirdropRecord.from_bytes(data)
+    
+    @subroutine
+    def _airdrop_box_name(self, airdrop_id: UInt64) -> Bytes:
+        """Airdrop record box: "drp_" + airdrop_id (8 bytes)"""
+        return op.concat(Bytes(b"drp_"), op.itob(airdrop_id))
+    
+    @subroutine
+    def _airdrop_page_name(self, airdrop_id: UInt64, page: UInt64) -> Bytes:
+        """Airdrop claimed-bitmap page: "drb_" + airdrop_id (8 bytes) + page (8 bytes)"""
+        return op.concat(op.concat(Bytes(b"drb_"), op.itob(airdrop_id)), op.itob(page))
+    
+    @arc4.abimethod()
+    def create_voucher_book(
+        self,
+        payment: gtxn.Transaction,
+        signer: arc4.Address,
+        expiry_time: UInt64,
+        nonce_count: UInt64,
+        mbr_payment: gtxn.PaymentTransaction,
+    ) -> arc4.UInt64:
+        """Fund a pool that pays out vouchers signed offline by `signer`
+        
+        Issuing a voucher needs no transaction: the signer key signs it and
+        the sender hands it out. The call must reference vbk_<id> and the
+        asset's registry box.
+        
+        Args:
+            payment: Payment or asset transfer funding the book
+            signer: ed25519 public key (an account address) that signs the vouchers
+            expiry_time: Unix timestamp after which no voucher is redeemable (0 for no expiry)
+            nonce_count: Number of vouchers the book can issue (nonces 0 to nonce_count - 1)
+            mbr_payment: Payment of VOUCHER_PAGE_MIN_BALANCE per bitmap page
+                (nonce_count / AIRDROP_PAGE_LEAVES, rounded up) to this contract;
+                purge_voucher_pages refunds it
+        
+        Returns:
+            Voucher book ID
+        """
+        assert nonce_count > 0, "At least one nonce required"
+        
+        funded, asset_id = self._funding(payment)
+        assert funded > 0, "Amount must be greater than 0"
+        
+        pages = (nonce_count + AIRDROP_PAGE_LEAVES - 1) // AIRDROP_PAGE_LEAVES
+        self._charge_min_balance(mbr_payment, pages * VOUCHER_PAGE_MIN_BALANCE)
+        
+        book_id = self.voucher_book_count
+        self.voucher_book_count += UInt64(1)
+        
+        book = VoucherBook(
+            sender=arc4.Address(Txn.sender),
+            signer=signer,
+            asset_id=arc4.UInt64(asset_id),
+            total=arc4.UInt64(funded),
+            claimed=arc4.UInt64(0),
+            expiry_time=arc4.UInt64(expiry_time),
+            nonce_count=arc4.UInt64(nonce_count),
+            pages=arc4.UInt64(pages),
+        )
+        box_name = self._voucher_book_name(book_id)
+        
+        _length, box_exists = op.Box.length(box_name)
+        assert not box_exists, "Voucher book already exists"
+        
+        op.Box.put(box_name, book.bytes)
+        self._add_liability(asset_id, funded, UInt64(0))
+        
+        return arc4.UInt64(book_id)
+    
+    @arc4.abimethod()
+    def redeem_voucher(
+        self,
+        book_id: UInt64,
+        nonce: UInt64,
+        receiver: Account,
+        amount: UInt64,
+        expiry_time: UInt64,
+        signature: Signature,
+    ) -> arc4.Bool:
+        """Pay out a signed voucher and mark its nonce as spent
+        
+        Anyone can submit a voucher: one for a receiver pays that receiver,
+        one for the zero address pays the caller. The call must reference
+        vbk_<id>, the nonce's bitmap page and the registry box.
+        ed25519verify_bare costs 1900, so the group needs three extra app
+        calls (reserve_box_refs) for opcode budget.
+        
+        Args:
+            book_id: ID of the voucher book
+            nonce: Voucher number, unique within the book and below its nonce_count
+            receiver: Account paid (zero address for the caller)
+            amount: Voucher amount
+            expiry_time: Voucher expiry (0 for none)
+            signature: ed25519 signature of the voucher message by the book's signer
+        
+        Returns:
+            True if redeemed
+        """
+        book = self._load_voucher_book(book_id)
+        assert book.nonce_count.native > 0, "Voucher book closed"
+        assert nonce < book.nonce_count.native, "Nonce out of range"
+        assert amount > 0, "Amount must be greater than 0"
+        
+        book_expiry = book.expiry_time.native
+        if book_expiry > UInt64(0):
+            assert Global.latest_timestamp < book_expiry, "Voucher book expired"
+        if expiry_time > UInt64(0):
+            assert Global.latest_timestamp < expiry_time, "Voucher expired"
+        
+        message = (
+            Bytes(VOUCHER_PREFIX)
+            + op.itob(Global.current_application_id.id)
+            + op.itob(book_id)
+            + op.itob(nonce)
+            + receiver.bytes
+            + op.itob(amount)
+            + op.itob(expiry_time)
+        )
+        assert op.ed25519verify_bare(message, signature.bytes, book.signer.bytes), "Invalid voucher signature"
+        
+        self._set_claimed_bit(self._voucher_page_name(book_id, nonce // AIRDROP_PAGE_LEAVES), nonce)
+        
+        claimed = book.claimed.native + amount
+        assert claimed <= book.total.native, "Voucher book exhausted"
+        op.Box.replace(self._voucher_book_name(book_id), UInt64(VOUCHER_CLAIMED_OFFSET), op.itob(claimed))
+        
+        payee = receiver
+        if receiver == Global.zero_address:
+            payee = Txn.sender
+        asset_id = book.asset_id.native
+        self._add_transfer(payee, asset_id, amount, UInt64(0))
+        op.ITxnCreate.submit()
+        self._remove_liability(asset_id, amount, UInt64(0))
+        
+        return arc4.Bool(True)
+    
+    @arc4.abimethod()
+    def close_voucher_book(
+        self,
+        book_id: UInt64,
+    ) -> arc4.UInt64:
+        """Refund the unredeemed remainder to the sender and stop redemptions
+        
+        Only the sender can close, at any time; outstanding vouchers stop
+        working. The book stays until purge_voucher_pages has released the
+        bitmap pages.
+        
+        Args:
+            book_id: ID of the voucher book
+        
+        Returns:
+            Refunded amount
+        """
+        book = self._load_voucher_book(book_id)
+        sender = book.sender.native
+        assert Txn.sender == sender, "Only sender can close"
+        assert book.nonce_count.native > 0, "Voucher book already closed"
+        
+        remaining = book.total.native - book.claimed.native
+        if remaining > 0:
+            self._add_transfer(sender, book.asset_id.native, remaining, UInt64(0))
+            op.ITxnCreate.submit()
+            self._remove_liability(book.asset_id.native, remaining, UInt64(0))
+        
+        book.claimed = book.total
+        book.nonce_count = arc4.UInt64(0)
+        op.Box.put(self._voucher_book_name(book_id), book.bytes)
+        
+        return arc4.UInt64(remaining)
+    
+    @arc4.abimethod()
+    def purge_voucher_pages(
+        self,
+        book_id: UInt64,
+        count: UInt64,
+    ) -> arc4.UInt64:
+        """Delete the highest `count` bitmap pages of a closed voucher book and refund their minimum balance
+        
+        Anyone can call this once the book is closed. Pages are released
+        from the top down, whether or not a redemption created them, and the
+        sender gets VOUCHER_PAGE_MIN_BALANCE back for each. The book is
+        deleted with the last page. The caller covers the inner fee through
+        fee pooling.
+        
+        Args:
+            book_id: ID of the closed voucher book
+            count: Number of pages to release
+        
+        Returns:
+            Number of pages released
+        """
+        book = self._load_voucher_book(book_id)
+        assert book.nonce_count.native == 0, "Voucher book is still open"
+        
+        pages = book.pages.native
+        if count > pages:
+            count = pages
+        for page in urange(pages - count, pages):
+            op.Box.delete(self._voucher_page_name(book_id, page))
+        
+        if count > 0:
+            itxn.Payment(
+                receiver=book.sender.native,
+                amount=count * VOUCHER_PAGE_MIN_BALANCE,
+                fee=UInt64(0),  # Caller pays fee
+            ).submit()
+        
+        if count == pages:
+            op.Box.delete(self._voucher_book_name(book_id))
+        else:
+            book.pages = arc4.UInt64(pages - count)
+            op.Box.put(self._voucher_book_name(book_id), book.bytes)
+        
+        return arc4.UInt64(count)
+    
+    @subroutine
+    def _load_voucher_book(self, book_id: UInt64) -> VoucherBook:
+        """Read and decode a voucher book (one box read)"""
+        data, box_exists = op.Box.get(self._voucher_book_name(book_id))
+        assert box_exists, "Voucher book not found"
+        
+        return VoucherBook.from_bytes(data)
+    
+    @subroutine
+    def _voucher_book_name(self, book_id: UInt64) -> Bytes:
+        """Voucher book box: "vbk_" + book_id (8 bytes)"""
+        return op.concat(Bytes(b"vbk_"), op.itob(book_id))
+    
+    @subroutine
+    def _voucher_page_name(self, book_id: UInt64, page: UInt64) -> Bytes:
+        """Spent-nonce bitmap page: "vbb_" + book_id (8 bytes) + page (8 bytes)"""
+        return op.concat(op.concat(Bytes(b"vbb_"), op.itob(book_id)), op.itob(page))
+    
     @arc4.abimethod()
     def get_claim_info(
         self,
@@ -237,31 +1319,67 @@ class EscrowClaimLink(ARC4Contract):
         Returns:
             Tuple of (sender, receiver, amount, asset_id, expiry_time, claimed)
         """
-        # Get box name
-        box_name = op.concat(arc4.String("claim_").bytes, op.itob(claim_id))
-        
-        # Verify box exists
-        box_exists, _ = op.Box.length(box_name)
-        assert box_exists, "Claim link not found"
-        
-        # Read claim data from box
-        sender = Account(op.Box.extract(box_name, UInt64(0), UInt64(32)))
-        receiver = Account(op.Box.extract(box_name, UInt64(32), UInt64(32)))
-        amount = op.btoi(op.Box.extract(box_name, UInt64(64), UInt64(8)))
-        asset_id = op.btoi(op.Box.extract(box_name, UInt64(72), UInt64(8)))
-        expiry_time = op.btoi(op.Box.extract(box_name, UInt64(80), UInt64(8)))
-        claimed_byte = op.Box.extract(box_name, UInt64(88), UInt64(1))
-        claimed = op.btoi(claimed_byte)
+        record = self._load_claim(claim_id)
         
         return arc4.Tuple((
-            sender,
-            receiver,
-            amount,
-            asset_id,
-            expiry_time,
-            claimed,
+            record.sender.native,
+            record.receiver.native,
+            record.amount.native,
+            record.asset_id.native,
+            record.expiry_time.native,
+            UInt64(record.state.native),
         ))
-    
+
+    @arc4.abimethod(readonly=True)
+    def get_asset_registry(
+        self,
+        asset_id: UInt64,
+    ) -> arc4.Tuple[arc4.UInt64, arc4.UInt64, arc4.UInt64]:
+        """Get an asset's escrow balance and outstanding liability
+
+        Args:
+            asset_id: Asset ID (0 for ALGO)
+
+        Returns:
+            Tuple of (balance, liability, open_links); balance is the app's
+            current holding, excluding its minimum balance for ALGO
+        """
+        balance = self._held_balance(asset_id)
+
+        data, box_exists = op.Box.get(self._registry_name(asset_id))
+        if not box_exists:
+            return arc4.Tuple((arc4.UInt64(balance), arc4.UInt64(0), arc4.UInt64(0)))
+
+        registry = AssetRegistry.from_bytes(data)
+        return arc4.Tuple((arc4.UInt64(balance), registry.liability, registry.open_links))
+
+    @arc4.abimethod(readonly=True)
+    def get_liability_ledger(self) -> arc4.DynamicArray[LedgerEntry]:
+        """Get balance, liability and open link count of every tracked asset
+
+        Reads only global state and the app's holdings, so the cost does not
+        depend on how many links are open. ASAs in the ledger must be
+        available to the call (foreign assets or unnamed resources).
+        Assets with nothing outstanding, and assets beyond the
+        MAX_LEDGER_ASSETS slots, are left out; get_asset_registry reads them.
+
+        Returns:
+            One LedgerEntry per tracked asset, in the order they took a slot
+        """
+        entries = arc4.DynamicArray[LedgerEntry]()
+        for position in urange(0, self.ledger_assets.length, 8):
+            asset_id = op.extract_uint64(self.ledger_assets, position)
+            registry = AssetRegistry.from_bytes(
+                op.AppGlobal.get_bytes(op.concat(Bytes(b"ldg_"), op.itob(asset_id)))
+            )
+            entries.append(LedgerEntry(
+                asset_id=arc4.UInt64(asset_id),
+                balance=arc4.UInt64(self._held_balance(asset_id)),
+                liability=registry.liability,
+                open_links=registry.open_links,
+            ))
+        return entries
+
     @arc4.abimethod(allow_actions=["OptIn"])
     def opt_in_asset(
         self,
@@ -269,19 +1387,17 @@ class EscrowClaimLink(ARC4Contract):
     ) -> arc4.Bool:
         """Opt contract into an asset (for ASA support)
         
+        create_asset_links_batch opts in on its own; this remains for
+        callers funding ASA links through create_claim_link. The call must
+        reference the asset's registry box.
+        
         Args:
             asset: Asset to opt into
             
         Returns:
             True if opt-in successful
         """
-        # Opt into asset
-        itxn.AssetTransfer(
-            xfer_asset=asset,
-            asset_receiver=Global.current_application_address,
-            asset_amount=UInt64(0),
-            fee=UInt64(0),
-        ).submit()
+        self._ensure_opted_in(asset.id)
         
         return arc4.Bool(True)
 
@@ -0,0 +1,1114 @@
+"""
+In-memory escrow ledger for local load tests
+Models the EscrowClaimLink state machine and the escrow_approval.teal
+routes in plain Python: claim_count, claim/index/registry boxes, airdrops,
+voucher books, the global liability ledger, account balances with minimum
+balance requirements and inner payments. SimLedger is a FakeAlgod executor, so
+tooling that talks to algod (directly or through fake_algod.serve()) runs
+against it as is.
+
+Each group is applied atomically: writes are journaled and undone when any
+transaction in it fails. Checked as on chain: the reference limit of each
+transaction, box references and the group's box I/O quota, pooled fees
+(outer plus inner transactions), the pooled opcode budget and minimum
+balances. Opcode costs are the estimates the packers plan with (see
+METHOD_COSTS), not measured ones. Merkle proofs and voucher signatures
+are checked; transaction signatures are not. Not modelled: validity
+windows.
+
+Usage:
+    ledger = SimLedger()
+    ledger.fund(address, 10_000_000)
+    app_id = ledger.create_app(EscrowClaimLinkModel(), creator)
+    server, url = fake_algod.serve(ledger.fake)
+"""
+import base64
+from typing import Callable, Dict, List, Optional, Tuple
+
+from algosdk import abi, encoding, logic
+from algosdk.error import AlgodHTTPError
+
+from box_codec import (
+    AIRDROP_PAGE_LEAVES,
+    AIRDROP_PAGE_MIN_BALANCE,
+    AIRDROP_PAGE_SIZE,
+    AIRDROP_RECORD,
+    ASSET_REGISTRY,
+    ASSET_REGISTRY_SIZE,
+    BOX_IO_QUOTA_PER_REF,
+    CLAIM_CLAIMED,
+    CLAIM_OPEN,
+    INDEX_FREE_BIT,
+    INDEX_HEADER,
+    NO_INDEX_SLOT,
+    RECEIVER_PAGE_CLAIMS,
+    RECEIVER_PAGE_HEADER_SIZE,
+    RECEIVER_PAGE_SIZE,
+    TEAL_LINK_MIN_BALANCE,
+    VOUCHER_BOOK,
+    VOUCHER_PAGE_MIN_BALANCE,
+    ZERO_ADDRESS_BYTES,
+    AirdropRecord,
+    ClaimRecord,
+    TealLink,
+    VoucherBook,
+    airdrop_box_name,
+    airdrop_page_count,
+    airdrop_page_name,
+    asset_registry_name,
+    claim_box_name,
+    decode_airdrop_record,
+    decode_asset_registry,
+    decode_claim_record,
+    decode_teal_link,
+    decode_voucher_book,
+    encode_claim_record,
+    encode_teal_link,
+    ledger_key,
+    receiver_index_name,
+    sender_index_name,
+    teal_link_box_name,
+    voucher_book_name,
+    voucher_page_name,
+)
+from fake_algod import MIN_BALANCE, MIN_FEE, FakeAlgod
+from group_packer import APP_CALL_BUDGET, DEFAULT_COSTS
+from merkle_airdrop import CLAIM_BASE_COST, CLAIM_LEVEL_COST, compute_root
+
+# Protocol limits and minimum balance costs
+MAX_REFS_PER_TXN = 8
+ASSET_MIN_BALANCE = 100_000
+BOX_FLAT_MIN_BALANCE = 2_500
+BOX_BYTE_MIN_BALANCE = 400
+
+# Contract constants mirrored from escrow_claim_link.py
+CLAIM_STATE_OFFSET = 88
+INDEX_MAX_SLOTS = 4094
+MAX_LEDGER_ASSETS = 14
+MAX_GLOBAL_KEY_VALUE_SIZE = 128
+VOUCHER_PREFIX = b"ASV1"
+
+ABI_RETURN_PREFIX = bytes.fromhex("151f7c75")
+
+# Opcode cost of a call: (fixed, per item), the items being the entries or
+# IDs of a batch call or the proof levels of an airdrop claim. These are the
+# estimates the packers plan with, so the groups they build pass; methods
+# not listed fit in one call.
+ED25519_VERIFY_COST = 1900
+METHOD_COSTS: Dict[str, Tuple[int, int]] = {
+    "claim": (DEFAULT_COSTS["claim"].budget, 0),
+    "cancel": (DEFAULT_COSTS["cancel"].budget, 0),
+    "claim_batch": (0, DEFAULT_COSTS["claim"].budget),
+    "sweep_expired": (0, DEFAULT_COSTS["sweep_expired"].budget),
+    "create_claim_links_batch": (0, DEFAULT_COSTS["create_claim_links_batch"].budget),
+    "create_asset_links_batch": (0, DEFAULT_COSTS["create_claim_links_batch"].budget),
+    "claim_airdrop": (CLAIM_BASE_COST, CLAIM_LEVEL_COST),
+    "redeem_voucher": (ED25519_VERIFY_COST + 300, 0),
+}
+
+NOOP = 0
+FIRST_APP_ID = 1001
+
+
+class LogicError(Exception):
+    """A transaction of the group was rejected; the group is rolled back"""
+
+
+def box_min_balance(name: bytes, value: bytes) -> int:
+    return BOX_FLAT_MIN_BALANCE + BOX_BYTE_MIN_BALANCE * (len(name) + len(value))
+
+
+class AppCall:
+    """Everything an app model can see and do during one application call"""
+
+    def __init__(self, ledger: "SimLedger", group: List[dict], position: int, app_id: int) -> None:
+        self.ledger = ledger
+        self.group = group
+        self.position = position
+        self.txn = group[position]
+        self.app_id = app_id
+        self.app_address = logic.get_application_address(app_id)
+        self.app_key = encoding.decode_address(self.app_address)
+        self.sender = self.txn.get("snd", ZERO_ADDRESS_BYTES)
+        self.args: List[bytes] = self.txn.get("apaa", [])
+        self.logs: List[bytes] = []
+        self.inner: List[dict] = []
+
+    # -- transaction fields ---------------------------------------------
+
+    def account_arg(self, index: int) -> bytes:
+        return self.sender if index == 0 else self.txn["apat"][index - 1]
+
+    def asset_arg(self, index: int) -> int:
+        return self.txn["apas"][index]
+
+    def now(self) -> int:
+        return int(self.ledger.clock())
+
+    # -- state ----------------------------------------------------------
+
+    def global_get(self, key: bytes, default=0):
+        return self.ledger.global_get(self.app_id, key, default)
+
+    def global_put(self, key: bytes, value) -> None:
+        if isinstance(value, bytes) and len(key) + len(value) > MAX_GLOBAL_KEY_VALUE_SIZE:
+            raise LogicError(f"key and value of global {key!r} exceed {MAX_GLOBAL_KEY_VALUE_SIZE} bytes")
+        self.ledger.global_put(self.app_id, key, value)
+
+    def global_delete(self, key: bytes) -> None:
+        self.ledger.global_delete(self.app_id, key)
+
+    def box_get(self, name: bytes) -> Optional[bytes]:
+        self.ledger.require_box(self.app_id, name)
+        value = self.ledger.box_get(self.app_id, name)
+        self.ledger.touch_box(self.app_id, name, len(value) if value is not None else 0)
+        return value
+
+    def box_put(self, name: bytes, value: bytes) -> None:
+        self.ledger.require_box(self.app_id, name)
+        self.ledger.box_put(self.app_id, name, value)
+        self.ledger.touch_box(self.app_id, name, len(value))
+
+    def box_delete(self, name: bytes) -> None:
+        self.ledger.require_box(self.app_id, name)
+        self.ledger.box_delete(self.app_id, name)
+
+    def holding(self, asset_id: int) -> Optional[int]:
+        """App's balance of an ASA, or None when not opted in"""
+        return self.ledger.account(self.app_address)["assets"].get(asset_id)
+
+    def balance(self, asset_id: int) -> int:
+        """App's spendable ALGO (above its minimum balance) or ASA balance"""
+        account = self.ledger.account(self.app_address)
+        if asset_id == 0:
+            return account["amount"] - account["min-balance"]
+        return account["assets"].get(asset_id, 0)
+
+    # -- inner transactions ---------------------------------------------
+
+    def pay(self, receiver: bytes, asset_id: int, amount: int) -> None:
+        """Inner payment or asset transfer from the app account"""
+        address = encoding.encode_address(receiver)
+        self.ledger.transfer(self.app_address, address, asset_id, amount)
+        if asset_id == 0:
+            self.inner.append({"txn": {"txn": {"type": "pay", "snd": self.app_address, "rcv": address, "amt": amount}}})
+        else:
+            self.inner.append(
+                {"txn": {"txn": {"type": "axfer", "snd": self.app_address, "arcv": address, "xaid": asset_id, "aamt": amount}}}
+            )
+
+    def opt_in(self, asset_id: int) -> None:
+        """Inner zero-amount transfer to self, opting the app into an ASA"""
+        self.ledger.opt_in(self.app_address, asset_id)
+        self.inner.append({"txn": {"txn": {"type": "axfer", "snd": self.app_address, "arcv": self.app_address, "xaid": asset_id}}})
+
+
+class AppModel:
+    """Base of the app models: ABI routing on the method selector
+
+    Subclasses list {signature: handler name} in METHODS; handlers receive
+    the AppCall and the decoded arguments and return the ABI return value.
+    Calls without arguments go to bare(). Each call charges the handler's
+    METHOD_COSTS entry to the group's opcode budget.
+    """
+    METHODS: Dict[str, str] = {}
+
+    def __init__(self) -> None:
+        self._routes = {}
+        for signature, handler in self.METHODS.items():
+            method = abi.Method.from_signature(signature)
+            self._routes[method.get_selector()] = (method, getattr(self, handler))
+
+    def create(self, call: AppCall) -> None:
+        pass
+
+    def bare(self, call: AppCall) -> None:
+        raise LogicError("bare call not allowed")
+
+    def call(self, call: AppCall) -> None:
+        if call.txn.get("apan", NOOP) != NOOP:
+            raise LogicError(f"on-completion {call.txn['apan']} not supported")
+        if not call.args:
+            self.bare(call)
+            return
+        route = self._routes.get(call.args[0])
+        if route is None:
+            raise LogicError("unknown method selector")
+        method, handler = route
+        values = self._decode_args(call, method)
+        fixed, per_item = METHOD_COSTS.get(handler.__name__, (0, 0))
+        items = next((len(value) for value in reversed(values) if isinstance(value, list)), 0)
+        call.ledger.opcode_cost += fixed + per_item * items
+        result = handler(call, *values)
+        if method.returns.type != abi.Returns.VOID:
+            call.logs.append(ABI_RETURN_PREFIX + method.returns.type.encode(result))
+
+    @staticmethod
+    def _decode_args(call: AppCall, method: abi.Method) -> list:
+        txn_args = sum(1 for arg in method.args if abi.is_abi_transaction_type(arg.type))
+        txn_position = call.position - txn_args
+        app_arg = 1
+        values = []
+        for arg in method.args:
+            if abi.is_abi_transaction_type(arg.type):
+                if txn_position < 0:
+                    raise LogicError("missing transaction argument")
+                values.append(call.group[txn_position])
+                txn_position += 1
+                continue
+            raw = call.args[app_arg]
+            app_arg += 1
+            if arg.type == "account":
+                values.append(call.account_arg(raw[0]))
+            elif arg.type == "asset":
+                values.append(call.asset_arg(raw[0]))
+            elif arg.type == "application":
+                values.append(call.txn["apfa"][raw[0] - 1] if raw[0] else call.app_id)
+            else:
+                values.append(arg.type.decode(raw))
+        return values
+
+
+class TealEscrowModel(AppModel):
+    """escrow_approval.teal, route for route"""
+
+    def create(self, call: AppCall) -> None:
+        call.global_put(b"claim_count", 0)
+
+    def call(self, call: AppCall) -> None:
+        if call.txn.get("apan", NOOP) != NOOP:
+            raise LogicError("only NoOp calls are approved")
+        if not call.args:
+            return
+        if call.args[0] == b"create":
+            self._create(call)
+        elif call.args[0] == b"claim":
+            name, link = self._load_link(call)
+            if link.receiver not in (ZERO_ADDRESS_BYTES, call.sender):
+                raise LogicError("assert failed: only the receiver can claim")
+            if link.expiry_time and call.now() >= link.expiry_time:
+                raise LogicError("assert failed: link expired")
+            self._pay_out(call, name, link)
+        elif call.args[0] == b"cancel":
+            name, link = self._load_link(call)
+            if link.sender != call.sender:
+                raise LogicError("assert failed: only the sender can cancel")
+            self._pay_out(call, name, link)
+        else:
+            raise LogicError("unknown method")
+
+    @staticmethod
+    def _create(call: AppCall) -> None:
+        if call.position == 0:
+            raise LogicError("- would result negative: no funding payment before the call")
+        payment = call.group[call.position - 1]
+        if payment.get("type") != "pay" or payment.get("rcv") != call.app_key:
+            raise LogicError("assert failed: the previous transaction must pay the contract")
+        if payment.get("amt", 0) < TEAL_LINK_MIN_BALANCE:
+            raise LogicError("assert failed: amount below the link box minimum balance")
+        if len(call.args) < 3 or len(call.args[1]) != 32 or len(call.args[2]) > 8:
+            raise LogicError("invalid receiver or expiry argument")
+        claim_id = call.global_get(b"claim_count")
+        call.global_put(b"claim_count", claim_id + 1)
+        link = TealLink(
+            payment.get("snd", ZERO_ADDRESS_BYTES),
+            call.args[1],
+            payment["amt"],
+            int.from_bytes(call.args[2], "big"),
+        )
+        call.box_put(teal_link_box_name(claim_id), encode_teal_link(link))
+        call.logs.append(claim_id.to_bytes(8, "big"))
+
+    @staticmethod
+    def _load_link(call: AppCall) -> Tuple[bytes, TealLink]:
+        if len(call.args) < 2 or len(call.args[1]) > 8:
+            raise LogicError("btoi: invalid claim ID argument")
+        name = teal_link_box_name(int.from_bytes(call.args[1], "big"))
+        value = call.box_get(name)
+        if value is None:
+            raise LogicError("assert failed: no such link")
+        return name, decode_teal_link(value)
+
+    @staticmethod
+    def _pay_out(call: AppCall, name: bytes, link: TealLink) -> None:
+        call.pay(call.sender, 0, link.amount)
+        call.box_delete(name)
+
+
+class EscrowClaimLinkModel(AppModel):
+    """EscrowClaimLink from escrow_claim_link.py"""
+    METHODS = {
+        "create_claim_link(txn,account,uint64)string": "create_claim_link",
+        "create_claim_links_batch(txn,(address,uint64,uint64)[])(uint64,uint64)": "create_claim_links_batch",
+        "create_asset_links_batch(asset,(address,uint64,uint64)[])(uint64,uint64)": "create_asset_links_batch",
+        "claim(uint64)bool": "claim",
+        "claim_batch(uint64[])uint64": "claim_batch",
+        "cancel(uint64)bool": "cancel",
+        "sweep_expired(uint64[])uint64": "sweep_expired",
+        "create_airdrop(txn,byte[32],uint64,uint64,pay)uint64": "create_airdrop",
+        "claim_airdrop(uint64,uint64,uint64,byte[32][])bool": "claim_airdrop",
+        "close_airdrop(uint64)uint64": "close_airdrop",
+        "purge_airdrop_pages(uint64,uint64)uint64": "purge_airdrop_pages",
+        "get_claim_info(uint64)(address,address,uint64,uint64,uint64,uint64)": "get_claim_info",
+        "get_asset_registry(uint64)(uint64,uint64,uint64)": "get_asset_registry",
+        "get_liability_ledger()(uint64,uint64,uint64,uint64)[]": "get_liability_ledger",
+        "create_voucher_book(txn,address,uint64,uint64,pay)uint64": "create_voucher_book",
+        "redeem_voucher(uint64,uint64,account,uint64,uint64,byte[64])bool": "redeem_voucher",
+        "close_voucher_book(uint64)uint64": "close_voucher_book",
+        "purge_voucher_pages(uint64,uint64)uint64": "purge_voucher_pages",
+    }
+
+    def create(self, call: AppCall) -> None:
+        call.global_put(b"claim_count", 0)
+        call.global_put(b"airdrop_count", 0)
+        call.global_put(b"voucher_book_count", 0)
+        call.global_put(b"ledger_assets", b"")
+
+    def bare(self, call: AppCall) -> None:
+        """reserve_box_refs"""
+
+    # -- creation -------------------------------------------------------
+
+    def create_claim_link(self, call: AppCall, payment: dict, receiver: bytes, expiry_time: int) -> str:
+        amount, asset_id = self._funding(call, payment)
+        if amount == 0:
+            raise LogicError("Amount must be greater than 0")
+        claim_id = self._next_claim_id(call)
+        self._store_claim(call, claim_id, receiver, amount, asset_id, expiry_time)
+        self._add_liability(call, asset_id, amount, 1)
+        return f"claim_{claim_id}"
+
+    def create_claim_links_batch(self, call: AppCall, payment: dict, entries: list) -> list:
+        if not entries:
+            raise LogicError("At least one entry required")
+        funded, asset_id = self._funding(call, payment)
+        first_id = call.global_get(b"claim_count")
+        if self._store_entries(call, entries, asset_id) != funded:
+            raise LogicError("Payment must equal the sum of entry amounts")
+        return [first_id, len(entries)]
+
+    def create_asset_links_batch(self, call: AppCall, asset_id: int, entries: list) -> list:
+        if not entries:
+            raise LogicError("At least one entry required")
+        self._ensure_opted_in(call, asset_id)
+        if call.position + 1 >= len(call.group):
+            raise LogicError("funding transfer must follow the call")
+        funding = call.group[call.position + 1]
+        if funding.get("type") != "axfer" or funding.get("arcv") != call.app_key:
+            raise LogicError("Payment must be to contract")
+        if funding.get("xaid") != asset_id:
+            raise LogicError("Funding must be in the link asset")
+        first_id = call.global_get(b"claim_count")
+        if self._store_entries(call, entries, asset_id) != funding.get("aamt", 0):
+            raise LogicError("Payment must equal the sum of entry amounts")
+        return [first_id, len(entries)]
+
+    def _store_entries(self, call: AppCall, entries: list, asset_id: int) -> int:
+        total = 0
+        for receiver, amount, expiry_time in entries:
+            if amount == 0:
+                raise LogicError("Amount must be greater than 0")
+            total += amount
+            self._store_claim(call, self._next_claim_id(call), encoding.decode_address(receiver), amount, asset_id, expiry_time)
+        self._add_liability(call, asset_id, total, len(entries))
+        return total
+
+    @staticmethod
+    def _charge_min_balance(call: AppCall, payment: dict, amount: int) -> None:
+        if payment.get("rcv") != call.app_key:
+            raise LogicError("Payment must be to contract")
+        if payment.get("amt", 0) != amount:
+            raise LogicError("Payment must equal the box minimum balance")
+
+    def _funding(self, call: AppCall, payment: dict) -> Tuple[int, int]:
+        if payment.get("type") == "pay":
+            if payment.get("rcv") != call.app_key:
+                raise LogicError("Payment must be to contract")
+            return payment.get("amt", 0), 0
+        if payment.get("type") != "axfer":
+            raise LogicError("Funding must be a payment or asset transfer")
+        if payment.get("arcv") != call.app_key:
+            raise LogicError("Payment must be to contract")
+        return payment.get("aamt", 0), payment.get("xaid", 0)
+
+    @staticmethod
+    def _next_claim_id(call: AppCall) -> int:
+        claim_id = call.global_get(b"claim_count")
+        call.global_put(b"claim_count", claim_id + 1)
+        return claim_id
+
+    def _store_claim(
+        self,
+        call: AppCall,
+        claim_id: int,
+        receiver: bytes,
+        amount: int,
+        asset_id: int,
+        expiry_time: int,
+    ) -> None:
+        receiver_slot = NO_INDEX_SLOT
+        if receiver != ZERO_ADDRESS_BYTES:
+            receiver_slot = self._receiver_index_add(call, receiver, claim_id)
+        sender_slot = self._index_add(call, sender_index_name(call.sender), claim_id)
+        name = claim_box_name(claim_id)
+        if call.box_get(name) is not None:
+            raise LogicError("Claim link already exists")
+        record = ClaimRecord(call.sender, receiver, amount, asset_id, expiry_time, CLAIM_OPEN, sender_slot, receiver_slot)
+        call.box_put(name, encode_claim_record(record))
+
+    # -- index boxes ----------------------------------------------------
+
+    @staticmethod
+    def _index_add(call: AppCall, name: bytes, claim_id: int) -> int:
+        data = call.box_get(name)
+        box = bytearray(data if data is not None else bytes(INDEX_HEADER.size))
+        free_head, count = INDEX_HEADER.unpack_from(box)
+        if free_head > 0:
+            slot = free_head - 1
+            offset = INDEX_HEADER.size + slot * 8
+            free_head = int.from_bytes(box[offset:offset + 8], "big") ^ INDEX_FREE_BIT
+        else:
+            slot = (len(box) - INDEX_HEADER.size) // 8
+            if slot >= INDEX_MAX_SLOTS:
+                raise LogicError("Too many open links for one sender")
+            offset = len(box)
+            box.extend(bytes(8))
+        box[offset:offset + 8] = claim_id.to_bytes(8, "big")
+        INDEX_HEADER.pack_into(box, 0, free_head, count + 1)
+        call.box_put(name, bytes(box))
+        return slot
+
+    @staticmethod
+    def _index_remove(call: AppCall, name: bytes, slot: int) -> None:
+        box = bytearray(call.box_get(name))
+        free_head, count = INDEX_HEADER.unpack_from(box)
+        if count == 1:
+            call.box_delete(name)
+            return
+        offset = INDEX_HEADER.size + slot * 8
+        box[offset:offset + 8] = (INDEX_FREE_BIT | free_head).to_bytes(8, "big")
+        INDEX_HEADER.pack_into(box, 0, slot + 1, count - 1)
+        call.box_put(name, bytes(box))
+
+    @staticmethod
+    def _receiver_index_add(call: AppCall, receiver: bytes, claim_id: int) -> int:
+        name = receiver_index_name(receiver, claim_id)
+        data = call.box_get(name)
+        page = bytearray(data if data is not None else bytes(RECEIVER_PAGE_SIZE))
+        bit = claim_id % RECEIVER_PAGE_CLAIMS
+        page[RECEIVER_PAGE_HEADER_SIZE + bit // 8] |= 1 << (bit % 8)
+        count = int.from_bytes(page[:RECEIVER_PAGE_HEADER_SIZE], "big")
+        page[:RECEIVER_PAGE_HEADER_SIZE] = (count + 1).to_bytes(RECEIVER_PAGE_HEADER_SIZE, "big")
+        call.box_put(name, bytes(page))
+        return bit
+
+    @staticmethod
+    def _receiver_index_remove(call: AppCall, receiver: bytes, claim_id: int) -> None:
+        name = receiver_index_name(receiver, claim_id)
+        page = bytearray(call.box_get(name))
+        count = int.from_bytes(page[:RECEIVER_PAGE_HEADER_SIZE], "big")
+        if count == 1:
+            call.box_delete(name)
+            return
+        bit = claim_id % RECEIVER_PAGE_CLAIMS
+        page[RECEIVER_PAGE_HEADER_SIZE + bit // 8] &= ~(1 << (bit % 8)) & 0xFF
+        page[:RECEIVER_PAGE_HEADER_SIZE] = (count - 1).to_bytes(RECEIVER_PAGE_HEADER_SIZE, "big")
+        call.box_put(name, bytes(page))
+
+    def _unindex_claim(self, call: AppCall, claim_id: int, record: ClaimRecord) -> None:
+        if record.is_indexed:
+            self._index_remove(call, sender_index_name(record.sender), record.sender_slot)
+        if record.receiver_slot != NO_INDEX_SLOT:
+            self._receiver_index_remove(call, record.receiver, claim_id)
+
+    # -- registry and ledger --------------------------------------------
+
+    @staticmethod
+    def _ensure_opted_in(call: AppCall, asset_id: int) -> None:
+        name = asset_registry_name(asset_id)
+        if call.box_get(name) is None:
+            if asset_id != 0 and call.holding(asset_id) is None:
+                call.opt_in(asset_id)
+            call.box_put(name, bytes(ASSET_REGISTRY_SIZE))
+
+    def _add_liability(self, call: AppCall, asset_id: int, amount: int, links: int) -> None:
+        self._ensure_opted_in(call, asset_id)
+        registry = decode_asset_registry(call.box_get(asset_registry_name(asset_id)))
+        self._write_liability(call, asset_id, registry.liability + amount, registry.open_links + links)
+
+    def _remove_liability(self, call: AppCall, asset_id: int, amount: int, links: int) -> None:
+        self._ensure_opted_in(call, asset_id)
+        registry = decode_asset_registry(call.box_get(asset_registry_name(asset_id)))
+        self._write_liability(
+            call,
+            asset_id,
+            max(registry.liability - amount, 0),
+            max(registry.open_links - links, 0),
+        )
+
+    @staticmethod
+    def _write_liability(call: AppCall, asset_id: int, liability: int, open_links: int) -> None:
+        value = ASSET_REGISTRY.pack(liability, open_links)
+        call.box_put(asset_registry_name(asset_id), value)
+        key = ledger_key(asset_id)
+        tracked = call.global_get(key, None) is not None
+        assets = call.global_get(b"ledger_assets", b"")
+        if liability == 0 and open_links == 0:
+            if tracked:
+                call.global_delete(key)
+                position = next(i for i in range(0, len(assets), 8) if assets[i:i + 8] == asset_id.to_bytes(8, "big"))
+                call.global_put(b"ledger_assets", assets[:position] + assets[position + 8:])
+        elif tracked:
+            call.global_put(key, value)
+        elif len(assets) < MAX_LEDGER_ASSETS * 8:
+            call.global_put(b"ledger_assets", assets + asset_id.to_bytes(8, "big"))
+            call.global_put(key, value)
+
+    # -- closing links --------------------------------------------------
+
+    @staticmethod
+    def _load_claim(call: AppCall, claim_id: int) -> ClaimRecord:
+        data = call.box_get(claim_box_name(claim_id))
+        if data is None:
+            raise LogicError("Claim link not found")
+        return decode_claim_record(data)
+
+    @staticmethod
+    def _check_claimable(call: AppCall, record: ClaimRecord) -> None:
+        if record.state != CLAIM_OPEN:
+            raise LogicError("Already claimed")
+        if record.expiry_time > 0 and call.now() >= record.expiry_time:
+            raise LogicError("Claim link expired")
+        if record.receiver != ZERO_ADDRESS_BYTES and call.sender != record.receiver:
+            raise LogicError("Only specified receiver can claim")
+
+    def _mark_claimed(self, call: AppCall, claim_id: int, record: ClaimRecord) -> None:
+        name = claim_box_name(claim_id)
+        data = call.box_get(name)
+        call.box_put(name, data[:CLAIM_STATE_OFFSET] + bytes([CLAIM_CLAIMED]) + data[CLAIM_STATE_OFFSET + 1:])
+        self._unindex_claim(call, claim_id, record)
+
+    def claim(self, call: AppCall, claim_id: int) -> bool:
+        record = self._load_claim(call, claim_id)
+        self._check_claimable(call, record)
+        self._mark_claimed(call, claim_id, record)
+        call.pay(call.sender, record.asset_id, record.amount)
+        self._remove_liability(call, record.asset_id, record.amount, 1)
+        return True
+
+    def claim_batch(self, call: AppCall, claim_ids: list) -> int:
+        pending: Optional[List[int]] = None  # [asset_id, amount, links]
+        for claim_id in claim_ids:
+            record = self._load_claim(call, claim_id)
+            self._check_claimable(call, record)
+            self._mark_claimed(call, claim_id, record)
+            if pending is not None and pending[0] != record.asset_id:
+                call.pay(call.sender, pending[0], pending[1])
+                self._remove_liability(call, pending[0], pending[1], pending[2])
+                pending = None
+            if pending is None:
+                pending = [record.asset_id, 0, 0]
+            pending[1] += record.amount
+            pending[2] += 1
+        if pending is not None:
+            call.pay(call.sender, pending[0], pending[1])
+            self._remove_liability(call, pending[0], pending[1], pending[2])
+        return len(claim_ids)
+
+    def cancel(self, call: AppCall, claim_id: int) -> bool:
+        record = self._load_claim(call, claim_id)
+        if record.state != CLAIM_OPEN:
+            raise LogicError("Already claimed")
+        if call.sender != record.sender:
+            raise LogicError("Only sender can cancel")
+        call.pay(record.sender, record.asset_id, record.amount)
+        call.box_delete(claim_box_name(claim_id))
+        self._unindex_claim(call, claim_id, record)
+        self._remove_liability(call, record.asset_id, record.amount, 1)
+        return True
+
+    def sweep_expired(self, call: AppCall, claim_ids: list) -> int:
+        swept = 0
+        pending: Optional[List] = None  # [sender, asset_id, amount, links]
+        for claim_id in claim_ids:
+            name = claim_box_name(claim_id)
+            data = call.box_get(name)
+            if data is None:
+                continue
+            record = decode_claim_record(data)
+            if record.state != CLAIM_OPEN or record.expiry_time == 0 or call.now() < record.expiry_time:
+                continue
+            if pending is not None and (pending[0], pending[1]) != (record.sender, record.asset_id):
+                call.pay(pending[0], pending[1], pending[2])
+                self._remove_liability(call, pending[1], pending[2], pending[3])
+                pending = None
+            if pending is None:
+                pending = [record.sender, record.asset_id, 0, 0]
+            pending[2] += record.amount
+            pending[3] += 1
+            call.box_delete(name)
+            self._unindex_claim(call, claim_id, record)
+            swept += 1
+        if pending is not None:
+            call.pay(pending[0], pending[1], pending[2])
+            self._remove_liability(call, pending[1], pending[2], pending[3])
+        return swept
+
+    # -- airdrops -------------------------------------------------------
+
+    def create_airdrop(
+        self, call: AppCall, payment: dict, merkle_root: list, leaf_count: int, expiry_time: int, mbr_payment: dict
+    ) -> int:
+        if leaf_count == 0:
+            raise LogicError("At least one leaf required")
+        funded, asset_id = self._funding(call, payment)
+        if funded == 0:
+            raise LogicError("Amount must be greater than 0")
+        pages = airdrop_page_count(leaf_count)
+        self._charge_min_balance(call, mbr_payment, pages * AIRDROP_PAGE_MIN_BALANCE)
+        airdrop_id = call.global_get(b"airdrop_count")
+        call.global_put(b"airdrop_count", airdrop_id + 1)
+        name = airdrop_box_name(airdrop_id)
+        if call.box_get(name) is not None:
+            raise LogicError("Airdrop already exists")
+        record = AirdropRecord(call.sender, bytes(merkle_root), asset_id, funded, 0, leaf_count, expiry_time, pages)
+        call.box_put(name, AIRDROP_RECORD.pack(*record))
+        self._add_liability(call, asset_id, funded, 0)
+        return airdrop_id
+
+    def claim_airdrop(self, call: AppCall, airdrop_id: int, index: int, amount: int, proof: list) -> bool:
+        record = self._load_airdrop(call, airdrop_id)
+        if record.is_closed:
+            raise LogicError("Airdrop closed")
+        if index >= record.leaf_count:
+            raise LogicError("Leaf index out of range")
+        if record.expiry_time and call.now() >= record.expiry_time:
+            raise LogicError("Airdrop expired")
+        # The leaf binds the caller, so a proof cannot be replayed by anyone else
+        try:
+            root = compute_root(index, call.sender, amount, [bytes(sibling) for sibling in proof])
+        except ValueError:
+            raise LogicError("Proof too short") from None
+        if root != record.merkle_root:
+            raise LogicError("Invalid proof")
+
+        self._set_claimed_bit(call, airdrop_page_name(airdrop_id, index // AIRDROP_PAGE_LEAVES), index)
+
+        if record.claimed + amount > record.total:
+            raise LogicError("Airdrop pool exhausted")
+        call.box_put(airdrop_box_name(airdrop_id), AIRDROP_RECORD.pack(*record._replace(claimed=record.claimed + amount)))
+        call.pay(call.sender, record.asset_id, amount)
+        self._remove_liability(call, record.asset_id, amount, 0)
+        return True
+
+    def close_airdrop(self, call: AppCall, airdrop_id: int) -> int:
+        record = self._load_airdrop(call, airdrop_id)
+        if call.sender != record.sender:
+            raise LogicError("Only sender can close")
+        if record.is_closed:
+            raise LogicError("Airdrop already closed")
+        if record.remaining:
+            call.pay(record.sender, record.asset_id, record.remaining)
+            self._remove_liability(call, record.asset_id, record.remaining, 0)
+        closed = record._replace(claimed=record.total, leaf_count=0)
+        call.box_put(airdrop_box_name(airdrop_id), AIRDROP_RECORD.pack(*closed))
+        return record.remaining
+
+    def purge_airdrop_pages(self, call: AppCall, airdrop_id: int, count: int) -> int:
+        record = self._load_airdrop(call, airdrop_id)
+        if not record.is_closed:
+            raise LogicError("Airdrop is still open")
+        count = min(count, record.pages)
+        for page in range(record.pages - count, record.pages):
+            name = airdrop_page_name(airdrop_id, page)
+            if call.box_get(name) is not None:
+                call.box_delete(name)
+        if count:
+            call.pay(record.sender, 0, count * AIRDROP_PAGE_MIN_BALANCE)
+        if count == record.pages:
+            call.box_delete(airdrop_box_name(airdrop_id))
+        else:
+            call.box_put(airdrop_box_name(airdrop_id), AIRDROP_RECORD.pack(*record._replace(pages=record.pages - count)))
+        return count
+
+    @staticmethod
+    def _load_airdrop(call: AppCall, airdrop_id: int) -> AirdropRecord:
+        data = call.box_get(airdrop_box_name(airdrop_id))
+        if data is None:
+            raise LogicError("Airdrop not found")
+        return decode_airdrop_record(data)
+
+    @staticmethod
+    def _set_claimed_bit(call: AppCall, page_name: bytes, index: int) -> None:
+        """Test and set the bit of index in its bitmap page, creating the page if needed"""
+        page = bytearray(call.box_get(page_name) or bytes(AIRDROP_PAGE_SIZE))
+        bit = index % AIRDROP_PAGE_LEAVES
+        if page[bit // 8] >> (bit % 8) & 1:
+            raise LogicError("Already claimed")
+        page[bit // 8] |= 1 << (bit % 8)
+        call.box_put(page_name, bytes(page))
+
+    # -- vouchers -------------------------------------------------------
+
+    def create_voucher_book(
+        self, call: AppCall, payment: dict, signer: str, expiry_time: int, nonce_count: int, mbr_payment: dict
+    ) -> int:
+        if nonce_count == 0:
+            raise LogicError("At least one nonce required")
+        funded, asset_id = self._funding(call, payment)
+        if funded == 0:
+            raise LogicError("Amount must be greater than 0")
+        pages = airdrop_page_count(nonce_count)
+        self._charge_min_balance(call, mbr_payment, pages * VOUCHER_PAGE_MIN_BALANCE)
+        book_id = call.global_get(b"voucher_book_count")
+        call.global_put(b"voucher_book_count", book_id + 1)
+        name = voucher_book_name(book_id)
+        if call.box_get(name) is not None:
+            raise LogicError("Voucher book already exists")
+        signer_key = encoding.decode_address(signer)
+        book = VoucherBook(call.sender, signer_key, asset_id, funded, 0, expiry_time, nonce_count, pages)
+        call.box_put(name, VOUCHER_BOOK.pack(*book))
+        self._add_liability(call, asset_id, funded, 0)
+        return book_id
+
+    def redeem_voucher(
+        self,
+        call: AppCall,
+        book_id: int,
+        nonce: int,
+        receiver: bytes,
+        amount: int,
+        expiry_time: int,
+        signature: list,
+    ) -> bool:
+        from nacl.exceptions import BadSignatureError
+        from nacl.signing import VerifyKey
+
+        book = self._load_voucher_book(call, book_id)
+        if book.is_closed:
+            raise LogicError("Voucher book closed")
+        if nonce >= book.nonce_count:
+            raise LogicError("Nonce out of range")
+        if amount == 0:
+            raise LogicError("Amount must be greater than 0")
+        for expiry, message in ((book.expiry_time, "Voucher book expired"), (expiry_time, "Voucher expired")):
+            if expiry and call.now() >= expiry:
+                raise LogicError(message)
+        message = (
+            VOUCHER_PREFIX + call.app_id.to_bytes(8, "big") + book_id.to_bytes(8, "big")
+            + nonce.to_bytes(8, "big") + receiver + amount.to_bytes(8, "big") + expiry_time.to_bytes(8, "big")
+        )
+        try:
+            VerifyKey(book.signer).verify(message, bytes(signature))
+        except BadSignatureError:
+            raise LogicError("Invalid voucher signature") from None
+
+        self._set_claimed_bit(call, voucher_page_name(book_id, nonce // AIRDROP_PAGE_LEAVES), nonce)
+
+        if book.claimed + amount > book.total:
+            raise LogicError("Voucher book exhausted")
+        call.box_put(voucher_book_name(book_id), VOUCHER_BOOK.pack(*book._replace(claimed=book.claimed + amount)))
+        call.pay(call.sender if receiver == ZERO_ADDRESS_BYTES else receiver, book.asset_id, amount)
+        self._remove_liability(call, book.asset_id, amount, 0)
+        return True
+
+    def close_voucher_book(self, call: AppCall, book_id: int) -> int:
+        book = self._load_voucher_book(call, book_id)
+        if call.sender != book.sender:
+            raise LogicError("Only sender can close")
+        if book.is_closed:
+            raise LogicError("Voucher book already closed")
+        if book.remaining:
+            call.pay(book.sender, book.asset_id, book.remaining)
+            self._remove_liability(call, book.asset_id, book.remaining, 0)
+        call.box_put(voucher_book_name(book_id), VOUCHER_BOOK.pack(*book._replace(claimed=book.total, nonce_count=0)))
+        return book.remaining
+
+    def purge_voucher_pages(self, call: AppCall, book_id: int, count: int) -> int:
+        book = self._load_voucher_book(call, book_id)
+        if not book.is_closed:
+            raise LogicError("Voucher book is still open")
+        count = min(count, book.pages)
+        for page in range(book.pages - count, book.pages):
+            name = voucher_page_name(book_id, page)
+            if call.box_get(name) is not None:
+                call.box_delete(name)
+        if count:
+            call.pay(book.sender, 0, count * VOUCHER_PAGE_MIN_BALANCE)
+        if count == book.pages:
+            call.box_delete(voucher_book_name(book_id))
+        else:
+            call.box_put(voucher_book_name(book_id), VOUCHER_BOOK.pack(*book._replace(pages=book.pages - count)))
+        return count
+
+    @staticmethod
+    def _load_voucher_book(call: AppCall, book_id: int) -> VoucherBook:
+        data = call.box_get(voucher_book_name(book_id))
+        if data is None:
+            raise LogicError("Voucher book not found")
+        return decode_voucher_book(data)
+
+    # -- read-only ------------------------------------------------------
+
+    def get_claim_info(self, call: AppCall, claim_id: int) -> list:
+        record = self._load_claim(call, claim_id)
+        return [record.sender, record.receiver, record.amount, record.asset_id, record.expiry_time, record.state]
+
+    def get_asset_registry(self, call: AppCall, asset_id: int) -> list:
+        data = call.box_get(asset_registry_name(asset_id))
+        if data is None:
+            return [call.balance(asset_id), 0, 0]
+        registry = decode_asset_registry(data)
+        return [call.balance(asset_id), registry.liability, registry.open_links]
+
+    def get_liability_ledger(self, call: AppCall) -> list:
+        assets = call.global_get(b"ledger_assets", b"")
+        entries = []
+        for position in range(0, len(assets), 8):
+            asset_id = int.from_bytes(assets[position:position + 8], "big")
+            registry = decode_asset_registry(call.global_get(ledger_key(asset_id)))
+            entries.append([asset_id, call.balance(asset_id), registry.liability, registry.open_links])
+        return entries
+
+
+class SimLedger:
+    """FakeAlgod executor applying groups to the app models atomically"""
+
+    def __init__(self, fake: Optional[FakeAlgod] = None, clock: Optional[Callable[[], float]] = None) -> None:
+        self.fake = fake or FakeAlgod()
+        self.fake.executor = self
+        self.clock = clock or self.fake.clock  # Global.latest_timestamp
+        self.apps: Dict[int, AppModel] = {}
+        self.next_app_id = FIRST_APP_ID
+        self.groups = 0
+        self.rejected = 0
+        self.opcode_cost = 0  # charged by the app calls of the group being applied
+        self._journal: Optional[list] = None
+        self._saved_accounts: set = set()
+        self._box_refs: set = set()
+        self._box_ref_count = 0
+        self._box_io: Dict[Tuple[int, bytes], int] = {}
+
+    # -- setup ----------------------------------------------------------
+
+    def fund(self, address: str, amount: int, assets: Optional[Dict[int, int]] = None) -> None:
+        """Credit ALGO (and ASA holdings, which opt the account in)"""
+        with self.fake._lock:
+            account = self.account(address)
+            account["amount"] += amount
+            for asset_id, asset_amount in (assets or {}).items():
+                if asset_id not in account["assets"]:
+                    account["min-balance"] += ASSET_MIN_BALANCE
+                account["assets"][asset_id] = account["assets"].get(asset_id, 0) + asset_amount
+
+    def create_app(self, model: AppModel, creator: str, funding: int = MIN_BALANCE) -> int:
+        """Register an app model, run its creation and fund its account"""
+        with self.fake._lock:
+            app_id = self.next_app_id
+            self.next_app_id += 1
+            self.apps[app_id] = model
+            self.fake._globals[app_id] = {}
+            self.fake._boxes[app_id] = {}
+            creation = {"type": "appl", "snd": encoding.decode_address(creator)}
+            model.create(AppCall(self, [creation], 0, app_id))
+        self.fund(logic.get_application_address(app_id), funding)
+        return app_id
+
+    # -- state, journaled while a group is applied ----------------------
+
+    def account(self, address: str) -> dict:
+        accounts = self.fake._accounts
+        if address not in accounts:
+            accounts[address] = {"amount": 0, "min-balance": MIN_BALANCE, "assets": {}}
+            if self._journal is not None:
+                self._journal.append(("account", address, None))
+                self._saved_accounts.add(address)
+        elif self._journal is not None and address not in self._saved_accounts:
+            account = accounts[address]
+            self._journal.append(("account", address, {**account, "assets": dict(account["assets"])}))
+            self._saved_accounts.add(address)
+        return accounts[address]
+
+    def global_get(self, app_id: int, key: bytes, default=0):
+        return self.fake._globals[app_id].get(key, default)
+
+    def global_put(self, app_id: int, key: bytes, value) -> None:
+        state = self.fake._globals[app_id]
+        if self._journal is not None:
+            self._journal.append(("global", app_id, key, state.get(key)))
+        state[key] = value
+
+    def global_delete(self, app_id: int, key: bytes) -> None:
+        state = self.fake._globals[app_id]
+        if key not in state:
+            return
+        if self._journal is not None:
+            self._journal.append(("global", app_id, key, state[key]))
+        del state[key]
+
+    def box_get(self, app_id: int, name: bytes) -> Optional[bytes]:
+        return self.fake._boxes[app_id].get(name)
+
+    def box_put(self, app_id: int, name: bytes, value: bytes) -> None:
+        boxes = self.fake._boxes[app_id]
+        old = boxes.get(name)
+        if self._journal is not None:
+            self._journal.append(("box", app_id, name, old))
+        app = self.account(logic.get_application_address(app_id))
+        app["min-balance"] += box_min_balance(name, value) - (box_min_balance(name, old) if old is not None else 0)
+        boxes[name] = value
+
+    def box_delete(self, app_id: int, name: bytes) -> None:
+        boxes = self.fake._boxes[app_id]
+        old = boxes.pop(name, None)
+        if old is None:
+            return
+        if self._journal is not None:
+            self._journal.append(("box", app_id, name, old))
+        self.account(logic.get_application_address(app_id))["min-balance"] -= box_min_balance(name, old)
+
+    def transfer(self, sender: str, receiver: str, asset_id: int, amount: int) -> None:
+        source = self.account(sender)
+        target = self.account(receiver)
+        if asset_id == 0:
+            if source["amount"] < amount:
+                raise LogicError(f"overspend: {sender} tried to spend {amount}")
+            source["amount"] -= amount
+            target["amount"] += amount
+            return
+        if asset_id not in source["assets"] or source["assets"][asset_id] < amount:
+            raise LogicError(f"underflow on asset {asset_id}")
+        if asset_id not in target["assets"]:
+            raise LogicError(f"receiver not opted in to asset {asset_id}")
+        source["assets"][asset_id] -= amount
+        target["assets"][asset_id] += amount
+
+    def opt_in(self, address: str, asset_id: int) -> None:
+        account = self.account(address)
+        if asset_id not in account["assets"]:
+            account["assets"][asset_id] = 0
+            account["min-balance"] += ASSET_MIN_BALANCE
+
+    def _rollback(self) -> None:
+        accounts = self.fake._accounts
+        for entry in reversed(self._journal):
+            kind = entry[0]
+            if kind == "account":
+                _kind, address, old = entry
+                if old is None:
+                    accounts.pop(address, None)
+                else:
+                    accounts[address] = old
+            elif kind == "global":
+                _kind, app_id, key, old = entry
+                if old is None:
+                    self.fake._globals[app_id].pop(key, None)
+                else:
+                    self.fake._globals[app_id][key] = old
+            else:
+                _kind, app_id, name, old = entry
+                if old is None:
+                    self.fake._boxes[app_id].pop(name, None)
+                else:
+                    self.fake._boxes[app_id][name] = old
+
+    # -- box references -------------------------------------------------
+
+    def require_box(self, app_id: int, name: bytes) -> None:
+        if self._journal is not None and (app_id, name) not in self._box_refs:
+            raise LogicError(f"invalid Box reference {name!r}")
+
+    def touch_box(self, app_id: int, name: bytes, size: int) -> None:
+        key = (app_id, name)
+        self._box_io[key] = max(self._box_io.get(key, 0), size)
+
+    def _collect_box_refs(self, txns: List[dict]) -> None:
+        self._box_refs = set()
+        self._box_ref_count = 0
+        self._box_io = {}
+        for txn in txns:
+            if txn.get("type") != "appl":
+                continue
+            for ref in txn.get("apbx", []):
+                index = ref.get("i", 0)
+                app_id = txn.get("apid", 0) if index == 0 else txn["apfa"][index - 1]
+                self._box_refs.add((app_id, ref.get("n", b"")))
+                self._box_ref_count += 1
+
+    # -- execution ------------------------------------------------------
+
+    def __call__(self, fake: FakeAlgod, txns: List[dict]) -> List[dict]:
+        self._journal = []
+        self._saved_accounts = set()
+        try:
+            results = self._apply(txns)
+        except (LogicError, KeyError, IndexError, ValueError) as e:
+            self._rollback()
+            self.rejected += 1
+            raise AlgodHTTPError(f"transaction rejected by logic: {e}", 400) from e
+        finally:
+            self._journal = None
+        self.groups += 1
+        return results
+
+    def _apply(self, txns: List[dict]) -> List[dict]:
+        for txn in txns:
+            refs = sum(len(txn.get(field, [])) for field in ("apat", "apas", "apfa", "apbx"))
+            if refs > MAX_REFS_PER_TXN:
+                raise LogicError(f"{refs} references in one transaction")
+        self._collect_box_refs(txns)
+        self.opcode_cost = 0
+
+        results = []
+        for position, txn in enumerate(txns):
+            sender = encoding.encode_address(txn["snd"])
+            fee = txn.get("fee", 0)
+            account = self.account(sender)
+            if account["amount"] < fee:
+                raise LogicError(f"overspend: {sender} cannot pay fee {fee}")
+            account["amount"] -= fee
+
+            kind = txn.get("type")
+            if kind == "pay":
+                self.transfer(sender, encoding.encode_address(txn["rcv"]), 0, txn.get("amt", 0))
+                results.append({})
+            elif kind == "axfer":
+                receiver = encoding.encode_address(txn["arcv"])
+                if receiver == sender and not txn.get("aamt"):
+                    self.opt_in(sender, txn["xaid"])
+                else:
+                    self.transfer(sender, receiver, txn["xaid"], txn.get("aamt", 0))
+                results.append({})
+            elif kind == "appl":
+                app_id = txn.get("apid", 0)
+                if app_id not in self.apps:
+                    raise LogicError(f"application {app_id} does not exist")
+                call = AppCall(self, txns, position, app_id)
+                self.apps[app_id].call(call)
+                result = {}
+                if call.logs:
+                    result["logs"] = [base64.b64encode(log).decode() for log in call.logs]
+                if call.inner:
+                    result["inner-txns"] = call.inner
+                results.append(result)
+            else:
+                raise LogicError(f"transaction type {kind} not supported")
+
+        inner = sum(len(result.get("inner-txns", [])) for result in results)
+        fees = sum(txn.get("fee", 0) for txn in txns)
+        if fees < MIN_FEE * (len(txns) + inner):
+            raise LogicError(f"fee too small: {fees} for {len(txns)} transactions and {inner} inner")
+
+        budget = APP_CALL_BUDGET * sum(1 for txn in txns if txn.get("type") == "appl")
+        if self.opcode_cost > budget:
+            raise LogicError(f"dynamic cost budget exceeded: {self.opcode_cost} > {budget}")
+
+        io_bytes = sum(self._box_io.values())
+        if io_bytes > BOX_IO_QUOTA_PER_REF * self._box_ref_count:
+            raise LogicError(f"box I/O of {io_bytes} bytes exceeds {self._box_ref_count} box references")
+
+        for address in self._saved_accounts:
+            account = self.fake._accounts.get(address)
+            if account and account["amount"] < account["min-balance"] and (account["amount"] or account["assets"]):
+                raise LogicError(f"{address} balance {account['amount']} below min {account['min-balance']}")
+        return results
@@ -0,0 +1,285 @@
+"""
+Expired claim link sweeper
+Finds expired, unclaimed links from a claim box snapshot and refunds them
+through sweep_expired() in maximal groups
+
+Usage:
+    python expiry_sweeper.py [--interval SECONDS]
+    (reads ALGOD_URL, ALGOD_TOKEN, CLAIM_APP_ID, DEPLOYER_MNEMONIC)
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from box_codec import (
+    CLAIM_OPEN,
+    ASSET_REGISTRY_SIZE,
+    CLAIM_RECORD_SIZE,
+    NO_INDEX_SLOT,
+    ZERO_ADDRESS_BYTES,
+    asset_registry_name,
+    box_io_refs,
+    claim_box_name,
+    receiver_index_name,
+    sender_index_name,
+)
+from claim_snapshot import ClaimTable, snapshot_claims
+from group_packer import APP_CALL_BUDGET, BUDGET_MARGIN, DEFAULT_COSTS, load_costs
+import telemetry
+
+SWEEP_METHOD_SIGNATURE = "sweep_expired(uint64[])uint64"
+
+# Protocol limits
+MAX_GROUP_SIZE = 16
+MAX_REFS_PER_TXN = 8
+MAX_ACCOUNTS_PER_TXN = 4
+
+# uint64[] argument must fit in the app args with the selector
+MAX_IDS_PER_CALL = (2048 - 4 - 2) // 8
+
+# The contract compares against the last block timestamp, which lags the
+# wall clock; links this close to expiry are left for the next run
+EXPIRY_MARGIN_SECONDS = 60
+
+
+def link_index_names(claim_id: int, sender: bytes, receiver: bytes, indexed: bool = True) -> List[bytes]:
+    """Index boxes a link is listed in (none for a legacy record)"""
+    if not indexed:
+        return []
+    names = [sender_index_name(sender)]
+    if receiver != ZERO_ADDRESS_BYTES:
+        names.append(receiver_index_name(receiver, claim_id))
+    return names
+
+
+@dataclass
+class SweepGroup:
+    """Claim IDs swept by one group and the references they need"""
+    claim_ids: List[int] = field(default_factory=list)
+    senders: Set[bytes] = field(default_factory=set)
+    assets: Set[int] = field(default_factory=set)
+    index_bytes: Dict[bytes, int] = field(default_factory=dict)  # size of each index and registry box touched
+    inner_count: int = 0
+    last_run: Optional[Tuple[bytes, int]] = None
+    link_budget: int = DEFAULT_COSTS["sweep_expired"].budget  # opcode cost of sweeping one link
+
+    @staticmethod
+    def box_refs_for(claims: int, index_bytes: Dict[bytes, int]) -> int:
+        """Box references: every claim and index box, and enough for the I/O quota"""
+        io_bytes = claims * CLAIM_RECORD_SIZE + sum(index_bytes.values())
+        return max(claims + len(index_bytes), box_io_refs(io_bytes))
+
+    def _txns_for(self, claims: int, senders: int, assets: int, index_bytes: Dict[bytes, int]) -> int:
+        refs = self.box_refs_for(claims, index_bytes) + senders + assets
+        budget = int(claims * self.link_budget * BUDGET_MARGIN)
+        return max(
+            1,
+            -(-senders // MAX_ACCOUNTS_PER_TXN),
+            -(-refs // MAX_REFS_PER_TXN),
+            -(-budget // APP_CALL_BUDGET),
+        )
+
+    @property
+    def box_ref_count(self) -> int:
+        return self.box_refs_for(len(self.claim_ids), self.index_bytes)
+
+    @property
+    def txn_count(self) -> int:
+        """App calls needed to carry every reference and the opcode budget of the group"""
+        return self._txns_for(len(self.claim_ids), len(self.senders), len(self.assets), self.index_bytes)
+
+    def fits(self, sender: bytes, asset_id: int, index_bytes: Dict[bytes, int]) -> bool:
+        """Whether one more link (listed in the given index boxes) still fits the group's limits"""
+        if len(self.claim_ids) >= MAX_IDS_PER_CALL:
+            return False
+        senders = len(self.senders | {sender})
+        assets = len(self.assets | ({asset_id} if asset_id else set()))
+        merged = {**self.index_bytes, **index_bytes}
+        return self._txns_for(len(self.claim_ids) + 1, senders, assets, merged) <= MAX_GROUP_SIZE
+
+    def add(self, claim_id: int, sender: bytes, asset_id: int, index_bytes: Dict[bytes, int]) -> None:
+        self.claim_ids.append(claim_id)
+        self.senders.add(sender)
+        self.index_bytes.update(index_bytes)
+        if asset_id:
+            self.assets.add(asset_id)
+        # Refunds are merged while (sender, asset) repeats
+        if (sender, asset_id) != self.last_run:
+            self.inner_count += 1
+            self.last_run = (sender, asset_id)
+
+
+def find_expired(table: ClaimTable, now: int) -> List[int]:
+    """Row indexes of open links that expired before `now`, ordered by
+    (sender, asset) so the contract can merge consecutive refunds"""
+    rows = [
+        index
+        for index in range(len(table))
+        if table.state[index] == CLAIM_OPEN and 0 < table.expiry_time[index] <= now
+    ]
+    rows.sort(key=lambda index: (table.sender[index * 32:index * 32 + 32], table.asset_id[index]))
+    return rows
+
+
+def plan_sweeps(
+    table: ClaimTable,
+    rows: List[int],
+    index_sizes: Optional[Dict[bytes, int]] = None,
+    link_budget: Optional[int] = None,
+) -> List[SweepGroup]:
+    """Pack expired links into the fewest groups the reference and budget limits allow
+
+    Args:
+        table: Claim snapshot
+        rows: Row indexes to sweep, as returned by find_expired
+        index_sizes: Current size of index boxes by name; unknown boxes are
+            assumed to fit in one box reference's I/O quota
+        link_budget: Opcode cost of sweeping one link (measured baseline by default)
+    """
+    index_sizes = index_sizes or {}
+    if link_budget is None:
+        link_budget = load_costs()["sweep_expired"].budget
+    groups: List[SweepGroup] = []
+    group = SweepGroup(link_budget=link_budget)
+
+    for index in rows:
+        sender = bytes(table.sender[index * 32:index * 32 + 32])
+        receiver = bytes(table.receiver[index * 32:index * 32 + 32])
+        asset_id = table.asset_id[index]
+        indexed = table.sender_slot[index] != NO_INDEX_SLOT
+        names = link_index_names(table.claim_id[index], sender, receiver, indexed)
+        index_bytes = {name: index_sizes.get(name, 0) for name in names}
+        index_bytes[asset_registry_name(asset_id)] = ASSET_REGISTRY_SIZE
+        if group.claim_ids and not group.fits(sender, asset_id, index_bytes):
+            groups.append(group)
+            group = SweepGroup(link_budget=link_budget)
+        group.add(table.claim_id[index], sender, asset_id, index_bytes)
+
+    if group.claim_ids:
+        groups.append(group)
+    return groups
+
+
+def submit_sweep(algod_client, app_id: int, sender: str, signer, group: SweepGroup) -> int:
+    """Submit one sweep group; the sweep call's fee covers every inner refund
+    and the group's other calls, which carry references and opcode budget
+
+    Returns:
+        Number of links swept
+    """
+    from algosdk import abi, encoding
+    from algosdk.atomic_transaction_composer import (
+        AtomicTransactionComposer,
+        TransactionWithSigner,
+    )
+    from algosdk.transaction import ApplicationNoOpTxn
+
+    params = algod_client.suggested_params()
+    sweep_params = copy.copy(params)
+    sweep_params.flat_fee = True
+    sweep_params.fee = max(params.min_fee, 1000) * (group.txn_count + group.inner_count)
+    pad_params = copy.copy(params)
+    pad_params.flat_fee = True
+    pad_params.fee = 0
+
+    # Spread references over the app calls: accounts first, then assets and boxes
+    accounts = [encoding.encode_address(raw) for raw in sorted(group.senders)]
+    assets = sorted(group.assets)
+    boxes = [(0, claim_box_name(claim_id)) for claim_id in group.claim_ids]
+    boxes += [(0, name) for name in group.index_bytes]
+    boxes += [(0, b"")] * (group.box_ref_count - len(boxes))
+    slots = []
+    for _ in range(group.txn_count):
+        txn_accounts, accounts = accounts[:MAX_ACCOUNTS_PER_TXN], accounts[MAX_ACCOUNTS_PER_TXN:]
+        free = MAX_REFS_PER_TXN - len(txn_accounts)
+        txn_assets, assets = assets[:free], assets[free:]
+        free -= len(txn_assets)
+        txn_boxes, boxes = boxes[:free], boxes[free:]
+        slots.append((txn_accounts, txn_assets, txn_boxes))
+
+    atc = AtomicTransactionComposer()
+    first_accounts, first_assets, first_boxes = slots[0]
+    atc.add_method_call(
+        app_id=app_id,
+        method=abi.Method.from_signature(SWEEP_METHOD_SIGNATURE),
+        sender=sender,
+        sp=sweep_params,
+        signer=signer,
+        method_args=[group.claim_ids],
+        accounts=first_accounts,
+        foreign_assets=first_assets,
+        boxes=first_boxes,
+    )
+    for txn_accounts, txn_assets, txn_boxes in slots[1:]:
+        pad = ApplicationNoOpTxn(
+            sender,
+            pad_params,
+            app_id,
+            accounts=txn_accounts,
+            foreign_assets=txn_assets,
+            boxes=txn_boxes,
+        )
+        atc.add_transaction(TransactionWithSigner(pad, signer))
+
+    result = atc.execute(algod_client, 4)
+    telemetry.record_group("sweep_expired", group.txn_count, len(group.claim_ids), group.txn_count - 1)
+    return result.abi_results[0].return_value
+
+
+def sweep_once(algod_client, app_id: int, sender: str, signer) -> int:
+    """Snapshot the app, then sweep every expired link
+
+    Returns:
+        Number of links swept
+    """
+    from claim_index import index_sizes
+
+    table = snapshot_claims(algod_client, app_id)
+    rows = find_expired(table, int(time.time()) - EXPIRY_MARGIN_SECONDS)
+    names = {
+        name
+        for index in rows
+        for name in link_index_names(
+            table.claim_id[index],
+            bytes(table.sender[index * 32:index * 32 + 32]),
+            bytes(table.receiver[index * 32:index * 32 + 32]),
+            table.sender_slot[index] != NO_INDEX_SLOT,
+        )
+    }
+    swept = 0
+    for group in plan_sweeps(table, rows, index_sizes(algod_client, app_id, names)):
+        swept += submit_sweep(algod_client, app_id, sender, signer, group)
+    return swept
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refund expired, unclaimed claim links")
+    parser.add_argument("--interval", type=int, default=0, help="Repeat every N seconds (0 = run once)")
+    args = parser.parse_args()
+
+    from algosdk import account, mnemonic as mn
+    from algosdk.atomic_transaction_composer import AccountTransactionSigner
+    from algod_pool import client_from_env
+
+    private_key = mn.to_private_key(os.environ["DEPLOYER_MNEMONIC"])
+    sender = account.address_from_private_key(private_key)
+    signer = AccountTransactionSigner(private_key)
+    app_id = int(os.environ["CLAIM_APP_ID"])
+
+    algod_client = client_from_env()
+
+    while True:
+        swept = sweep_once(algod_client, app_id, sender, signer)
+        print(f"🧹 Swept {swept} expired link(s)")
+        if not args.interval:
+            return True
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
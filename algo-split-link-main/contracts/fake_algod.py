@@ -0,0 +1,434 @@
+"""
+In-memory stand-in for algosdk's AlgodClient
+Serves application globals, boxes and account balances from dictionaries
+so the off-chain tooling can run locally without a node. Submitted
+transactions are only recorded unless an executor is given: it receives
+each group (decoded transaction maps) while the state is locked, applies
+it or raises AlgodHTTPError, and returns per-transaction results (logs,
+inner transactions) that pending_transaction_info reports. escrow_sim.py
+provides one. Each status_after_block call with transactions pending
+produces a round that confirms them; with keep_blocks the round's block is
+also built in algod's encoding (executor logs and inner transactions as
+apply data), so chain_indexer.py can follow it or record it as a fixture.
+
+serve() exposes the same state over algod's REST paths, for clients that
+speak HTTP (e.g. PooledAlgodClient).
+"""
+import base64
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from urllib import parse
+
+import msgpack
+from algosdk import encoding
+from algosdk.error import AlgodHTTPError
+from algosdk.transaction import SuggestedParams
+
+GENESIS_ID = "fakenet-v1"
+GENESIS_HASH = base64.b64encode(bytes(32)).decode()
+MIN_FEE = 1000
+MIN_BALANCE = 100_000
+
+# executor(fake, txns) -> one result dict per transaction
+Executor = Callable[["FakeAlgod", List[dict]], List[dict]]
+
+# Transaction fields holding addresses: strings in results, raw in blocks
+ADDRESS_FIELDS = ("snd", "rcv", "close", "arcv", "asnd", "aclose", "rekey")
+
+
+class FakeAlgod:
+    """Subset of AlgodClient backed by in-memory application state"""
+
+    def __init__(
+        self,
+        current_round: int = 1,
+        executor: Optional[Executor] = None,
+        keep_blocks: bool = False,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.current_round = current_round
+        self.executor = executor
+        self.keep_blocks = keep_blocks
+        self.clock = clock  # block timestamps
+        self._lock = threading.RLock()  # the executor runs with it held
+        self._globals: Dict[int, Dict[bytes, Union[int, bytes]]] = {}
+        self._boxes: Dict[int, Dict[bytes, bytes]] = {}
+        self._accounts: Dict[str, dict] = {}  # address -> amount, min-balance, assets {id: amount}
+        self._assets: Dict[int, dict] = {}  # asset ID -> params
+        self._blocks: Dict[int, bytes] = {}
+        self._txns: Dict[str, int] = {}  # txid -> confirmed round, 0 while pending
+        self._pending: List[str] = []
+        self._signed: Dict[str, dict] = {}  # pending signed transactions, with keep_blocks
+        self._results: Dict[str, dict] = {}
+        if keep_blocks:
+            self._blocks[current_round] = self._make_block(current_round, [])
+
+    # -- setup helpers -------------------------------------------------
+
+    def set_global(self, app_id: int, key: bytes, value: Union[int, bytes]) -> None:
+        with self._lock:
+            self._globals.setdefault(app_id, {})[key] = value
+
+    def set_account(
+        self,
+        address: str,
+        amount: int,
+        min_balance: int = MIN_BALANCE,
+        assets: Optional[Dict[int, int]] = None,
+    ) -> None:
+        with self._lock:
+            self._accounts[address] = {"amount": amount, "min-balance": min_balance, "assets": dict(assets or {})}
+
+    def set_asset(self, asset_id: int, unit_name: str, decimals: int = 0) -> None:
+        with self._lock:
+            self._assets[asset_id] = {"unit-name": unit_name, "decimals": decimals}
+
+    def put_box(self, app_id: int, name: bytes, value: bytes) -> None:
+        with self._lock:
+            self._boxes.setdefault(app_id, {})[name] = value
+
+    def delete_box(self, app_id: int, name: bytes) -> None:
+        with self._lock:
+            self._boxes.get(app_id, {}).pop(name, None)
+
+    def add_block(self, round_num: int, raw: bytes) -> None:
+        """Add a raw msgpack block and advance the current round to it"""
+        with self._lock:
+            self._blocks[round_num] = raw
+            self.current_round = max(self.current_round, round_num)
+
+    # -- AlgodClient surface -------------------------------------------
+
+    def status(self) -> dict:
+        return {"last-round": self.current_round}
+
+    def status_after_block(self, block_num: Optional[int] = None, round_num: Optional[int] = None) -> dict:
+        with self._lock:
+            if self._pending:
+                self.current_round += 1
+                for tx_id in self._pending:
+                    self._txns[tx_id] = self.current_round
+                if self.keep_blocks:
+                    self._blocks[self.current_round] = self._make_block(self.current_round, self._pending)
+                self._pending = []
+            return {"last-round": self.current_round}
+
+    def suggested_params(self) -> SuggestedParams:
+        return SuggestedParams(
+            fee=0,
+            first=self.current_round,
+            last=self.current_round + 1000,
+            gh=GENESIS_HASH,
+            gen=GENESIS_ID,
+            flat_fee=False,
+            min_fee=MIN_FEE,
+        )
+
+    def send_raw_transaction(self, txn) -> str:
+        """Record a base64 encoded group of signed transactions; returns the first txid"""
+        raw = base64.b64decode(txn)
+        signed_txns = list(msgpack.Unpacker(io.BytesIO(raw), raw=False))
+        txns = [signed["txn"] for signed in signed_txns]
+        tx_ids = [_txid(txn) for txn in txns]
+        if not tx_ids:
+            raise AlgodHTTPError("empty transaction group", 400)
+        with self._lock:
+            if tx_ids[0] in self._txns:
+                if self._txns[tx_ids[0]] or self.executor is not None:
+                    raise AlgodHTTPError(f"transaction already in ledger: {tx_ids[0]}", 400)
+            if self.executor is not None:
+                for tx_id, result in zip(tx_ids, self.executor(self, txns)):
+                    self._results[tx_id] = result
+            for tx_id, signed in zip(tx_ids, signed_txns):
+                if tx_id not in self._txns:
+                    self._txns[tx_id] = 0
+                    self._pending.append(tx_id)
+                    if self.keep_blocks:
+                        self._signed[tx_id] = signed
+        return tx_ids[0]
+
+    def send_transactions(self, txns) -> str:
+        return self.send_raw_transaction(
+            base64.b64encode(b"".join(base64.b64decode(encoding.msgpack_encode(txn)) for txn in txns))
+        )
+
+    def pending_transaction_info(self, transaction_id: str) -> dict:
+        with self._lock:
+            confirmed = self._txns.get(transaction_id)
+            result = self._results.get(transaction_id, {})
+        if confirmed is None:
+            raise AlgodHTTPError("txn does not exist", 404)
+        return {**result, "confirmed-round": confirmed, "pool-error": ""}
+
+    def block_info(
+        self,
+        block: Optional[int] = None,
+        response_format: str = "json",
+        round_num: Optional[int] = None,
+    ) -> Union[bytes, dict]:
+        """Raw msgpack block, or the decoded block with bytes in base64 for json"""
+        if response_format not in ("json", "msgpack"):
+            raise AlgodHTTPError(f"unsupported format: {response_format}", 400)
+        with self._lock:
+            raw = self._blocks.get(round_num if round_num is not None else block)
+        if raw is None:
+            raise AlgodHTTPError("block not found", 404)
+        if response_format == "msgpack":
+            return raw
+        return _json_value(msgpack.unpackb(raw, raw=False, strict_map_key=False))
+
+    def _make_block(self, round_num: int, tx_ids: List[str]) -> bytes:
+        """Raw msgpack block confirming tx_ids, encoded as algod encodes it
+
+        The genesis hash is stripped from every transaction and the genesis
+        ID too, flagged by hgi; executor results become apply data.
+        """
+        stxns = []
+        for tx_id in tx_ids:
+            stxn = dict(self._signed.pop(tx_id))
+            txn = dict(stxn["txn"])
+            txn.pop("gh", None)
+            if txn.pop("gen", None):
+                stxn["hgi"] = True
+            stxn["txn"] = txn
+            apply_data = _apply_data(self._results.get(tx_id, {}))
+            if apply_data:
+                stxn["dt"] = apply_data
+            stxns.append(stxn)
+        block = {
+            "rnd": round_num,
+            "ts": int(self.clock()),
+            "gh": base64.b64decode(GENESIS_HASH),
+            "gen": GENESIS_ID,
+            "txns": stxns,
+        }
+        return msgpack.packb(_canonical({"block": block}), use_bin_type=True)
+
+    def application_info(self, application_id: int) -> dict:
+        with self._lock:
+            if application_id not in self._globals and application_id not in self._boxes:
+                raise AlgodHTTPError("application does not exist", 404)
+            global_state = [
+                {
+                    "key": base64.b64encode(key).decode(),
+                    "value": (
+                        {"type": 1, "uint": 0, "bytes": base64.b64encode(value).decode()}
+                        if isinstance(value, bytes)
+                        else {"type": 2, "uint": value, "bytes": ""}
+                    ),
+                }
+                for key, value in self._globals.get(application_id, {}).items()
+            ]
+        return {"id": application_id, "params": {"global-state": global_state}}
+
+    def account_info(self, address: str, exclude: Optional[str] = None) -> dict:
+        with self._lock:
+            account = self._accounts.get(address)
+            if account is None:
+                return {"address": address, "amount": 0, "min-balance": 0, "assets": []}
+            return {
+                "address": address,
+                "amount": account["amount"],
+                "min-balance": account["min-balance"],
+                "assets": [
+                    {"asset-id": asset_id, "amount": amount, "is-frozen": False}
+                    for asset_id, amount in account["assets"].items()
+                ],
+            }
+
+    def account_asset_info(self, address: str, asset_id: int) -> dict:
+        with self._lock:
+            assets = self._accounts.get(address, {}).get("assets", {})
+            if asset_id not in assets:
+                raise AlgodHTTPError("account asset info not found", 404)
+            return {"asset-holding": {"asset-id": asset_id, "amount": assets[asset_id], "is-frozen": False}}
+
+    def asset_info(self, asset_id: int) -> dict:
+        with self._lock:
+            params = self._assets.get(asset_id)
+        if params is None:
+            raise AlgodHTTPError("asset does not exist", 404)
+        return {"index": asset_id, "params": dict(params)}
+
+    def application_boxes(self, application_id: int, limit: int = 0) -> dict:
+        with self._lock:
+            names = list(self._boxes.get(application_id, {}))
+        if limit:
+            names = names[:limit]
+        return {"boxes": [{"name": base64.b64encode(name).decode()} for name in names]}
+
+    def application_box_by_name(self, application_id: int, box_name: bytes) -> dict:
+        with self._lock:
+            value: Optional[bytes] = self._boxes.get(application_id, {}).get(box_name)
+        if value is None:
+            raise AlgodHTTPError("box not found", 404)
+        return {
+            "name": base64.b64encode(box_name).decode(),
+            "round": self.current_round,
+            "value": base64.b64encode(value).decode(),
+        }
+
+
+def _txid(txn: dict) -> str:
+    """Transaction ID of a decoded (canonical msgpack) transaction map"""
+    digest = encoding.checksum(b"TX" + msgpack.packb(txn, use_bin_type=True))
+    return base64.b32encode(digest).decode().rstrip("=")
+
+
+def _apply_data(result: dict) -> dict:
+    """Block apply data (logs, inner transactions) from an executor result"""
+    apply_data = {}
+    if result.get("logs"):
+        apply_data["lg"] = [base64.b64decode(log) for log in result["logs"]]
+    if result.get("inner-txns"):
+        apply_data["itx"] = [_inner_stxn(inner) for inner in result["inner-txns"]]
+    return apply_data
+
+
+def _inner_stxn(inner: dict) -> dict:
+    txn = {
+        key: encoding.decode_address(value) if key in ADDRESS_FIELDS else value
+        for key, value in inner["txn"]["txn"].items()
+    }
+    stxn = {"txn": txn}
+    apply_data = _apply_data(inner)
+    if apply_data:
+        stxn["dt"] = apply_data
+    return stxn
+
+
+def _canonical(value):
+    """Sort map keys recursively, as required for canonical msgpack"""
+    if isinstance(value, dict):
+        return {key: _canonical(value[key]) for key in sorted(value)}
+    if isinstance(value, list):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def _json_value(value):
+    """Decoded msgpack in algod's JSON form: bytes become base64 strings"""
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode()
+    if isinstance(value, dict):
+        return {_json_value(key): _json_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_json_value(item) for item in value]
+    return value
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Routes algod REST paths to the server's FakeAlgod"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+    disable_nagle_algorithm = True
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.stats_lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _reply(self, status: int, body, content_type: str = "application/json") -> None:
+        data = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _dispatch(self, method: str) -> None:
+        with self.server.stats_lock:
+            self.server.requests += 1
+        url = parse.urlsplit(self.path)
+        query = dict(parse.parse_qsl(url.query))
+        parts = url.path.strip("/").split("/")
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        fake: FakeAlgod = self.server.fake
+
+        try:
+            result = _route(fake, method, parts, query, body)
+        except AlgodHTTPError as e:
+            self._reply(e.code or 500, {"message": str(e)})
+            return
+        if result is None:
+            self._reply(404, {"message": f"unknown path {url.path}"})
+        elif isinstance(result, bytes):
+            self._reply(200, result, "application/msgpack")
+        else:
+            self._reply(200, result)
+
+    def do_GET(self) -> None:
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        self._dispatch("POST")
+
+
+def _route(fake: FakeAlgod, method: str, parts: List[str], query: dict, body: bytes):
+    if parts[:1] != ["v2"]:
+        return {} if parts == ["health"] else None
+    path = parts[1:]
+
+    if method == "POST" and path == ["transactions"]:
+        return {"txId": fake.send_raw_transaction(base64.b64encode(body))}
+    if method != "GET":
+        return None
+
+    if path == ["status"]:
+        return fake.status()
+    if path[:2] == ["status", "wait-for-block-after"]:
+        return fake.status_after_block(int(path[2]))
+    if path == ["transactions", "params"]:
+        params = fake.suggested_params()
+        return {
+            "consensus-version": "future",
+            "fee": params.fee,
+            "genesis-hash": params.gh,
+            "genesis-id": params.gen,
+            "last-round": params.first,
+            "min-fee": params.min_fee,
+        }
+    if path[:2] == ["transactions", "pending"] and len(path) == 3:
+        return fake.pending_transaction_info(path[2])
+    if path[:1] == ["accounts"] and len(path) == 2:
+        return fake.account_info(path[1])
+    if path[:1] == ["accounts"] and len(path) == 4 and path[2] == "assets":
+        return fake.account_asset_info(path[1], int(path[3]))
+    if path[:1] == ["assets"] and len(path) == 2:
+        return fake.asset_info(int(path[1]))
+    if path[:1] == ["blocks"] and len(path) == 2:
+        return fake.block_info(round_num=int(path[1]), response_format=query.get("format", "json"))
+    if path[:1] == ["applications"] and len(path) >= 2:
+        app_id = int(path[1])
+        if len(path) == 2:
+            return fake.application_info(app_id)
+        if path[2:] == ["boxes"]:
+            return fake.application_boxes(app_id, int(query.get("max", 0)))
+        if path[2:] == ["box"]:
+            encoding_name, _, value = query.get("name", "").partition(":")
+            name = base64.b64decode(value) if encoding_name == "b64" else value.encode()
+            return fake.application_box_by_name(app_id, name)
+    return None
+
+
+def serve(fake: FakeAlgod, host: str = "127.0.0.1", port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve a FakeAlgod over HTTP on a background thread
+
+    Returns:
+        (server, base URL); call server.shutdown() when done
+    """
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.fake = fake
+    server.stats_lock = threading.Lock()
+    server.connections = 0
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
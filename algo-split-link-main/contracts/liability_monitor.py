@@ -0,0 +1,172 @@
+"""
+Escrow solvency monitor
+Reads the per-asset liability ledger the escrow keeps in global state and
+compares it with the app account's holdings. Each check is two algod reads
+(application_info and account_info), whatever the number of open links,
+plus one registry box read per held asset that has no ledger slot (its
+totals are zero, or every slot was taken when it was first used).
+
+Metrics (Prometheus text format, labelled by app_id and asset_id):
+    algosplit_escrow_liability   outstanding amount of open links and airdrops
+    algosplit_escrow_open_links  number of open links
+    algosplit_escrow_balance     app holding (ALGO excludes the minimum balance)
+    algosplit_escrow_surplus     balance - liability
+    algosplit_escrow_solvent     1 if balance >= liability, else 0
+
+Usage:
+    python liability_monitor.py [--interval SECONDS] [--port PORT]
+    (reads ALGOD_URL, ALGOD_TOKEN, CLAIM_APP_ID)
+"""
+import argparse
+import base64
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, NamedTuple, Optional
+
+from box_codec import AssetRegistry, asset_id_from_ledger_key, asset_registry_name, decode_asset_registry
+
+
+class AssetSolvency(NamedTuple):
+    """Ledger totals of one asset next to what the app actually holds"""
+    asset_id: int
+    balance: int
+    liability: int
+    open_links: int
+
+    @property
+    def surplus(self) -> int:
+        return self.balance - self.liability
+
+    @property
+    def solvent(self) -> bool:
+        return self.balance >= self.liability
+
+
+def read_ledger(algod_client, app_id: int) -> Dict[int, AssetRegistry]:
+    """Liability and open link count of every asset in the global ledger"""
+    app_info = algod_client.application_info(app_id)
+    ledger = {}
+    for item in app_info["params"].get("global-state", []):
+        asset_id = asset_id_from_ledger_key(base64.b64decode(item["key"]))
+        if asset_id is not None:
+            ledger[asset_id] = decode_asset_registry(base64.b64decode(item["value"]["bytes"]))
+    return ledger
+
+
+def read_registry(algod_client, app_id: int, asset_id: int) -> Optional[AssetRegistry]:
+    """Totals of one asset from its ast_<asset_id> box, or None if it has none"""
+    from algosdk.error import AlgodHTTPError
+
+    try:
+        response = algod_client.application_box_by_name(app_id, asset_registry_name(asset_id))
+    except AlgodHTTPError as e:
+        if e.code == 404:
+            return None
+        raise
+    return decode_asset_registry(base64.b64decode(response["value"]))
+
+
+def read_holdings(algod_client, app_id: int) -> Dict[int, int]:
+    """Spendable ALGO (under key 0) and ASA holdings of the app account"""
+    from algosdk import logic
+
+    info = algod_client.account_info(logic.get_application_address(app_id))
+    holdings = {0: info["amount"] - info.get("min-balance", 0)}
+    for holding in info.get("assets", []):
+        holdings[holding["asset-id"]] = holding["amount"]
+    return holdings
+
+
+def check_solvency(algod_client, app_id: int) -> List[AssetSolvency]:
+    """Solvency of every asset with a ledger entry or a registry box, ordered by asset ID"""
+    ledger = read_ledger(algod_client, app_id)
+    holdings = read_holdings(algod_client, app_id)
+    for asset_id in holdings.keys() - ledger.keys():
+        registry = read_registry(algod_client, app_id, asset_id)
+        if registry is not None:
+            ledger[asset_id] = registry
+    return [
+        AssetSolvency(asset_id, holdings.get(asset_id, 0), entry.liability, entry.open_links)
+        for asset_id, entry in sorted(ledger.items())
+    ]
+
+
+def render_metrics(app_id: int, report: List[AssetSolvency]) -> str:
+    """Prometheus text exposition of a solvency report"""
+    metrics = (
+        ("algosplit_escrow_liability", "Outstanding amount of open links and airdrops", lambda row: row.liability),
+        ("algosplit_escrow_open_links", "Number of open claim links", lambda row: row.open_links),
+        ("algosplit_escrow_balance", "App account holding of the asset", lambda row: row.balance),
+        ("algosplit_escrow_surplus", "Balance minus liability", lambda row: row.surplus),
+        ("algosplit_escrow_solvent", "1 if the balance covers the liability", lambda row: int(row.solvent)),
+    )
+    lines = []
+    for name, help_text, value in metrics:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for row in report:
+            lines.append(f'{name}{{app_id="{app_id}",asset_id="{row.asset_id}"}} {value(row)}')
+    return "\n".join(lines) + "\n"
+
+
+def serve_metrics(algod_client, app_id: int, host: str = "0.0.0.0", port: int = 9108) -> ThreadingHTTPServer:
+    """Serve /metrics on a background thread; every scrape runs one check"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            data = render_metrics(app_id, check_solvency(algod_client, app_id)).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check escrow solvency from its liability ledger")
+    parser.add_argument("--interval", type=int, default=0, help="Repeat every N seconds (0 = run once)")
+    parser.add_argument("--port", type=int, help="Serve Prometheus metrics on this port instead of printing")
+    args = parser.parse_args()
+
+    from algod_pool import client_from_env
+
+    app_id = int(os.environ["CLAIM_APP_ID"])
+    algod_client = client_from_env()
+
+    if args.port:
+        serve_metrics(algod_client, app_id, port=args.port)
+        print(f"📊 Serving solvency metrics on :{args.port}/metrics")
+        while True:
+            time.sleep(3600)
+
+    while True:
+        report = check_solvency(algod_client, app_id)
+        for row in report:
+            mark = "✅" if row.solvent else "❌"
+            print(
+                f"{mark} asset {row.asset_id}: balance {row.balance}, liability {row.liability} "
+                f"({row.open_links} open link(s)), surplus {row.surplus}"
+            )
+        solvent = all(row.solvent for row in report)
+        if not args.interval:
+            return solvent
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,302 @@
+"""
+Multi-process load generator for the claim flow
+Runs the escrow_sim.py ledger behind fake_algod.serve() in this process and
+drives it over HTTP from worker processes with the repo's own tooling:
+batch_claim_links.py groups for creates and group_packer.py claim_batch
+groups for claims, or the escrow_approval.teal create and claim routes
+with --app teal.
+
+Each worker creates links in rounds of --round links and then claims them,
+so its sender index box stays small. Reported: creates and claims per
+second (sum of per-worker rates), p50/p99 latency from submission to
+confirmation per group, retries after claim ID collisions, and the
+simulator's resident memory growth per 10k links. With
+ALGOSPLIT_METRICS_FILE=out/w{pid}.prom each worker also writes its
+telemetry metrics.
+
+Usage:
+    python load_generator.py [--links N] [--workers W] [--round R] [--app escrow|teal]
+"""
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+from typing import List
+
+from algosdk import account, encoding
+from algosdk.error import AlgodHTTPError
+
+import telemetry
+
+DEFAULT_LINKS = 10_000
+DEFAULT_WORKERS = 4
+DEFAULT_ROUND = 256
+LINK_AMOUNT = 100_000
+TEAL_CREATES_PER_GROUP = 8
+TEAL_CLAIMS_PER_GROUP = 16
+MAX_RETRIES = 20
+
+ACCOUNT_FUNDING = 10 ** 13
+APP_FUNDING = 10 ** 13
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile (0 for no samples)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))]
+
+
+def resident_memory() -> int:
+    """Resident set size of this process in bytes (Linux)"""
+    with open("/proc/self/status", encoding="ascii") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+class WorkerStats:
+    """Latencies and timings one worker reports back"""
+
+    def __init__(self) -> None:
+        self.created = 0
+        self.claimed = 0
+        self.retries = 0
+        self.index_slots = 0
+        self.create_seconds = 0.0
+        self.claim_seconds = 0.0
+        self.create_latency: List[float] = []
+        self.claim_latency: List[float] = []
+
+    def timed(self, atc, algod_client, latencies: List[float]):
+        start = time.perf_counter()
+        result = atc.execute(algod_client, 4)
+        latencies.append(time.perf_counter() - start)
+        return result
+
+
+def _escrow_round(algod_client, app_id: int, sender: str, signer, count: int, stats: WorkerStats) -> None:
+    from batch_claim_links import ZERO_ADDRESS, ClaimEntry, build_group, plan_groups, read_claim_count
+    from box_codec import NO_INDEX_SLOT, ClaimRecord, INDEX_HEADER, sender_index_name
+    from group_packer import build_atc, claim_batch_calls, pack_calls
+
+    sender_key = encoding.decode_address(sender)
+    entries = [ClaimEntry(ZERO_ADDRESS, LINK_AMOUNT)] * count
+    claim_ids: List[int] = []
+
+    start = time.perf_counter()
+    for group in plan_groups(entries, sender):
+        for _attempt in range(MAX_RETRIES):
+            # Another worker may take the predicted IDs first; the group is
+            # then rejected for unreferenced boxes and retried
+            next_id = read_claim_count(algod_client, app_id)
+            atc = build_group(group, app_id, sender, signer, algod_client.suggested_params(), next_id)
+            try:
+                stats.timed(atc, algod_client, stats.create_latency)
+            except AlgodHTTPError:
+                stats.retries += 1
+                continue
+            group.record()
+            claim_ids.extend(range(next_id, next_id + group.claims))
+            break
+        else:
+            raise RuntimeError(f"group of {group.claims} link(s) kept colliding")
+    stats.create_seconds += time.perf_counter() - start
+    stats.created += len(claim_ids)
+
+    # Freed index slots are reused, so the box keeps the largest round's size
+    stats.index_slots = max(stats.index_slots, len(claim_ids))
+    start = time.perf_counter()
+    record = ClaimRecord(sender_key, bytes(32), LINK_AMOUNT, 0, 0, 0, 0, NO_INDEX_SLOT)
+    sizes = {sender_index_name(sender_key): INDEX_HEADER.size + 8 * stats.index_slots}
+    params = algod_client.suggested_params()
+    for group in pack_calls(claim_batch_calls([(claim_id, record) for claim_id in claim_ids], sizes)):
+        stats.timed(build_atc(group, app_id, sender, signer, params), algod_client, stats.claim_latency)
+        group.record()
+    stats.claim_seconds += time.perf_counter() - start
+    stats.claimed += len(claim_ids)
+
+
+def _teal_round(algod_client, app_id: int, sender: str, signer, count: int, stats: WorkerStats) -> None:
+    import copy
+
+    from algosdk import logic
+    from algosdk.atomic_transaction_composer import AtomicTransactionComposer, TransactionWithSigner
+    from algosdk.transaction import ApplicationNoOpTxn, PaymentTxn
+
+    from batch_claim_links import read_claim_count
+    from box_codec import ZERO_ADDRESS_BYTES, teal_link_box_name
+
+    app_address = logic.get_application_address(app_id)
+    params = algod_client.suggested_params()
+    claim_ids: List[int] = []
+
+    # Each link is a [payment, "create"] pair; a group holds TEAL_CREATES_PER_GROUP
+    start = time.perf_counter()
+    for first in range(0, count, TEAL_CREATES_PER_GROUP):
+        size = min(TEAL_CREATES_PER_GROUP, count - first)
+        for _attempt in range(MAX_RETRIES):
+            next_id = read_claim_count(algod_client, app_id)
+            atc = AtomicTransactionComposer()
+            for claim_id in range(next_id, next_id + size):
+                payment = PaymentTxn(sender, params, app_address, LINK_AMOUNT)
+                args = [b"create", ZERO_ADDRESS_BYTES, (0).to_bytes(8, "big")]
+                call = ApplicationNoOpTxn(
+                    sender, params, app_id, app_args=args, boxes=[(0, teal_link_box_name(claim_id))]
+                )
+                atc.add_transaction(TransactionWithSigner(payment, signer))
+                atc.add_transaction(TransactionWithSigner(call, signer))
+            try:
+                stats.timed(atc, algod_client, stats.create_latency)
+            except AlgodHTTPError:
+                stats.retries += 1
+                continue
+            claim_ids.extend(range(next_id, next_id + size))
+            break
+        else:
+            raise RuntimeError(f"group of {size} link(s) kept colliding")
+    stats.create_seconds += time.perf_counter() - start
+    stats.created += len(claim_ids)
+
+    claim_params = copy.copy(params)
+    claim_params.flat_fee = True
+    claim_params.fee = max(params.min_fee, 1000) * 2
+    start = time.perf_counter()
+    for first in range(0, len(claim_ids), TEAL_CLAIMS_PER_GROUP):
+        atc = AtomicTransactionComposer()
+        for claim_id in claim_ids[first:first + TEAL_CLAIMS_PER_GROUP]:
+            args = [b"claim", claim_id.to_bytes(8, "big")]
+            call = ApplicationNoOpTxn(
+                sender, claim_params, app_id, app_args=args, boxes=[(0, teal_link_box_name(claim_id))]
+            )
+            atc.add_transaction(TransactionWithSigner(call, signer))
+        stats.timed(atc, algod_client, stats.claim_latency)
+    stats.claim_seconds += time.perf_counter() - start
+    stats.claimed += len(claim_ids)
+
+
+def run_worker(url: str, app_id: int, app: str, private_key: str, links: int, round_size: int) -> dict:
+    """Create and claim `links` links in rounds; runs in a worker process"""
+    from algosdk.atomic_transaction_composer import AccountTransactionSigner
+
+    from algod_pool import PooledAlgodClient
+
+    algod_client = PooledAlgodClient("", url)
+    sender = account.address_from_private_key(private_key)
+    signer = AccountTransactionSigner(private_key)
+    stats = WorkerStats()
+    run_round = _teal_round if app == "teal" else _escrow_round
+
+    for first in range(0, links, round_size):
+        run_round(algod_client, app_id, sender, signer, min(round_size, links - first), stats)
+    # Pool workers are terminated, so atexit would never write their metrics
+    telemetry.flush()
+    return vars(stats)
+
+
+def run_load(links: int, workers: int, round_size: int, app: str = "escrow") -> dict:
+    """Serve a fresh simulated ledger and drive it from `workers` processes
+
+    Returns:
+        Summary with rates, latency percentiles and memory per 10k links
+    """
+    from escrow_sim import EscrowClaimLinkModel, SimLedger, TealEscrowModel
+    from fake_algod import serve
+
+    ledger = SimLedger()
+    creator_key, creator = account.generate_account()
+    ledger.fund(creator, ACCOUNT_FUNDING)
+    model = TealEscrowModel() if app == "teal" else EscrowClaimLinkModel()
+    app_id = ledger.create_app(model, creator, APP_FUNDING)
+
+    keys = []
+    for _ in range(workers):
+        private_key, address = account.generate_account()
+        ledger.fund(address, ACCOUNT_FUNDING)
+        keys.append(private_key)
+
+    server, url = serve(ledger.fake)
+    memory_before = resident_memory()
+    shares = [links // workers + (1 if index < links % workers else 0) for index in range(workers)]
+
+    start = time.perf_counter()
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(workers) as pool:
+        results = pool.starmap(
+            run_worker,
+            [(url, app_id, app, key, share, round_size) for key, share in zip(keys, shares)],
+        )
+    elapsed = time.perf_counter() - start
+    memory_after = resident_memory()
+    server.shutdown()
+
+    create_latency = [sample for result in results for sample in result["create_latency"]]
+    claim_latency = [sample for result in results for sample in result["claim_latency"]]
+    created = sum(result["created"] for result in results)
+    boxes = ledger.fake._boxes[app_id]
+    return {
+        "app": app,
+        "links": created,
+        "claimed": sum(result["claimed"] for result in results),
+        "workers": workers,
+        "elapsed_seconds": round(elapsed, 3),
+        "creates_per_second": round(sum(
+            result["created"] / result["create_seconds"] for result in results if result["create_seconds"]
+        ), 1),
+        "claims_per_second": round(sum(
+            result["claimed"] / result["claim_seconds"] for result in results if result["claim_seconds"]
+        ), 1),
+        "create_p50_ms": round(percentile(create_latency, 0.50) * 1000, 2),
+        "create_p99_ms": round(percentile(create_latency, 0.99) * 1000, 2),
+        "claim_p50_ms": round(percentile(claim_latency, 0.50) * 1000, 2),
+        "claim_p99_ms": round(percentile(claim_latency, 0.99) * 1000, 2),
+        "groups": ledger.groups,
+        "rejected_groups": ledger.rejected,
+        "retries": sum(result["retries"] for result in results),
+        "boxes": len(boxes),
+        "box_bytes": sum(len(name) + len(value) for name, value in boxes.items()),
+        "memory_per_10k_links": (memory_after - memory_before) * 10_000 // max(created, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the claim flow against an in-memory ledger")
+    parser.add_argument("--links", type=int, default=DEFAULT_LINKS)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--round", type=int, default=DEFAULT_ROUND, help="Links created before each claim pass")
+    parser.add_argument("--app", choices=("escrow", "teal"), default="escrow")
+    parser.add_argument("--json", help="Also write the summary to this file")
+    args = parser.parse_args()
+
+    print(f"📦 {args.links} link(s) with {args.workers} worker(s) against the simulated {args.app} app...")
+    summary = run_load(args.links, args.workers, args.round, args.app)
+
+    print(f"✅ {summary['links']} created, {summary['claimed']} claimed in {summary['elapsed_seconds']}s")
+    print(
+        f"📊 creates/s {summary['creates_per_second']}  "
+        f"p50 {summary['create_p50_ms']}ms  p99 {summary['create_p99_ms']}ms"
+    )
+    print(
+        f"📊 claims/s {summary['claims_per_second']}  "
+        f"p50 {summary['claim_p50_ms']}ms  p99 {summary['claim_p99_ms']}ms"
+    )
+    print(
+        f"📊 {summary['groups']} group(s), {summary['rejected_groups']} rejected, "
+        f"{summary['retries']} retried after ID collisions"
+    )
+    print(
+        f"📊 {summary['boxes']} box(es), {summary['box_bytes']} bytes; "
+        f"~{summary['memory_per_10k_links'] / 2**20:.1f} MiB RSS per 10k links"
+    )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    return summary["claimed"] == summary["links"]
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,583 @@
+"""
+Merkle-root airdrops for the escrow claim link app
+Builds the Merkle tree of an airdrop's (index, receiver, amount) leaves,
+writes the proofs as address-sharded JSON files a frontend can fetch one
+at a time, verifies those files offline, and drives the create/claim/close
+calls of the escrow's airdrop mode.
+
+Hashing matches EscrowClaimLink.claim_airdrop:
+    leaf = sha256(0x00 || itob(index) || receiver || itob(amount))
+    node = sha256(0x01 || left || right)
+The leaf level is padded to a power of two with zero hashes; the bits of
+the leaf index, lowest first, say whether each sibling is on the left.
+
+Output directory:
+    manifest.json      root, leaf_count, total, depth, shard_count (+ app/airdrop IDs once created)
+    proofs/NNNN.json   {address: [[index, amount, [sibling hex, ...]], ...]} for the addresses of shard NNNN
+
+Usage:
+    python merkle_airdrop.py build <recipients.csv> <out_dir> [--shard-size N]
+    python merkle_airdrop.py verify <out_dir>
+    python merkle_airdrop.py create <out_dir> [--expiry T]
+    python merkle_airdrop.py claim <out_dir>
+    python merkle_airdrop.py close <out_dir>
+    (chain commands read ALGOD_URL, ALGOD_TOKEN, CLAIM_APP_ID, DEPLOYER_MNEMONIC, CLAIM_ASSET_ID)
+"""
+import argparse
+import copy
+import csv
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from algosdk import encoding
+
+from batch_claim_links import MAX_REFS_PER_TXN
+from box_codec import (
+    AIRDROP_PAGE_LEAVES,
+    AIRDROP_PAGE_MIN_BALANCE,
+    AIRDROP_PAGE_SIZE,
+    AIRDROP_RECORD_SIZE,
+    ASSET_REGISTRY_SIZE,
+    AirdropRecord,
+    airdrop_box_name,
+    airdrop_page_count,
+    airdrop_page_name,
+    asset_registry_name,
+    box_io_refs,
+    decode_airdrop_record,
+)
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+EMPTY_NODE = bytes(32)
+
+MANIFEST_NAME = "manifest.json"
+PROOFS_DIR = "proofs"
+DEFAULT_SHARD_SIZE = 1000  # leaves per proof file, on average
+
+# Opcode budget of one app call, pooled across the group
+APP_CALL_BUDGET = 700
+
+# Estimated claim_airdrop cost: fixed part plus one sha256 and branch per level
+CLAIM_BASE_COST = 300
+CLAIM_LEVEL_COST = 50
+
+CREATE_METHOD_SIGNATURE = "create_airdrop(txn,byte[32],uint64,uint64,pay)uint64"
+CLAIM_METHOD_SIGNATURE = "claim_airdrop(uint64,uint64,uint64,byte[32][])bool"
+CLOSE_METHOD_SIGNATURE = "close_airdrop(uint64)uint64"
+PURGE_METHOD_SIGNATURE = "purge_airdrop_pages(uint64,uint64)uint64"
+
+# Pages released per purge call (one box reference each, besides the record's)
+PURGE_PAGES_PER_CALL = MAX_REFS_PER_TXN - 1
+
+
+@dataclass(frozen=True)
+class AirdropLeaf:
+    """One recipient of an airdrop"""
+    receiver: str
+    amount: int
+
+
+def leaf_hash(index: int, receiver: bytes, amount: int) -> bytes:
+    """Leaf hash of a receiver's 32-byte public key and amount at an index"""
+    return hashlib.sha256(LEAF_PREFIX + index.to_bytes(8, "big") + receiver + amount.to_bytes(8, "big")).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+class MerkleTree:
+    """Binary Merkle tree kept as one list of hashes per level, leaves first"""
+
+    def __init__(self, leaves: Sequence[bytes]) -> None:
+        if not leaves:
+            raise ValueError("An airdrop needs at least one leaf")
+        self.leaf_count = len(leaves)
+        self.depth = (self.leaf_count - 1).bit_length()
+
+        level = list(leaves) + [EMPTY_NODE] * ((1 << self.depth) - self.leaf_count)
+        self.levels: List[List[bytes]] = [level]
+        while len(level) > 1:
+            level = [node_hash(level[i], level[i + 1]) for i in range(0, len(level), 2)]
+            self.levels.append(level)
+
+    @property
+    def root(self) -> bytes:
+        return self.levels[-1][0]
+
+    def proof(self, index: int) -> List[bytes]:
+        """Sibling hashes from the leaf at `index` up to the root"""
+        if not 0 <= index < self.leaf_count:
+            raise IndexError(f"Leaf {index} out of range")
+        return [level[(index >> height) ^ 1] for height, level in enumerate(self.levels[:-1])]
+
+
+def compute_root(index: int, receiver: bytes, amount: int, proof: Sequence[bytes]) -> bytes:
+    """Root implied by a leaf and its proof, walked as the contract walks it"""
+    node = leaf_hash(index, receiver, amount)
+    position = index
+    for sibling in proof:
+        node = node_hash(sibling, node) if position & 1 else node_hash(node, sibling)
+        position >>= 1
+    if position:
+        raise ValueError("Proof too short for the leaf index")
+    return node
+
+
+def verify_proof(root: bytes, index: int, receiver: bytes, amount: int, proof: Sequence[bytes]) -> bool:
+    """Whether a proof is accepted by claim_airdrop for the given root"""
+    try:
+        return compute_root(index, receiver, amount, proof) == root
+    except ValueError:
+        return False
+
+
+def shard_of(receiver: bytes, shard_count: int) -> int:
+    """Proof file holding an address (public keys are uniformly distributed)"""
+    return int.from_bytes(receiver[:4], "big") % shard_count
+
+
+def claim_cost(depth: int) -> int:
+    """Estimated opcode cost of a claim_airdrop call for a tree depth"""
+    return CLAIM_BASE_COST + CLAIM_LEVEL_COST * depth
+
+
+def budget_calls(depth: int) -> int:
+    """Extra app calls a claim needs so the pooled budget covers its proof"""
+    return -(-claim_cost(depth) // APP_CALL_BUDGET) - 1
+
+
+def load_leaves(path: str) -> Iterable[AirdropLeaf]:
+    """Load leaves from a CSV with receiver and amount columns"""
+    with open(path, newline="", encoding="utf-8") as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            receiver = (row.get("receiver") or "").strip()
+            amount = int(row["amount"])
+            if not encoding.is_valid_address(receiver):
+                raise ValueError(f"{path}:{line}: invalid receiver {receiver!r}")
+            if amount <= 0:
+                raise ValueError(f"{path}:{line}: amount must be greater than 0")
+            yield AirdropLeaf(receiver, amount)
+
+
+def build_airdrop(leaves: Sequence[AirdropLeaf], out_dir: str, shard_size: int = DEFAULT_SHARD_SIZE) -> dict:
+    """Build the tree and write the manifest and proof shards
+
+    Shards are written one at a time, so only the tree and one shard's
+    proofs are in memory.
+
+    Returns:
+        The manifest
+    """
+    keys = [encoding.decode_address(leaf.receiver) for leaf in leaves]
+    tree = MerkleTree([leaf_hash(i, key, leaf.amount) for i, (key, leaf) in enumerate(zip(keys, leaves))])
+    shard_count = max(1, -(-len(leaves) // shard_size))
+
+    by_shard: List[List[int]] = [[] for _ in range(shard_count)]
+    for index, key in enumerate(keys):
+        by_shard[shard_of(key, shard_count)].append(index)
+
+    proofs_dir = Path(out_dir) / PROOFS_DIR
+    proofs_dir.mkdir(parents=True, exist_ok=True)
+    for shard, indices in enumerate(by_shard):
+        claims: Dict[str, list] = {}
+        for index in indices:
+            leaf = leaves[index]
+            claims.setdefault(leaf.receiver, []).append(
+                [index, leaf.amount, [sibling.hex() for sibling in tree.proof(index)]]
+            )
+        (proofs_dir / f"{shard:04d}.json").write_text(json.dumps(claims, separators=(",", ":")))
+
+    manifest = {
+        "root": tree.root.hex(),
+        "leaf_count": tree.leaf_count,
+        "total": sum(leaf.amount for leaf in leaves),
+        "depth": tree.depth,
+        "shard_count": shard_count,
+    }
+    write_manifest(out_dir, manifest)
+    return manifest
+
+
+def read_manifest(out_dir: str) -> dict:
+    return json.loads((Path(out_dir) / MANIFEST_NAME).read_text())
+
+
+def write_manifest(out_dir: str, manifest: dict) -> None:
+    (Path(out_dir) / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2) + "\n")
+
+
+def load_claims(out_dir: str, address: str) -> List[Tuple[int, int, List[bytes]]]:
+    """(index, amount, proof) of every leaf of an address, from its shard only"""
+    shard = shard_of(encoding.decode_address(address), read_manifest(out_dir)["shard_count"])
+    claims = json.loads((Path(out_dir) / PROOFS_DIR / f"{shard:04d}.json").read_text())
+    return [
+        (index, amount, [bytes.fromhex(sibling) for sibling in proof])
+        for index, amount, proof in claims.get(address, [])
+    ]
+
+
+def _verify_shard(path: str, root: bytes, shard: int, shard_count: int) -> Tuple[List[int], int, List[str]]:
+    """Verify one proof file; returns (leaf indices, amount sum, problems)"""
+    indices: List[int] = []
+    amount_sum = 0
+    problems: List[str] = []
+    for address, claims in json.loads(Path(path).read_text()).items():
+        key = encoding.decode_address(address)
+        if shard_of(key, shard_count) != shard:
+            problems.append(f"{address} is in shard {shard} instead of {shard_of(key, shard_count)}")
+        for index, amount, proof in claims:
+            if not verify_proof(root, index, key, amount, [bytes.fromhex(sibling) for sibling in proof]):
+                problems.append(f"Invalid proof for leaf {index} ({address})")
+            indices.append(index)
+            amount_sum += amount
+    return indices, amount_sum, problems
+
+
+def verify_airdrop(out_dir: str, max_workers: Optional[int] = None) -> List[str]:
+    """Verify every proof file against the manifest, one process per shard
+
+    Also checks that the shards cover each leaf exactly once and that the
+    amounts add up to the manifest total, i.e. that the pool funded by
+    create_airdrop covers every claim.
+
+    Returns:
+        Problems found (empty if the airdrop is consistent)
+    """
+    manifest = read_manifest(out_dir)
+    root = bytes.fromhex(manifest["root"])
+    shard_count = manifest["shard_count"]
+    paths = [str(Path(out_dir) / PROOFS_DIR / f"{shard:04d}.json") for shard in range(shard_count)]
+
+    seen = bytearray(manifest["leaf_count"])
+    amount_sum = 0
+    problems: List[str] = []
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        results = pool.map(_verify_shard, paths, [root] * shard_count, range(shard_count), [shard_count] * shard_count)
+        for indices, shard_sum, shard_problems in results:
+            problems.extend(shard_problems)
+            amount_sum += shard_sum
+            for index in indices:
+                if not 0 <= index < len(seen):
+                    problems.append(f"Leaf {index} out of range")
+                elif seen[index]:
+                    problems.append(f"Leaf {index} listed twice")
+                else:
+                    seen[index] = 1
+
+    missing = len(seen) - sum(seen)
+    if missing:
+        problems.append(f"{missing} leaf/leaves missing from the proof files")
+    if amount_sum != manifest["total"]:
+        problems.append(f"Amounts add up to {amount_sum}, manifest total is {manifest['total']}")
+    return problems
+
+
+def read_airdrop_count(algod_client, app_id: int) -> int:
+    """Read the airdrop_count global from the escrow application"""
+    import base64
+
+    app_info = algod_client.application_info(app_id)
+    for item in app_info["params"].get("global-state", []):
+        if base64.b64decode(item["key"]) == b"airdrop_count":
+            return item["value"]["uint"]
+    return 0
+
+
+def read_airdrop(algod_client, app_id: int, airdrop_id: int) -> Optional[AirdropRecord]:
+    """Read an airdrop record, or None once it has been purged"""
+    import base64
+
+    from algosdk.error import AlgodHTTPError
+
+    try:
+        response = algod_client.application_box_by_name(app_id, airdrop_box_name(airdrop_id))
+    except AlgodHTTPError as e:
+        if e.code == 404:
+            return None
+        raise
+    return decode_airdrop_record(base64.b64decode(response["value"]))
+
+
+def _call_params(algod_client, inner_txns: int):
+    """Suggested params with a flat fee covering `inner_txns` inner transfers"""
+    params = algod_client.suggested_params()
+    call_params = copy.copy(params)
+    call_params.flat_fee = True
+    call_params.fee = max(params.min_fee, 1000) * (1 + inner_txns)
+    return params, call_params
+
+
+def create_airdrop(
+    algod_client,
+    app_id: int,
+    sender: str,
+    signer,
+    manifest: dict,
+    asset_id: int = 0,
+    expiry_time: int = 0,
+) -> int:
+    """Fund an airdrop pool with the manifest total and store its root
+
+    The drp_<id> box reference names the next airdrop ID, predicted from the
+    app's airdrop_count; a concurrent creator makes the group fail and it
+    can be retried. A second payment prepays the minimum balance of every
+    bitmap page, which close_airdrop gets back.
+
+    Returns:
+        Airdrop ID
+    """
+    atc = create_airdrop_atc(algod_client, app_id, sender, signer, manifest, asset_id, expiry_time)
+    return atc.execute(algod_client, 4).abi_results[0].return_value
+
+
+def create_airdrop_atc(
+    algod_client,
+    app_id: int,
+    sender: str,
+    signer,
+    manifest: dict,
+    asset_id: int = 0,
+    expiry_time: int = 0,
+):
+    """AtomicTransactionComposer of create_airdrop: the pool funding, the call and its page payment"""
+    from algosdk import abi, logic
+    from algosdk.atomic_transaction_composer import AtomicTransactionComposer, TransactionWithSigner
+    from algosdk.transaction import AssetTransferTxn, PaymentTxn
+
+    params = algod_client.suggested_params()
+    app_address = logic.get_application_address(app_id)
+    if asset_id == 0:
+        funding = PaymentTxn(sender, params, app_address, manifest["total"])
+    else:
+        funding = AssetTransferTxn(sender, params, app_address, manifest["total"], asset_id)
+
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=app_id,
+        method=abi.Method.from_signature(CREATE_METHOD_SIGNATURE),
+        sender=sender,
+        sp=params,
+        signer=signer,
+        method_args=[
+            TransactionWithSigner(funding, signer),
+            bytes.fromhex(manifest["root"]),
+            manifest["leaf_count"],
+            expiry_time,
+            TransactionWithSigner(
+                PaymentTxn(
+                    sender, params, app_address, airdrop_page_count(manifest["leaf_count"]) * AIRDROP_PAGE_MIN_BALANCE
+                ),
+                signer,
+            ),
+        ],
+        boxes=[
+            (0, airdrop_box_name(read_airdrop_count(algod_client, app_id))),
+            (0, asset_registry_name(asset_id)),
+        ],
+    )
+    return atc
+
+
+def claim_airdrop(
+    algod_client,
+    app_id: int,
+    airdrop_id: int,
+    claimer: str,
+    signer,
+    depth: int,
+    index: int,
+    amount: int,
+    proof: Sequence[bytes],
+    asset_id: int = 0,
+) -> bool:
+    """Claim one leaf as `claimer`, padding the group for opcode budget"""
+    atc = claim_airdrop_atc(algod_client, app_id, airdrop_id, claimer, signer, depth, index, amount, proof, asset_id)
+    return atc.execute(algod_client, 4).abi_results[0].return_value
+
+
+def claim_airdrop_atc(
+    algod_client,
+    app_id: int,
+    airdrop_id: int,
+    claimer: str,
+    signer,
+    depth: int,
+    index: int,
+    amount: int,
+    proof: Sequence[bytes],
+    asset_id: int = 0,
+):
+    """AtomicTransactionComposer of claim_airdrop"""
+    from algosdk import abi
+    from algosdk.atomic_transaction_composer import AtomicTransactionComposer, TransactionWithSigner
+    from algosdk.transaction import ApplicationNoOpTxn
+
+    page = index // AIRDROP_PAGE_LEAVES
+    boxes = [
+        (0, airdrop_box_name(airdrop_id)),
+        (0, airdrop_page_name(airdrop_id, page)),
+        (0, asset_registry_name(asset_id)),
+    ]
+    io_bytes = AIRDROP_RECORD_SIZE + AIRDROP_PAGE_SIZE + ASSET_REGISTRY_SIZE
+    boxes += [(0, b"")] * (box_io_refs(io_bytes) - len(boxes))
+
+    # One inner transfer, covered by the outer call's fee
+    params, call_params = _call_params(algod_client, 1)
+
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=app_id,
+        method=abi.Method.from_signature(CLAIM_METHOD_SIGNATURE),
+        sender=claimer,
+        sp=call_params,
+        signer=signer,
+        method_args=[airdrop_id, index, amount, list(proof)],
+        foreign_assets=[asset_id] if asset_id else None,
+        boxes=boxes,
+    )
+    # Each bare no-op call adds APP_CALL_BUDGET to the group's pooled budget
+    for _ in range(budget_calls(depth)):
+        atc.add_transaction(TransactionWithSigner(ApplicationNoOpTxn(claimer, params, app_id), signer))
+    return atc
+
+
+def close_airdrop(algod_client, app_id: int, airdrop_id: int, sender: str, signer, asset_id: int = 0) -> int:
+    """Refund the unclaimed remainder, then purge every bitmap page and get
+    their minimum balance back
+
+    Returns:
+        Refunded amount
+    """
+    atc = close_airdrop_atc(algod_client, app_id, airdrop_id, sender, signer, asset_id)
+    refunded = atc.execute(algod_client, 4).abi_results[0].return_value
+
+    # Pages are released from the top down; each purge refunds its pages in one transfer
+    record = read_airdrop(algod_client, app_id, airdrop_id)
+    pages = record.pages if record is not None else 0
+    while pages:
+        chunk = range(max(pages - PURGE_PAGES_PER_CALL, 0), pages)
+        purge_pages_atc(algod_client, app_id, airdrop_id, chunk, sender, signer).execute(algod_client, 4)
+        pages = chunk.start
+
+    return refunded
+
+
+def close_airdrop_atc(algod_client, app_id: int, airdrop_id: int, sender: str, signer, asset_id: int = 0):
+    """AtomicTransactionComposer of close_airdrop, paying for its refund"""
+    from algosdk import abi
+    from algosdk.atomic_transaction_composer import AtomicTransactionComposer
+
+    _params, call_params = _call_params(algod_client, 1)
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=app_id,
+        method=abi.Method.from_signature(CLOSE_METHOD_SIGNATURE),
+        sender=sender,
+        sp=call_params,
+        signer=signer,
+        method_args=[airdrop_id],
+        foreign_assets=[asset_id] if asset_id else None,
+        boxes=[(0, airdrop_box_name(airdrop_id)), (0, asset_registry_name(asset_id))],
+    )
+    return atc
+
+
+def purge_pages_atc(algod_client, app_id: int, airdrop_id: int, pages: range, sender: str, signer):
+    """AtomicTransactionComposer of purge_airdrop_pages for the top `pages` of a closed airdrop"""
+    from algosdk import abi
+    from algosdk.atomic_transaction_composer import AtomicTransactionComposer
+
+    _params, call_params = _call_params(algod_client, 1)
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=app_id,
+        method=abi.Method.from_signature(PURGE_METHOD_SIGNATURE),
+        sender=sender,
+        sp=call_params,
+        signer=signer,
+        method_args=[airdrop_id, len(pages)],
+        boxes=[(0, airdrop_box_name(airdrop_id))] + [(0, airdrop_page_name(airdrop_id, page)) for page in pages],
+    )
+    return atc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build, verify and run Merkle-root airdrops")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Build the tree and proof files from a CSV")
+    build.add_argument("recipients")
+    build.add_argument("out_dir")
+    build.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    commands.add_parser("verify", help="Verify the proof files offline").add_argument("out_dir")
+    create = commands.add_parser("create", help="Fund the airdrop on chain")
+    create.add_argument("out_dir")
+    create.add_argument("--expiry", type=int, default=0)
+    commands.add_parser("claim", help="Claim every leaf of the account").add_argument("out_dir")
+    commands.add_parser("close", help="Refund the remainder and free the bitmap").add_argument("out_dir")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        leaves = list(load_leaves(args.recipients))
+        manifest = build_airdrop(leaves, args.out_dir, args.shard_size)
+        print(f"✅ {manifest['leaf_count']} leaves, depth {manifest['depth']}, {manifest['shard_count']} proof file(s)")
+        print(f"📝 Root {manifest['root']} written to {Path(args.out_dir) / MANIFEST_NAME}")
+        return True
+
+    if args.command == "verify":
+        problems = verify_airdrop(args.out_dir)
+        for problem in problems:
+            print(f"❌ {problem}")
+        if not problems:
+            print(f"✅ Every proof in {args.out_dir} matches the root")
+        return not problems
+
+    from algosdk import account, mnemonic as mn
+    from algosdk.atomic_transaction_composer import AccountTransactionSigner
+    from algod_pool import client_from_env
+
+    private_key = mn.to_private_key(os.environ["DEPLOYER_MNEMONIC"])
+    address = account.address_from_private_key(private_key)
+    signer = AccountTransactionSigner(private_key)
+    asset_id = int(os.environ.get("CLAIM_ASSET_ID", "0"))
+    algod_client = client_from_env()
+    manifest = read_manifest(args.out_dir)
+
+    if args.command == "create":
+        app_id = int(os.environ["CLAIM_APP_ID"])
+        airdrop_id = create_airdrop(algod_client, app_id, address, signer, manifest, asset_id, args.expiry)
+        manifest.update(app_id=app_id, airdrop_id=airdrop_id, asset_id=asset_id)
+        write_manifest(args.out_dir, manifest)
+        print(f"✅ Airdrop {airdrop_id} funded with {manifest['total']} for {manifest['leaf_count']} leaves")
+        return True
+
+    if "airdrop_id" not in manifest:
+        print("❌ The manifest has no airdrop_id; run create first")
+        return False
+    app_id, airdrop_id = manifest["app_id"], manifest["airdrop_id"]
+    asset_id = manifest.get("asset_id", 0)
+
+    if args.command == "claim":
+        claims = load_claims(args.out_dir, address)
+        for index, amount, proof in claims:
+            claim_airdrop(algod_client, app_id, airdrop_id, address, signer, manifest["depth"], index, amount, proof, asset_id)
+            print(f"✅ Claimed leaf {index}: {amount}")
+        if not claims:
+            print(f"🔍 No leaves for {address}")
+        return True
+
+    refunded = close_airdrop(algod_client, app_id, airdrop_id, address, signer, asset_id)
+    print(f"✅ Airdrop {airdrop_id} closed, {refunded} refunded")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -2,14 +2,101 @@
 AlgoSplit Payment Split Smart Contract
 Handles split payments with multiple contributors on Algorand
 Uses PuyaPy (Algorand Python) for contract development
+
+Storage (boxes, no opt-in required):
+- pay_<id>: fixed-layout PaymentRecord (97 bytes)
+- ctb_<id><address>: amount contributed by one account (8 bytes)
+- cbm_<id><page>, cam_<id><page>: contributions by participant slot, for
+  large splits: a paid-bit bitmap page (8192 slots) and amount pages (128 slots)
+- dfr_<address>: present when a receiver defers payouts to settle()
+- str_<id>: fixed-layout StreamRecord (105 bytes) of a streaming payment
+
+The account a payment box is refunded to pays its minimum balance: the
+creator funds the record and the slot pages, each contributor their
+contributor box, a deferring receiver its deferral box, a stream's
+creator the stream box. Once a split is paid out, close_contributions
+and close_payment delete the boxes and refund their minimum balance.
 """
-from algopy import ARC4Contract, arc4, Account, UInt64, String, Txn, itxn
-from algopy.op import App
+from algopy import (
+    ARC4Contract,
+    arc4,
+    Account,
+    Bytes,
+    UInt64,
+    String,
+    Txn,
+    Global,
+    TransactionType,
+    gtxn,
+    itxn,
+    op,
+    subroutine,
+)
+
+
+# Payment record states (last byte of the record)
+PAYMENT_ACTIVE = 0
+PAYMENT_COMPLETED = 1  # fully collected, funds held until settle()
+PAYMENT_PAID_OUT = 2  # fully collected and paid to the receiver
+
+# Maximum transactions in one inner group
+MAX_INNER_GROUP_SIZE = 16
+
+# Size of an encoded PaymentRecord: 32 + 32 + 8 + 8 + 8 + 8 + 1
+PAYMENT_RECORD_SIZE = 97
+
+# Box minimum balances (2500 + 400 * (name + value)) charged to the caller
+PAYMENT_BOX_MIN_BALANCE = 46_100  # pay_<id>: 12 + 97
+CONTRIBUTOR_BOX_MIN_BALANCE = 23_300  # ctb_<id><address>: 44 + 8
+CONTRIBUTOR_PAGE_MIN_BALANCE = 420_100  # cbm_/cam_<id><page>: 20 + 1024
+DEFERRAL_BOX_MIN_BALANCE = 17_300  # dfr_<address>: 36 + 1
+STREAM_BOX_MIN_BALANCE = 49_300  # str_<id>: 12 + 105
+
+# Paged contributor storage: every page is one box reference of I/O quota
+CONTRIBUTOR_PAGE_SIZE = 1024
+BITMAP_PAGE_SLOTS = 8192  # CONTRIBUTOR_PAGE_SIZE * 8
+AMOUNT_PAGE_SLOTS = 128  # CONTRIBUTOR_PAGE_SIZE // 8
+MAX_PARTICIPANTS = 65536  # eight bitmap pages
+AMOUNT_PAGES_PER_BITMAP_PAGE = 64  # BITMAP_PAGE_SLOTS // AMOUNT_PAGE_SLOTS
+
+# Slots per get_contributions call: the uint64[] return must fit in one 1KB log
+MAX_SLOTS_PER_READ = 64
+
+# Clock a stream's rate is measured against (last byte of the record)
+STREAM_UNIT_SECONDS = 0  # Global.latest_timestamp
+STREAM_UNIT_ROUNDS = 1  # Global.round
+
+
+class PaymentRecord(arc4.Struct):
+    """Fixed layout of a pay_<id> box, mirrored by box_codec.py"""
+    creator: arc4.Address
+    receiver: arc4.Address
+    total_amount: arc4.UInt64
+    participants: arc4.UInt64
+    collected: arc4.UInt64
+    contributor_count: arc4.UInt64
+    status: arc4.UInt8  # PAYMENT_ACTIVE / PAYMENT_COMPLETED / PAYMENT_PAID_OUT
+
+
+class StreamRecord(arc4.Struct):
+    """Fixed layout of a str_<id> box, mirrored by box_codec.py"""
+    creator: arc4.Address
+    receiver: arc4.Address
+    rate: arc4.UInt64  # microAlgos unlocked per second or round
+    start: arc4.UInt64  # moved forward when a top-up restarts a stream that ran dry
+    stop: arc4.UInt64  # 0 while the stream runs until its deposits are used up
+    deposited: arc4.UInt64
+    withdrawn: arc4.UInt64
+    unit: arc4.UInt8  # STREAM_UNIT_SECONDS / STREAM_UNIT_ROUNDS
 
 
 class PaymentSplit(ARC4Contract):
     """Smart contract for managing split payments"""
     
+    def __init__(self) -> None:
+        # Next payment or stream ID; known before signing so callers can reference the box
+        self.payment_count = UInt64(0)
+    
     @arc4.abimethod()
     def create_payment(
         self,
@@ -18,89 +105,180 @@ class PaymentSplit(ARC4Contract):
         participants: UInt64,
         title: String,
         description: String,
+        mbr_payment: gtxn.PaymentTransaction,
     ) -> arc4.UInt64:
         """Create a new payment split
         
+        Title and description stay in the transaction arguments (and the
+        payments table); only fixed-size fields are kept on-chain. Large
+        splits take contributions by slot (contribute_slot), which stores
+        them in shared pages instead of one box per contributor.
+        
         Args:
             receiver: Account that will receive all payments
             total_amount: Total amount in microAlgos
             participants: Number of participants expected
             title: Payment title
             description: Payment description
-            
+            mbr_payment: Payment of PAYMENT_BOX_MIN_BALANCE to this contract for
+                the record box, refunded by close_payment
+        
         Returns:
-            Payment ID (transaction ID)
+            Payment ID (sequential, read from payment_count)
         """
         # Validate inputs
         assert total_amount > 0, "Total amount must be greater than 0"
         assert participants > 0, "Must have at least 1 participant"
-        assert participants <= 100, "Maximum 100 participants"
-        
-        # Use transaction ID as payment ID
-        payment_id_bytes = Txn.id
-        
-        # Store payment details in app local state
-        # Note: Using box storage for better scalability
-        payment_key = String("payment_") + String.from_bytes(payment_id_bytes)
-        
-        # Store payment data as JSON-like structure in box
-        payment_data = {
-            "receiver": receiver.bytes,
-            "total_amount": total_amount,
-            "participants": participants,
-            "collected": UInt64(0),
-            "contributor_count": UInt64(0),
-            "status": String("active"),
-            "title": title,
-            "description": description,
-            "creator": Txn.sender.bytes,
-        }
-        
-        # For simplicity, we'll use a combination of global state and local state
-        # Store key payment info in global state indexed by payment ID hash
-        App.global.put(payment_key, String("active"))
-        
-        return arc4.UInt64.from_bytes(payment_id_bytes[:8])
+        assert participants <= MAX_PARTICIPANTS, "Maximum 65536 participants"
+        self._charge_min_balance(mbr_payment, UInt64(PAYMENT_BOX_MIN_BALANCE))
+        
+        payment_id = self.payment_count
+        box_name = self._payment_box_name(payment_id)
+        
+        _length, box_exists = op.Box.length(box_name)
+        assert not box_exists, "Payment already exists"
+        
+        record = PaymentRecord(
+            creator=arc4.Address(Txn.sender),
+            receiver=arc4.Address(receiver),
+            total_amount=arc4.UInt64(total_amount),
+            participants=arc4.UInt64(participants),
+            collected=arc4.UInt64(0),
+            contributor_count=arc4.UInt64(0),
+            status=arc4.UInt8(PAYMENT_ACTIVE),
+        )
+        op.Box.put(box_name, record.bytes)
+        self.payment_count = payment_id + 1
+        
+        return arc4.UInt64(payment_id)
     
     @arc4.abimethod()
     def contribute(
         self,
         payment_id: arc4.UInt64,
-        amount: UInt64,
+        payment: gtxn.PaymentTransaction,
     ) -> arc4.Bool:
         """Contribute to a payment split
         
+        Uses a constant number of box operations: one read and one write of
+        the payment record, one existence check and one write of the
+        contributor's membership box.
+        
+        The payment carries the contribution plus CONTRIBUTOR_BOX_MIN_BALANCE
+        for the membership box, refunded by close_contributions. The
+        contribution that completes the split also pays the receiver
+        (caller covers the inner fee), unless the receiver deferred payouts
+        to settle().
+        
         Args:
-            payment_id: ID of the payment to contribute to (first 8 bytes of txid)
-            amount: Amount to contribute in microAlgos
-            
+            payment_id: ID of the payment to contribute to
+            payment: Payment of the contribution and box minimum balance to this contract
+        
         Returns:
             True if contribution successful
         """
-        # Get payment details from state
-        # Note: In production, you'd read from box storage
-        # For now, we'll use a simplified approach
-        
-        # Calculate expected per-person amount from stored data
-        # This would need to be passed or stored differently in production
+        record = self._load_payment(payment_id.native)
+        assert payment.amount > CONTRIBUTOR_BOX_MIN_BALANCE, "Amount must cover the contributor box"
+        amount = payment.amount - CONTRIBUTOR_BOX_MIN_BALANCE
         
         # Check if sender already contributed
-        contributor_key = String("contrib_") + String.from_bytes(Txn.sender.bytes)
-        has_contributed = App.local.get(contributor_key)
-        assert has_contributed is None, "Already contributed"
+        contributor_box = self._contributor_box_name(payment_id.native, Txn.sender)
+        _length, has_contributed = op.Box.length(contributor_box)
+        assert not has_contributed, "Already contributed"
         
         # Mark as contributed
-        App.local.put(contributor_key, amount)
+        op.Box.put(contributor_box, op.itob(amount))
         
-        # In a full implementation, you would:
-        # 1. Read payment details from box storage
-        # 2. Validate amount matches expected
-        # 3. Update collected amount
-        # 4. Check if payment is complete
+        self._record_contribution(payment_id.native, record, payment, amount)
         
         return arc4.Bool(True)
     
     @arc4.abimethod()
+    def contribute_slot(
+        self,
+        payment_id: arc4.UInt64,
+        slot: arc4.UInt64,
+        payment: gtxn.PaymentTransaction,
+    ) -> arc4.Bool:
+        """Contribute the share of one participant slot of a payment split
+        
+        Slots are numbered 0 to participants - 1 (the order of the invite
+        list) and each is paid once. The paid bit goes into the slot's
+        bitmap page and the amount into its amount page, so storage grows
+        by one 1KB page per 8192 / 128 slots instead of one box per
+        contributor. The creator opens the pages beforehand with
+        open_slot_pages. The call must reference the payment record, both
+        pages and the receiver's deferral box.
+        
+        Args:
+            payment_id: ID of the payment to contribute to
+            slot: Participant slot being paid for
+            payment: Payment of the contribution to this contract
+        
+        Returns:
+            True if contribution successful
+        """
+        record = self._load_payment(payment_id.native)
+        assert slot.native < record.participants.native, "Slot out of range"
+        
+        bitmap_page = self._bitmap_page_name(payment_id.native, slot.native // BITMAP_PAGE_SLOTS)
+        amount_page = self._amount_page_name(payment_id.native, slot.native // AMOUNT_PAGE_SLOTS)
+        _length, page_exists = op.Box.length(amount_page)
+        assert page_exists, "Slot page not opened"
+        
+        bit = slot.native % BITMAP_PAGE_SLOTS
+        byte_offset = bit // 8
+        mask = UInt64(1) << (bit % 8)
+        bits = op.btoi(op.Box.extract(bitmap_page, byte_offset, 1))
+        assert bits & mask == 0, "Slot already paid"
+        op.Box.replace(bitmap_page, byte_offset, op.extract(op.itob(bits | mask), 7, 1))
+        
+        op.Box.replace(amount_page, (slot.native % AMOUNT_PAGE_SLOTS) * 8, op.itob(payment.amount))
+        
+        self._record_contribution(payment_id.native, record, payment, payment.amount)
+        
+        return arc4.Bool(True)
+    
+    @arc4.abimethod()
+    def open_slot_pages(
+        self,
+        payment_id: arc4.UInt64,
+        pages: arc4.DynamicArray[arc4.UInt64],
+        payment: gtxn.PaymentTransaction,
+    ) -> arc4.UInt64:
+        """Create the amount pages (and their bitmap pages) that contribute_slot writes to
+        
+        Only the creator can open pages, and pays CONTRIBUTOR_PAGE_MIN_BALANCE
+        for every box created; close_contributions refunds it. Opening amount
+        page k also opens bitmap page k // 64 if it does not exist yet.
+        Pages that already exist are skipped.
+        
+        Args:
+            payment_id: ID of the payment
+            pages: Amount page numbers (slot // 128)
+            payment: Payment of the created boxes' minimum balance to this contract
+        
+        Returns:
+            Number of boxes created
+        """
+        record = self._load_payment(payment_id.native)
+        assert Txn.sender == record.creator.native, "Only creator can open pages"
+        assert record.status.native == PAYMENT_ACTIVE, "Payment already completed"
+        
+        last_page = (record.participants.native - 1) // AMOUNT_PAGE_SLOTS
+        created = UInt64(0)
+        for page in pages:
+            assert page.native <= last_page, "Page out of range"
+            created += self._open_page(self._amount_page_name(payment_id.native, page.native))
+            created += self._open_page(
+                self._bitmap_page_name(payment_id.native, page.native // AMOUNT_PAGES_PER_BITMAP_PAGE)
+            )
+        
+        self._charge_min_balance(payment, created * CONTRIBUTOR_PAGE_MIN_BALANCE)
+        
+        return arc4.UInt64(created)
+    
+    @arc4.abimethod(readonly=True)
     def get_payment_info(
         self,
         payment_id: arc4.UInt64,
@@ -109,22 +287,59 @@ class PaymentSplit(ARC4Contract):
         
         Args:
             payment_id: ID of the payment
-            
+        
         Returns:
             Tuple of (receiver, total_amount, participants, collected, contributor_count, status)
         """
-        # Placeholder - would read from box storage in production
-        # For now, return default values
-        return arc4.Tuple(
-            Txn.sender,  # receiver placeholder
-            UInt64(0),   # total_amount placeholder
-            UInt64(0),   # participants placeholder
-            UInt64(0),   # collected placeholder
-            UInt64(0),   # contributor_count placeholder
-            String("active"),  # status placeholder
-        )
+        record = self._load_payment(payment_id.native)
+        
+        status = String("active")
+        if record.status.native != PAYMENT_ACTIVE:
+            status = String("completed")
+        
+        return arc4.Tuple((
+            record.receiver.native,
+            record.total_amount.native,
+            record.participants.native,
+            record.collected.native,
+            record.contributor_count.native,
+            status,
+        ))
     
-    @arc4.abimethod()
+    @arc4.abimethod(readonly=True)
+    def get_contributions(
+        self,
+        payment_id: arc4.UInt64,
+        first_slot: arc4.UInt64,
+        count: arc4.UInt64,
+    ) -> arc4.DynamicArray[arc4.UInt64]:
+        """Read the amounts paid for a range of slots (0 for unpaid slots)
+        
+        The range must lie in one amount page and hold at most
+        MAX_SLOTS_PER_READ slots; a page nobody has paid into reads as zeros.
+        
+        Args:
+            payment_id: ID of the payment
+            first_slot: First slot to read
+            count: Number of slots
+        
+        Returns:
+            Amount paid for each slot of the range
+        """
+        first = first_slot.native
+        size = count.native
+        assert size <= MAX_SLOTS_PER_READ, "Too many slots"
+        assert first % AMOUNT_PAGE_SLOTS + size <= AMOUNT_PAGE_SLOTS, "Range crosses an amount page"
+        
+        amount_page = self._amount_page_name(payment_id.native, first // AMOUNT_PAGE_SLOTS)
+        _length, page_exists = op.Box.length(amount_page)
+        amounts = op.bzero(size * 8)
+        if page_exists:
+            amounts = op.Box.extract(amount_page, (first % AMOUNT_PAGE_SLOTS) * 8, size * 8)
+        
+        return arc4.DynamicArray[arc4.UInt64].from_bytes(op.extract(op.itob(size), 6, 2) + amounts)
+    
+    @arc4.abimethod(readonly=True)
     def has_contributed(
         self,
         payment_id: arc4.UInt64,
@@ -135,11 +350,552 @@ class PaymentSplit(ARC4Contract):
         Args:
             payment_id: ID of the payment
             contributor: Account to check
-            
+        
         Returns:
             True if account has contributed
         """
-        contributor_key = String("contrib_") + String.from_bytes(contributor.bytes)
-        has_contributed = App.local.get(contributor_key)
+        _length, has_contributed = op.Box.length(
+            self._contributor_box_name(payment_id.native, contributor)
+        )
+        
+        return arc4.Bool(has_contributed)
+    
+    @arc4.abimethod()
+    def set_deferred_payout(
+        self,
+        enabled: arc4.Bool,
+        payment: gtxn.PaymentTransaction,
+    ) -> arc4.Bool:
+        """Choose whether completed payments to the caller wait for settle()
+        
+        High-volume receivers can defer payouts and sweep many completed
+        payments in one settle() call instead of one payment each.
+        Enabling creates the caller's deferral box, paid for by
+        DEFERRAL_BOX_MIN_BALANCE; disabling deletes it and refunds that
+        amount (the caller covers the inner fee).
+        
+        Args:
+            enabled: True to defer payouts, False to be paid on completion
+            payment: Payment of the box's minimum balance to this contract when
+                the box is created, otherwise of 0
+            
+        Returns:
+            True if the preference was stored
+        """
+        box_name = self._deferral_box_name(Txn.sender)
+        _length, deferred = op.Box.length(box_name)
+        
+        created = UInt64(0)
+        if enabled.native and not deferred:
+            op.Box.create(box_name, UInt64(1))
+            created = UInt64(1)
+        elif not enabled.native and deferred:
+            op.Box.delete(box_name)
+            itxn.Payment(
+                receiver=Txn.sender,
+                amount=UInt64(DEFERRAL_BOX_MIN_BALANCE),
+                fee=UInt64(0),  # Caller pays fee
+            ).submit()
+        
+        self._charge_min_balance(payment, created * DEFERRAL_BOX_MIN_BALANCE)
+        
+        return arc4.Bool(True)
+    
+    @arc4.abimethod()
+    def settle(
+        self,
+        payment_ids: arc4.DynamicArray[arc4.UInt64],
+    ) -> arc4.UInt64:
+        """Pay out several completed payments in one call
+        
+        Anyone can call this. Payments that are not awaiting payout,
+        including unknown or closed IDs, are skipped. Consecutive payments to the same receiver are merged into
+        one inner payment, and inner payments are submitted in groups of up
+        to 16. The caller covers inner fees through fee pooling.
+        
+        Args:
+            payment_ids: IDs of payments to settle
+            
+        Returns:
+            Total amount paid out
+        """
+        total_paid = UInt64(0)
+        inner_count = UInt64(0)
+        pending_receiver = Global.zero_address
+        pending_amount = UInt64(0)
+        
+        for payment_id in payment_ids:
+            data, box_exists = op.Box.get(self._payment_box_name(payment_id.native))
+            if not box_exists:
+                continue
+            record = PaymentRecord.from_bytes(data)
+            if record.status.native == PAYMENT_COMPLETED:
+                record.status = arc4.UInt8(PAYMENT_PAID_OUT)
+                op.Box.put(self._payment_box_name(payment_id.native), record.bytes)
+                
+                receiver = record.receiver.native
+                if receiver != pending_receiver and pending_amount > 0:
+                    inner_count = self._add_payout(pending_receiver, pending_amount, inner_count)
+                    pending_amount = UInt64(0)
+                
+                pending_receiver = receiver
+                pending_amount += record.collected.native
+                total_paid += record.collected.native
+        
+        if pending_amount > 0:
+            inner_count = self._add_payout(pending_receiver, pending_amount, inner_count)
+        
+        if inner_count > 0:
+            op.ITxnCreate.submit()
+        
+        return arc4.UInt64(total_paid)
+    
+    @arc4.abimethod()
+    def close_contributions(
+        self,
+        payment_id: arc4.UInt64,
+        contributors: arc4.DynamicArray[arc4.Address],
+        pages: arc4.DynamicArray[arc4.UInt64],
+    ) -> arc4.UInt64:
+        """Delete the contributor boxes and slot pages of a paid-out payment
+        
+        Anyone can call this. Each contributor box's minimum balance goes
+        back to its contributor and each page's to the creator; closing
+        amount page 64 * j also closes bitmap page j. Missing boxes are
+        skipped, so large splits close over several calls. The caller
+        covers inner fees through fee pooling.
+        
+        Args:
+            payment_id: ID of the paid-out payment
+            contributors: Contributors whose ctb_ boxes to delete
+            pages: Amount page numbers to delete
+        
+        Returns:
+            Number of boxes deleted
+        """
+        record = self._load_payment(payment_id.native)
+        assert record.status.native == PAYMENT_PAID_OUT, "Payment not paid out"
+        
+        deleted = UInt64(0)
+        inner_count = UInt64(0)
+        for contributor in contributors:
+            if op.Box.delete(self._contributor_box_name(payment_id.native, contributor.native)):
+                inner_count = self._add_payout(
+                    contributor.native, UInt64(CONTRIBUTOR_BOX_MIN_BALANCE), inner_count
+                )
+                deleted += UInt64(1)
+        
+        pages_deleted = UInt64(0)
+        for page in pages:
+            if op.Box.delete(self._amount_page_name(payment_id.native, page.native)):
+                pages_deleted += UInt64(1)
+            if page.native % AMOUNT_PAGES_PER_BITMAP_PAGE == 0:
+                if op.Box.delete(
+                    self._bitmap_page_name(payment_id.native, page.native // AMOUNT_PAGES_PER_BITMAP_PAGE)
+                ):
+                    pages_deleted += UInt64(1)
+        
+        if pages_deleted > 0:
+            inner_count = self._add_payout(
+                record.creator.native, pages_deleted * CONTRIBUTOR_PAGE_MIN_BALANCE, inner_count
+            )
+        if inner_count > 0:
+            op.ITxnCreate.submit()
+        
+        return arc4.UInt64(deleted + pages_deleted)
+    
+    @arc4.abimethod()
+    def close_payment(
+        self,
+        payment_id: arc4.UInt64,
+    ) -> arc4.UInt64:
+        """Delete the record of a paid-out payment and refund its minimum balance
+        
+        Only the creator can close. Close the contributor boxes and pages
+        first: close_contributions needs the record.
+        
+        Args:
+            payment_id: ID of the paid-out payment
+        
+        Returns:
+            Amount refunded to the creator
+        """
+        record = self._load_payment(payment_id.native)
+        creator = record.creator.native
+        assert Txn.sender == creator, "Only creator can close"
+        assert record.status.native == PAYMENT_PAID_OUT, "Payment not paid out"
+        
+        op.Box.delete(self._payment_box_name(payment_id.native))
+        itxn.Payment(
+            receiver=creator,
+            amount=UInt64(PAYMENT_BOX_MIN_BALANCE),
+            fee=UInt64(0),  # Caller pays fee
+        ).submit()
+        
+        return arc4.UInt64(PAYMENT_BOX_MIN_BALANCE)
+    
+    @arc4.abimethod()
+    def create_stream(
+        self,
+        receiver: Account,
+        rate: UInt64,
+        start: UInt64,
+        stop: UInt64,
+        unit: UInt64,
+        payment: gtxn.PaymentTransaction,
+        mbr_payment: gtxn.PaymentTransaction,
+    ) -> arc4.UInt64:
+        """Create a payment that unlocks `rate` microAlgos per second or round
+        
+        Nothing happens per period: the vested amount is computed from the
+        elapsed time whenever the stream is read or withdrawn from, so a
+        stream is one box however long it runs. A recurring split (rent,
+        subscriptions) is one stream that every payer tops up with
+        fund_stream. Several receivers take one stream each.
+        
+        Args:
+            receiver: Account the stream pays
+            rate: Amount unlocked per unit of time
+            start: First second/round of the stream (0 for now)
+            stop: Last second/round (0 to run until the deposits are used up)
+            unit: STREAM_UNIT_SECONDS or STREAM_UNIT_ROUNDS
+            payment: First deposit, paid to this contract
+            mbr_payment: Payment of STREAM_BOX_MIN_BALANCE to this contract for
+                the stream box, refunded by cancel_stream
+        
+        Returns:
+            Stream ID (from the payment_count sequence)
+        """
+        assert rate > 0, "Rate must be greater than 0"
+        assert unit <= STREAM_UNIT_ROUNDS, "Unknown stream unit"
+        self._charge_min_balance(mbr_payment, UInt64(STREAM_BOX_MIN_BALANCE))
+        
+        if start == 0:
+            start = self._stream_clock(unit)
+        assert stop == 0 or stop > start, "Stream must stop after it starts"
+        
+        stream_id = self.payment_count
+        box_name = self._stream_box_name(stream_id)
+        
+        _length, box_exists = op.Box.length(box_name)
+        assert not box_exists, "Stream already exists"
+        
+        record = StreamRecord(
+            creator=arc4.Address(Txn.sender),
+            receiver=arc4.Address(receiver),
+            rate=arc4.UInt64(rate),
+            start=arc4.UInt64(start),
+            stop=arc4.UInt64(stop),
+            deposited=arc4.UInt64(0),
+            withdrawn=arc4.UInt64(0),
+            unit=arc4.UInt8(unit),
+        )
+        self._deposit(record, payment)
+        op.Box.put(box_name, record.bytes)
+        self.payment_count = stream_id + 1
+        
+        return arc4.UInt64(stream_id)
+    
+    @arc4.abimethod()
+    def fund_stream(
+        self,
+        stream_id: arc4.UInt64,
+        payment: gtxn.PaymentTransaction,
+    ) -> arc4.UInt64:
+        """Top up a stream; anyone can pay in, e.g. each roommate their share
+        
+        A top-up of a stream whose deposits have all vested restarts it:
+        the start moves forward so the new deposit unlocks at `rate` from
+        now, instead of the whole idle period vesting at once.
+        
+        Args:
+            stream_id: ID of the stream
+            payment: Deposit, paid to this contract
+        
+        Returns:
+            Total deposited so far
+        """
+        record = self._load_stream(stream_id.native)
+        stop = record.stop.native
+        if stop > 0:
+            assert self._stream_clock(record.unit.native) < stop, "Stream has ended"
+        
+        deposited = record.deposited.native
+        if self._vested(record) == deposited:
+            # Anchor the start so exactly the old deposits (rounded up to a whole unit) have vested by now
+            elapsed = deposited // record.rate.native
+            if deposited % record.rate.native > 0:
+                elapsed += 1
+            record.start = arc4.UInt64(self._stream_clock(record.unit.native) - elapsed)
+        
+        self._deposit(record, payment)
+        op.Box.put(self._stream_box_name(stream_id.native), record.bytes)
+        
+        return record.deposited
+    
+    @arc4.abimethod()
+    def withdraw_stream(
+        self,
+        stream_id: arc4.UInt64,
+    ) -> arc4.UInt64:
+        """Pay the receiver everything vested and not yet withdrawn
+        
+        Anyone can call this (the caller covers the inner fee); the funds
+        always go to the stream's receiver.
+        
+        Args:
+            stream_id: ID of the stream
+        
+        Returns:
+            Amount paid out (0 if nothing has vested since the last withdrawal)
+        """
+        record = self._load_stream(stream_id.native)
+        amount = self._vested(record) - record.withdrawn.native
+        
+        if amount > 0:
+            record.withdrawn = arc4.UInt64(record.withdrawn.native + amount)
+            op.Box.put(self._stream_box_name(stream_id.native), record.bytes)
+            itxn.Payment(
+                receiver=record.receiver.native,
+                amount=amount,
+                fee=UInt64(0),  # Caller pays fee
+            ).submit()
+        
+        return arc4.UInt64(amount)
+    
+    @arc4.abimethod()
+    def cancel_stream(
+        self,
+        stream_id: arc4.UInt64,
+    ) -> arc4.UInt64:
+        """Stop a stream: pay out what has vested, refund the rest and delete the box
+        
+        Only the creator can cancel; unvested deposits of every payer and
+        the box's minimum balance are refunded to the creator. The caller
+        covers both inner fees.
+        
+        Args:
+            stream_id: ID of the stream
+        
+        Returns:
+            Amount refunded to the creator
+        """
+        record = self._load_stream(stream_id.native)
+        creator = record.creator.native
+        assert Txn.sender == creator, "Only creator can cancel"
+        
+        vested = self._vested(record)
+        owed = vested - record.withdrawn.native
+        refund = record.deposited.native - vested + STREAM_BOX_MIN_BALANCE
+        
+        inner_count = UInt64(0)
+        if owed > 0:
+            inner_count = self._add_payout(record.receiver.native, owed, inner_count)
+        inner_count = self._add_payout(creator, refund, inner_count)
+        op.ITxnCreate.submit()
+        
+        op.Box.delete(self._stream_box_name(stream_id.native))
+        
+        return arc4.UInt64(refund)
+    
+    @arc4.abimethod(readonly=True)
+    def get_stream_info(
+        self,
+        stream_id: arc4.UInt64,
+    ) -> arc4.Tuple[Account, UInt64, UInt64, UInt64, UInt64, UInt64]:
+        """Get stream balances as of the current block
+        
+        Args:
+            stream_id: ID of the stream
+        
+        Returns:
+            Tuple of (receiver, rate, deposited, withdrawn, withdrawable, funded_until),
+            where funded_until is the second/round the deposits last until
+        """
+        record = self._load_stream(stream_id.native)
+        
+        start = record.start.native
+        stop = record.stop.native
+        funded_until = start + record.deposited.native // record.rate.native
+        if stop > 0 and funded_until > stop:
+            funded_until = stop
+        
+        return arc4.Tuple((
+            record.receiver.native,
+            record.rate.native,
+            record.deposited.native,
+            record.withdrawn.native,
+            self._vested(record) - record.withdrawn.native,
+            funded_until,
+        ))
+    
+    @arc4.baremethod()
+    def reserve_box_refs(self) -> None:
+        """Bare no-op call used only to carry extra box references for a group"""
+    
+    @arc4.baremethod(allow_actions=["UpdateApplication"])
+    def update(self) -> None:
+        """Creator-only in-place program update (deploy_cli.py upgrade)"""
+        assert Txn.sender == Global.creator_address, "Only creator can update"
+    
+    @subroutine
+    def _add_payout(self, receiver: Account, amount: UInt64, inner_count: UInt64) -> UInt64:
+        """Append a payout to the open inner group, submitting full groups"""
+        if inner_count == 0:
+            op.ITxnCreate.begin()
+        elif inner_count % MAX_INNER_GROUP_SIZE == 0:
+            op.ITxnCreate.submit()
+            op.ITxnCreate.begin()
+        else:
+            op.ITxnCreate.next()
         
-        return arc4.Bool(has_contributed is not None)
+        op.ITxnCreate.set_type_enum(TransactionType.Payment)
+        op.ITxnCreate.set_receiver(receiver)
+        op.ITxnCreate.set_amount(amount)
+        op.ITxnCreate.set_fee(UInt64(0))  # Caller pays fee
+        
+        return inner_count + 1
+    
+    @subroutine
+    def _load_payment(self, payment_id: UInt64) -> PaymentRecord:
+        """Read and decode the whole payment record (one box read)"""
+        data, box_exists = op.Box.get(self._payment_box_name(payment_id))
+        assert box_exists, "Payment not found"
+        
+        return PaymentRecord.from_bytes(data)
+    
+    @subroutine
+    def _charge_min_balance(self, payment: gtxn.PaymentTransaction, amount: UInt64) -> None:
+        """Assert a payment covers exactly the minimum balance of the boxes a call creates"""
+        assert payment.receiver == Global.current_application_address, "Payment must be to contract"
+        assert payment.amount == amount, "Payment must equal the box minimum balance"
+    
+    @subroutine
+    def _open_page(self, box_name: Bytes) -> UInt64:
+        """Create a zeroed contributor page unless it exists; 1 if created"""
+        _length, page_exists = op.Box.length(box_name)
+        if page_exists:
+            return UInt64(0)
+        op.Box.create(box_name, UInt64(CONTRIBUTOR_PAGE_SIZE))
+        return UInt64(1)
+    
+    @subroutine
+    def _record_contribution(
+        self,
+        payment_id: UInt64,
+        record: PaymentRecord,
+        payment: gtxn.PaymentTransaction,
+        amount: UInt64,
+    ) -> None:
+        """Add a contribution to the record, paying out the split once it is complete
+        
+        The last participant must bring the total to total_amount, so a
+        split can never fill up with participants and still be short.
+        """
+        assert record.status.native == PAYMENT_ACTIVE, "Payment already completed"
+        
+        assert payment.sender == Txn.sender, "Contribution must come from the caller"
+        assert payment.receiver == Global.current_application_address, "Payment must be to contract"
+        
+        collected = record.collected.native + amount
+        contributor_count = record.contributor_count.native + 1
+        assert amount > 0, "Amount must be greater than 0"
+        assert collected <= record.total_amount.native, "Contribution exceeds remaining amount"
+        assert contributor_count <= record.participants.native, "All participants have contributed"
+        if contributor_count == record.participants.native:
+            assert collected == record.total_amount.native, "Last participant must pay the remaining amount"
+        
+        record.collected = arc4.UInt64(collected)
+        record.contributor_count = arc4.UInt64(contributor_count)
+        if collected == record.total_amount.native:
+            receiver = record.receiver.native
+            _length, deferred = op.Box.length(self._deferral_box_name(receiver))
+            if deferred:
+                record.status = arc4.UInt8(PAYMENT_COMPLETED)
+            else:
+                record.status = arc4.UInt8(PAYMENT_PAID_OUT)
+                itxn.Payment(
+                    receiver=receiver,
+                    amount=collected,
+                    fee=UInt64(0),  # Caller pays fee
+                ).submit()
+        op.Box.put(self._payment_box_name(payment_id), record.bytes)
+    
+    @subroutine
+    def _stream_clock(self, unit: UInt64) -> UInt64:
+        """Current time on a stream's clock"""
+        if unit == STREAM_UNIT_ROUNDS:
+            return Global.round
+        return Global.latest_timestamp
+    
+    @subroutine
+    def _vested(self, record: StreamRecord) -> UInt64:
+        """Amount unlocked so far: rate * elapsed, capped by the deposits
+        
+        Computed with a 128-bit product, so long streams cannot overflow.
+        """
+        now = self._stream_clock(record.unit.native)
+        stop = record.stop.native
+        if stop > 0 and now > stop:
+            now = stop
+        
+        start = record.start.native
+        if now <= start:
+            return UInt64(0)
+        
+        deposited = record.deposited.native
+        high, low = op.mulw(record.rate.native, now - start)
+        if high > 0 or low > deposited:
+            return deposited
+        return low
+    
+    @subroutine
+    def _deposit(self, record: StreamRecord, payment: gtxn.PaymentTransaction) -> None:
+        """Add a deposit to a stream; a stream with a stop takes at most rate * duration"""
+        assert payment.receiver == Global.current_application_address, "Payment must be to contract"
+        assert payment.amount > 0, "Amount must be greater than 0"
+        
+        deposited = record.deposited.native + payment.amount
+        stop = record.stop.native
+        if stop > 0:
+            high, low = op.mulw(record.rate.native, stop - record.start.native)
+            assert high > 0 or deposited <= low, "Deposit exceeds stream total"
+        record.deposited = arc4.UInt64(deposited)
+    
+    @subroutine
+    def _load_stream(self, stream_id: UInt64) -> StreamRecord:
+        """Read and decode a stream record (one box read)"""
+        data, box_exists = op.Box.get(self._stream_box_name(stream_id))
+        assert box_exists, "Stream not found"
+        
+        return StreamRecord.from_bytes(data)
+    
+    @subroutine
+    def _payment_box_name(self, payment_id: UInt64) -> Bytes:
+        """Box name: "pay_" + payment_id (8 bytes)"""
+        return Bytes(b"pay_") + op.itob(payment_id)
+    
+    @subroutine
+    def _contributor_box_name(self, payment_id: UInt64, contributor: Account) -> Bytes:
+        """Box name: "ctb_" + payment_id (8 bytes) + contributor address (32 bytes)"""
+        return Bytes(b"ctb_") + op.itob(payment_id) + contributor.bytes
+    
+    @subroutine
+    def _bitmap_page_name(self, payment_id: UInt64, page: UInt64) -> Bytes:
+        """Box name: "cbm_" + payment_id (8 bytes) + page (8 bytes)"""
+        return Bytes(b"cbm_") + op.itob(payment_id) + op.itob(page)
+    
+    @subroutine
+    def _amount_page_name(self, payment_id: UInt64, page: UInt64) -> Bytes:
+        """Box name: "cam_" + payment_id (8 bytes) + page (8 bytes)"""
+        return Bytes(b"cam_") + op.itob(payment_id) + op.itob(page)
+    
+    @subroutine
+    def _deferral_box_name(self, receiver: Account) -> Bytes:
+        """Box name: "dfr_" + receiver address (32 bytes)"""
+        return Bytes(b"dfr_") + receiver.bytes
+    
+    @subroutine
+    def _stream_box_name(self, stream_id: UInt64) -> Bytes:
+        """Box name: "str_" + stream_id (8 bytes)"""
+        return Bytes(b"str_") + op.itob(stream_id)
\ No newline at end of file
@@ -0,0 +1,482 @@
+"""
+Streaming payout ingestion for the escrow claim link app
+Turns a CSV or JSONL file of recipients into claim links without loading
+it into memory. Rows flow through a pipeline of stages, each running in
+its own thread and connected by bounded queues:
+
+    parse -> validate -> plan groups -> sign -> submit -> confirm
+
+so reading, index box lookups, signing, submission and confirmation all
+overlap while memory stays bounded by the queue sizes. Groups are packed
+with the batch planner of batch_claim_links.py. Each stage's work is timed
+as a telemetry span (payout.lookup, payout.sign, payout.submit,
+payout.confirm), so its metrics show which stage a slow run waits on.
+
+Every group, confirmation, rejected row and failure is appended to a
+progress journal (JSONL). Rerunning with the same journal skips the rows
+already paid out and settles groups whose outcome was not recorded before
+the previous run stopped. Link IDs are predicted from claim_count, so the
+pipeline assumes it is the only creator on the app: it stops at the first
+rejected group and a rerun picks up from there.
+
+Input rows: receiver (empty for anyone), amount, expiry_time (optional)
+
+Usage:
+    python payout_stream.py <recipients.csv|.jsonl> [--journal PATH] [--queue N]
+    (reads ALGOD_URL, ALGOD_TOKEN, CLAIM_APP_ID, DEPLOYER_MNEMONIC, CLAIM_ASSET_ID)
+"""
+import argparse
+import bisect
+import csv
+import json
+import os
+import queue
+import sys
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from algosdk import encoding
+
+from batch_claim_links import ZERO_ADDRESS, ClaimEntry, PlannedGroup, iter_groups
+from box_codec import sender_index_name
+from telemetry import span
+
+DEFAULT_QUEUE_SIZE = 64
+
+# Rows whose index boxes are looked up together
+LOOKUP_CHUNK = 256
+
+# Index box sizes remembered between lookups
+MAX_CACHED_SIZES = 65536
+
+# Validity window of each group; a rerun waits at most this long to learn
+# whether a group left unconfirmed by the previous run made it in
+VALIDITY_ROUNDS = 20
+
+_DONE = object()
+
+
+class _StageError:
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+def _threaded(items: Iterable, maxsize: int, stop: threading.Event) -> Iterator:
+    """Iterate `items` in a background thread through a bounded queue
+
+    The producer blocks when the queue is full, which is what keeps the
+    whole pipeline's memory bounded. Exceptions are re-raised on the
+    consumer side; `stop` makes the producer give up once the consumer is
+    gone.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize)
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_StageError(e))
+        else:
+            put(_DONE)
+
+    threading.Thread(target=produce, daemon=True).start()
+    while True:
+        try:
+            item = buffer.get(timeout=0.1)
+        except queue.Empty:
+            if stop.is_set():
+                return
+            continue
+        if item is _DONE:
+            return
+        if isinstance(item, _StageError):
+            raise item.error
+        yield item
+
+
+class SizeCache(OrderedDict):
+    """Index box sizes for the planner, keeping only the most recent names"""
+
+    def __init__(self, capacity: int = MAX_CACHED_SIZES) -> None:
+        super().__init__()
+        self.capacity = capacity
+
+    def __setitem__(self, name: bytes, size: int) -> None:
+        super().__setitem__(name, size)
+        self.move_to_end(name)
+        if len(self) > self.capacity:
+            self.popitem(last=False)
+
+
+class ProgressJournal:
+    """Append-only JSONL record of a payout run
+
+    Records:
+        {"invalid": row, "reason": ...}                 row rejected by validation
+        {"group": n, "rows": [first, last], "first_id": id, "claims": k,
+         "txid": ..., "last_valid": round}              group submitted
+        {"group": n, "confirmed_round": round}          group confirmed
+        {"group": n, "error": ...}                      group did not land
+
+    A row is done once it is invalid or inside the row range of a confirmed
+    group; ranges of later groups may span rows done by earlier runs.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.next_group = 0
+        self._starts: List[int] = []  # sorted, disjoint done row ranges
+        self._ends: List[int] = []
+        self._invalid = set()
+        self.unresolved = {}  # group -> submit record without an outcome
+
+        if os.path.exists(path):
+            self._replay()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _replay(self) -> None:
+        submitted = {}
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if "invalid" in record:
+                    self._invalid.add(record["invalid"])
+                    continue
+                group = record["group"]
+                self.next_group = max(self.next_group, group + 1)
+                if "txid" in record:
+                    submitted[group] = record
+                elif "confirmed_round" in record:
+                    self._mark_done(*submitted.pop(group)["rows"])
+                else:
+                    submitted.pop(group, None)
+        self.unresolved = submitted
+
+    def _mark_done(self, first: int, last: int) -> None:
+        i = bisect.bisect_left(self._starts, first)
+        self._starts.insert(i, first)
+        self._ends.insert(i, last)
+
+    def is_done(self, row: int) -> bool:
+        if row in self._invalid:
+            return True
+        i = bisect.bisect_right(self._starts, row) - 1
+        return i >= 0 and row <= self._ends[i]
+
+    def append(self, record: dict) -> None:
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def invalid(self, row: int, reason: str) -> None:
+        self._invalid.add(row)
+        self.append({"invalid": row, "reason": reason})
+
+    def confirmed(self, group: int, rows: Sequence[int], confirmed_round: int) -> None:
+        self._mark_done(*rows)
+        self.unresolved.pop(group, None)
+        self.append({"group": group, "confirmed_round": confirmed_round})
+
+    def close(self) -> None:
+        self._file.close()
+
+
+@dataclass
+class SignedGroup:
+    """A planned group signed for submission"""
+    number: int
+    rows: Tuple[int, int]
+    first_id: int
+    claims: int
+    signed: list
+    last_valid: int
+    group: PlannedGroup
+
+
+def read_rows(path: str) -> Iterator[Tuple[int, dict]]:
+    """(row number, raw fields) for every data row of a CSV or JSONL file"""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        yield from enumerate(rows)
+
+
+def parse_entry(fields: dict) -> ClaimEntry:
+    """ClaimEntry from raw fields
+
+    Raises:
+        ValueError: If the receiver, amount or expiry is malformed
+    """
+    receiver = str(fields.get("receiver") or "").strip() or ZERO_ADDRESS
+    if not encoding.is_valid_address(receiver):
+        raise ValueError(f"invalid receiver {receiver!r}")
+    amount = int(fields["amount"])
+    if amount <= 0:
+        raise ValueError("amount must be greater than 0")
+    expiry_time = int(fields.get("expiry_time") or 0)
+    if expiry_time < 0:
+        raise ValueError("expiry_time must not be negative")
+    return ClaimEntry(receiver, amount, expiry_time)
+
+
+def validate(rows: Iterable[Tuple[int, dict]], journal: ProgressJournal) -> Iterator[Tuple[int, ClaimEntry]]:
+    """Skip rows already done and journal the ones that do not parse"""
+    for row, fields in rows:
+        if journal.is_done(row):
+            continue
+        try:
+            yield row, parse_entry(fields)
+        except (KeyError, TypeError, ValueError) as e:
+            journal.invalid(row, str(e) if not isinstance(e, KeyError) else f"missing {e}")
+
+
+def plan(
+    entries: Iterable[Tuple[int, ClaimEntry]],
+    sender: str,
+    lookup: Callable[[List[bytes]], dict],
+    sizes: Optional[SizeCache] = None,
+    asset_id: int = 0,
+    first_id: int = 0,
+) -> Iterator[Tuple[Tuple[int, int], PlannedGroup]]:
+    """Pack entries into groups, looking up the sender index size once
+
+    Receiver index pages have a fixed size, so only the sender index box is
+    looked up; groups are planned from the claim ID the first link will get.
+
+    Yields:
+        ((first row, last row), group)
+    """
+    sender_key = encoding.decode_address(sender)
+    sizes = SizeCache() if sizes is None else sizes
+    rows: deque = deque()
+
+    def chunked() -> Iterator[ClaimEntry]:
+        chunk: List[Tuple[int, ClaimEntry]] = []
+        for item in entries:
+            chunk.append(item)
+            if len(chunk) >= LOOKUP_CHUNK:
+                yield from flush(chunk)
+                chunk = []
+        yield from flush(chunk)
+
+    def flush(chunk: List[Tuple[int, ClaimEntry]]) -> Iterator[ClaimEntry]:
+        missing = [name for name in (sender_index_name(sender_key),) if name not in sizes]
+        if chunk and missing:
+            with span("payout.lookup", boxes=len(missing)):
+                found = lookup(missing)
+            for name, size in found.items():
+                sizes[name] = size
+        for row, entry in chunk:
+            rows.append(row)
+            yield entry
+
+    for group in iter_groups(chunked(), sender, sizes, asset_id, first_id=first_id):
+        group_rows = [rows.popleft() for _ in range(group.claims)]
+        yield (group_rows[0], group_rows[-1]), group
+
+
+def sign(
+    groups: Iterable[Tuple[Tuple[int, int], PlannedGroup]],
+    build: Callable[[PlannedGroup, int], Tuple[list, int]],
+    first_id: int,
+    first_group: int = 0,
+) -> Iterator[SignedGroup]:
+    """Sign groups in order, assigning each the next claim IDs
+
+    `build(group, next_id)` returns the signed transactions and their last
+    valid round.
+    """
+    next_id = first_id
+    for number, (rows, group) in enumerate(groups, start=first_group):
+        with span("payout.sign", group=number):
+            signed, last_valid = build(group, next_id)
+        yield SignedGroup(number, rows, next_id, group.claims, signed, last_valid, group)
+        next_id += group.claims
+
+
+def submit(
+    signed_groups: Iterable[SignedGroup],
+    send: Callable[[list], str],
+    journal: ProgressJournal,
+) -> Iterator[Tuple[SignedGroup, str]]:
+    """Send groups one at a time, in ID order, journaling each before it is sent
+
+    A failed send is left unresolved rather than journaled as an error: it
+    may still have reached the network, which only settle_unresolved can
+    tell once the group's validity window has passed.
+    """
+    for signed in signed_groups:
+        tx_id = signed.signed[0].get_txid()
+        journal.append({
+            "group": signed.number,
+            "rows": list(signed.rows),
+            "first_id": signed.first_id,
+            "claims": signed.claims,
+            "txid": tx_id,
+            "last_valid": signed.last_valid,
+        })
+        with span("payout.submit", group=signed.number):
+            send(signed.signed)
+        yield signed, tx_id
+
+
+def confirm(
+    submitted: Iterable[Tuple[SignedGroup, str]],
+    wait: Callable[[str], dict],
+    journal: ProgressJournal,
+) -> Iterator[SignedGroup]:
+    """Wait for each group in turn; later groups keep flowing meanwhile"""
+    for signed, tx_id in submitted:
+        with span("payout.confirm", group=signed.number):
+            info = wait(tx_id)
+        journal.confirmed(signed.number, signed.rows, info["confirmed-round"])
+        signed.group.record()
+        yield signed
+
+
+def run_pipeline(
+    path: str,
+    journal: ProgressJournal,
+    sender: str,
+    lookup: Callable[[List[bytes]], dict],
+    build: Callable[[PlannedGroup, int], Tuple[list, int]],
+    send: Callable[[list], str],
+    wait: Callable[[str], dict],
+    first_id: int,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    asset_id: int = 0,
+) -> Iterator[SignedGroup]:
+    """Chain the stages, each behind a bounded queue, yielding confirmed groups"""
+    stop = threading.Event()
+    try:
+        stage = _threaded(read_rows(path), queue_size * LOOKUP_CHUNK, stop)
+        stage = _threaded(validate(stage, journal), queue_size * LOOKUP_CHUNK, stop)
+        stage = _threaded(plan(stage, sender, lookup, asset_id=asset_id, first_id=first_id), queue_size, stop)
+        stage = _threaded(sign(stage, build, first_id, journal.next_group), queue_size, stop)
+        stage = _threaded(submit(stage, send, journal), queue_size, stop)
+        yield from confirm(stage, wait, journal)
+    finally:
+        stop.set()
+
+
+def settle_unresolved(algod_client, app_id: int, sender: str, journal: ProgressJournal) -> int:
+    """Settle groups submitted by a previous run whose outcome was not journaled
+
+    Waits until their validity window has passed, so they can no longer
+    land, then checks whether their first claim box exists with our sender.
+
+    Returns:
+        Number of groups found confirmed
+    """
+    from algod_pool import wait_for_confirmations
+    from claim_snapshot import fetch_claim
+
+    if not journal.unresolved:
+        return 0
+
+    last_valid = max(record["last_valid"] for record in journal.unresolved.values())
+    last_round = algod_client.status()["last-round"]
+    while last_round <= last_valid:
+        last_round = algod_client.status_after_block(last_round)["last-round"]
+
+    sender_key = encoding.decode_address(sender)
+    settled = 0
+    for group, record in sorted(journal.unresolved.items()):
+        try:
+            confirmed_round = wait_for_confirmations(algod_client, [record["txid"]], 0)[record["txid"]]["confirmed-round"]
+        except Exception:
+            claim = fetch_claim(algod_client, app_id, record["first_id"])
+            if claim is None or claim.sender != sender_key:
+                journal.append({"group": group, "error": "not confirmed before its last valid round"})
+                continue
+            confirmed_round = last_round
+        journal.confirmed(group, record["rows"], confirmed_round)
+        settled += 1
+    return settled
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a CSV/JSONL of payouts into claim links")
+    parser.add_argument("input")
+    parser.add_argument("--journal", help="Progress journal (default: <input>.journal.jsonl)")
+    parser.add_argument("--queue", type=int, default=DEFAULT_QUEUE_SIZE, help="Groups buffered between stages")
+    args = parser.parse_args()
+
+    from algosdk import account, mnemonic as mn
+    from algosdk.atomic_transaction_composer import AccountTransactionSigner
+
+    from algod_pool import client_from_env, send_group, wait_for_confirmations
+    from batch_claim_links import build_group, needs_opt_in, read_claim_count
+    from claim_index import index_sizes
+
+    private_key = mn.to_private_key(os.environ["DEPLOYER_MNEMONIC"])
+    sender = account.address_from_private_key(private_key)
+    signer = AccountTransactionSigner(private_key)
+    app_id = int(os.environ["CLAIM_APP_ID"])
+    asset_id = int(os.environ.get("CLAIM_ASSET_ID", "0"))
+    algod_client = client_from_env()
+
+    journal = ProgressJournal(args.journal or args.input + ".journal.jsonl")
+    if journal.unresolved:
+        print(f"🔍 Settling {len(journal.unresolved)} group(s) left pending by the previous run...")
+        print(f"   {settle_unresolved(algod_client, app_id, sender, journal)} confirmed")
+
+    opt_in = [needs_opt_in(algod_client, app_id, asset_id)]
+
+    def build(group: PlannedGroup, next_id: int) -> Tuple[list, int]:
+        params = algod_client.suggested_params()
+        params.last = params.first + VALIDITY_ROUNDS
+        atc = build_group(group, app_id, sender, signer, params, next_id, asset_id, opt_in[0])
+        opt_in[0] = False
+        return atc.gather_signatures(), params.last
+
+    links = 0
+    groups = 0
+    try:
+        for signed in run_pipeline(
+            args.input,
+            journal,
+            sender,
+            lambda names: index_sizes(algod_client, app_id, names),
+            build,
+            lambda group: send_group(algod_client, group),
+            lambda tx_id: wait_for_confirmations(algod_client, [tx_id], VALIDITY_ROUNDS + 1)[tx_id],
+            read_claim_count(algod_client, app_id),
+            args.queue,
+            asset_id,
+        ):
+            links += signed.claims
+            groups += 1
+            if groups % 10 == 0:
+                print(f"📦 {links} link(s) in {groups} group(s), up to row {signed.rows[1]}")
+    except Exception as e:
+        print(f"❌ Stopped after {links} link(s): {e}")
+        print(f"   Rerun with the same journal ({journal.path}) to resume")
+        return False
+    finally:
+        journal.close()
+
+    print(f"✅ {links} link(s) created in {groups} group(s)")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
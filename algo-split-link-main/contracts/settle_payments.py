@@ -0,0 +1,154 @@
+"""
+Bulk settlement of completed PaymentSplit payments
+Finds payments whose funds are held for settle() (receivers that deferred
+payouts) and sweeps them with as few settle calls as possible
+
+Usage:
+    python settle_payments.py [receiver_address]
+    (reads ALGOD_URL, ALGOD_TOKEN, PAYMENT_APP_ID, DEPLOYER_MNEMONIC)
+"""
+import base64
+import copy
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from algosdk import encoding
+
+from box_codec import (
+    PAYMENT_COMPLETED,
+    decode_payment_record,
+    payment_box_name,
+    payment_id_from_box_name,
+)
+
+SETTLE_METHOD_SIGNATURE = "settle(uint64[])uint64"
+
+MAX_REFS_PER_TXN = 8
+
+# Payments per settle call: one settle call plus seven bare calls carry
+# 64 box references, well inside the pooled opcode budget of the group
+SETTLE_BATCH_SIZE = 64
+
+DEFAULT_WORKERS = 32
+
+
+def list_completed_payments(
+    algod_client,
+    app_id: int,
+    receiver: Optional[str] = None,
+    max_workers: int = DEFAULT_WORKERS,
+) -> List[int]:
+    """IDs of payments awaiting settle(), optionally for one receiver
+
+    Args:
+        algod_client: algod client
+        app_id: PaymentSplit application ID
+        receiver: Only return payments to this address
+        max_workers: Maximum concurrent box requests
+
+    Returns:
+        Payment IDs sorted by receiver, so settle() can merge payouts
+    """
+    response = algod_client.application_boxes(app_id, limit=0)
+    payment_ids = []
+    for box in response.get("boxes", []):
+        payment_id = payment_id_from_box_name(base64.b64decode(box["name"]))
+        if payment_id is not None:
+            payment_ids.append(payment_id)
+
+    def fetch(payment_id: int):
+        value = algod_client.application_box_by_name(app_id, payment_box_name(payment_id))["value"]
+        return decode_payment_record(base64.b64decode(value))
+
+    receiver_bytes = encoding.decode_address(receiver) if receiver else None
+    completed = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for payment_id, record in zip(payment_ids, pool.map(fetch, payment_ids)):
+            if record.status != PAYMENT_COMPLETED:
+                continue
+            if receiver_bytes is not None and record.receiver != receiver_bytes:
+                continue
+            completed.append((record.receiver, payment_id))
+
+    completed.sort()
+    return [payment_id for _receiver, payment_id in completed]
+
+
+def settle_payments(algod_client, app_id: int, sender: str, signer, payment_ids: List[int]) -> int:
+    """Call settle() for the given payments in batches
+
+    Returns:
+        Total amount paid out
+    """
+    total_paid = 0
+    for start in range(0, len(payment_ids), SETTLE_BATCH_SIZE):
+        batch = payment_ids[start:start + SETTLE_BATCH_SIZE]
+        atc = settle_atc(algod_client.suggested_params(), app_id, sender, signer, batch)
+        total_paid += atc.execute(algod_client, 4).abi_results[0].return_value
+    return total_paid
+
+
+def settle_atc(params, app_id: int, sender: str, signer, batch: List[int]):
+    """AtomicTransactionComposer settling one batch of payments
+
+    The settle call's fee covers one inner payment per payment in the batch,
+    which is the worst case when no receivers repeat. Box references past
+    the call's eight ride on bare no-op calls.
+    """
+    from algosdk import abi
+    from algosdk.atomic_transaction_composer import (
+        AtomicTransactionComposer,
+        TransactionWithSigner,
+    )
+    from algosdk.transaction import ApplicationNoOpTxn
+
+    boxes = [(0, payment_box_name(payment_id)) for payment_id in batch]
+
+    settle_params = copy.copy(params)
+    settle_params.flat_fee = True
+    settle_params.fee = max(params.min_fee, 1000) * (1 + len(batch))
+
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=app_id,
+        method=abi.Method.from_signature(SETTLE_METHOD_SIGNATURE),
+        sender=sender,
+        sp=settle_params,
+        signer=signer,
+        method_args=[batch],
+        boxes=boxes[:MAX_REFS_PER_TXN],
+    )
+    for offset in range(MAX_REFS_PER_TXN, len(boxes), MAX_REFS_PER_TXN):
+        pad = ApplicationNoOpTxn(sender, params, app_id, boxes=boxes[offset:offset + MAX_REFS_PER_TXN])
+        atc.add_transaction(TransactionWithSigner(pad, signer))
+    return atc
+
+
+def main():
+    from algosdk import account, mnemonic as mn
+    from algosdk.atomic_transaction_composer import AccountTransactionSigner
+    from algod_pool import client_from_env
+
+    private_key = mn.to_private_key(os.environ["DEPLOYER_MNEMONIC"])
+    sender = account.address_from_private_key(private_key)
+    app_id = int(os.environ["PAYMENT_APP_ID"])
+    receiver = sys.argv[1] if len(sys.argv) > 1 else None
+
+    algod_client = client_from_env()
+
+    payment_ids = list_completed_payments(algod_client, app_id, receiver)
+    print(f"🔍 {len(payment_ids)} completed payment(s) awaiting payout")
+    if not payment_ids:
+        return True
+
+    total_paid = settle_payments(algod_client, app_id, sender, AccountTransactionSigner(private_key), payment_ids)
+    print(f"✅ Paid out {total_paid / 1_000_000} ALGO")
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
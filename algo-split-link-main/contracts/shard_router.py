@@ -0,0 +1,338 @@
+"""
+Sharded escrow deployment and routing
+Deploys K EscrowClaimLink instances from the same compiled program and
+spreads claim links across them, so creations do not all contend on one
+app's claim_count and one app account.
+
+Link IDs carry their shard: the top SHARD_BITS bits select the app in the
+shard list, the rest is the claim ID inside that app. Shard 0 link IDs are
+plain claim IDs, so a single-app deployment is the K = 1 case.
+
+Shard list (shards.json):
+    {"app_ids": [<shard 0 app>, <shard 1 app>, ...]}
+
+Usage:
+    python shard_router.py deploy <count>
+    python shard_router.py create <entries.csv> [--by entry|sender]
+    python shard_router.py status
+    (reads ALGOD_URL, ALGOD_TOKEN, DEPLOYER_MNEMONIC, CLAIM_SHARDS)
+"""
+import argparse
+import copy
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from algosdk import encoding
+
+from batch_claim_links import MAX_GROUP_SIZE, MAX_REFS_PER_TXN, ClaimEntry, create_claim_links_batch, read_claim_count
+from box_codec import ASSET_REGISTRY_SIZE, CLAIM_RECORD_SIZE, asset_registry_name, box_io_refs, claim_box_name
+from claim_snapshot import fetch_claim
+
+SCRIPT_DIR = Path(__file__).parent
+SHARDS_PATH = SCRIPT_DIR / "shards.json"
+ARTIFACT_DIR = SCRIPT_DIR / "out"
+
+SHARD_BITS = 8
+MAX_SHARDS = 1 << SHARD_BITS
+CLAIM_ID_BITS = 64 - SHARD_BITS
+CLAIM_ID_MASK = (1 << CLAIM_ID_BITS) - 1
+
+# Minimum balance of an app account, funded at deploy so boxes can follow
+APP_ACCOUNT_FUNDING = 100_000
+
+CLAIM_METHOD_SIGNATURE = "claim(uint64)bool"
+CANCEL_METHOD_SIGNATURE = "cancel(uint64)bool"
+
+
+def encode_link_id(shard: int, claim_id: int) -> int:
+    """Global link ID for a claim ID in one shard"""
+    if not 0 <= shard < MAX_SHARDS:
+        raise ValueError(f"Shard must be in [0, {MAX_SHARDS}), got {shard}")
+    if not 0 <= claim_id <= CLAIM_ID_MASK:
+        raise ValueError(f"Claim ID {claim_id} does not fit in {CLAIM_ID_BITS} bits")
+    return (shard << CLAIM_ID_BITS) | claim_id
+
+
+def decode_link_id(link_id: int) -> Tuple[int, int]:
+    """(shard, claim ID) encoded in a global link ID"""
+    return link_id >> CLAIM_ID_BITS, link_id & CLAIM_ID_MASK
+
+
+@dataclass(frozen=True)
+class ShardSet:
+    """Ordered escrow app IDs; a link's shard is its index in this list"""
+    app_ids: Tuple[int, ...]
+
+    def __post_init__(self) -> None:
+        if not 0 < len(self.app_ids) <= MAX_SHARDS:
+            raise ValueError(f"Need 1 to {MAX_SHARDS} shards, got {len(self.app_ids)}")
+
+    def __len__(self) -> int:
+        return len(self.app_ids)
+
+    def shard_for_sender(self, sender: str) -> int:
+        """Stable shard of a sender address (hash of its public key)"""
+        digest = hashlib.sha256(encoding.decode_address(sender)).digest()
+        return int.from_bytes(digest[:8], "big") % len(self.app_ids)
+
+    def route(self, link_id: int) -> Tuple[int, int]:
+        """(app ID, claim ID) serving a global link ID
+
+        Raises:
+            ValueError: If the link's shard is not in this set
+        """
+        shard, claim_id = decode_link_id(link_id)
+        if shard >= len(self.app_ids):
+            raise ValueError(f"Link {link_id} is in shard {shard}, but only {len(self.app_ids)} are configured")
+        return self.app_ids[shard], claim_id
+
+    def partition(self, sender: str, count: int, by: str = "entry") -> Dict[int, List[int]]:
+        """Assign `count` new links to shards
+
+        Args:
+            sender: Address funding the links
+            count: Number of links
+            by: "entry" spreads links round-robin over every shard; "sender"
+                keeps all of a sender's links in its hashed shard
+
+        Returns:
+            Shard -> indexes of the links it receives, in input order
+        """
+        if by == "sender":
+            return {self.shard_for_sender(sender): list(range(count))} if count else {}
+        if by != "entry":
+            raise ValueError(f"Unknown assignment {by!r}; use 'entry' or 'sender'")
+
+        # Start at the sender's shard so small batches from many senders
+        # do not all land on shard 0
+        start = self.shard_for_sender(sender)
+        assignment: Dict[int, List[int]] = {}
+        for index in range(count):
+            assignment.setdefault((start + index) % len(self.app_ids), []).append(index)
+        return assignment
+
+    @classmethod
+    def load(cls, path: Path = SHARDS_PATH) -> "ShardSet":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        return cls(tuple(data["app_ids"]))
+
+    def dump(self, path: Path = SHARDS_PATH) -> None:
+        Path(path).write_text(json.dumps({"app_ids": list(self.app_ids)}, indent=2) + "\n", encoding="utf-8")
+
+
+def deploy_shards(
+    algod_client,
+    sender: str,
+    signer,
+    count: int,
+    artifact_dir: Path = ARTIFACT_DIR,
+) -> ShardSet:
+    """Create `count` EscrowClaimLink apps from one compiled program
+
+    Creations are packed 16 per atomic group, then every app account is
+    funded to its minimum balance in the same way.
+    """
+    from algosdk import logic
+    from algosdk.atomic_transaction_composer import AtomicTransactionComposer, TransactionWithSigner
+    from algosdk.transaction import ApplicationCreateTxn, OnComplete, PaymentTxn, StateSchema
+
+    approval = (artifact_dir / "EscrowClaimLink.approval.bin").read_bytes()
+    clear = (artifact_dir / "EscrowClaimLink.clear.bin").read_bytes()
+    spec = json.loads((artifact_dir / "EscrowClaimLink.arc32.json").read_text(encoding="utf-8"))
+    schema = spec["state"]["global"]
+
+    app_ids: List[int] = []
+    for start in range(0, count, MAX_GROUP_SIZE):
+        params = algod_client.suggested_params()
+        atc = AtomicTransactionComposer()
+        for index in range(start, min(count, start + MAX_GROUP_SIZE)):
+            txn = ApplicationCreateTxn(
+                sender=sender,
+                sp=params,
+                on_complete=OnComplete.NoOpOC,
+                approval_program=approval,
+                clear_program=clear,
+                global_schema=StateSchema(num_uints=schema["num_uints"], num_byte_slices=schema["num_byte_slices"]),
+                local_schema=StateSchema(num_uints=0, num_byte_slices=0),
+                extra_pages=(max(len(approval), len(clear)) - 1) // 2048,
+                note=f"shard:{index}".encode(),
+            )
+            atc.add_transaction(TransactionWithSigner(txn, signer))
+        result = atc.execute(algod_client, 4)
+        for tx_id in result.tx_ids:
+            app_ids.append(algod_client.pending_transaction_info(tx_id)["application-index"])
+
+    for start in range(0, len(app_ids), MAX_GROUP_SIZE):
+        params = algod_client.suggested_params()
+        atc = AtomicTransactionComposer()
+        for app_id in app_ids[start:start + MAX_GROUP_SIZE]:
+            funding = PaymentTxn(sender, params, logic.get_application_address(app_id), APP_ACCOUNT_FUNDING)
+            atc.add_transaction(TransactionWithSigner(funding, signer))
+        atc.execute(algod_client, 4)
+
+    return ShardSet(tuple(app_ids))
+
+
+def create_sharded(
+    algod_client,
+    shards: ShardSet,
+    sender: str,
+    signer,
+    entries: Sequence[ClaimEntry],
+    asset_id: int = 0,
+    by: str = "entry",
+) -> List[int]:
+    """Create claim links across shards, one concurrent batch driver per shard
+
+    Each shard has its own claim_count, so the per-shard submissions never
+    conflict with each other.
+
+    Returns:
+        Global link IDs, aligned with `entries`
+    """
+    assignment = shards.partition(sender, len(entries), by)
+
+    def create(shard: int) -> List[int]:
+        batch = [entries[index] for index in assignment[shard]]
+        ranges = create_claim_links_batch(algod_client, shards.app_ids[shard], sender, signer, batch, asset_id)
+        return [
+            encode_link_id(shard, claim_id)
+            for first_id, created in ranges
+            for claim_id in range(first_id, first_id + created)
+        ]
+
+    link_ids = [0] * len(entries)
+    with ThreadPoolExecutor(max_workers=max(1, len(assignment))) as pool:
+        for shard, shard_link_ids in zip(assignment, pool.map(create, assignment)):
+            for index, link_id in zip(assignment[shard], shard_link_ids):
+                link_ids[index] = link_id
+
+    return link_ids
+
+
+def _call_on_link(algod_client, shards: ShardSet, signature: str, link_id: int, sender: str, signer) -> bool:
+    """Route a claim/cancel call to the link's shard with the references it needs"""
+    from algosdk import abi
+    from algosdk.atomic_transaction_composer import AtomicTransactionComposer, TransactionWithSigner
+    from algosdk.transaction import ApplicationNoOpTxn
+
+    from claim_index import index_sizes
+    from expiry_sweeper import link_index_names
+
+    app_id, claim_id = shards.route(link_id)
+    record = fetch_claim(algod_client, app_id, claim_id)
+    if record is None:
+        raise ValueError(f"Link {link_id} not found in app {app_id}")
+
+    # The claim box, its index boxes, the asset registry box and the I/O quota they need
+    names = link_index_names(claim_id, record.sender, record.receiver, record.is_indexed)
+    sizes = index_sizes(algod_client, app_id, names)
+    boxes = [(0, claim_box_name(claim_id))] + [(0, name) for name in sizes]
+    boxes.append((0, asset_registry_name(record.asset_id)))
+    io_bytes = CLAIM_RECORD_SIZE + sum(sizes.values()) + ASSET_REGISTRY_SIZE
+    boxes += [(0, b"")] * (box_io_refs(io_bytes) - len(boxes))
+
+    # One inner transfer, covered by the outer call's fee
+    params = algod_client.suggested_params()
+    call_params = copy.copy(params)
+    call_params.flat_fee = True
+    call_params.fee = max(params.min_fee, 1000) * 2
+
+    assets = [record.asset_id] if record.asset_id else []
+    first = MAX_REFS_PER_TXN - len(assets)
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=app_id,
+        method=abi.Method.from_signature(signature),
+        sender=sender,
+        sp=call_params,
+        signer=signer,
+        method_args=[claim_id],
+        foreign_assets=assets or None,
+        boxes=boxes[:first],
+    )
+    # References beyond the first call ride on bare no-op calls
+    for start in range(first, len(boxes), MAX_REFS_PER_TXN):
+        pad = ApplicationNoOpTxn(sender, params, app_id, boxes=boxes[start:start + MAX_REFS_PER_TXN])
+        atc.add_transaction(TransactionWithSigner(pad, signer))
+    return atc.execute(algod_client, 4).abi_results[0].return_value
+
+
+def claim_link(algod_client, shards: ShardSet, link_id: int, sender: str, signer) -> bool:
+    """Claim a sharded link as `sender`"""
+    return _call_on_link(algod_client, shards, CLAIM_METHOD_SIGNATURE, link_id, sender, signer)
+
+
+def cancel_link(algod_client, shards: ShardSet, link_id: int, sender: str, signer) -> bool:
+    """Cancel a sharded link; `sender` must be its creator"""
+    return _call_on_link(algod_client, shards, CANCEL_METHOD_SIGNATURE, link_id, sender, signer)
+
+
+def shard_status(algod_client, shards: ShardSet) -> List[Tuple[int, int]]:
+    """(app ID, claim_count) for every shard, read concurrently"""
+    with ThreadPoolExecutor(max_workers=min(32, len(shards))) as pool:
+        counts = list(pool.map(lambda app_id: read_claim_count(algod_client, app_id), shards.app_ids))
+    return list(zip(shards.app_ids, counts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deploy and use sharded escrow apps")
+    commands = parser.add_subparsers(dest="command", required=True)
+    deploy = commands.add_parser("deploy", help="Deploy N escrow shards")
+    deploy.add_argument("count", type=int)
+    create = commands.add_parser("create", help="Create links from a CSV across shards")
+    create.add_argument("entries")
+    create.add_argument("--by", choices=("entry", "sender"), default="entry")
+    commands.add_parser("status", help="Show claim_count per shard")
+    args = parser.parse_args()
+
+    from algosdk import account, mnemonic as mn
+    from algosdk.atomic_transaction_composer import AccountTransactionSigner
+    from algod_pool import client_from_env
+
+    from batch_claim_links import load_entries
+
+    algod_client = client_from_env()
+    shards_path = Path(os.environ.get("CLAIM_SHARDS", SHARDS_PATH))
+
+    if args.command == "status":
+        for shard, (app_id, claims) in enumerate(shard_status(algod_client, ShardSet.load(shards_path))):
+            print(f"📊 shard {shard}: app {app_id}, {claims} link(s)")
+        return True
+
+    private_key = mn.to_private_key(os.environ["DEPLOYER_MNEMONIC"])
+    sender = account.address_from_private_key(private_key)
+    signer = AccountTransactionSigner(private_key)
+
+    if args.command == "deploy":
+        shards = deploy_shards(algod_client, sender, signer, args.count)
+        shards.dump(shards_path)
+        print(f"✅ Deployed {len(shards)} shard(s): {', '.join(map(str, shards.app_ids))}")
+        print(f"📝 Shard list written to {shards_path}")
+        return True
+
+    entries = list(load_entries(args.entries))
+    link_ids = create_sharded(
+        algod_client,
+        ShardSet.load(shards_path),
+        sender,
+        signer,
+        entries,
+        asset_id=int(os.environ.get("CLAIM_ASSET_ID", "0")),
+        by=args.by,
+    )
+    for link_id in link_ids:
+        print(link_id)
+    print(f"✅ Created {len(link_ids)} link(s)")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,255 @@
+"""
+Balance projector for PaymentSplit streams
+Fetches every str_<id> box concurrently into a columnar table and projects
+what each stream has vested, what its receiver can withdraw and until when
+its deposits last, for all streams at once. With numpy the projection is a
+handful of array expressions over the whole table; without it the same
+arithmetic runs row by row over the array columns.
+
+Projections use the contract's formula (box_codec.StreamRecord.vested), so
+they match what withdraw_stream would pay at that second or round.
+
+Usage:
+    python stream_projector.py <app_id> [--at UNIX_SECONDS] [--round ROUND] [--horizon SECONDS]
+    (reads ALGOD_URL, ALGOD_TOKEN)
+"""
+import argparse
+import base64
+import sys
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from algosdk.error import AlgodHTTPError
+
+from box_codec import (
+    STREAM_UNIT_ROUNDS,
+    StreamRecord,
+    decode_stream_record,
+    stream_box_name,
+    stream_id_from_box_name,
+)
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; the projection falls back to a loop
+    np = None
+
+DEFAULT_WORKERS = 32
+
+@dataclass
+class StreamTable:
+    """Columnar table of stream records
+
+    Integer columns are array.array values; address columns are contiguous
+    bytearrays of 32 bytes per row.
+    """
+    stream_id: array = field(default_factory=lambda: array("Q"))
+    rate: array = field(default_factory=lambda: array("Q"))
+    start: array = field(default_factory=lambda: array("Q"))
+    stop: array = field(default_factory=lambda: array("Q"))
+    deposited: array = field(default_factory=lambda: array("Q"))
+    withdrawn: array = field(default_factory=lambda: array("Q"))
+    unit: array = field(default_factory=lambda: array("B"))
+    creator: bytearray = field(default_factory=bytearray)
+    receiver: bytearray = field(default_factory=bytearray)
+
+    def __len__(self) -> int:
+        return len(self.stream_id)
+
+    def append(self, stream_id: int, record: StreamRecord) -> None:
+        self.stream_id.append(stream_id)
+        self.rate.append(record.rate)
+        self.start.append(record.start)
+        self.stop.append(record.stop)
+        self.deposited.append(record.deposited)
+        self.withdrawn.append(record.withdrawn)
+        self.unit.append(record.unit)
+        self.creator += record.creator
+        self.receiver += record.receiver
+
+    def row(self, index: int) -> StreamRecord:
+        start = index * 32
+        return StreamRecord(
+            creator=bytes(self.creator[start:start + 32]),
+            receiver=bytes(self.receiver[start:start + 32]),
+            rate=self.rate[index],
+            start=self.start[index],
+            stop=self.stop[index],
+            deposited=self.deposited[index],
+            withdrawn=self.withdrawn[index],
+            unit=self.unit[index],
+        )
+
+
+class Projection(NamedTuple):
+    """Per-stream balances at one point in time, aligned with the table rows
+
+    Columns are numpy arrays when numpy is installed, array.array otherwise.
+    """
+    vested: Iterable[int]
+    withdrawable: Iterable[int]
+    unvested: Iterable[int]  # refunded to the creator if the stream is cancelled now
+    funded_until: Iterable[int]  # second/round the deposits last until
+
+    def total(self, column: str) -> int:
+        return int(sum(int(value) for value in getattr(self, column)))
+
+
+def project(table: StreamTable, now: int, now_round: int, use_numpy: Optional[bool] = None) -> Projection:
+    """Project every stream's balances at unix time `now` / round `now_round`
+
+    Each row uses the clock of its own unit. A time before a stream's last
+    withdrawal projects nothing withdrawable. use_numpy defaults to whether
+    numpy is installed.
+    """
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy:
+        return _project_numpy(table, now, now_round)
+
+    vested = array("Q")
+    funded_until = array("Q")
+    for rate, start, stop, deposited, unit in zip(table.rate, table.start, table.stop, table.deposited, table.unit):
+        record = StreamRecord(b"", b"", rate, start, stop, deposited, 0, unit)
+        vested.append(record.vested(now_round if unit == STREAM_UNIT_ROUNDS else now))
+        funded_until.append(record.funded_until)
+    return Projection(
+        vested=vested,
+        withdrawable=array("Q", (max(total - done, 0) for total, done in zip(vested, table.withdrawn))),
+        unvested=array("Q", (total - done for total, done in zip(table.deposited, vested))),
+        funded_until=funded_until,
+    )
+
+
+def _project_numpy(table: StreamTable, now: int, now_round: int) -> Projection:
+    if np is None:
+        raise RuntimeError("numpy is not installed")
+    rate = np.frombuffer(table.rate, dtype=np.uint64)
+    start = np.frombuffer(table.start, dtype=np.uint64)
+    stop = np.frombuffer(table.stop, dtype=np.uint64)
+    deposited = np.frombuffer(table.deposited, dtype=np.uint64)
+    withdrawn = np.frombuffer(table.withdrawn, dtype=np.uint64)
+    unit = np.frombuffer(table.unit, dtype=np.uint8)
+
+    clock = np.where(unit == STREAM_UNIT_ROUNDS, np.uint64(now_round), np.uint64(now))
+    clock = np.where((stop > 0) & (clock > stop), stop, clock)
+    elapsed = np.where(clock > start, clock - start, np.uint64(0))
+    # Capping elapsed at the time the deposits last keeps rate * elapsed within uint64
+    lasts = deposited // rate
+    vested = np.minimum(rate * np.minimum(elapsed, lasts + np.uint64(1)), deposited)
+
+    funded_until = start + lasts
+    funded_until = np.where((stop > 0) & (funded_until > stop), stop, funded_until)
+    return Projection(
+        vested=vested,
+        withdrawable=np.where(vested > withdrawn, vested - withdrawn, np.uint64(0)),
+        unvested=deposited - vested,
+        funded_until=funded_until,
+    )
+
+
+def running_dry(table: StreamTable, projection: Projection, before: int, before_round: int) -> List[int]:
+    """IDs of open-ended streams whose deposits run out before the given time/round"""
+    return [
+        stream_id
+        for stream_id, stop, unit, until in zip(table.stream_id, table.stop, table.unit, projection.funded_until)
+        if stop == 0 and int(until) < (before_round if unit == STREAM_UNIT_ROUNDS else before)
+    ]
+
+
+def withdrawable_by_receiver(table: StreamTable, projection: Projection) -> Dict[bytes, int]:
+    """Total withdrawable per receiver public key, e.g. to batch withdraw_stream calls"""
+    totals: Dict[bytes, int] = {}
+    for index, amount in enumerate(projection.withdrawable):
+        if amount:
+            receiver = bytes(table.receiver[index * 32:index * 32 + 32])
+            totals[receiver] = totals.get(receiver, 0) + int(amount)
+    return totals
+
+
+def list_stream_ids(algod_client, app_id: int) -> List[int]:
+    """List the stream IDs of every str_<id> box of the app"""
+    response = algod_client.application_boxes(app_id, limit=0)
+    ids = []
+    for box in response.get("boxes", []):
+        stream_id = stream_id_from_box_name(base64.b64decode(box["name"]))
+        if stream_id is not None:
+            ids.append(stream_id)
+    ids.sort()
+    return ids
+
+
+def fetch_stream(algod_client, app_id: int, stream_id: int) -> Optional[StreamRecord]:
+    """Fetch and decode one stream box; None if it was cancelled meanwhile"""
+    try:
+        response = algod_client.application_box_by_name(app_id, stream_box_name(stream_id))
+    except AlgodHTTPError as e:
+        if e.code == 404:
+            return None
+        raise
+    return decode_stream_record(base64.b64decode(response["value"]))
+
+
+def snapshot_streams(
+    algod_client,
+    app_id: int,
+    stream_ids: Optional[Iterable[int]] = None,
+    max_workers: int = DEFAULT_WORKERS,
+) -> StreamTable:
+    """Fetch stream boxes with a bounded thread pool into a StreamTable, ordered by ID"""
+    if stream_ids is None:
+        stream_ids = list_stream_ids(algod_client, app_id)
+    else:
+        stream_ids = sorted(stream_ids)
+
+    table = StreamTable()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        records = pool.map(lambda stream_id: fetch_stream(algod_client, app_id, stream_id), stream_ids)
+        for stream_id, record in zip(stream_ids, records):
+            if record is not None:
+                table.append(stream_id, record)
+
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Project balances of every PaymentSplit stream")
+    parser.add_argument("app_id", type=int)
+    parser.add_argument("--at", type=int, help="Unix time to project at (default: now)")
+    parser.add_argument("--round", type=int, help="Round to project at (default: last round)")
+    parser.add_argument("--horizon", type=int, default=7 * 86400, help="Report streams running dry within N seconds")
+    args = parser.parse_args()
+
+    from algod_pool import client_from_env
+
+    algod_client = client_from_env()
+    now = args.at if args.at is not None else int(time.time())
+    now_round = args.round if args.round is not None else algod_client.status()["last-round"]
+
+    print(f"🔍 Snapshotting stream boxes of app {args.app_id}...")
+    table = snapshot_streams(algod_client, args.app_id)
+
+    started = time.perf_counter()
+    projection = project(table, now, now_round)
+    elapsed = time.perf_counter() - started
+
+    print(f"✅ {len(table)} stream(s) projected in {elapsed * 1000:.1f}ms ({'numpy' if np is not None else 'loop'})")
+    print(f"   Deposited: {sum(table.deposited) / 1_000_000} ALGO")
+    print(f"   Vested: {projection.total('vested') / 1_000_000} ALGO")
+    print(f"   Withdrawable: {projection.total('withdrawable') / 1_000_000} ALGO")
+    print(f"   Unvested: {projection.total('unvested') / 1_000_000} ALGO")
+
+    # Rounds are ~2.8s, so the horizon is converted for round-based streams
+    dry = running_dry(table, projection, now + args.horizon, now_round + args.horizon * 10 // 28)
+    if dry:
+        print(f"⚠️  {len(dry)} stream(s) run out of deposits within {args.horizon}s: {dry[:20]}")
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
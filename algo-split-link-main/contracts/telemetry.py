@@ -0,0 +1,386 @@
+"""
+Metrics and tracing for the ops tooling
+Every script talks to algod through algod_pool, which records each call
+here, so a slow run can be split into time spent waiting on the node,
+signing, and in our own code. Metrics live in one process-wide registry
+and cost a lock and a few additions per event; nothing is exported
+unless it is switched on:
+
+    ALGOSPLIT_METRICS_PORT  serve /metrics (Prometheus text format) on this port
+    ALGOSPLIT_METRICS_FILE  write the metrics to this file when the script exits
+                            (for one-shot scripts, e.g. a node_exporter textfile;
+                            "{pid}" in the path gives each worker process its own file)
+    ALGOSPLIT_TRACING=1     also open an OpenTelemetry span for every span()
+                            (needs opentelemetry-api; run the script under
+                            opentelemetry-instrument or configure an SDK to export)
+
+Metrics:
+    algosplit_algod_request_seconds   algod call latency, by endpoint and method
+    algosplit_algod_retries_total     retried algod calls, by endpoint
+    algosplit_algod_errors_total      failed algod calls, by endpoint, HTTP status and error code
+    algosplit_box_reads_total         box reads, by app and whether the box existed
+    algosplit_submit_seconds          time to hand one group to algod
+    algosplit_confirmation_rounds     rounds from submission to confirmation
+    algosplit_confirmation_seconds    seconds from submission to confirmation
+    algosplit_last_round              last round seen while confirming
+    algosplit_rejections_total        groups dropped from the pool, by error code
+    algosplit_group_txns              transactions per confirmed group, by kind
+    algosplit_group_items_total       links or calls carried by confirmed groups, by kind
+    algosplit_group_bare_calls_total  bare calls added for references or budget, by kind
+    algosplit_span_seconds            duration of each span(), e.g. payout.sign
+
+Usage:
+    from telemetry import span
+    with span("payout.sign", group=12):
+        ...
+    ALGOSPLIT_METRICS_PORT=9109 python payout_stream.py recipients.csv
+"""
+import atexit
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, Sequence, Tuple
+
+# Latency buckets (seconds): public nodes answer in ~10-300ms, confirmation takes a few rounds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+ROUND_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20)
+GROUP_BUCKETS = (1, 2, 4, 6, 8, 10, 12, 14, 15, 16)
+
+# algod error messages mapped to stable codes, first match wins
+ERROR_CODES = (
+    ("already in ledger", "already_in_ledger"),
+    ("overspend", "overspend"),
+    ("below min", "below_min_balance"),
+    ("txn dead", "txn_dead"),
+    ("fee too small", "fee_too_small"),
+    ("dynamic cost budget exceeded", "budget_exceeded"),
+    ("box read budget", "box_quota"),
+    ("invalid Box reference", "box_reference"),
+    ("assert failed", "assert_failed"),
+    ("err opcode", "err_opcode"),
+    ("logic eval error", "logic_eval"),
+    ("rejected by logic", "rejected_by_logic"),
+    ("not found", "not_found"),
+)
+
+# Path segments replaced in endpoint labels so every app, account and txid shares one series
+_ID_SEGMENT = re.compile(r"/(?:\d+|[A-Z2-7]{58}|[A-Z2-7]{52})(?=/|$)")
+
+
+class _Metric:
+    """One named metric with a value per label set"""
+
+    def __init__(self, name: str, help_text: str, kind: str, labels: Sequence[str]) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self.labels = tuple(labels)
+        self.values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def _label_text(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{label}="{value}"' for label, value in zip(self.labels, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter(_Metric):
+    def __init__(self, registry: "Registry", name: str, help_text: str, labels: Sequence[str] = ()) -> None:
+        super().__init__(name, help_text, "counter", labels)
+        self._lock = registry.lock
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> Iterator[str]:
+        for key, value in sorted(self.values.items()):
+            yield f"{self.name}{self._label_text(key)} {value}"
+
+
+class Gauge(Counter):
+    def __init__(self, registry: "Registry", name: str, help_text: str, labels: Sequence[str] = ()) -> None:
+        super().__init__(registry, name, help_text, labels)
+        self.kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = value
+
+
+class Histogram(_Metric):
+    def __init__(
+        self,
+        registry: "Registry",
+        name: str,
+        help_text: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help_text, "histogram", labels)
+        self._lock = registry.lock
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self.values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                state = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> Iterator[str]:
+        for key, (counts, total, count) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{self._label_text(key, le)} {cumulative}"
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{self._label_text(key, le)} {count}"
+            yield f"{self.name}_sum{self._label_text(key)} {total}"
+            yield f"{self.name}_count{self._label_text(key)} {count}"
+
+
+class Registry:
+    """The metrics of one process, rendered together"""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.metrics = []
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self, name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(self, name, help_text, labels))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(self, name, help_text, labels, buckets))
+
+    def _register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition of every metric with at least one value"""
+        lines = []
+        with self.lock:
+            for metric in self.metrics:
+                if not metric.values:
+                    continue
+                lines.append(f"# HELP {metric.name} {metric.help_text}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+ALGOD_SECONDS = REGISTRY.histogram(
+    "algosplit_algod_request_seconds", "Latency of algod calls, retries included", ("endpoint", "method"),
+)
+ALGOD_RETRIES = REGISTRY.counter("algosplit_algod_retries_total", "Retried algod calls", ("endpoint",))
+ALGOD_ERRORS = REGISTRY.counter(
+    "algosplit_algod_errors_total", "Failed algod calls", ("endpoint", "status", "code"),
+)
+BOX_READS = REGISTRY.counter("algosplit_box_reads_total", "Box reads", ("app_id", "found"))
+SUBMIT_SECONDS = REGISTRY.histogram("algosplit_submit_seconds", "Time to hand one signed group to algod")
+CONFIRMATION_ROUNDS = REGISTRY.histogram(
+    "algosplit_confirmation_rounds", "Rounds from submission to confirmation", buckets=ROUND_BUCKETS,
+)
+CONFIRMATION_SECONDS = REGISTRY.histogram(
+    "algosplit_confirmation_seconds", "Seconds from submission to confirmation",
+)
+LAST_ROUND = REGISTRY.gauge("algosplit_last_round", "Last round seen while confirming")
+REJECTIONS = REGISTRY.counter("algosplit_rejections_total", "Groups dropped from the transaction pool", ("code",))
+GROUP_TXNS = REGISTRY.histogram(
+    "algosplit_group_txns", "Transactions per packed group", ("kind",), buckets=GROUP_BUCKETS,
+)
+GROUP_ITEMS = REGISTRY.counter("algosplit_group_items_total", "Links or calls carried by packed groups", ("kind",))
+GROUP_BARE_CALLS = REGISTRY.counter(
+    "algosplit_group_bare_calls_total", "Bare calls added for references or opcode budget", ("kind",),
+)
+SPAN_SECONDS = REGISTRY.histogram("algosplit_span_seconds", "Duration of traced operations", ("span",))
+
+# Submission time of each txid until its confirmation is recorded
+_submitted: Dict[str, float] = {}
+_submitted_lock = threading.Lock()
+
+_tracer = None
+_metrics_path = None
+_configured = False
+_config_lock = threading.Lock()
+
+
+def error_code(message: str) -> str:
+    """Stable code for an algod error message"""
+    for text, code in ERROR_CODES:
+        if text in message:
+            return code
+    return "other"
+
+
+def endpoint_label(requrl: str) -> str:
+    """algod path with IDs, addresses and txids replaced, e.g. /applications/{id}/box"""
+    return _ID_SEGMENT.sub("/{id}", requrl.split("?")[0])
+
+
+def record_request(method: str, requrl: str, seconds: float, status: int, message: str = "") -> None:
+    """One algod call (after retries); status 0 means the connection failed"""
+    endpoint = endpoint_label(requrl)
+    ALGOD_SECONDS.observe(seconds, endpoint=endpoint, method=method)
+    if endpoint == "/applications/{id}/box" and (status < 400 or status == 404):
+        # A missing box is an answer, not an error
+        BOX_READS.inc(app_id=requrl.split("/")[2], found=str(status != 404).lower())
+    elif status >= 400 or status == 0:
+        ALGOD_ERRORS.inc(endpoint=endpoint, status=status, code=error_code(message))
+
+
+def record_retry(requrl: str) -> None:
+    ALGOD_RETRIES.inc(endpoint=endpoint_label(requrl))
+
+
+def record_submission(tx_id: str, seconds: float) -> None:
+    """A group was handed to algod; its confirmation lag is measured from now"""
+    SUBMIT_SECONDS.observe(seconds)
+    with _submitted_lock:
+        _submitted.setdefault(tx_id, time.monotonic())
+
+
+def record_confirmation(tx_id: str, confirmed_round: int, first_round: int) -> None:
+    """A group was confirmed; first_round is the last round when the wait began"""
+    with _submitted_lock:
+        submitted_at = _submitted.pop(tx_id, None)
+    CONFIRMATION_ROUNDS.observe(max(confirmed_round - first_round, 0))
+    if submitted_at is not None:
+        CONFIRMATION_SECONDS.observe(time.monotonic() - submitted_at)
+    LAST_ROUND.set(confirmed_round)
+
+
+def record_rejection(tx_id: str, message: str) -> None:
+    with _submitted_lock:
+        _submitted.pop(tx_id, None)
+    REJECTIONS.inc(code=error_code(message))
+
+
+def record_group(kind: str, txns: int, items: int, bare_calls: int = 0) -> None:
+    """One confirmed group: items (links or calls) per transaction is its packing efficiency
+
+    Packers call this once the group is confirmed, not while planning, so
+    dry runs and groups that are planned twice are not counted.
+    """
+    GROUP_TXNS.observe(txns, kind=kind)
+    GROUP_ITEMS.inc(items, kind=kind)
+    if bare_calls:
+        GROUP_BARE_CALLS.inc(bare_calls, kind=kind)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a block into algosplit_span_seconds, and trace it when tracing is on"""
+    start = time.perf_counter()
+    try:
+        if _tracer is None:
+            yield
+        else:
+            with _tracer.start_as_current_span(name, attributes=attributes):
+                yield
+    finally:
+        SPAN_SECONDS.observe(time.perf_counter() - start, span=name)
+
+
+def enable_tracing() -> bool:
+    """Open an OpenTelemetry span for every span() call
+
+    Returns:
+        False if opentelemetry-api is not installed (spans are then only timed)
+    """
+    global _tracer
+    try:
+        from opentelemetry import trace
+    except ImportError:  # tracing is optional; metrics still work
+        return False
+    _tracer = trace.get_tracer("algosplit")
+    return True
+
+
+def serve_metrics(host: str = "0.0.0.0", port: int = 9109) -> ThreadingHTTPServer:
+    """Serve /metrics on a background thread"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            data = REGISTRY.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def write_metrics(path: str) -> None:
+    """Write the metrics atomically, so a collector never reads half a file"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(REGISTRY.render())
+    os.replace(tmp_path, path)
+
+
+def flush() -> None:
+    """Write ALGOSPLIT_METRICS_FILE now, for processes that may not run atexit hooks (pool workers)"""
+    if _metrics_path:
+        write_metrics(_metrics_path)
+
+
+def configure_from_env() -> None:
+    """Start the exporters selected by ALGOSPLIT_* variables (once per process)"""
+    global _configured, _metrics_path
+    with _config_lock:
+        if _configured:
+            return
+        _configured = True
+
+    port = os.environ.get("ALGOSPLIT_METRICS_PORT")
+    if port:
+        try:
+            serve_metrics(port=int(port))
+        except OSError as e:
+            # Worker processes of a multi-process run inherit the variable; the first one serves
+            print(f"⚠️  Metrics endpoint not started on :{port}: {e}")
+    path = os.environ.get("ALGOSPLIT_METRICS_FILE")
+    if path:
+        _metrics_path = path.replace("{pid}", str(os.getpid()))
+        atexit.register(flush)
+    if os.environ.get("ALGOSPLIT_TRACING") == "1" and not enable_tracing():
+        print("⚠️  ALGOSPLIT_TRACING is set but opentelemetry-api is not installed; spans are only timed")
@@ -0,0 +1,10 @@
+"""Make the contracts/ scripts importable, as they are when run from there"""
+import os
+import sys
+
+CONTRACTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(CONTRACTS_DIR, "tests", "fixtures")
+ESCROW_BLOCKS = os.path.join(FIXTURES_DIR, "escrow_blocks.bin")
+
+sys.path.insert(0, CONTRACTS_DIR)
+sys.path.insert(0, FIXTURES_DIR)
@@ -0,0 +1,164 @@
+"""
+Record escrow_blocks.bin, the block fixture chain_indexer is tested on
+Runs one session against escrow_sim.py (a FakeAlgod that keeps blocks)
+touching every method the indexer decodes: create_claim_link, both batch
+creates, claim, claim_batch, cancel, sweep_expired, claim_airdrop and
+redeem_voucher. Keys and the clock are fixed, so re-running it rewrites
+the same bytes unless the contracts' encoding changes.
+
+Usage:
+    python tests/fixtures/make_escrow_blocks.py
+"""
+import base64
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(HERE)))
+
+FIXTURE_PATH = os.path.join(HERE, "escrow_blocks.bin")
+START_TIME = 1_700_000_000
+ASSET_ID = 1001
+
+
+def _account(seed: int):
+    """Deterministic (private key, address) pair"""
+    from algosdk import account
+    from nacl.signing import SigningKey
+
+    key = SigningKey(bytes([seed]) * 32)
+    private_key = base64.b64encode(bytes(key) + bytes(key.verify_key)).decode()
+    return private_key, account.address_from_private_key(private_key)
+
+
+def record_session(path: str = FIXTURE_PATH) -> int:
+    """Run the session and write its blocks to path
+
+    Returns:
+        Number of blocks recorded
+    """
+    from algosdk import abi, encoding, logic
+    from algosdk.atomic_transaction_composer import (
+        AccountTransactionSigner,
+        AtomicTransactionComposer,
+        TransactionWithSigner,
+    )
+    from algosdk.transaction import PaymentTxn
+
+    from batch_claim_links import ZERO_ADDRESS, ClaimEntry, _index_names, create_claim_links_batch, read_claim_count
+    from box_codec import asset_registry_name, claim_box_name
+    from chain_indexer import ESCROW_METHODS, record_blocks
+    from claim_index import index_sizes
+    from claim_snapshot import snapshot_claims
+    from escrow_sim import EscrowClaimLinkModel, SimLedger
+    from expiry_sweeper import find_expired, link_index_names, plan_sweeps, submit_sweep
+    from fake_algod import FakeAlgod
+    from group_packer import build_atc, plan_link_calls
+    from merkle_airdrop import MerkleTree, claim_airdrop, create_airdrop, leaf_hash
+    from vouchers import VoucherEntry, create_voucher_book, mint_vouchers, redeem_atc
+
+    now = [START_TIME]
+    fake = FakeAlgod(keep_blocks=True, clock=lambda: now[0])
+    ledger = SimLedger(fake)
+
+    creator_key, creator = _account(1)
+    claimer_key, claimer = _account(2)
+    receiver_key, receiver = _account(3)
+    creator_signer = AccountTransactionSigner(creator_key)
+    claimer_signer = AccountTransactionSigner(claimer_key)
+    receiver_signer = AccountTransactionSigner(receiver_key)
+    ledger.fund(creator, 10**12, {ASSET_ID: 10**9})
+    ledger.fund(claimer, 10**9, {ASSET_ID: 0})
+    ledger.fund(receiver, 10**9, {ASSET_ID: 0})
+    app_id = ledger.create_app(EscrowClaimLinkModel(), creator, funding=10**7)
+
+    def link_calls(method: str, claim_ids, sender: str, signer) -> None:
+        for group in plan_link_calls(fake, app_id, method, claim_ids):
+            build_atc(group, app_id, sender, signer, fake.suggested_params()).execute(fake, 4)
+
+    # claim_0: create_claim_link, restricted to receiver
+    entry = ClaimEntry(receiver, 250_000)
+    claim_id = read_claim_count(fake, app_id)
+    params = fake.suggested_params()
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=app_id,
+        method=abi.Method.from_signature(ESCROW_METHODS["create"]),
+        sender=creator,
+        sp=params,
+        signer=creator_signer,
+        method_args=[
+            TransactionWithSigner(
+                PaymentTxn(creator, params, logic.get_application_address(app_id), entry.amount), creator_signer
+            ),
+            receiver,
+            0,
+        ],
+        boxes=[(0, claim_box_name(claim_id))]
+        + [(0, name) for name in _index_names(encoding.decode_address(creator), entry, claim_id)]
+        + [(0, asset_registry_name(0))],
+    )
+    atc.execute(fake, 4)
+
+    # claim_1..6: ALGO batch; claim_1, 3 and 5 expire an hour in
+    expiry = START_TIME + 3600
+    create_claim_links_batch(
+        fake, app_id, creator, creator_signer,
+        [ClaimEntry(ZERO_ADDRESS, 100_000 + i, 0 if i % 2 else expiry) for i in range(6)],
+    )
+    # claim_7..9: ASA batch (opts the escrow in)
+    create_claim_links_batch(
+        fake, app_id, creator, creator_signer,
+        [ClaimEntry(receiver, 5_000), ClaimEntry(ZERO_ADDRESS, 6_000), ClaimEntry(ZERO_ADDRESS, 7_000)],
+        asset_id=ASSET_ID,
+    )
+
+    link_calls("claim", [0], receiver, receiver_signer)
+    link_calls("claim_batch", [2, 4], claimer, claimer_signer)
+    link_calls("claim", [8], claimer, claimer_signer)
+    link_calls("cancel", [6], creator, creator_signer)
+
+    # Airdrop of three leaves; the claimer takes leaf 1
+    leaves = [(creator, 1_000), (claimer, 2_000), (receiver, 3_000)]
+    tree = MerkleTree([leaf_hash(i, encoding.decode_address(a), amount) for i, (a, amount) in enumerate(leaves)])
+    manifest = {"root": tree.root.hex(), "leaf_count": len(leaves), "total": 6_000}
+    airdrop_id = create_airdrop(fake, app_id, creator, creator_signer, manifest)
+    claim_airdrop(fake, app_id, airdrop_id, claimer, claimer_signer, tree.depth, 1, 2_000, tree.proof(1))
+
+    # Voucher book signed by the creator; the claimer relays a voucher paying the receiver
+    book_id = create_voucher_book(fake, app_id, creator, creator_signer, 50_000, creator, 2)
+    vouchers = mint_vouchers(creator_key, app_id, book_id, [VoucherEntry(receiver, 4_000), VoucherEntry(ZERO_ADDRESS, 3_000)])
+    redeem_atc(fake.suggested_params(), vouchers[0], claimer, claimer_signer).execute(fake, 4)
+    redeem_atc(fake.suggested_params(), vouchers[1], claimer, claimer_signer).execute(fake, 4)
+
+    # Past the expiry, one more block so the next group sees it as latest_timestamp
+    now[0] = expiry + 60
+    link_calls("claim", [9], claimer, claimer_signer)
+    table = snapshot_claims(fake, app_id)
+    rows = find_expired(table, now[0])
+    names = {
+        name
+        for index in rows
+        for name in link_index_names(
+            table.claim_id[index],
+            bytes(table.sender[index * 32:index * 32 + 32]),
+            bytes(table.receiver[index * 32:index * 32 + 32]),
+        )
+    }
+    for group in plan_sweeps(table, rows, index_sizes(fake, app_id, names)):
+        submit_sweep(fake, app_id, creator, creator_signer, group)
+
+    record_blocks(fake, 1, fake.current_round, path)
+    return fake.current_round
+
+
+def main():
+    print("🧪 Recording the escrow session...")
+    blocks = record_session()
+    print(f"✅ {blocks} block(s) written to {FIXTURE_PATH}")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,148 @@
+import struct
+
+import pytest
+
+from box_codec import (
+    AIRDROP_PAGE_LEAVES,
+    AIRDROP_PAGE_SIZE,
+    AIRDROP_RECORD,
+    BITMAP_PAGE_SLOTS,
+    CLAIM_CLAIMED,
+    CLAIM_RECORD,
+    CLAIM_RECORD_SIZE,
+    INDEX_FREE_BIT,
+    INDEX_HEADER,
+    LEGACY_CLAIM_RECORD_SIZE,
+    NO_INDEX_SLOT,
+    RECEIVER_PAGE_CLAIMS,
+    RECEIVER_PAGE_HEADER_SIZE,
+    RECEIVER_PAGE_SIZE,
+    ZERO_ADDRESS_BYTES,
+    ClaimRecord,
+    PaymentRecord,
+    StreamRecord,
+    TealLink,
+    asset_id_from_ledger_key,
+    box_io_refs,
+    claim_box_name,
+    claim_id_from_box_name,
+    decode_airdrop_record,
+    decode_claim_record,
+    decode_index,
+    decode_payment_record,
+    decode_receiver_page,
+    decode_stream_record,
+    decode_teal_link,
+    encode_claim_record,
+    encode_payment_record,
+    encode_stream_record,
+    encode_teal_link,
+    is_leaf_claimed,
+    ledger_key,
+    paid_slots,
+    payment_box_name,
+    payment_id_from_box_name,
+    receiver_index_name,
+    receiver_page_from_box_name,
+    stream_box_name,
+    stream_id_from_box_name,
+)
+
+SENDER = bytes(range(32))
+RECEIVER = bytes(range(32, 64))
+
+
+def test_claim_record_round_trip():
+    record = ClaimRecord(SENDER, RECEIVER, 250_000, 31566704, 1_700_000_000, CLAIM_CLAIMED, 3, 7)
+    data = encode_claim_record(record)
+
+    assert len(data) == CLAIM_RECORD_SIZE
+    assert decode_claim_record(data) == record
+    assert record.is_indexed and not record.is_open and not record.anyone_can_claim
+
+
+def test_legacy_claim_record_is_unindexed():
+    record = ClaimRecord(SENDER, ZERO_ADDRESS_BYTES, 1, 0, 0, 0, NO_INDEX_SLOT, NO_INDEX_SLOT)
+    legacy = encode_claim_record(record)[:LEGACY_CLAIM_RECORD_SIZE]
+
+    decoded = decode_claim_record(legacy)
+    assert decoded == record
+    assert not decoded.is_indexed and decoded.anyone_can_claim
+
+
+@pytest.mark.parametrize("size", [0, LEGACY_CLAIM_RECORD_SIZE - 1, CLAIM_RECORD_SIZE + 1])
+def test_claim_record_of_wrong_size_is_rejected(size):
+    with pytest.raises(ValueError):
+        decode_claim_record(bytes(size))
+
+
+@pytest.mark.parametrize(
+    "name_of, id_of",
+    [
+        (claim_box_name, claim_id_from_box_name),
+        (payment_box_name, payment_id_from_box_name),
+        (stream_box_name, stream_id_from_box_name),
+        (ledger_key, asset_id_from_ledger_key),
+    ],
+)
+def test_box_names_round_trip(name_of, id_of):
+    for value in (0, 1, 2**64 - 1):
+        assert id_of(name_of(value)) == value
+    assert id_of(b"other") is None
+    assert id_of(name_of(5)[:-1]) is None
+
+
+def test_index_skips_free_slots():
+    slots = [4, 9 | INDEX_FREE_BIT, 12]
+    data = INDEX_HEADER.pack(len(slots), 1) + struct.pack(">3Q", *slots)
+
+    assert decode_index(data) == [4, 12]
+    with pytest.raises(ValueError):
+        decode_index(data[:-1])
+
+
+def test_receiver_pages_cover_fixed_claim_id_ranges():
+    claim_id = 2 * RECEIVER_PAGE_CLAIMS + 9
+    name = receiver_index_name(RECEIVER, claim_id)
+    page = bytearray(RECEIVER_PAGE_SIZE)
+    page[RECEIVER_PAGE_HEADER_SIZE + 1] = 0b0000_0010
+
+    assert receiver_page_from_box_name(name, RECEIVER) == 2
+    assert receiver_page_from_box_name(name, SENDER) is None
+    assert decode_receiver_page(bytes(page), 2) == [claim_id]
+    with pytest.raises(ValueError):
+        decode_receiver_page(bytes(page[:-1]), 2)
+
+
+def test_payment_stream_and_teal_link_round_trips():
+    payment = PaymentRecord(SENDER, RECEIVER, 5_000_000, 12, 1_200_000, 1_800_000_000, 0)
+    stream = StreamRecord(SENDER, RECEIVER, 10, 1_700_000_000, 0, 1_000_000, 2_500, 0)
+    link = TealLink(SENDER, RECEIVER, 100_000, 0)
+
+    assert decode_payment_record(encode_payment_record(payment)) == payment
+    assert decode_stream_record(encode_stream_record(stream)) == stream
+    assert decode_teal_link(encode_teal_link(link)) == link
+
+
+def test_airdrop_record_remaining():
+    record = decode_airdrop_record(AIRDROP_RECORD.pack(SENDER, RECEIVER, 0, 6_000, 2_000, 3, 0, 1))
+    assert record.remaining == 4_000 and not record.is_closed
+    with pytest.raises(ValueError):
+        decode_airdrop_record(bytes(AIRDROP_RECORD.size - 1))
+
+
+def test_bitmaps_use_the_low_bit_first():
+    page = bytearray(AIRDROP_PAGE_SIZE)
+    page[0] = 0b0000_0010
+    page[-1] = 0b1000_0000
+
+    assert is_leaf_claimed(page, 1) and not is_leaf_claimed(page, 0)
+    assert is_leaf_claimed(page, AIRDROP_PAGE_LEAVES * 2 - 1)
+    assert paid_slots(bytes(page), 1) == [BITMAP_PAGE_SLOTS + 1, 2 * BITMAP_PAGE_SLOTS - 1]
+
+
+def test_box_io_refs_round_up():
+    assert box_io_refs(0) == 1
+    assert box_io_refs(1024) == 1
+    assert box_io_refs(1025) == 2
+    assert box_io_refs(CLAIM_RECORD.size * 20) == 2
@@ -0,0 +1,158 @@
+import base64
+import json
+import sqlite3
+
+import msgpack
+import pytest
+from algosdk import abi, account, encoding, logic
+from algosdk.atomic_transaction_composer import AtomicTransactionComposer, EmptySigner, TransactionWithSigner
+from algosdk.transaction import PaymentTxn
+
+from box_codec import CONTRIBUTOR_BOX_MIN_BALANCE, PAYMENT_BOX_MIN_BALANCE
+from chain_indexer import (
+    PAYMENT_METHODS,
+    RETURN_PREFIX,
+    BlockDecoder,
+    ChainIndexer,
+    ChangeBatch,
+    SqlStore,
+    load_block_fixture,
+)
+from conftest import ESCROW_BLOCKS
+from escrow_sim import FIRST_APP_ID
+from fake_algod import FakeAlgod
+from make_escrow_blocks import ASSET_ID, START_TIME
+
+PAYMENT_APP_ID = FIRST_APP_ID + 1
+
+BLOCKS = list(load_block_fixture(ESCROW_BLOCKS))
+
+# Link states at the end of the recorded session (see fixtures/make_escrow_blocks.py)
+EXPECTED_STATUS = {
+    0: "claimed",
+    1: "expired",
+    2: "claimed",
+    3: "expired",
+    4: "claimed",
+    5: "expired",
+    6: "cancelled",
+    7: "active",
+    8: "claimed",
+    9: "claimed",
+}
+
+
+def _replay(fake: FakeAlgod, last_round: int) -> None:
+    for round_num, raw in BLOCKS:
+        if round_num <= last_round:
+            fake.add_block(round_num, raw)
+
+
+@pytest.fixture
+def store():
+    connection = sqlite3.connect(":memory:")
+    store = SqlStore(connection)
+    store.create_sqlite_schema()
+    yield store
+    connection.close()
+
+
+def _rows(store: SqlStore, query: str):
+    return store.connection.execute(query).fetchall()
+
+
+def test_replayed_session_is_indexed(store):
+    fake = FakeAlgod()
+    fake.set_asset(ASSET_ID, "TST", decimals=2)
+    _replay(fake, BLOCKS[-1][0])
+    indexer = ChainIndexer(fake, store, escrow_app_id=FIRST_APP_ID, batch_rounds=4)
+
+    assert indexer.run_once() == len(BLOCKS)
+    status = dict(_rows(store, "SELECT chain_claim_id, status FROM claim_links"))
+    assert status == EXPECTED_STATUS
+    assert store.load_checkpoint() == BLOCKS[-1][0]
+
+    claimed_by = dict(_rows(store, "SELECT chain_claim_id, claimed_by FROM claim_links WHERE claimed"))
+    assert len(set(claimed_by.values())) == 2  # the restricted receiver and the relaying claimer
+    units = _rows(store, "SELECT currency, asset_id, amount FROM claim_links WHERE chain_claim_id IN (0, 7) ORDER BY 2")
+    assert units == [("ALGO", 0, 0.25), ("TST", ASSET_ID, 50)]
+    airdrops = _rows(store, "SELECT airdrop_id, leaf_index, amount, currency FROM airdrop_claims")
+    assert airdrops == [(0, 1, 0.002, "ALGO")]
+    assert _rows(store, "SELECT book_id, nonce FROM voucher_redemptions ORDER BY nonce") == [(0, 0), (0, 1)]
+
+
+def test_resumed_indexer_sweeps_with_the_previous_block_time(store):
+    fake = FakeAlgod()
+    sweep_round = BLOCKS[-1][0]
+    _replay(fake, sweep_round - 1)
+    ChainIndexer(fake, store, escrow_app_id=FIRST_APP_ID).run_once()
+    assert _rows(store, "SELECT COUNT(*) FROM claim_links WHERE status = 'expired'") == [(0,)]
+
+    _replay(fake, sweep_round)
+    resumed = ChainIndexer(fake, store, escrow_app_id=FIRST_APP_ID)
+    assert resumed.next_round == sweep_round
+    assert resumed.run_once() == 1
+    assert dict(_rows(store, "SELECT chain_claim_id, status FROM claim_links")) == EXPECTED_STATUS
+
+
+def test_blocks_of_other_apps_are_ignored():
+    batch = ChangeBatch()
+    decoder = BlockDecoder(escrow_app_id=FIRST_APP_ID + 1)
+    for _, raw in BLOCKS:
+        decoder.decode(msgpack.unpackb(raw, raw=False, strict_map_key=False)["block"], batch)
+
+    assert not batch
+
+
+def _payment_block(fake: FakeAlgod, method: str, sender: str, args: list, payment: int, returned: bytes):
+    """Block holding one confirmed PaymentSplit call and the payment before it"""
+    params = fake.suggested_params()
+    pay = PaymentTxn(sender, params, logic.get_application_address(PAYMENT_APP_ID), payment)
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=PAYMENT_APP_ID,
+        method=abi.Method.from_signature(PAYMENT_METHODS[method]),
+        sender=sender,
+        sp=params,
+        signer=EmptySigner(),
+        method_args=args + [TransactionWithSigner(pay, EmptySigner())],
+    )
+    group = [item.txn for item in atc.build_group()]
+    block = {
+        "ts": START_TIME,
+        "gh": base64.b64decode(params.gh),
+        "gen": params.gen,
+        # Wire encoding, which leaves out zero fields as blocks do
+        "txns": [{"txn": msgpack.unpackb(base64.b64decode(encoding.msgpack_encode(txn)))} for txn in group],
+    }
+    block["txns"][-1]["dt"] = {"lg": [RETURN_PREFIX + returned]}
+    return block, group[-1].get_txid()
+
+
+def test_payment_splits_are_synced_from_create_and_contribute(store):
+    fake = FakeAlgod()
+    creator, receiver, contributor = (account.generate_account()[1] for _ in range(3))
+    create, create_txid = _payment_block(
+        fake, "create_payment", creator, [receiver, 3_000_000, 2, "Dinner", "Split the bill"],
+        PAYMENT_BOX_MIN_BALANCE, (7).to_bytes(8, "big"),
+    )
+    contribute, _ = _payment_block(
+        fake, "contribute", contributor, [7], 1_500_000 + CONTRIBUTOR_BOX_MIN_BALANCE, b"\x80"
+    )
+    # The frontend writes its row first, keyed by the create call's transaction ID
+    store.connection.execute(
+        "INSERT INTO payments (id, title, total_amount, participants, receiver_address) VALUES (?, 'Dinner', 3, 2, ?)",
+        (create_txid, receiver),
+    )
+
+    batch = ChangeBatch()
+    decoder = BlockDecoder(escrow_app_id=FIRST_APP_ID, payment_app_id=PAYMENT_APP_ID)
+    for block in (create, contribute):
+        decoder.decode(block, batch)
+    store.apply(batch, 2)
+
+    ((payment_id, app_id, collected, contributors),) = _rows(
+        store, "SELECT id, contract_app_id, collected, contributors FROM payments WHERE chain_payment_id = 7"
+    )
+    assert (payment_id, app_id, collected) == (create_txid, PAYMENT_APP_ID, 1.5)
+    assert [(entry["address"], entry["amount"]) for entry in json.loads(contributors)] == [(contributor, 1.5)]
@@ -0,0 +1,82 @@
+"""The cost_benchmark.py regression gate, as a test
+
+The gate itself needs a LocalNet (ALGOD_URL / KMD_URL, AlgoKit defaults),
+build artifacts in out/ and a committed cost_baseline.json; without any of
+them it is skipped, so the suite still runs offline. That every ABI method
+of the contracts has a scenario is checked from their sources.
+"""
+import ast
+import json
+import os
+
+import pytest
+
+from build_contracts import SCRIPT_DIR
+from cost_benchmark import ARTIFACT_DIR, BASELINE_PATH, ESCROW_METHODS, PAYMENT_METHODS, SCENARIOS, compare
+from escrow_sim import EscrowClaimLinkModel
+
+COST_TOLERANCE = float(os.environ.get("COST_TOLERANCE", "0"))
+
+
+def test_compare_reports_only_growth_past_the_tolerance():
+    baseline = {"EscrowClaimLink.claim": {"opcode_budget": 400, "inner_txns": 1}}
+    results = {
+        "EscrowClaimLink.claim": {"opcode_budget": 420, "inner_txns": 1},
+        "EscrowClaimLink.new_method": {"opcode_budget": 9000, "inner_txns": 3},
+    }
+
+    assert compare(baseline, results) == ["EscrowClaimLink.claim: opcode_budget 400 -> 420"]
+    assert compare(baseline, results, tolerance=0.05) == []
+    assert compare(baseline, {"EscrowClaimLink.claim": {"opcode_budget": 380, "inner_txns": 1}}) == []
+
+
+def _abi_methods(source: str):
+    """Names of the @arc4.abimethod functions in a contract source file"""
+    tree = ast.parse((SCRIPT_DIR / source).read_text(encoding="utf-8"))
+    return {
+        node.name
+        for node in ast.walk(tree)
+        if isinstance(node, ast.FunctionDef)
+        and any("abimethod" in ast.dump(decorator) for decorator in node.decorator_list)
+    }
+
+
+@pytest.mark.parametrize("source, contract, methods", [
+    ("escrow_claim_link.py", "EscrowClaimLink", ESCROW_METHODS),
+    ("payment_split.py", "PaymentSplit", PAYMENT_METHODS),
+])
+def test_every_abi_method_has_a_scenario(source, contract, methods):
+    measured = {name.split("[")[0] for name in SCENARIOS}
+
+    assert set(methods) == _abi_methods(source)
+    assert {f"{contract}.{method}" for method in methods} <= measured
+
+
+def test_escrow_signatures_match_the_simulator():
+    for signature, method in EscrowClaimLinkModel.METHODS.items():
+        assert ESCROW_METHODS[method] == signature
+
+
+@pytest.fixture(scope="module")
+def localnet():
+    from algosdk.error import AlgodHTTPError, KMDHTTPError
+
+    from cost_benchmark import deploy_apps, localnet_env
+
+    if not BASELINE_PATH.exists():
+        pytest.skip(f"no baseline at {BASELINE_PATH}; run cost_benchmark.py --update")
+    if not (ARTIFACT_DIR / "EscrowClaimLink.approval.bin").exists():
+        pytest.skip(f"no build artifacts in {ARTIFACT_DIR}; run build_contracts.py")
+    try:
+        env = localnet_env()
+    except (AlgodHTTPError, KMDHTTPError, OSError) as e:
+        pytest.skip(f"LocalNet unreachable: {e}")
+    deploy_apps(env)
+    return env
+
+
+def test_costs_do_not_exceed_the_baseline(localnet):
+    from cost_benchmark import run_benchmarks
+
+    baseline = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+    assert compare(baseline, run_benchmarks(localnet), COST_TOLERANCE) == []
@@ -0,0 +1,199 @@
+from typing import NamedTuple
+
+import pytest
+from algosdk import abi, account, encoding
+from algosdk.atomic_transaction_composer import (
+    AccountTransactionSigner,
+    AtomicTransactionComposer,
+    TransactionWithSigner,
+)
+from algosdk.error import AlgodHTTPError
+from algosdk.transaction import PaymentTxn
+
+import merkle_airdrop
+import vouchers
+from batch_claim_links import ZERO_ADDRESS, ClaimEntry, create_claim_links_batch
+from box_codec import (
+    AIRDROP_PAGE_MIN_BALANCE,
+    RECEIVER_INDEX_PREFIX,
+    RECEIVER_PAGE_SIZE,
+    VOUCHER_PAGE_MIN_BALANCE,
+    asset_registry_name,
+    claim_box_name,
+)
+from claim_index import open_links
+from escrow_sim import MAX_LEDGER_ASSETS, EscrowClaimLinkModel, SimLedger
+from fake_algod import MIN_FEE, FakeAlgod
+from group_packer import build_atc, plan_link_calls
+from liability_monitor import check_solvency, read_ledger
+
+NOW = 1_700_000_000
+
+
+class Sim(NamedTuple):
+    ledger: SimLedger
+    fake: FakeAlgod
+    app_id: int
+    creator: str
+    signer: AccountTransactionSigner
+
+
+def _funded(ledger: SimLedger):
+    private_key, address = account.generate_account()
+    ledger.fund(address, 10**9)
+    return address, AccountTransactionSigner(private_key), private_key
+
+
+@pytest.fixture
+def sim():
+    ledger = SimLedger(FakeAlgod(clock=lambda: NOW))
+    creator, signer, _ = _funded(ledger)
+    app_id = ledger.create_app(EscrowClaimLinkModel(), creator, funding=10**7)
+    return Sim(ledger, ledger.fake, app_id, creator, signer)
+
+
+def _claim_atc(sim: Sim, claim_id: int, boxes, fee: int = 2_000) -> AtomicTransactionComposer:
+    params = sim.fake.suggested_params()
+    params.flat_fee, params.fee = True, fee
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=sim.app_id,
+        method=abi.Method.from_signature("claim(uint64)bool"),
+        sender=sim.creator,
+        sp=params,
+        signer=sim.signer,
+        method_args=[claim_id],
+        boxes=[(0, name) for name in boxes],
+    )
+    return atc
+
+
+def test_rejected_group_leaves_no_trace(sim):
+    receiver, _, _ = _funded(sim.ledger)
+    params = sim.fake.suggested_params()
+    atc = _claim_atc(sim, 99, [claim_box_name(99), asset_registry_name(0)])
+    atc.add_transaction(TransactionWithSigner(PaymentTxn(sim.creator, params, receiver, 5_000), sim.signer))
+
+    with pytest.raises(AlgodHTTPError, match="Claim link not found"):
+        atc.execute(sim.fake, 4)
+    assert sim.ledger.account(receiver)["amount"] == 10**9
+    assert sim.ledger.rejected == 1
+
+
+def test_packed_claims_settle_and_keep_the_escrow_solvent(sim):
+    create_claim_links_batch(sim.fake, sim.app_id, sim.creator, sim.signer, [ClaimEntry(ZERO_ADDRESS, 100_000)] * 20)
+    for group in plan_link_calls(sim.fake, sim.app_id, "claim_batch", range(12)):
+        build_atc(group, sim.app_id, sim.creator, sim.signer, sim.fake.suggested_params()).execute(sim.fake, 4)
+
+    (solvency,) = check_solvency(sim.fake, sim.app_id)
+    assert solvency.open_links == 8
+    assert solvency.liability == 8 * 100_000
+    assert solvency.balance >= solvency.liability
+    assert sim.ledger.rejected == 0
+
+
+def test_third_parties_cannot_fill_a_receiver_index(sim):
+    receiver, receiver_signer, _ = _funded(sim.ledger)
+    stranger, stranger_signer, _ = _funded(sim.ledger)
+    create_claim_links_batch(sim.fake, sim.app_id, stranger, stranger_signer, [ClaimEntry(receiver, 1_000)] * 40)
+    create_claim_links_batch(sim.fake, sim.app_id, sim.creator, sim.signer, [ClaimEntry(receiver, 2_000)])
+
+    pages = {name: value for name, value in sim.fake._boxes[sim.app_id].items() if name.startswith(RECEIVER_INDEX_PREFIX)}
+    assert [len(value) for value in pages.values()] == [RECEIVER_PAGE_SIZE]
+    assert [claim_id for claim_id, _ in open_links(sim.fake, sim.app_id, receiver, "receiver")] == list(range(41))
+
+    for group in plan_link_calls(sim.fake, sim.app_id, "claim_batch", range(41)):
+        build_atc(group, sim.app_id, receiver, receiver_signer, sim.fake.suggested_params()).execute(sim.fake, 4)
+    assert not any(name.startswith(RECEIVER_INDEX_PREFIX) for name in sim.fake._boxes[sim.app_id])
+    assert open_links(sim.fake, sim.app_id, receiver, "receiver") == []
+
+
+def test_unreferenced_box_and_short_fee_are_rejected(sim):
+    create_claim_links_batch(sim.fake, sim.app_id, sim.creator, sim.signer, [ClaimEntry(ZERO_ADDRESS, 100_000)])
+    index_boxes = list(sim.fake._boxes[sim.app_id])
+
+    with pytest.raises(AlgodHTTPError, match="invalid Box reference"):
+        _claim_atc(sim, 0, [claim_box_name(0)]).execute(sim.fake, 4)
+    with pytest.raises(AlgodHTTPError, match="fee too small"):
+        _claim_atc(sim, 0, index_boxes, fee=1_000).execute(sim.fake, 4)
+    _claim_atc(sim, 0, index_boxes).execute(sim.fake, 4)
+
+
+def test_airdrop_claims_check_the_proof_and_the_bitmap(sim):
+    claimer, claimer_signer, _ = _funded(sim.ledger)
+    other, other_signer, _ = _funded(sim.ledger)
+    leaves = [merkle_airdrop.AirdropLeaf(address, amount) for address, amount in ((claimer, 2_000), (other, 3_000))]
+    tree = merkle_airdrop.MerkleTree([
+        merkle_airdrop.leaf_hash(i, encoding.decode_address(leaf.receiver), leaf.amount) for i, leaf in enumerate(leaves)
+    ])
+    manifest = {"root": tree.root.hex(), "leaf_count": 2, "total": 5_000}
+    airdrop_id = merkle_airdrop.create_airdrop(sim.fake, sim.app_id, sim.creator, sim.signer, manifest)
+
+    def claim(address, signer, index, amount):
+        return merkle_airdrop.claim_airdrop(
+            sim.fake, sim.app_id, airdrop_id, address, signer, tree.depth, index, amount, tree.proof(index)
+        )
+
+    with pytest.raises(AlgodHTTPError, match="Invalid proof"):
+        claim(other, other_signer, 0, 2_000)
+    before = sim.ledger.account(claimer)["amount"]
+    assert claim(claimer, claimer_signer, 0, 2_000)
+    assert sim.ledger.account(claimer)["amount"] == before + 2_000 - 2 * MIN_FEE  # the call pays for its payout
+    with pytest.raises(AlgodHTTPError, match="Already claimed"):
+        claim(claimer, claimer_signer, 0, 2_000)
+
+    # Closing refunds the remainder and, once the page is purged, its prepaid minimum balance
+    before = sim.ledger.account(sim.creator)["amount"]
+    assert merkle_airdrop.close_airdrop(sim.fake, sim.app_id, airdrop_id, sim.creator, sim.signer) == 3_000
+    assert sim.ledger.account(sim.creator)["amount"] == before + 3_000 + AIRDROP_PAGE_MIN_BALANCE - 4 * MIN_FEE
+    assert not any(name.startswith((b"drp_", b"drb_")) for name in sim.fake._boxes[sim.app_id])
+    assert check_solvency(sim.fake, sim.app_id)[0].liability == 0
+    with pytest.raises(AlgodHTTPError, match="Airdrop not found"):
+        claim(other, other_signer, 1, 3_000)
+
+
+def test_groups_over_the_pooled_budget_are_rejected(sim, monkeypatch):
+    _, _, private_key = _funded(sim.ledger)
+    signer_address = account.address_from_private_key(private_key)
+    book_id = vouchers.create_voucher_book(sim.fake, sim.app_id, sim.creator, sim.signer, 50_000, signer_address, 1)
+    (voucher,) = vouchers.mint_vouchers(private_key, sim.app_id, book_id, [vouchers.VoucherEntry(ZERO_ADDRESS, 1_000)])
+
+    monkeypatch.setattr(vouchers, "REDEEM_BUDGET_CALLS", vouchers.REDEEM_BUDGET_CALLS - 1)
+    with pytest.raises(AlgodHTTPError, match="dynamic cost budget exceeded"):
+        vouchers.redeem_atc(sim.fake.suggested_params(), voucher, sim.creator, sim.signer).execute(sim.fake, 4)
+    monkeypatch.undo()
+    vouchers.redeem_atc(sim.fake.suggested_params(), voucher, sim.creator, sim.signer).execute(sim.fake, 4)
+    assert check_solvency(sim.fake, sim.app_id)[0].liability == 50_000 - 1_000
+
+
+def test_voucher_books_reject_nonces_outside_their_range_and_refund_their_pages(sim):
+    _, _, private_key = _funded(sim.ledger)
+    signer_address = account.address_from_private_key(private_key)
+    book_id = vouchers.create_voucher_book(sim.fake, sim.app_id, sim.creator, sim.signer, 50_000, signer_address, 2)
+    entries = [vouchers.VoucherEntry(ZERO_ADDRESS, 1_000)] * 3
+    inside, _, outside = vouchers.mint_vouchers(private_key, sim.app_id, book_id, entries)
+
+    vouchers.redeem_atc(sim.fake.suggested_params(), inside, sim.creator, sim.signer).execute(sim.fake, 4)
+    with pytest.raises(AlgodHTTPError, match="Nonce out of range"):
+        vouchers.redeem_atc(sim.fake.suggested_params(), outside, sim.creator, sim.signer).execute(sim.fake, 4)
+
+    before = sim.ledger.account(sim.creator)["amount"]
+    assert vouchers.close_voucher_book(sim.fake, sim.app_id, book_id, sim.creator, sim.signer) == 49_000
+    assert sim.ledger.account(sim.creator)["amount"] == before + 49_000 + VOUCHER_PAGE_MIN_BALANCE - 4 * MIN_FEE
+    assert not any(name.startswith((b"vbk_", b"vbb_")) for name in sim.fake._boxes[sim.app_id])
+
+
+def test_ledger_slots_are_freed_and_extra_assets_stay_in_the_registry(sim):
+    asset_ids = range(5_001, 5_001 + MAX_LEDGER_ASSETS + 1)
+    sim.ledger.fund(sim.creator, 0, {asset_id: 10**6 for asset_id in asset_ids})
+    for asset_id in asset_ids:
+        create_claim_links_batch(
+            sim.fake, sim.app_id, sim.creator, sim.signer, [ClaimEntry(ZERO_ADDRESS, 1_000)], asset_id=asset_id
+        )
+
+    assert len(read_ledger(sim.fake, sim.app_id)) == MAX_LEDGER_ASSETS
+    assert {entry.asset_id for entry in check_solvency(sim.fake, sim.app_id)} == set(asset_ids)
+
+    for group in plan_link_calls(sim.fake, sim.app_id, "claim", [0]):  # the first asset's only link
+        build_atc(group, sim.app_id, sim.creator, sim.signer, sim.fake.suggested_params()).execute(sim.fake, 4)
+    assert asset_ids[0] not in read_ledger(sim.fake, sim.app_id)
@@ -0,0 +1,75 @@
+import base64
+
+import msgpack
+import pytest
+from algosdk import account
+from algosdk.atomic_transaction_composer import AccountTransactionSigner
+from algosdk.error import AlgodHTTPError
+from algosdk.transaction import PaymentTxn
+
+from algod_pool import PooledAlgodClient
+from chain_indexer import load_block_fixture, transaction_id
+from conftest import ESCROW_BLOCKS
+from fake_algod import GENESIS_HASH, GENESIS_ID, FakeAlgod, serve
+
+
+@pytest.fixture
+def replayed():
+    fake = FakeAlgod()
+    for round_num, raw in load_block_fixture(ESCROW_BLOCKS):
+        fake.add_block(round_num, raw)
+    return fake
+
+
+def test_json_block_is_the_msgpack_block_in_base64(replayed):
+    raw = replayed.block_info(round_num=2, response_format="msgpack")
+    block = msgpack.unpackb(raw, raw=False, strict_map_key=False)["block"]
+    decoded = replayed.block_info(round_num=2)["block"]
+
+    assert decoded["gh"] == GENESIS_HASH
+    assert decoded["rnd"] == block["rnd"] == 2
+    first = decoded["txns"][0]["txn"]
+    assert base64.b64decode(first["snd"]) == block["txns"][0]["txn"]["snd"]
+
+
+def test_unknown_format_and_round_are_rejected(replayed):
+    with pytest.raises(AlgodHTTPError) as rejected:
+        replayed.block_info(round_num=2, response_format="xml")
+    assert rejected.value.code == 400
+    with pytest.raises(AlgodHTTPError) as missing:
+        replayed.block_info(round_num=10_000, response_format="msgpack")
+    assert missing.value.code == 404
+
+
+def test_http_blocks_honor_the_format_parameter(replayed):
+    server, url = serve(replayed)
+    try:
+        client = PooledAlgodClient("", url)
+        assert client.block_info(round_num=3)["block"]["rnd"] == 3
+        raw = client.block_info(round_num=3, response_format="msgpack")
+        assert raw == replayed.block_info(round_num=3, response_format="msgpack")
+    finally:
+        server.shutdown()
+
+
+def test_kept_blocks_strip_genesis_fields_and_keep_txids():
+    fake = FakeAlgod(keep_blocks=True, clock=lambda: 1_700_000_000)
+    private_key, sender = account.generate_account()
+    txn = PaymentTxn(sender, fake.suggested_params(), sender, 1)
+    tx_id = fake.send_transactions([AccountTransactionSigner(private_key).sign_transactions([txn], [0])[0]])
+    round_num = fake.status_after_block(fake.current_round)["last-round"]
+
+    block = msgpack.unpackb(fake.block_info(round_num=round_num, response_format="msgpack"), raw=False)["block"]
+    assert block["ts"] == 1_700_000_000 and block["gen"] == GENESIS_ID
+    (stxn,) = block["txns"]
+    assert "gh" not in stxn["txn"] and "gen" not in stxn["txn"] and stxn["hgi"]
+    assert transaction_id(stxn["txn"], block, stxn["hgi"]) == tx_id
+
+
+def test_fixture_matches_a_fresh_recording(tmp_path):
+    from make_escrow_blocks import record_session
+
+    path = tmp_path / "escrow_blocks.bin"
+    record_session(str(path))
+    with open(ESCROW_BLOCKS, "rb") as committed:
+        assert path.read_bytes() == committed.read()
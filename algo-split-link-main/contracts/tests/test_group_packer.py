@@ -0,0 +1,91 @@
+import json
+
+import pytest
+from algosdk import account, encoding
+
+from batch_claim_links import ZERO_ADDRESS, ClaimEntry, plan_groups
+from box_codec import ZERO_ADDRESS_BYTES, ClaimRecord
+from group_packer import (
+    APP_CALL_BUDGET,
+    BUDGET_MARGIN,
+    DEFAULT_COSTS,
+    MAX_GROUP_SIZE,
+    MIN_FEE,
+    PackedCall,
+    claim_batch_calls,
+    link_call,
+    load_costs,
+    pack_calls,
+)
+
+SENDER = encoding.decode_address(account.generate_account()[1])
+
+
+def _record(asset_id: int = 0) -> ClaimRecord:
+    return ClaimRecord(SENDER, ZERO_ADDRESS_BYTES, 100_000, asset_id, 0, 0, 0, 0xFFFF)
+
+
+def _assert_within_limits(group):
+    assert group.txn_count <= MAX_GROUP_SIZE
+    assert group.box_ref_count + len(group.accounts) + len(group.assets) <= 8 * group.txn_count
+    assert sum(call.budget for call in group.calls) * BUDGET_MARGIN <= APP_CALL_BUDGET * group.txn_count
+
+
+def test_claims_pack_in_order_within_group_limits():
+    calls = [link_call("claim", claim_id, _record(), {}) for claim_id in range(40)]
+    groups = pack_calls(calls)
+
+    assert [call.args[0] for group in groups for call in group.calls] == list(range(40))
+    for group in groups:
+        _assert_within_limits(group)
+        assert group.fee() == MIN_FEE * (group.txn_count + group.inner_txns)
+    assert len(groups) < len(calls)
+
+
+def test_call_over_the_group_budget_is_rejected():
+    call = PackedCall("claim", [0], APP_CALL_BUDGET * MAX_GROUP_SIZE, 1)
+    with pytest.raises(ValueError):
+        pack_calls([call])
+
+
+def test_claim_batch_merges_payouts_per_asset():
+    links = [(claim_id, _record(asset_id=claim_id % 2 * 31566704)) for claim_id in range(30)]
+    calls = claim_batch_calls(links, {})
+
+    claimed = [claim_id for call in calls for claim_id in call.args[0]]
+    assert sorted(claimed) == list(range(30))
+    for call in calls:
+        assets = {claim_id % 2 for claim_id in call.args[0]}
+        assert call.inner_txns == len(assets)
+        assert call.budget == DEFAULT_COSTS["claim"].budget * len(call.args[0])
+    for group in pack_calls(calls):
+        _assert_within_limits(group)
+
+
+def test_batch_creation_plans_budget_for_every_link():
+    _, receiver = account.generate_account()
+    entries = [ClaimEntry(ZERO_ADDRESS if i % 3 else receiver, 100_000) for i in range(200)]
+    link_budget = DEFAULT_COSTS["create_claim_links_batch"].budget
+    groups = plan_groups(entries, encoding.encode_address(SENDER), link_budget=link_budget)
+
+    assert sum(group.claims for group in groups) == len(entries)
+    for group in groups:
+        batches, refs = len(group.batches), group.ref_count
+        calls = group.call_count(batches, refs, group.claims)
+        assert group.txn_count(batches, refs, group.claims) <= MAX_GROUP_SIZE
+        assert group.claims * link_budget * BUDGET_MARGIN <= APP_CALL_BUDGET * calls
+
+
+def test_costs_come_from_the_baseline_per_link(tmp_path):
+    path = tmp_path / "cost_baseline.json"
+    path.write_text(json.dumps({
+        "EscrowClaimLink.claim": {"opcode_budget": 512, "inner_txns": 1},
+        "EscrowClaimLink.sweep_expired[8]": {"opcode_budget": 2001, "inner_txns": 1},
+    }))
+    costs = load_costs(path)
+
+    assert costs["claim"].budget == 512
+    assert costs["sweep_expired"].budget == 251
+    assert costs["sweep_expired"].inner_txns == DEFAULT_COSTS["sweep_expired"].inner_txns
+    assert costs["cancel"] == DEFAULT_COSTS["cancel"]
+    assert load_costs(tmp_path / "missing.json") == DEFAULT_COSTS
@@ -0,0 +1,84 @@
+import pytest
+from algosdk import account, encoding
+
+from group_packer import APP_CALL_BUDGET
+from merkle_airdrop import (
+    EMPTY_NODE,
+    AirdropLeaf,
+    MerkleTree,
+    budget_calls,
+    build_airdrop,
+    claim_cost,
+    compute_root,
+    leaf_hash,
+    load_claims,
+    verify_airdrop,
+    verify_proof,
+)
+
+
+@pytest.fixture(scope="module")
+def leaves():
+    return [AirdropLeaf(account.generate_account()[1], 1_000 * (i + 1)) for i in range(5)]
+
+
+def _tree(leaves):
+    keys = [encoding.decode_address(leaf.receiver) for leaf in leaves]
+    return keys, MerkleTree([leaf_hash(i, key, leaf.amount) for i, (key, leaf) in enumerate(zip(keys, leaves))])
+
+
+def test_every_leaf_of_a_padded_tree_verifies(leaves):
+    keys, tree = _tree(leaves)
+
+    assert tree.depth == 3
+    assert tree.levels[0][-1] == EMPTY_NODE
+    for index, (key, leaf) in enumerate(zip(keys, leaves)):
+        proof = tree.proof(index)
+        assert len(proof) == tree.depth
+        assert verify_proof(tree.root, index, key, leaf.amount, proof)
+
+
+def test_proof_binds_index_receiver_and_amount(leaves):
+    keys, tree = _tree(leaves)
+    proof = tree.proof(2)
+
+    assert not verify_proof(tree.root, 2, keys[2], leaves[2].amount + 1, proof)
+    assert not verify_proof(tree.root, 2, keys[3], leaves[2].amount, proof)
+    assert not verify_proof(tree.root, 3, keys[2], leaves[2].amount, proof)
+
+
+def test_short_proof_is_rejected(leaves):
+    keys, tree = _tree(leaves)
+
+    # Leaf 4 needs all three levels; two siblings leave position 1 unconsumed
+    with pytest.raises(ValueError):
+        compute_root(4, keys[4], leaves[4].amount, tree.proof(4)[:2])
+    assert not verify_proof(tree.root, 4, keys[4], leaves[4].amount, tree.proof(4)[:2])
+
+
+def test_single_leaf_tree_needs_no_proof(leaves):
+    keys, tree = _tree(leaves[:1])
+    assert tree.depth == 0
+    assert verify_proof(tree.root, 0, keys[0], leaves[0].amount, [])
+    with pytest.raises(IndexError):
+        tree.proof(1)
+
+
+@pytest.mark.parametrize("depth", [0, 4, 8, 20])
+def test_budget_calls_cover_the_claim(depth):
+    pooled = APP_CALL_BUDGET * (1 + budget_calls(depth))
+    assert claim_cost(depth) <= pooled < claim_cost(depth) + APP_CALL_BUDGET
+
+
+def test_built_airdrop_verifies_and_serves_claims(leaves, tmp_path):
+    manifest = build_airdrop(leaves, str(tmp_path), shard_size=2)
+
+    assert manifest["shard_count"] == 3
+    assert manifest["total"] == sum(leaf.amount for leaf in leaves)
+    assert verify_airdrop(str(tmp_path), max_workers=1) == []
+
+    root = bytes.fromhex(manifest["root"])
+    for index, leaf in enumerate(leaves):
+        ((claim_index, amount, proof),) = load_claims(str(tmp_path), leaf.receiver)
+        assert (claim_index, amount) == (index, leaf.amount)
+        assert verify_proof(root, index, encoding.decode_address(leaf.receiver), amount, proof)
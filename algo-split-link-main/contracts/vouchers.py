@@ -0,0 +1,586 @@
+"""
+Signed offline claim vouchers for the escrow claim link app
+Mints, serializes and verifies vouchers in bulk and drives the voucher
+book calls of EscrowClaimLink (create_voucher_book, redeem_voucher,
+close_voucher_book). Issuing a voucher costs nothing on chain; redeeming
+it sets one bit in the book's spent-nonce bitmap.
+
+Signatures match EscrowClaimLink.redeem_voucher (ed25519verify_bare over):
+    "ASV1" || itob(app_id) || itob(book_id) || itob(nonce) || receiver || itob(amount) || itob(expiry_time)
+The prefix keeps voucher messages apart from transactions and other
+Algorand signing domains, so the sender's own account key can sign them.
+
+Bulk minting and verification pack each chunk's messages into one buffer
+with a single struct layout and process chunks in parallel. PyNaCl has no
+batch verification, so every signature is still checked on its own.
+
+Voucher code: URL-safe base64 (unpadded) of the 136-byte record
+    app_id (8) + book_id (8) + nonce (8) + receiver (32) + amount (8) + expiry_time (8) + signature (64)
+Voucher file (.vch): "AVCH" + version (2) + count (8) + signer key (32), then the records
+
+Usage:
+    python vouchers.py book <amount> --nonces N [--expiry T]
+    python vouchers.py mint <recipients.csv> <out.vch> --book ID [--first-nonce N] [--expiry T]
+    python vouchers.py verify <file.vch>
+    python vouchers.py redeem <code>...
+    python vouchers.py close --book ID
+    (chain commands read ALGOD_URL, ALGOD_TOKEN, CLAIM_APP_ID, DEPLOYER_MNEMONIC, CLAIM_ASSET_ID;
+     VOUCHER_SIGNER_MNEMONIC, if set, is the signer key instead of the deployer's)
+"""
+import argparse
+import base64
+import csv
+import os
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from algosdk import encoding
+
+from box_codec import (
+    AIRDROP_PAGE_LEAVES,
+    AIRDROP_PAGE_SIZE,
+    ASSET_REGISTRY_SIZE,
+    VOUCHER_BOOK_SIZE,
+    VOUCHER_PAGE_MIN_BALANCE,
+    VoucherBook,
+    airdrop_page_count,
+    asset_registry_name,
+    box_io_refs,
+    decode_voucher_book,
+    voucher_book_name,
+    voucher_page_name,
+)
+
+VOUCHER_PREFIX = b"ASV1"
+VOUCHER_MESSAGE = struct.Struct(">4sQQQ32sQQ")
+VOUCHER_RECORD = struct.Struct(">QQQ32sQQ64s")
+VOUCHER_RECORD_SIZE = VOUCHER_RECORD.size
+
+FILE_MAGIC = b"AVCH"
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct("<4sHQ32s")
+
+# Vouchers per chunk handed to a worker process; smaller inputs run inline
+DEFAULT_CHUNK_SIZE = 4096
+
+# ed25519verify_bare costs 1900 of the group's pooled 700 per app call
+REDEEM_BUDGET_CALLS = 3
+
+CREATE_METHOD_SIGNATURE = "create_voucher_book(txn,address,uint64,uint64,pay)uint64"
+REDEEM_METHOD_SIGNATURE = "redeem_voucher(uint64,uint64,account,uint64,uint64,byte[64])bool"
+CLOSE_METHOD_SIGNATURE = "close_voucher_book(uint64)uint64"
+PURGE_METHOD_SIGNATURE = "purge_voucher_pages(uint64,uint64)uint64"
+
+# Pages released per purge call (one box reference each, besides the book's)
+PURGE_PAGES_PER_CALL = 7
+
+
+@dataclass(frozen=True)
+class VoucherEntry:
+    """One voucher to mint"""
+    receiver: str  # ZERO_ADDRESS for whoever redeems it
+    amount: int
+    expiry_time: int = 0
+
+
+class Voucher(NamedTuple):
+    """A signed voucher; receiver is a raw 32-byte public key"""
+    app_id: int
+    book_id: int
+    nonce: int
+    receiver: bytes
+    amount: int
+    expiry_time: int
+    signature: bytes
+
+    @property
+    def message(self) -> bytes:
+        return voucher_message(self.app_id, self.book_id, self.nonce, self.receiver, self.amount, self.expiry_time)
+
+
+def voucher_message(app_id: int, book_id: int, nonce: int, receiver: bytes, amount: int, expiry_time: int) -> bytes:
+    """Bytes the book's signer signs for one voucher"""
+    return VOUCHER_MESSAGE.pack(VOUCHER_PREFIX, app_id, book_id, nonce, receiver, amount, expiry_time)
+
+
+def encode_voucher(voucher: Voucher) -> bytes:
+    return VOUCHER_RECORD.pack(*voucher)
+
+
+def decode_voucher(data: bytes) -> Voucher:
+    """Decode a binary voucher record
+
+    Raises:
+        ValueError: If the value is not a VOUCHER_RECORD_SIZE byte record
+    """
+    if len(data) != VOUCHER_RECORD_SIZE:
+        raise ValueError(f"Voucher must be {VOUCHER_RECORD_SIZE} bytes, got {len(data)}")
+    return Voucher(*VOUCHER_RECORD.unpack(data))
+
+
+def voucher_code(voucher: Voucher) -> str:
+    """Compact text form of a voucher, for links and QR codes"""
+    return base64.urlsafe_b64encode(encode_voucher(voucher)).rstrip(b"=").decode()
+
+
+def parse_voucher_code(code: str) -> Voucher:
+    code = code.strip()
+    return decode_voucher(base64.urlsafe_b64decode(code + "=" * (-len(code) % 4)))
+
+
+def load_entries(path: str) -> Iterable[VoucherEntry]:
+    """Load entries from a CSV with receiver and amount (and optional expiry_time) columns"""
+    with open(path, newline="", encoding="utf-8") as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            receiver = (row.get("receiver") or "").strip()
+            amount = int(row["amount"])
+            if not encoding.is_valid_address(receiver):
+                raise ValueError(f"{path}:{line}: invalid receiver {receiver!r}")
+            if amount <= 0:
+                raise ValueError(f"{path}:{line}: amount must be greater than 0")
+            yield VoucherEntry(receiver, amount, int(row.get("expiry_time") or 0))
+
+
+# -- bulk signing and verification ---------------------------------------
+
+
+def _sign_chunk(seed: bytes, app_id: int, book_id: int, rows: Sequence[Tuple[int, bytes, int, int]]) -> bytes:
+    """Sign (nonce, receiver, amount, expiry_time) rows; returns their packed records"""
+    from nacl.signing import SigningKey
+
+    key = SigningKey(seed)
+    size = VOUCHER_MESSAGE.size
+    messages = bytearray(size * len(rows))
+    for position, (nonce, receiver, amount, expiry_time) in enumerate(rows):
+        VOUCHER_MESSAGE.pack_into(
+            messages, position * size, VOUCHER_PREFIX, app_id, book_id, nonce, receiver, amount, expiry_time
+        )
+
+    view = memoryview(messages)
+    records = bytearray(VOUCHER_RECORD_SIZE * len(rows))
+    for position, (nonce, receiver, amount, expiry_time) in enumerate(rows):
+        signature = key.sign(bytes(view[position * size:(position + 1) * size])).signature
+        VOUCHER_RECORD.pack_into(
+            records, position * VOUCHER_RECORD_SIZE, app_id, book_id, nonce, receiver, amount, expiry_time, signature
+        )
+    return bytes(records)
+
+
+def _verify_chunk(signer: bytes, records: bytes) -> List[int]:
+    """Positions of the records in a packed chunk whose signature is invalid"""
+    from nacl.exceptions import BadSignatureError
+    from nacl.signing import VerifyKey
+
+    key = VerifyKey(signer)
+    invalid = []
+    for position, fields in enumerate(VOUCHER_RECORD.iter_unpack(records)):
+        app_id, book_id, nonce, receiver, amount, expiry_time, signature = fields
+        try:
+            key.verify(voucher_message(app_id, book_id, nonce, receiver, amount, expiry_time), signature)
+        except BadSignatureError:
+            invalid.append(position)
+    return invalid
+
+
+def _chunks(count: int, chunk_size: int) -> List[Tuple[int, int]]:
+    return [(start, min(start + chunk_size, count)) for start in range(0, count, chunk_size)]
+
+
+def mint_vouchers(
+    private_key: str,
+    app_id: int,
+    book_id: int,
+    entries: Sequence[VoucherEntry],
+    first_nonce: int = 0,
+    max_workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> List[Voucher]:
+    """Sign one voucher per entry, with nonces first_nonce, first_nonce + 1, ...
+
+    Args:
+        private_key: algosdk private key (base64) of the book's signer
+
+    Returns:
+        The vouchers, in entry order
+    """
+    seed = base64.b64decode(private_key)[:32]
+    rows = [
+        (first_nonce + offset, encoding.decode_address(entry.receiver), entry.amount, entry.expiry_time)
+        for offset, entry in enumerate(entries)
+    ]
+    chunks = _chunks(len(rows), chunk_size)
+    if len(chunks) <= 1:
+        packed = [_sign_chunk(seed, app_id, book_id, rows)]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            packed = list(pool.map(
+                _sign_chunk,
+                [seed] * len(chunks),
+                [app_id] * len(chunks),
+                [book_id] * len(chunks),
+                [rows[start:end] for start, end in chunks],
+            ))
+    return [Voucher(*fields) for chunk in packed for fields in VOUCHER_RECORD.iter_unpack(chunk)]
+
+
+def verify_vouchers(
+    vouchers: Sequence[Voucher],
+    signer: bytes,
+    book_total: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> List[str]:
+    """Check every signature against the signer key, and that nonces are unique
+
+    With book_total, also checks that the vouchers together do not exceed
+    what the book holds; redemptions past that fail as "Voucher book exhausted".
+
+    Returns:
+        Problems found (empty if every voucher is redeemable)
+    """
+    problems: List[str] = []
+    packed = b"".join(encode_voucher(voucher) for voucher in vouchers)
+    chunks = _chunks(len(vouchers), chunk_size)
+    slices = [packed[start * VOUCHER_RECORD_SIZE:end * VOUCHER_RECORD_SIZE] for start, end in chunks]
+    if len(chunks) <= 1:
+        results = [_verify_chunk(signer, chunk) for chunk in slices]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_verify_chunk, [signer] * len(chunks), slices))
+    for (start, _end), invalid in zip(chunks, results):
+        for position in invalid:
+            voucher = vouchers[start + position]
+            problems.append(f"Invalid signature on voucher {voucher.book_id}/{voucher.nonce}")
+
+    seen = set()
+    for voucher in vouchers:
+        key = (voucher.app_id, voucher.book_id, voucher.nonce)
+        if key in seen:
+            problems.append(f"Nonce {voucher.nonce} of book {voucher.book_id} used twice")
+        seen.add(key)
+
+    if book_total is not None:
+        total = sum(voucher.amount for voucher in vouchers)
+        if total > book_total:
+            problems.append(f"Vouchers add up to {total}, the book holds {book_total}")
+    return problems
+
+
+def write_vouchers(path: str, signer: bytes, vouchers: Sequence[Voucher]) -> None:
+    with open(path, "wb") as f:
+        f.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, len(vouchers), signer))
+        for voucher in vouchers:
+            f.write(encode_voucher(voucher))
+
+
+def read_vouchers(path: str) -> Tuple[bytes, List[Voucher]]:
+    """Signer key and vouchers of a .vch file
+
+    Raises:
+        ValueError: If the file is not a voucher file of this version
+    """
+    with open(path, "rb") as f:
+        magic, version, count, signer = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+        if magic != FILE_MAGIC or version != FILE_VERSION:
+            raise ValueError(f"{path} is not a version {FILE_VERSION} voucher file")
+        data = f.read(count * VOUCHER_RECORD_SIZE)
+    if len(data) != count * VOUCHER_RECORD_SIZE:
+        raise ValueError(f"{path} is truncated")
+    return signer, [Voucher(*fields) for fields in VOUCHER_RECORD.iter_unpack(data)]
+
+
+# -- chain calls ----------------------------------------------------------
+
+
+def read_voucher_book_count(algod_client, app_id: int) -> int:
+    """Read the voucher_book_count global from the escrow application"""
+    app_info = algod_client.application_info(app_id)
+    for item in app_info["params"].get("global-state", []):
+        if base64.b64decode(item["key"]) == b"voucher_book_count":
+            return item["value"]["uint"]
+    return 0
+
+
+def read_voucher_book(algod_client, app_id: int, book_id: int) -> Optional[VoucherBook]:
+    """Read a voucher book, or None once it has been purged"""
+    from algosdk.error import AlgodHTTPError
+
+    try:
+        response = algod_client.application_box_by_name(app_id, voucher_book_name(book_id))
+    except AlgodHTTPError as e:
+        if e.code == 404:
+            return None
+        raise
+    return decode_voucher_book(base64.b64decode(response["value"]))
+
+
+def create_voucher_book(
+    algod_client,
+    app_id: int,
+    sender: str,
+    signer,
+    amount: int,
+    signer_address: str,
+    nonce_count: int,
+    asset_id: int = 0,
+    expiry_time: int = 0,
+) -> int:
+    """Fund a voucher book for nonces 0 to nonce_count - 1, signed by signer_address's key
+
+    The vbk_<id> box reference names the next book ID, predicted from the
+    app's voucher_book_count; a concurrent creator makes the group fail and
+    it can be retried. A second payment prepays the minimum balance of the
+    range's bitmap pages, which close_voucher_book gets back.
+
+    Returns:
+        Voucher book ID
+    """
+    atc = create_voucher_book_atc(
+        algod_client, app_id, sender, signer, amount, signer_address, nonce_count, asset_id, expiry_time
+    )
+    return atc.execute(algod_client, 4).abi_results[0].return_value
+
+
+def create_voucher_book_atc(
+    algod_client,
+    app_id: int,
+    sender: str,
+    signer,
+    amount: int,
+    signer_address: str,
+    nonce_count: int,
+    asset_id: int = 0,
+    expiry_time: int = 0,
+):
+    """AtomicTransactionComposer of create_voucher_book: the funding, the call and its page payment"""
+    from algosdk import abi, logic
+    from algosdk.atomic_transaction_composer import AtomicTransactionComposer, TransactionWithSigner
+    from algosdk.transaction import AssetTransferTxn, PaymentTxn
+
+    params = algod_client.suggested_params()
+    app_address = logic.get_application_address(app_id)
+    if asset_id == 0:
+        funding = PaymentTxn(sender, params, app_address, amount)
+    else:
+        funding = AssetTransferTxn(sender, params, app_address, amount, asset_id)
+
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=app_id,
+        method=abi.Method.from_signature(CREATE_METHOD_SIGNATURE),
+        sender=sender,
+        sp=params,
+        signer=signer,
+        method_args=[
+            TransactionWithSigner(funding, signer),
+            signer_address,
+            expiry_time,
+            nonce_count,
+            TransactionWithSigner(
+                PaymentTxn(sender, params, app_address, airdrop_page_count(nonce_count) * VOUCHER_PAGE_MIN_BALANCE),
+                signer,
+            ),
+        ],
+        boxes=[
+            (0, voucher_book_name(read_voucher_book_count(algod_client, app_id))),
+            (0, asset_registry_name(asset_id)),
+        ],
+    )
+    return atc
+
+
+def _refund_params(params):
+    """Params with a flat fee covering the call and one inner transfer"""
+    import copy
+
+    call_params = copy.copy(params)
+    call_params.flat_fee = True
+    call_params.fee = max(params.min_fee, 1000) * 2
+    return call_params
+
+
+def redeem_atc(params, voucher: Voucher, caller: str, signer, asset_id: int = 0):
+    """AtomicTransactionComposer redeeming one voucher, padded for opcode budget
+
+    Any account can be the caller; it pays the fees, and receives the
+    payout only if the voucher has no receiver.
+    """
+    from algosdk import abi
+    from algosdk.atomic_transaction_composer import AtomicTransactionComposer, TransactionWithSigner
+    from algosdk.transaction import ApplicationNoOpTxn
+
+    boxes = [
+        (0, voucher_book_name(voucher.book_id)),
+        (0, voucher_page_name(voucher.book_id, voucher.nonce // AIRDROP_PAGE_LEAVES)),
+        (0, asset_registry_name(asset_id)),
+    ]
+    boxes += [(0, b"")] * (box_io_refs(VOUCHER_BOOK_SIZE + AIRDROP_PAGE_SIZE + ASSET_REGISTRY_SIZE) - len(boxes))
+
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=voucher.app_id,
+        method=abi.Method.from_signature(REDEEM_METHOD_SIGNATURE),
+        sender=caller,
+        sp=_refund_params(params),  # one inner transfer, covered by the outer call's fee
+        signer=signer,
+        method_args=[
+            voucher.book_id,
+            voucher.nonce,
+            encoding.encode_address(voucher.receiver),
+            voucher.amount,
+            voucher.expiry_time,
+            voucher.signature,
+        ],
+        foreign_assets=[asset_id] if asset_id else None,
+        boxes=boxes,
+    )
+    # Each bare no-op call adds 700 to the group's pooled budget
+    for _ in range(REDEEM_BUDGET_CALLS):
+        atc.add_transaction(TransactionWithSigner(ApplicationNoOpTxn(caller, params, voucher.app_id), signer))
+    return atc
+
+
+def close_voucher_book(algod_client, app_id: int, book_id: int, sender: str, signer, asset_id: int = 0) -> int:
+    """Refund the unredeemed remainder, then purge every bitmap page and get
+    their minimum balance back
+
+    Returns:
+        Refunded amount
+    """
+    params = algod_client.suggested_params()
+    atc = close_atc(params, app_id, book_id, sender, signer, asset_id)
+    refunded = atc.execute(algod_client, 4).abi_results[0].return_value
+
+    # Pages are released from the top down; each purge refunds its pages in one transfer
+    book = read_voucher_book(algod_client, app_id, book_id)
+    pages = book.pages if book is not None else 0
+    while pages:
+        chunk = range(max(pages - PURGE_PAGES_PER_CALL, 0), pages)
+        purge_pages_atc(params, app_id, book_id, chunk, sender, signer).execute(algod_client, 4)
+        pages = chunk.start
+
+    return refunded
+
+
+def close_atc(params, app_id: int, book_id: int, sender: str, signer, asset_id: int = 0):
+    """AtomicTransactionComposer of close_voucher_book"""
+    from algosdk import abi
+    from algosdk.atomic_transaction_composer import AtomicTransactionComposer
+
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=app_id,
+        method=abi.Method.from_signature(CLOSE_METHOD_SIGNATURE),
+        sender=sender,
+        sp=_refund_params(params),
+        signer=signer,
+        method_args=[book_id],
+        foreign_assets=[asset_id] if asset_id else None,
+        boxes=[(0, voucher_book_name(book_id)), (0, asset_registry_name(asset_id))],
+    )
+    return atc
+
+
+def purge_pages_atc(params, app_id: int, book_id: int, pages: range, sender: str, signer):
+    """AtomicTransactionComposer of purge_voucher_pages for the top `pages` of a closed book"""
+    from algosdk import abi
+    from algosdk.atomic_transaction_composer import AtomicTransactionComposer
+
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(
+        app_id=app_id,
+        method=abi.Method.from_signature(PURGE_METHOD_SIGNATURE),
+        sender=sender,
+        sp=_refund_params(params),
+        signer=signer,
+        method_args=[book_id, len(pages)],
+        boxes=[(0, voucher_book_name(book_id))] + [(0, voucher_page_name(book_id, page)) for page in pages],
+    )
+    return atc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mint, verify and redeem signed claim vouchers")
+    commands = parser.add_subparsers(dest="command", required=True)
+    book = commands.add_parser("book", help="Fund a voucher book on chain")
+    book.add_argument("amount", type=int)
+    book.add_argument("--nonces", type=int, required=True, help="Vouchers the book can issue")
+    book.add_argument("--expiry", type=int, default=0)
+    mint = commands.add_parser("mint", help="Sign one voucher per CSV row")
+    mint.add_argument("recipients")
+    mint.add_argument("out")
+    mint.add_argument("--book", type=int, required=True)
+    mint.add_argument("--first-nonce", type=int, default=0)
+    mint.add_argument("--expiry", type=int, default=0, help="Expiry for rows without expiry_time")
+    commands.add_parser("verify", help="Verify a voucher file offline").add_argument("file")
+    commands.add_parser("redeem", help="Redeem voucher codes").add_argument("codes", nargs="+")
+    close = commands.add_parser("close", help="Refund the remainder and free the bitmap")
+    close.add_argument("--book", type=int, required=True)
+    args = parser.parse_args()
+
+    if args.command == "verify":
+        signer_key, vouchers = read_vouchers(args.file)
+        problems = verify_vouchers(vouchers, signer_key)
+        for problem in problems:
+            print(f"❌ {problem}")
+        if not problems:
+            total = sum(voucher.amount for voucher in vouchers)
+            print(f"✅ {len(vouchers)} voucher(s) worth {total} signed by {encoding.encode_address(signer_key)}")
+        return not problems
+
+    from algosdk import account, mnemonic as mn
+
+    private_key = mn.to_private_key(os.environ["DEPLOYER_MNEMONIC"])
+    address = account.address_from_private_key(private_key)
+    signer_key = private_key
+    if os.environ.get("VOUCHER_SIGNER_MNEMONIC"):
+        signer_key = mn.to_private_key(os.environ["VOUCHER_SIGNER_MNEMONIC"])
+    app_id = int(os.environ["CLAIM_APP_ID"])
+
+    if args.command == "mint":
+        entries = [
+            entry if entry.expiry_time else VoucherEntry(entry.receiver, entry.amount, args.expiry)
+            for entry in load_entries(args.recipients)
+        ]
+        vouchers = mint_vouchers(signer_key, app_id, args.book, entries, args.first_nonce)
+        signer_public = encoding.decode_address(account.address_from_private_key(signer_key))
+        write_vouchers(args.out, signer_public, vouchers)
+        print(f"✅ {len(vouchers)} voucher(s) worth {sum(entry.amount for entry in entries)} written to {args.out}")
+        print(f"📝 Next free nonce of book {args.book}: {args.first_nonce + len(vouchers)}")
+        return True
+
+    from algosdk.atomic_transaction_composer import AccountTransactionSigner
+    from algod_pool import client_from_env
+
+    signer = AccountTransactionSigner(private_key)
+    asset_id = int(os.environ.get("CLAIM_ASSET_ID", "0"))
+    algod_client = client_from_env()
+
+    if args.command == "book":
+        signer_address = account.address_from_private_key(signer_key)
+        book_id = create_voucher_book(
+            algod_client, app_id, address, signer, args.amount, signer_address, args.nonces, asset_id, args.expiry
+        )
+        print(f"✅ Voucher book {book_id} funded with {args.amount} for {args.nonces} voucher(s)")
+        print(f"📝 Signed by {signer_address}")
+        return True
+
+    if args.command == "redeem":
+        params = algod_client.suggested_params()
+        for code in args.codes:
+            voucher = parse_voucher_code(code)
+            redeem_atc(params, voucher, address, signer, asset_id).execute(algod_client, 4)
+            print(f"✅ Redeemed voucher {voucher.book_id}/{voucher.nonce}: {voucher.amount}")
+        return True
+
+    refunded = close_voucher_book(algod_client, app_id, args.book, address, signer, asset_id)
+    print(f"✅ Voucher book {args.book} closed, {refunded} refunded")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
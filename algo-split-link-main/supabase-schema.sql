@@ -88,3 +88,60 @@ CREATE INDEX IF NOT EXISTS idx_claim_links_sender ON claim_links(sender_address)
 -- Create an index on claimed_by for filtering
 CREATE INDEX IF NOT EXISTS idx_claim_links_claimed_by ON claim_links(claimed_by);
 
+
+-- On-chain identity columns maintained by contracts/chain_indexer.py
+ALTER TABLE claim_links ADD COLUMN IF NOT EXISTS chain_claim_id BIGINT;
+ALTER TABLE claim_links ADD COLUMN IF NOT EXISTS asset_id BIGINT NOT NULL DEFAULT 0;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_claim_links_chain_id ON claim_links(contract_app_id, chain_claim_id);
+
+ALTER TABLE payments ADD COLUMN IF NOT EXISTS chain_payment_id NUMERIC;
+CREATE INDEX IF NOT EXISTS idx_payments_chain_id ON payments(contract_app_id, chain_payment_id);
+
+-- Airdrop leaves claimed on chain, maintained by contracts/chain_indexer.py
+CREATE TABLE IF NOT EXISTS airdrop_claims (
+  contract_app_id INTEGER NOT NULL,
+  airdrop_id BIGINT NOT NULL,
+  leaf_index BIGINT NOT NULL,
+  claimed_by TEXT NOT NULL,
+  amount NUMERIC NOT NULL,
+  currency TEXT NOT NULL DEFAULT 'ALGO',
+  asset_id BIGINT NOT NULL DEFAULT 0,
+  claimed_at TIMESTAMP WITH TIME ZONE,
+  claim_tx_hash TEXT,
+  PRIMARY KEY (contract_app_id, airdrop_id, leaf_index)
+);
+
+ALTER TABLE airdrop_claims ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Anyone can read airdrop claims" ON airdrop_claims
+  FOR SELECT USING (true);
+
+CREATE INDEX IF NOT EXISTS idx_airdrop_claims_claimed_by ON airdrop_claims(claimed_by);
+
+-- Vouchers redeemed on chain, maintained by contracts/chain_indexer.py
+CREATE TABLE IF NOT EXISTS voucher_redemptions (
+  contract_app_id INTEGER NOT NULL,
+  book_id BIGINT NOT NULL,
+  nonce BIGINT NOT NULL,
+  redeemed_by TEXT NOT NULL,
+  amount NUMERIC NOT NULL,
+  currency TEXT NOT NULL DEFAULT 'ALGO',
+  asset_id BIGINT NOT NULL DEFAULT 0,
+  redeemed_at TIMESTAMP WITH TIME ZONE,
+  redeem_tx_hash TEXT,
+  PRIMARY KEY (contract_app_id, book_id, nonce)
+);
+
+ALTER TABLE voucher_redemptions ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Anyone can read voucher redemptions" ON voucher_redemptions
+  FOR SELECT USING (true);
+
+CREATE INDEX IF NOT EXISTS idx_voucher_redemptions_redeemed_by ON voucher_redemptions(redeemed_by);
+
+-- Round checkpoint of the chain indexer (one row per indexer name)
+CREATE TABLE IF NOT EXISTS indexer_checkpoints (
+  name TEXT PRIMARY KEY,
+  round BIGINT NOT NULL,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);